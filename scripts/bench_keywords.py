@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+关键词引擎基准测试
+
+对比 Aho-Corasick 自动机与逐条 `keyword in text` 检查的编译耗时与匹配吞吐:
+
+    uv run scripts/bench_keywords.py --rules 10000 --messages 20000
+"""
+
+import argparse
+import random
+import string
+import time
+
+from aivk_qq.bot.keywords import KeywordEngine
+
+_ALPHABET = string.ascii_lowercase + "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年"
+
+
+def _word(rng: random.Random, low: int, high: int) -> str:
+    return "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(low, high)))
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    keywords = list({_word(rng, 3, 8) for _ in range(args.rules)})
+    rules = [{"keyword": keyword, "action": "recall"} for keyword in keywords]
+    messages = [_word(rng, 10, args.length) for _ in range(args.messages)]
+    # 保证有一定比例的命中
+    for index in range(0, len(messages), 10):
+        messages[index] += rng.choice(keywords)
+
+    started = time.perf_counter()
+    engine = KeywordEngine(rules)
+    build = time.perf_counter() - started
+    print(f"规则: {len(rules)}  自动机状态: {engine.stats()['states']}  编译: {build * 1000:.1f}ms")
+
+    started = time.perf_counter()
+    hits = sum(1 for message in messages if engine.match(message))
+    elapsed = time.perf_counter() - started
+    print(f"自动机: {len(messages)} 条消息 {elapsed * 1000:.1f}ms  {len(messages) / elapsed:,.0f} msg/s  命中 {hits}")
+
+    sample = messages[: args.naive_messages]
+    started = time.perf_counter()
+    naive_hits = sum(1 for message in sample if any(keyword in message for keyword in keywords))
+    naive = time.perf_counter() - started
+    print(f"逐条 in: {len(sample)} 条消息 {naive * 1000:.1f}ms  {len(sample) / naive:,.0f} msg/s  命中 {naive_hits}")
+    ac_hits = sum(1 for message in sample if engine.match(message))
+    assert ac_hits == naive_hits, (ac_hits, naive_hits)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AIVK-QQ 关键词引擎基准测试")
+    parser.add_argument("--rules", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--naive-messages", type=int, default=2000, help="逐条检查的消息数（较慢）")
+    parser.add_argument("--length", type=int, default=80, help="消息最大长度")
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
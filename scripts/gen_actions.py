@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+根据内置的 NapCat API 目录生成类型化的动作绑定与 MCP 工具定义。
+
+输入:  src/aivk_qq/bot/spec/napcat_actions.json
+输出:  src/aivk_qq/bot/actions.py       响应结构体 + NapcatActions 类型化异步方法
+       src/aivk_qq/mcp/action_tools.py  register_action_tools()，为每个动作注册 MCP 工具
+
+新增动作只需修改 JSON 后重新运行:
+    uv run scripts/gen_actions.py
+"""
+
+import json
+import keyword
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SPEC = ROOT / "src" / "aivk_qq" / "bot" / "spec" / "napcat_actions.json"
+ACTIONS_OUT = ROOT / "src" / "aivk_qq" / "bot" / "actions.py"
+TOOLS_OUT = ROOT / "src" / "aivk_qq" / "mcp" / "action_tools.py"
+
+HEADER = "# 此文件由 scripts/gen_actions.py 根据 bot/spec/napcat_actions.json 生成，请勿手动修改\n"
+
+# 规格类型 -> (注解, isinstance 检查的类型元组)
+TYPES: dict[str, tuple[str, str]] = {
+    "int": ("int", "int"),
+    "str": ("str", "str"),
+    "bool": ("bool", "bool"),
+    "float": ("float", "(int, float)"),
+    "id": ("int | str", "(int, str)"),
+    "message": ("Message", "(str, list)"),
+    "list": ("list[Any]", "list"),
+    "dict": ("dict[str, Any]", "dict"),
+}
+
+
+def _method_name(action: dict) -> str:
+    name = action.get("method") or action["action"]
+    if not name.isidentifier() or keyword.iskeyword(name):
+        raise SystemExit(f"动作 {action['action']} 需要在规格中提供合法的 method 名称")
+    return name
+
+
+def _arg_name(param: dict) -> str:
+    name = param["name"]
+    return f"{name}_" if keyword.iskeyword(name) or name in ("self", "account") else name
+
+
+def _annotation(param: dict) -> str:
+    annotation = TYPES[param["type"]][0]
+    if "default" in param and param["default"] is None:
+        annotation = f"{annotation} | None"
+    return annotation
+
+
+def _signature(params: list[dict]) -> list[str]:
+    parts = []
+    for param in params:
+        part = f"{_arg_name(param)}: {_annotation(param)}"
+        if "default" in param:
+            part += f" = {param['default']!r}"
+        parts.append(part)
+    return parts
+
+
+def _return_type(returns: str | None) -> str:
+    if returns is None:
+        return "Any"
+    if returns == "list":
+        return "list[Any]"
+    if returns.startswith("list[") and returns.endswith("]"):
+        return f"list[{returns[5:-1]}]"
+    return returns
+
+
+def _decode_expr(returns: str | None) -> str:
+    if returns is None:
+        return "data"
+    if returns == "list":
+        return "data if isinstance(data, list) else []"
+    if returns.startswith("list["):
+        struct = returns[5:-1]
+        return f"[{struct}.decode(item) for item in data] if isinstance(data, list) else []"
+    return f"{returns}.decode(data)"
+
+
+def generate_actions(spec: dict) -> str:
+    lines = [
+        HEADER,
+        '"""',
+        "NapCat 动作的类型化绑定",
+        "",
+        "每个方法在本地完成参数校验，调用失败（status != ok）时抛出 ActionFailed，",
+        "响应 data 解码为带 __slots__ 的结构体，结构体忽略未知字段、缺失字段为 None。",
+        '"""',
+        "",
+        "from dataclasses import dataclass",
+        "from typing import Any",
+        "",
+        "from .client import ActionCaller, ActionFailed",
+        "",
+        "Message = str | list[dict[str, Any]]",
+        "",
+        "",
+        "def _check(action: str, name: str, value: Any, types: type | tuple[type, ...], type_name: str) -> None:",
+        "    if not isinstance(value, types):",
+        "        raise TypeError(f\"{action}: 参数 {name} 应为 {type_name}，收到 {type(value).__name__}\")",
+        "",
+    ]
+
+    for struct, fields in spec["structs"].items():
+        lines += [
+            "",
+            "@dataclass(slots=True, frozen=True)",
+            f"class {struct}:",
+        ]
+        for field, kind in fields.items():
+            lines.append(f"    {field}: {TYPES[kind][0]} | None = None")
+        lines += [
+            "",
+            "    @classmethod",
+            f"    def decode(cls, data: Any) -> \"{struct}\":",
+            "        if not isinstance(data, dict):",
+            "            return cls()",
+            "        return cls(",
+        ]
+        for field in fields:
+            lines.append(f"            {field}=data.get({field!r}),")
+        lines += ["        )", ""]
+
+    lines += [
+        "",
+        "class NapcatActions:",
+        '    """',
+        "    NapCat 动作的类型化异步方法",
+        "",
+        "    Args:",
+        "        caller: 任意实现了 execute(action, params) 的动作客户端或账号",
+        '    """',
+        "",
+        "    __slots__ = (\"_caller\",)",
+        "",
+        "    def __init__(self, caller: ActionCaller) -> None:",
+        "        self._caller = caller",
+        "",
+        "    async def _call(self, action: str, params: dict[str, Any]) -> Any:",
+        "        response = await self._caller.execute(action, params)",
+        "        if response.get(\"status\") != \"ok\":",
+        "            raise ActionFailed(action, response)",
+        "        return response.get(\"data\")",
+    ]
+
+    for action in spec["actions"]:
+        method = _method_name(action)
+        params = action["params"]
+        returns = action.get("returns")
+        signature = ", ".join(["self", *_signature(params)])
+        lines += [
+            "",
+            f"    async def {method}({signature}) -> {_return_type(returns)}:",
+            f"        \"\"\"{action['category']} / {action['title']}\"\"\"",
+        ]
+        for param in params:
+            arg = _arg_name(param)
+            check_types = TYPES[param["type"]][1]
+            type_name = TYPES[param["type"]][0]
+            check = f"_check({action['action']!r}, {param['name']!r}, {arg}, {check_types}, {type_name!r})"
+            if "default" in param and param["default"] is None:
+                lines.append(f"        if {arg} is not None:")
+                lines.append(f"            {check}")
+            else:
+                lines.append(f"        {check}")
+        required = [p for p in params if not ("default" in p and p["default"] is None)]
+        optional = [p for p in params if "default" in p and p["default"] is None]
+        body = ", ".join(f"{p['name']!r}: {_arg_name(p)}" for p in required)
+        lines.append(f"        params: dict[str, Any] = {{{body}}}")
+        for param in optional:
+            lines.append(f"        if {_arg_name(param)} is not None:")
+            lines.append(f"            params[{param['name']!r}] = {_arg_name(param)}")
+        if returns is None:
+            lines.append(f"        return await self._call({action['action']!r}, params)")
+        else:
+            lines.append(f"        data = await self._call({action['action']!r}, params)")
+            lines.append(f"        return {_decode_expr(returns)}")
+
+    lines += ["", "", "ACTION_NAMES: frozenset[str] = frozenset({"]
+    lines += [f"    {action['action']!r}," for action in spec["actions"]]
+    lines += ["})", ""]
+    return "\n".join(lines)
+
+
+def generate_tools(spec: dict) -> str:
+    lines = [
+        HEADER,
+        '"""',
+        "为每个 NapCat 动作注册 MCP 工具",
+        "",
+        "工具参数与 NapcatActions 的方法签名一致，另加可选的 account（机器人QQ号）。",
+        '"""',
+        "",
+        "from collections.abc import Collection",
+        "from dataclasses import asdict, is_dataclass",
+        "from typing import Any",
+        "",
+        "from mcp.server.fastmcp import FastMCP",
+        "",
+        "from ..bot.actions import Message, NapcatActions",
+        "from .accounts import AccountPool",
+        "",
+        "",
+        "def _encode(value: Any) -> Any:",
+        "    if is_dataclass(value) and not isinstance(value, type):",
+        "        return asdict(value)",
+        "    if isinstance(value, list):",
+        "        return [_encode(item) for item in value]",
+        "    return value",
+        "",
+        "",
+        "def register_action_tools(",
+        "    mcp: FastMCP,",
+        "    accounts: AccountPool,",
+        "    categories: Collection[str] | None = None,",
+        "    exclude: Collection[str] = (),",
+        ") -> int:",
+        '    """',
+        "    注册动作工具",
+        "",
+        "    Args:",
+        "        mcp: MCP 服务器",
+        "        accounts: 账号池",
+        "        categories: 只注册这些分类（账号相关/消息相关/群聊相关/文件相关/密钥相关/个人操作/系统操作/其他），None 表示全部",
+        "        exclude: 跳过的工具名（例如服务器中已手写的工具）",
+        "",
+        "    Returns:",
+        "        int: 注册的工具数量",
+        '    """',
+        "    registered = 0",
+    ]
+    by_category: dict[str, list[dict]] = {}
+    for action in spec["actions"]:
+        by_category.setdefault(action["category"], []).append(action)
+
+    existing: set[str] = set()
+    for category, actions in by_category.items():
+        lines += ["", f"    if categories is None or {category!r} in categories:"]
+        for action in actions:
+            method = _method_name(action)
+            tool = method
+            if tool in existing:
+                continue
+            existing.add(tool)
+            params = action["params"]
+            signature = ", ".join([*_signature(params), "account: int | None = None"])
+            call_args = ", ".join(_arg_name(p) for p in params)
+            description = f"{action['title']}（{action['action']}），account 为机器人QQ号，留空使用默认账号"
+            lines += [
+                "",
+                f"        async def {method}({signature}) -> Any:",
+                f"            return _encode(await NapcatActions(accounts.get(account)).{method}({call_args}))",
+                "",
+                f"        if {tool!r} not in exclude:",
+                f"            mcp.add_tool({method}, name={tool!r}, description={description!r})",
+                "            registered += 1",
+            ]
+    lines += ["", "    return registered", ""]
+    return "\n".join(lines)
+
+
+def main() -> None:
+    spec = json.loads(SPEC.read_text(encoding="utf-8"))
+    ACTIONS_OUT.write_text(generate_actions(spec), encoding="utf-8")
+    TOOLS_OUT.write_text(generate_tools(spec), encoding="utf-8")
+    print(f"已生成 {len(spec['actions'])} 个动作:")
+    print(f"  {ACTIONS_OUT.relative_to(ROOT)}")
+    print(f"  {TOOLS_OUT.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
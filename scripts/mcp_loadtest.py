@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+MCP 服务器本地压测
+
+启动 N 个模拟 MCP 客户端（每个客户端一个独立会话），并发调用指定工具，
+统计吞吐、延迟分位数与被拒绝（服务器繁忙）的调用数。
+
+先启动服务器:
+    aivk-qq mcp -t sse -p 10141
+    aivk-qq mcp -t streamable-http -p 10141   # 需要 mcp>=1.8
+
+再运行:
+    uv run scripts/mcp_loadtest.py --clients 50 --calls 20
+    uv run scripts/mcp_loadtest.py --transport streamable-http --url http://127.0.0.1:10141/mcp
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from contextlib import AsyncExitStack
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+
+def _percentile(samples: list[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _open_session(stack: AsyncExitStack, transport: str, url: str) -> ClientSession:
+    if transport == "streamable-http":
+        from mcp.client.streamable_http import streamablehttp_client
+
+        read, write, _ = await stack.enter_async_context(streamablehttp_client(url))
+    else:
+        read, write = await stack.enter_async_context(sse_client(url))
+    session = await stack.enter_async_context(ClientSession(read, write))
+    await session.initialize()
+    return session
+
+
+async def _client(
+    index: int,
+    args: argparse.Namespace,
+    latencies: list[float],
+    errors: list[str],
+    start: asyncio.Event,
+) -> None:
+    async with AsyncExitStack() as stack:
+        try:
+            session = await _open_session(stack, args.transport, args.url)
+        except Exception as e:
+            errors.append(f"client{index}: 连接失败 {e!r}")
+            return
+        await start.wait()
+        for _ in range(args.calls):
+            started = time.perf_counter()
+            try:
+                result = await session.call_tool(args.tool, json.loads(args.arguments))
+            except Exception as e:
+                errors.append(f"client{index}: {e!r}")
+                continue
+            if result.isError:
+                errors.append(f"client{index}: {result.content}")
+                continue
+            latencies.append(time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    latencies: list[float] = []
+    errors: list[str] = []
+    start = asyncio.Event()
+
+    tasks = [asyncio.create_task(_client(i, args, latencies, errors, start)) for i in range(args.clients)]
+    # 等待所有会话建立后同时开始，避免把握手时间算进吞吐
+    await asyncio.sleep(args.warmup)
+    began = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - began
+
+    total = args.clients * args.calls
+    print(f"客户端: {args.clients}  每客户端调用: {args.calls}  工具: {args.tool}  传输: {args.transport}")
+    print(f"成功: {len(latencies)}/{total}  失败: {len(errors)}  用时: {elapsed:.2f}s")
+    if latencies:
+        print(f"吞吐: {len(latencies) / elapsed:.1f} calls/s")
+        print(
+            "延迟(ms): "
+            f"mean={statistics.fmean(latencies) * 1000:.1f} "
+            f"p50={_percentile(latencies, 50) * 1000:.1f} "
+            f"p90={_percentile(latencies, 90) * 1000:.1f} "
+            f"p99={_percentile(latencies, 99) * 1000:.1f} "
+            f"max={max(latencies) * 1000:.1f}"
+        )
+    for error in errors[:10]:
+        print(f"  {error}")
+    if len(errors) > 10:
+        print(f"  ... 另有 {len(errors) - 10} 个错误")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AIVK-QQ MCP服务器压测")
+    parser.add_argument("--url", default="http://127.0.0.1:10141/sse", help="SSE 为 /sse，streamable-http 为 /mcp")
+    parser.add_argument("--transport", choices=["sse", "streamable-http"], default="sse")
+    parser.add_argument("--clients", type=int, default=20, help="模拟的客户端（会话）数")
+    parser.add_argument("--calls", type=int, default=10, help="每个客户端的调用次数")
+    parser.add_argument("--tool", default="ping", help="调用的工具名")
+    parser.add_argument("--arguments", default="{}", help="工具参数（JSON）")
+    parser.add_argument("--warmup", type=float, default=2.0, help="等待会话建立的秒数")
+    asyncio.run(main(parser.parse_args()))
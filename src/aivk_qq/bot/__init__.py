@@ -0,0 +1,85 @@
+from .backfill import Backfill
+from .bus import EventBus, Event, Handler
+from .capture import CaptureWriter, Frame, ReplayStats, read_frames, replay
+from .client import ActionCaller, ActionError, ActionFailed, ActionNotSent, ActionQueued, HttpActionClient, WSClient, WSServer
+from .actions import NapcatActions
+from .context import ContextStore
+from .flood import FloodGuard
+from .images import ImagePipeline, OcrResult
+from .keywords import KeywordEngine, KeywordRule
+from .offload import Action, OffloadPool
+from .outbox import Outbox
+from .plugins import PluginManager
+from .runtime import Runtime
+from .scheduler import Job, JobStore, Scheduler
+from .shard import ShardRouter
+from .snapshot import Snapshotter
+from .state import (
+    MemoryBackend,
+    RedisBackend,
+    SharedTokenBucket,
+    SQLiteBackend,
+    StateBackend,
+    StateError,
+    open_backend,
+    shared_limiter,
+)
+from .stream import StreamRegistry, TextStream, stream_reply
+from .trace import Span, Trace, Tracer, span, tracer
+from .unified import UnifiedClient
+from .runner import run_bot
+
+__all__ = [
+    "Backfill",
+    "EventBus",
+    "Event",
+    "Handler",
+    "CaptureWriter",
+    "Frame",
+    "ReplayStats",
+    "read_frames",
+    "replay",
+    "ActionCaller",
+    "ActionError",
+    "ActionFailed",
+    "ActionNotSent",
+    "ActionQueued",
+    "NapcatActions",
+    "ContextStore",
+    "FloodGuard",
+    "ImagePipeline",
+    "OcrResult",
+    "KeywordEngine",
+    "KeywordRule",
+    "HttpActionClient",
+    "WSClient",
+    "WSServer",
+    "Action",
+    "OffloadPool",
+    "Outbox",
+    "PluginManager",
+    "Runtime",
+    "Job",
+    "JobStore",
+    "Scheduler",
+    "ShardRouter",
+    "Snapshotter",
+    "StateBackend",
+    "MemoryBackend",
+    "SQLiteBackend",
+    "RedisBackend",
+    "SharedTokenBucket",
+    "StateError",
+    "open_backend",
+    "shared_limiter",
+    "StreamRegistry",
+    "TextStream",
+    "stream_reply",
+    "Span",
+    "Trace",
+    "Tracer",
+    "span",
+    "tracer",
+    "UnifiedClient",
+    "run_bot",
+]
@@ -0,0 +1,1430 @@
+# 此文件由 scripts/gen_actions.py 根据 bot/spec/napcat_actions.json 生成，请勿手动修改
+
+"""
+NapCat 动作的类型化绑定
+
+每个方法在本地完成参数校验，调用失败（status != ok）时抛出 ActionFailed，
+响应 data 解码为带 __slots__ 的结构体，结构体忽略未知字段、缺失字段为 None。
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from .client import ActionCaller, ActionFailed
+
+Message = str | list[dict[str, Any]]
+
+
+def _check(action: str, name: str, value: Any, types: type | tuple[type, ...], type_name: str) -> None:
+    if not isinstance(value, types):
+        raise TypeError(f"{action}: 参数 {name} 应为 {type_name}，收到 {type(value).__name__}")
+
+
+@dataclass(slots=True, frozen=True)
+class MessageId:
+    message_id: int | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "MessageId":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            message_id=data.get('message_id'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class ForwardMessageId:
+    message_id: int | None = None
+    res_id: str | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "ForwardMessageId":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            message_id=data.get('message_id'),
+            res_id=data.get('res_id'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class LoginInfo:
+    user_id: int | None = None
+    nickname: str | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "LoginInfo":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            user_id=data.get('user_id'),
+            nickname=data.get('nickname'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class StrangerInfo:
+    user_id: int | None = None
+    nickname: str | None = None
+    sex: str | None = None
+    age: int | None = None
+    qid: str | None = None
+    level: int | None = None
+    login_days: int | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "StrangerInfo":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            user_id=data.get('user_id'),
+            nickname=data.get('nickname'),
+            sex=data.get('sex'),
+            age=data.get('age'),
+            qid=data.get('qid'),
+            level=data.get('level'),
+            login_days=data.get('login_days'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class FriendInfo:
+    user_id: int | None = None
+    nickname: str | None = None
+    remark: str | None = None
+    sex: str | None = None
+    age: int | None = None
+    level: int | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "FriendInfo":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            user_id=data.get('user_id'),
+            nickname=data.get('nickname'),
+            remark=data.get('remark'),
+            sex=data.get('sex'),
+            age=data.get('age'),
+            level=data.get('level'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class GroupInfo:
+    group_id: int | None = None
+    group_name: str | None = None
+    group_remark: str | None = None
+    member_count: int | None = None
+    max_member_count: int | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "GroupInfo":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            group_id=data.get('group_id'),
+            group_name=data.get('group_name'),
+            group_remark=data.get('group_remark'),
+            member_count=data.get('member_count'),
+            max_member_count=data.get('max_member_count'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class GroupMemberInfo:
+    group_id: int | None = None
+    user_id: int | None = None
+    nickname: str | None = None
+    card: str | None = None
+    sex: str | None = None
+    age: int | None = None
+    join_time: int | None = None
+    last_sent_time: int | None = None
+    level: str | None = None
+    role: str | None = None
+    title: str | None = None
+    shut_up_timestamp: int | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "GroupMemberInfo":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            group_id=data.get('group_id'),
+            user_id=data.get('user_id'),
+            nickname=data.get('nickname'),
+            card=data.get('card'),
+            sex=data.get('sex'),
+            age=data.get('age'),
+            join_time=data.get('join_time'),
+            last_sent_time=data.get('last_sent_time'),
+            level=data.get('level'),
+            role=data.get('role'),
+            title=data.get('title'),
+            shut_up_timestamp=data.get('shut_up_timestamp'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class MessageDetail:
+    time: int | None = None
+    message_type: str | None = None
+    message_id: int | None = None
+    real_id: int | None = None
+    group_id: int | None = None
+    user_id: int | None = None
+    sender: dict[str, Any] | None = None
+    message: Message | None = None
+    raw_message: str | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "MessageDetail":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            time=data.get('time'),
+            message_type=data.get('message_type'),
+            message_id=data.get('message_id'),
+            real_id=data.get('real_id'),
+            group_id=data.get('group_id'),
+            user_id=data.get('user_id'),
+            sender=data.get('sender'),
+            message=data.get('message'),
+            raw_message=data.get('raw_message'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class MessageHistory:
+    messages: list[Any] | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "MessageHistory":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            messages=data.get('messages'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class FileInfo:
+    file: str | None = None
+    url: str | None = None
+    file_size: str | None = None
+    file_name: str | None = None
+    base64: str | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "FileInfo":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            file=data.get('file'),
+            url=data.get('url'),
+            file_size=data.get('file_size'),
+            file_name=data.get('file_name'),
+            base64=data.get('base64'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class Status:
+    online: bool | None = None
+    good: bool | None = None
+    stat: dict[str, Any] | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "Status":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            online=data.get('online'),
+            good=data.get('good'),
+            stat=data.get('stat'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class VersionInfo:
+    app_name: str | None = None
+    app_version: str | None = None
+    protocol_version: str | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "VersionInfo":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            app_name=data.get('app_name'),
+            app_version=data.get('app_version'),
+            protocol_version=data.get('protocol_version'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class Cookies:
+    cookies: str | None = None
+    bkn: str | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "Cookies":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            cookies=data.get('cookies'),
+            bkn=data.get('bkn'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class CsrfToken:
+    token: int | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "CsrfToken":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            token=data.get('token'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class CanSend:
+    yes: bool | None = None
+
+    @classmethod
+    def decode(cls, data: Any) -> "CanSend":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            yes=data.get('yes'),
+        )
+
+
+class NapcatActions:
+    """
+    NapCat 动作的类型化异步方法
+
+    Args:
+        caller: 任意实现了 execute(action, params) 的动作客户端或账号
+    """
+
+    __slots__ = ("_caller",)
+
+    def __init__(self, caller: ActionCaller) -> None:
+        self._caller = caller
+
+    async def _call(self, action: str, params: dict[str, Any]) -> Any:
+        response = await self._caller.execute(action, params)
+        if response.get("status") != "ok":
+            raise ActionFailed(action, response)
+        return response.get("data")
+
+    async def set_qq_profile(self, nickname: str, personal_note: str | None = None, sex: str | None = None) -> Any:
+        """账号相关 / 设置账号信息"""
+        _check('set_qq_profile', 'nickname', nickname, str, 'str')
+        if personal_note is not None:
+            _check('set_qq_profile', 'personal_note', personal_note, str, 'str')
+        if sex is not None:
+            _check('set_qq_profile', 'sex', sex, str, 'str')
+        params: dict[str, Any] = {'nickname': nickname}
+        if personal_note is not None:
+            params['personal_note'] = personal_note
+        if sex is not None:
+            params['sex'] = sex
+        return await self._call('set_qq_profile', params)
+
+    async def ark_share_peer(self, user_id: int | str | None = None, group_id: int | str | None = None, phoneNumber: str | None = None) -> Any:
+        """账号相关 / 获取推荐好友/群聊卡片"""
+        if user_id is not None:
+            _check('ArkSharePeer', 'user_id', user_id, (int, str), 'int | str')
+        if group_id is not None:
+            _check('ArkSharePeer', 'group_id', group_id, (int, str), 'int | str')
+        if phoneNumber is not None:
+            _check('ArkSharePeer', 'phoneNumber', phoneNumber, str, 'str')
+        params: dict[str, Any] = {}
+        if user_id is not None:
+            params['user_id'] = user_id
+        if group_id is not None:
+            params['group_id'] = group_id
+        if phoneNumber is not None:
+            params['phoneNumber'] = phoneNumber
+        return await self._call('ArkSharePeer', params)
+
+    async def send_poke(self, user_id: int, group_id: int | None = None) -> Any:
+        """账号相关 / 发送戳一戳"""
+        _check('send_poke', 'user_id', user_id, int, 'int')
+        if group_id is not None:
+            _check('send_poke', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'user_id': user_id}
+        if group_id is not None:
+            params['group_id'] = group_id
+        return await self._call('send_poke', params)
+
+    async def get_online_clients(self, no_cache: bool = False) -> Any:
+        """账号相关 / 获取当前账号在线客户端列表"""
+        _check('get_online_clients', 'no_cache', no_cache, bool, 'bool')
+        params: dict[str, Any] = {'no_cache': no_cache}
+        return await self._call('get_online_clients', params)
+
+    async def mark_msg_as_read(self, group_id: int | None = None, user_id: int | None = None) -> Any:
+        """账号相关 / 设置消息已读"""
+        if group_id is not None:
+            _check('mark_msg_as_read', 'group_id', group_id, int, 'int')
+        if user_id is not None:
+            _check('mark_msg_as_read', 'user_id', user_id, int, 'int')
+        params: dict[str, Any] = {}
+        if group_id is not None:
+            params['group_id'] = group_id
+        if user_id is not None:
+            params['user_id'] = user_id
+        return await self._call('mark_msg_as_read', params)
+
+    async def ark_share_group(self, group_id: int | str) -> Any:
+        """账号相关 / 获取推荐群聊卡片"""
+        _check('ArkShareGroup', 'group_id', group_id, (int, str), 'int | str')
+        params: dict[str, Any] = {'group_id': group_id}
+        return await self._call('ArkShareGroup', params)
+
+    async def set_online_status(self, status: int, ext_status: int = 0, battery_status: int = 0) -> Any:
+        """账号相关 / 设置在线状态"""
+        _check('set_online_status', 'status', status, int, 'int')
+        _check('set_online_status', 'ext_status', ext_status, int, 'int')
+        _check('set_online_status', 'battery_status', battery_status, int, 'int')
+        params: dict[str, Any] = {'status': status, 'ext_status': ext_status, 'battery_status': battery_status}
+        return await self._call('set_online_status', params)
+
+    async def get_friends_with_category(self) -> list[Any]:
+        """账号相关 / 获取好友分组列表"""
+        params: dict[str, Any] = {}
+        data = await self._call('get_friends_with_category', params)
+        return data if isinstance(data, list) else []
+
+    async def set_qq_avatar(self, file: str) -> Any:
+        """账号相关 / 设置头像"""
+        _check('set_qq_avatar', 'file', file, str, 'str')
+        params: dict[str, Any] = {'file': file}
+        return await self._call('set_qq_avatar', params)
+
+    async def send_like(self, user_id: int, times: int = 1) -> Any:
+        """账号相关 / 点赞"""
+        _check('send_like', 'user_id', user_id, int, 'int')
+        _check('send_like', 'times', times, int, 'int')
+        params: dict[str, Any] = {'user_id': user_id, 'times': times}
+        return await self._call('send_like', params)
+
+    async def mark_private_msg_as_read(self, user_id: int) -> Any:
+        """账号相关 / 设置私聊已读"""
+        _check('mark_private_msg_as_read', 'user_id', user_id, int, 'int')
+        params: dict[str, Any] = {'user_id': user_id}
+        return await self._call('mark_private_msg_as_read', params)
+
+    async def mark_group_msg_as_read(self, group_id: int) -> Any:
+        """账号相关 / 设置群聊已读"""
+        _check('mark_group_msg_as_read', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id}
+        return await self._call('mark_group_msg_as_read', params)
+
+    async def create_collection(self, rawData: str, brief: str) -> Any:
+        """账号相关 / 创建收藏"""
+        _check('create_collection', 'rawData', rawData, str, 'str')
+        _check('create_collection', 'brief', brief, str, 'str')
+        params: dict[str, Any] = {'rawData': rawData, 'brief': brief}
+        return await self._call('create_collection', params)
+
+    async def set_friend_add_request(self, flag: str, approve: bool = True, remark: str | None = None) -> Any:
+        """账号相关 / 处理好友请求"""
+        _check('set_friend_add_request', 'flag', flag, str, 'str')
+        _check('set_friend_add_request', 'approve', approve, bool, 'bool')
+        if remark is not None:
+            _check('set_friend_add_request', 'remark', remark, str, 'str')
+        params: dict[str, Any] = {'flag': flag, 'approve': approve}
+        if remark is not None:
+            params['remark'] = remark
+        return await self._call('set_friend_add_request', params)
+
+    async def set_self_longnick(self, longNick: str) -> Any:
+        """账号相关 / 设置个性签名"""
+        _check('set_self_longnick', 'longNick', longNick, str, 'str')
+        params: dict[str, Any] = {'longNick': longNick}
+        return await self._call('set_self_longnick', params)
+
+    async def get_login_info(self) -> LoginInfo:
+        """账号相关 / 获取登录号信息"""
+        params: dict[str, Any] = {}
+        data = await self._call('get_login_info', params)
+        return LoginInfo.decode(data)
+
+    async def get_recent_contact(self, count: int = 10) -> list[Any]:
+        """账号相关 / 最近消息列表"""
+        _check('get_recent_contact', 'count', count, int, 'int')
+        params: dict[str, Any] = {'count': count}
+        data = await self._call('get_recent_contact', params)
+        return data if isinstance(data, list) else []
+
+    async def get_stranger_info(self, user_id: int, no_cache: bool = False) -> StrangerInfo:
+        """账号相关 / 获取账号信息"""
+        _check('get_stranger_info', 'user_id', user_id, int, 'int')
+        _check('get_stranger_info', 'no_cache', no_cache, bool, 'bool')
+        params: dict[str, Any] = {'user_id': user_id, 'no_cache': no_cache}
+        data = await self._call('get_stranger_info', params)
+        return StrangerInfo.decode(data)
+
+    async def get_friend_list(self, no_cache: bool = False) -> list[FriendInfo]:
+        """账号相关 / 获取好友列表"""
+        _check('get_friend_list', 'no_cache', no_cache, bool, 'bool')
+        params: dict[str, Any] = {'no_cache': no_cache}
+        data = await self._call('get_friend_list', params)
+        return [FriendInfo.decode(item) for item in data] if isinstance(data, list) else []
+
+    async def mark_all_as_read(self) -> Any:
+        """账号相关 / 设置所有消息已读"""
+        params: dict[str, Any] = {}
+        return await self._call('_mark_all_as_read', params)
+
+    async def get_profile_like(self, user_id: int | None = None, start: int = 0, count: int = 10) -> Any:
+        """账号相关 / 获取点赞列表"""
+        if user_id is not None:
+            _check('get_profile_like', 'user_id', user_id, int, 'int')
+        _check('get_profile_like', 'start', start, int, 'int')
+        _check('get_profile_like', 'count', count, int, 'int')
+        params: dict[str, Any] = {'start': start, 'count': count}
+        if user_id is not None:
+            params['user_id'] = user_id
+        return await self._call('get_profile_like', params)
+
+    async def fetch_custom_face(self, count: int = 48) -> list[Any]:
+        """账号相关 / 获取收藏表情"""
+        _check('fetch_custom_face', 'count', count, int, 'int')
+        params: dict[str, Any] = {'count': count}
+        data = await self._call('fetch_custom_face', params)
+        return data if isinstance(data, list) else []
+
+    async def delete_friend(self, user_id: int, temp_block: bool | None = None, temp_both_del: bool | None = None) -> Any:
+        """账号相关 / 删除好友"""
+        _check('delete_friend', 'user_id', user_id, int, 'int')
+        if temp_block is not None:
+            _check('delete_friend', 'temp_block', temp_block, bool, 'bool')
+        if temp_both_del is not None:
+            _check('delete_friend', 'temp_both_del', temp_both_del, bool, 'bool')
+        params: dict[str, Any] = {'user_id': user_id}
+        if temp_block is not None:
+            params['temp_block'] = temp_block
+        if temp_both_del is not None:
+            params['temp_both_del'] = temp_both_del
+        return await self._call('delete_friend', params)
+
+    async def get_model_show(self, model: str) -> Any:
+        """账号相关 / 获取在线机型"""
+        _check('_get_model_show', 'model', model, str, 'str')
+        params: dict[str, Any] = {'model': model}
+        return await self._call('_get_model_show', params)
+
+    async def set_model_show(self, model: str, model_show: str) -> Any:
+        """账号相关 / 设置在线机型"""
+        _check('_set_model_show', 'model', model, str, 'str')
+        _check('_set_model_show', 'model_show', model_show, str, 'str')
+        params: dict[str, Any] = {'model': model, 'model_show': model_show}
+        return await self._call('_set_model_show', params)
+
+    async def nc_get_user_status(self, user_id: int) -> Any:
+        """账号相关 / 获取用户状态"""
+        _check('nc_get_user_status', 'user_id', user_id, int, 'int')
+        params: dict[str, Any] = {'user_id': user_id}
+        return await self._call('nc_get_user_status', params)
+
+    async def get_status(self) -> Status:
+        """账号相关 / 获取状态"""
+        params: dict[str, Any] = {}
+        data = await self._call('get_status', params)
+        return Status.decode(data)
+
+    async def get_mini_app_ark(self, type: str | None = None, title: str | None = None, desc: str | None = None, picUrl: str | None = None, jumpUrl: str | None = None) -> Any:
+        """账号相关 / 获取小程序卡片"""
+        if type is not None:
+            _check('get_mini_app_ark', 'type', type, str, 'str')
+        if title is not None:
+            _check('get_mini_app_ark', 'title', title, str, 'str')
+        if desc is not None:
+            _check('get_mini_app_ark', 'desc', desc, str, 'str')
+        if picUrl is not None:
+            _check('get_mini_app_ark', 'picUrl', picUrl, str, 'str')
+        if jumpUrl is not None:
+            _check('get_mini_app_ark', 'jumpUrl', jumpUrl, str, 'str')
+        params: dict[str, Any] = {}
+        if type is not None:
+            params['type'] = type
+        if title is not None:
+            params['title'] = title
+        if desc is not None:
+            params['desc'] = desc
+        if picUrl is not None:
+            params['picUrl'] = picUrl
+        if jumpUrl is not None:
+            params['jumpUrl'] = jumpUrl
+        return await self._call('get_mini_app_ark', params)
+
+    async def get_unidirectional_friend_list(self) -> list[Any]:
+        """账号相关 / 获取单向好友列表"""
+        params: dict[str, Any] = {}
+        data = await self._call('get_unidirectional_friend_list', params)
+        return data if isinstance(data, list) else []
+
+    async def set_diy_online_status(self, face_id: int | str, face_type: int | str | None = None, wording: str | None = None) -> Any:
+        """账号相关 / 设置自定义在线状态"""
+        _check('set_diy_online_status', 'face_id', face_id, (int, str), 'int | str')
+        if face_type is not None:
+            _check('set_diy_online_status', 'face_type', face_type, (int, str), 'int | str')
+        if wording is not None:
+            _check('set_diy_online_status', 'wording', wording, str, 'str')
+        params: dict[str, Any] = {'face_id': face_id}
+        if face_type is not None:
+            params['face_type'] = face_type
+        if wording is not None:
+            params['wording'] = wording
+        return await self._call('set_diy_online_status', params)
+
+    async def send_group_msg(self, group_id: int, message: Message, auto_escape: bool = False) -> MessageId:
+        """消息相关 / 发送群聊消息"""
+        _check('send_group_msg', 'group_id', group_id, int, 'int')
+        _check('send_group_msg', 'message', message, (str, list), 'Message')
+        _check('send_group_msg', 'auto_escape', auto_escape, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'message': message, 'auto_escape': auto_escape}
+        data = await self._call('send_group_msg', params)
+        return MessageId.decode(data)
+
+    async def send_private_msg(self, user_id: int, message: Message, auto_escape: bool = False) -> MessageId:
+        """消息相关 / 发送私聊消息"""
+        _check('send_private_msg', 'user_id', user_id, int, 'int')
+        _check('send_private_msg', 'message', message, (str, list), 'Message')
+        _check('send_private_msg', 'auto_escape', auto_escape, bool, 'bool')
+        params: dict[str, Any] = {'user_id': user_id, 'message': message, 'auto_escape': auto_escape}
+        data = await self._call('send_private_msg', params)
+        return MessageId.decode(data)
+
+    async def send_msg(self, message: Message, message_type: str | None = None, user_id: int | None = None, group_id: int | None = None, auto_escape: bool = False) -> MessageId:
+        """消息相关 / 发送消息"""
+        _check('send_msg', 'message', message, (str, list), 'Message')
+        if message_type is not None:
+            _check('send_msg', 'message_type', message_type, str, 'str')
+        if user_id is not None:
+            _check('send_msg', 'user_id', user_id, int, 'int')
+        if group_id is not None:
+            _check('send_msg', 'group_id', group_id, int, 'int')
+        _check('send_msg', 'auto_escape', auto_escape, bool, 'bool')
+        params: dict[str, Any] = {'message': message, 'auto_escape': auto_escape}
+        if message_type is not None:
+            params['message_type'] = message_type
+        if user_id is not None:
+            params['user_id'] = user_id
+        if group_id is not None:
+            params['group_id'] = group_id
+        data = await self._call('send_msg', params)
+        return MessageId.decode(data)
+
+    async def send_group_forward_msg(self, group_id: int, messages: list[Any]) -> ForwardMessageId:
+        """消息相关 / 发送群合并转发消息"""
+        _check('send_group_forward_msg', 'group_id', group_id, int, 'int')
+        _check('send_group_forward_msg', 'messages', messages, list, 'list[Any]')
+        params: dict[str, Any] = {'group_id': group_id, 'messages': messages}
+        data = await self._call('send_group_forward_msg', params)
+        return ForwardMessageId.decode(data)
+
+    async def send_private_forward_msg(self, user_id: int, messages: list[Any]) -> ForwardMessageId:
+        """消息相关 / 发送私聊合并转发消息"""
+        _check('send_private_forward_msg', 'user_id', user_id, int, 'int')
+        _check('send_private_forward_msg', 'messages', messages, list, 'list[Any]')
+        params: dict[str, Any] = {'user_id': user_id, 'messages': messages}
+        data = await self._call('send_private_forward_msg', params)
+        return ForwardMessageId.decode(data)
+
+    async def send_forward_msg(self, messages: list[Any], group_id: int | None = None, user_id: int | None = None) -> ForwardMessageId:
+        """消息相关 / 发送合并转发消息"""
+        _check('send_forward_msg', 'messages', messages, list, 'list[Any]')
+        if group_id is not None:
+            _check('send_forward_msg', 'group_id', group_id, int, 'int')
+        if user_id is not None:
+            _check('send_forward_msg', 'user_id', user_id, int, 'int')
+        params: dict[str, Any] = {'messages': messages}
+        if group_id is not None:
+            params['group_id'] = group_id
+        if user_id is not None:
+            params['user_id'] = user_id
+        data = await self._call('send_forward_msg', params)
+        return ForwardMessageId.decode(data)
+
+    async def forward_group_single_msg(self, group_id: int, message_id: int) -> Any:
+        """消息相关 / 消息转发到群"""
+        _check('forward_group_single_msg', 'group_id', group_id, int, 'int')
+        _check('forward_group_single_msg', 'message_id', message_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id, 'message_id': message_id}
+        return await self._call('forward_group_single_msg', params)
+
+    async def forward_friend_single_msg(self, user_id: int, message_id: int) -> Any:
+        """消息相关 / 消息转发到私聊"""
+        _check('forward_friend_single_msg', 'user_id', user_id, int, 'int')
+        _check('forward_friend_single_msg', 'message_id', message_id, int, 'int')
+        params: dict[str, Any] = {'user_id': user_id, 'message_id': message_id}
+        return await self._call('forward_friend_single_msg', params)
+
+    async def group_poke(self, group_id: int, user_id: int) -> Any:
+        """消息相关 / 发送群聊戳一戳"""
+        _check('group_poke', 'group_id', group_id, int, 'int')
+        _check('group_poke', 'user_id', user_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id, 'user_id': user_id}
+        return await self._call('group_poke', params)
+
+    async def friend_poke(self, user_id: int) -> Any:
+        """消息相关 / 发送私聊戳一戳"""
+        _check('friend_poke', 'user_id', user_id, int, 'int')
+        params: dict[str, Any] = {'user_id': user_id}
+        return await self._call('friend_poke', params)
+
+    async def delete_msg(self, message_id: int) -> Any:
+        """消息相关 / 撤回消息"""
+        _check('delete_msg', 'message_id', message_id, int, 'int')
+        params: dict[str, Any] = {'message_id': message_id}
+        return await self._call('delete_msg', params)
+
+    async def get_group_msg_history(self, group_id: int, message_seq: int | None = None, count: int = 20, reverseOrder: bool = False) -> MessageHistory:
+        """消息相关 / 获取群历史消息"""
+        _check('get_group_msg_history', 'group_id', group_id, int, 'int')
+        if message_seq is not None:
+            _check('get_group_msg_history', 'message_seq', message_seq, int, 'int')
+        _check('get_group_msg_history', 'count', count, int, 'int')
+        _check('get_group_msg_history', 'reverseOrder', reverseOrder, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'count': count, 'reverseOrder': reverseOrder}
+        if message_seq is not None:
+            params['message_seq'] = message_seq
+        data = await self._call('get_group_msg_history', params)
+        return MessageHistory.decode(data)
+
+    async def get_msg(self, message_id: int) -> MessageDetail:
+        """消息相关 / 获取消息详情"""
+        _check('get_msg', 'message_id', message_id, int, 'int')
+        params: dict[str, Any] = {'message_id': message_id}
+        data = await self._call('get_msg', params)
+        return MessageDetail.decode(data)
+
+    async def get_forward_msg(self, message_id: int | str) -> Any:
+        """消息相关 / 获取合并转发消息"""
+        _check('get_forward_msg', 'message_id', message_id, (int, str), 'int | str')
+        params: dict[str, Any] = {'message_id': message_id}
+        return await self._call('get_forward_msg', params)
+
+    async def set_msg_emoji_like(self, message_id: int, emoji_id: int, set: bool = True) -> Any:
+        """消息相关 / 贴表情"""
+        _check('set_msg_emoji_like', 'message_id', message_id, int, 'int')
+        _check('set_msg_emoji_like', 'emoji_id', emoji_id, int, 'int')
+        _check('set_msg_emoji_like', 'set', set, bool, 'bool')
+        params: dict[str, Any] = {'message_id': message_id, 'emoji_id': emoji_id, 'set': set}
+        return await self._call('set_msg_emoji_like', params)
+
+    async def get_friend_msg_history(self, user_id: int, message_seq: int | None = None, count: int = 20, reverseOrder: bool = False) -> MessageHistory:
+        """消息相关 / 获取好友历史消息"""
+        _check('get_friend_msg_history', 'user_id', user_id, int, 'int')
+        if message_seq is not None:
+            _check('get_friend_msg_history', 'message_seq', message_seq, int, 'int')
+        _check('get_friend_msg_history', 'count', count, int, 'int')
+        _check('get_friend_msg_history', 'reverseOrder', reverseOrder, bool, 'bool')
+        params: dict[str, Any] = {'user_id': user_id, 'count': count, 'reverseOrder': reverseOrder}
+        if message_seq is not None:
+            params['message_seq'] = message_seq
+        data = await self._call('get_friend_msg_history', params)
+        return MessageHistory.decode(data)
+
+    async def fetch_emoji_like(self, message_id: int, emojiId: str, emojiType: str, count: int = 20) -> Any:
+        """消息相关 / 获取贴表情详情"""
+        _check('fetch_emoji_like', 'message_id', message_id, int, 'int')
+        _check('fetch_emoji_like', 'emojiId', emojiId, str, 'str')
+        _check('fetch_emoji_like', 'emojiType', emojiType, str, 'str')
+        _check('fetch_emoji_like', 'count', count, int, 'int')
+        params: dict[str, Any] = {'message_id': message_id, 'emojiId': emojiId, 'emojiType': emojiType, 'count': count}
+        return await self._call('fetch_emoji_like', params)
+
+    async def get_record(self, file: str, out_format: str = 'mp3') -> FileInfo:
+        """消息相关 / 获取语音消息详情"""
+        _check('get_record', 'file', file, str, 'str')
+        _check('get_record', 'out_format', out_format, str, 'str')
+        params: dict[str, Any] = {'file': file, 'out_format': out_format}
+        data = await self._call('get_record', params)
+        return FileInfo.decode(data)
+
+    async def get_image(self, file: str) -> FileInfo:
+        """消息相关 / 获取图片消息详情"""
+        _check('get_image', 'file', file, str, 'str')
+        params: dict[str, Any] = {'file': file}
+        data = await self._call('get_image', params)
+        return FileInfo.decode(data)
+
+    async def send_group_ai_record(self, group_id: int, character: str, text: str) -> MessageId:
+        """消息相关 / 发送群AI语音"""
+        _check('send_group_ai_record', 'group_id', group_id, int, 'int')
+        _check('send_group_ai_record', 'character', character, str, 'str')
+        _check('send_group_ai_record', 'text', text, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'character': character, 'text': text}
+        data = await self._call('send_group_ai_record', params)
+        return MessageId.decode(data)
+
+    async def set_group_remark(self, group_id: int | str, remark: str) -> Any:
+        """群聊相关 / 设置群备注"""
+        _check('set_group_remark', 'group_id', group_id, (int, str), 'int | str')
+        _check('set_group_remark', 'remark', remark, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'remark': remark}
+        return await self._call('set_group_remark', params)
+
+    async def set_group_kick(self, group_id: int, user_id: int, reject_add_request: bool = False) -> Any:
+        """群聊相关 / 群踢人"""
+        _check('set_group_kick', 'group_id', group_id, int, 'int')
+        _check('set_group_kick', 'user_id', user_id, int, 'int')
+        _check('set_group_kick', 'reject_add_request', reject_add_request, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'user_id': user_id, 'reject_add_request': reject_add_request}
+        return await self._call('set_group_kick', params)
+
+    async def get_group_system_msg(self) -> Any:
+        """群聊相关 / 获取群系统消息"""
+        params: dict[str, Any] = {}
+        return await self._call('get_group_system_msg', params)
+
+    async def set_group_ban(self, group_id: int, user_id: int, duration: int = 1800) -> Any:
+        """群聊相关 / 群禁言"""
+        _check('set_group_ban', 'group_id', group_id, int, 'int')
+        _check('set_group_ban', 'user_id', user_id, int, 'int')
+        _check('set_group_ban', 'duration', duration, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id, 'user_id': user_id, 'duration': duration}
+        return await self._call('set_group_ban', params)
+
+    async def get_essence_msg_list(self, group_id: int) -> list[Any]:
+        """群聊相关 / 获取群精华消息"""
+        _check('get_essence_msg_list', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id}
+        data = await self._call('get_essence_msg_list', params)
+        return data if isinstance(data, list) else []
+
+    async def set_group_whole_ban(self, group_id: int, enable: bool = True) -> Any:
+        """群聊相关 / 全体禁言"""
+        _check('set_group_whole_ban', 'group_id', group_id, int, 'int')
+        _check('set_group_whole_ban', 'enable', enable, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'enable': enable}
+        return await self._call('set_group_whole_ban', params)
+
+    async def set_group_portrait(self, group_id: int, file: str) -> Any:
+        """群聊相关 / 设置群头像"""
+        _check('set_group_portrait', 'group_id', group_id, int, 'int')
+        _check('set_group_portrait', 'file', file, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'file': file}
+        return await self._call('set_group_portrait', params)
+
+    async def set_group_admin(self, group_id: int, user_id: int, enable: bool = True) -> Any:
+        """群聊相关 / 设置群管理"""
+        _check('set_group_admin', 'group_id', group_id, int, 'int')
+        _check('set_group_admin', 'user_id', user_id, int, 'int')
+        _check('set_group_admin', 'enable', enable, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'user_id': user_id, 'enable': enable}
+        return await self._call('set_group_admin', params)
+
+    async def set_group_card(self, group_id: int, user_id: int, card: str = '') -> Any:
+        """群聊相关 / 设置群成员名片"""
+        _check('set_group_card', 'group_id', group_id, int, 'int')
+        _check('set_group_card', 'user_id', user_id, int, 'int')
+        _check('set_group_card', 'card', card, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'user_id': user_id, 'card': card}
+        return await self._call('set_group_card', params)
+
+    async def set_essence_msg(self, message_id: int) -> Any:
+        """群聊相关 / 设置群精华消息"""
+        _check('set_essence_msg', 'message_id', message_id, int, 'int')
+        params: dict[str, Any] = {'message_id': message_id}
+        return await self._call('set_essence_msg', params)
+
+    async def set_group_name(self, group_id: int, group_name: str) -> Any:
+        """群聊相关 / 设置群名"""
+        _check('set_group_name', 'group_id', group_id, int, 'int')
+        _check('set_group_name', 'group_name', group_name, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'group_name': group_name}
+        return await self._call('set_group_name', params)
+
+    async def delete_essence_msg(self, message_id: int) -> Any:
+        """群聊相关 / 删除群精华消息"""
+        _check('delete_essence_msg', 'message_id', message_id, int, 'int')
+        params: dict[str, Any] = {'message_id': message_id}
+        return await self._call('delete_essence_msg', params)
+
+    async def set_group_leave(self, group_id: int, is_dismiss: bool = False) -> Any:
+        """群聊相关 / 退群"""
+        _check('set_group_leave', 'group_id', group_id, int, 'int')
+        _check('set_group_leave', 'is_dismiss', is_dismiss, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'is_dismiss': is_dismiss}
+        return await self._call('set_group_leave', params)
+
+    async def send_group_notice(self, group_id: int, content: str, image: str | None = None) -> Any:
+        """群聊相关 / 发送群公告"""
+        _check('_send_group_notice', 'group_id', group_id, int, 'int')
+        _check('_send_group_notice', 'content', content, str, 'str')
+        if image is not None:
+            _check('_send_group_notice', 'image', image, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'content': content}
+        if image is not None:
+            params['image'] = image
+        return await self._call('_send_group_notice', params)
+
+    async def set_group_special_title(self, group_id: int, user_id: int, special_title: str = '') -> Any:
+        """群聊相关 / 设置群头衔"""
+        _check('set_group_special_title', 'group_id', group_id, int, 'int')
+        _check('set_group_special_title', 'user_id', user_id, int, 'int')
+        _check('set_group_special_title', 'special_title', special_title, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'user_id': user_id, 'special_title': special_title}
+        return await self._call('set_group_special_title', params)
+
+    async def get_group_notice(self, group_id: int) -> list[Any]:
+        """群聊相关 / 获取群公告"""
+        _check('_get_group_notice', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id}
+        data = await self._call('_get_group_notice', params)
+        return data if isinstance(data, list) else []
+
+    async def set_group_add_request(self, flag: str, approve: bool = True, reason: str | None = None) -> Any:
+        """群聊相关 / 处理加群请求"""
+        _check('set_group_add_request', 'flag', flag, str, 'str')
+        _check('set_group_add_request', 'approve', approve, bool, 'bool')
+        if reason is not None:
+            _check('set_group_add_request', 'reason', reason, str, 'str')
+        params: dict[str, Any] = {'flag': flag, 'approve': approve}
+        if reason is not None:
+            params['reason'] = reason
+        return await self._call('set_group_add_request', params)
+
+    async def get_group_info(self, group_id: int, no_cache: bool = False) -> GroupInfo:
+        """群聊相关 / 获取群信息"""
+        _check('get_group_info', 'group_id', group_id, int, 'int')
+        _check('get_group_info', 'no_cache', no_cache, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'no_cache': no_cache}
+        data = await self._call('get_group_info', params)
+        return GroupInfo.decode(data)
+
+    async def get_group_list(self, no_cache: bool = False) -> list[GroupInfo]:
+        """群聊相关 / 获取群列表"""
+        _check('get_group_list', 'no_cache', no_cache, bool, 'bool')
+        params: dict[str, Any] = {'no_cache': no_cache}
+        data = await self._call('get_group_list', params)
+        return [GroupInfo.decode(item) for item in data] if isinstance(data, list) else []
+
+    async def del_group_notice(self, group_id: int, notice_id: str) -> Any:
+        """群聊相关 / 删除群公告"""
+        _check('_del_group_notice', 'group_id', group_id, int, 'int')
+        _check('_del_group_notice', 'notice_id', notice_id, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'notice_id': notice_id}
+        return await self._call('_del_group_notice', params)
+
+    async def get_group_member_info(self, group_id: int, user_id: int, no_cache: bool = False) -> GroupMemberInfo:
+        """群聊相关 / 获取群成员信息"""
+        _check('get_group_member_info', 'group_id', group_id, int, 'int')
+        _check('get_group_member_info', 'user_id', user_id, int, 'int')
+        _check('get_group_member_info', 'no_cache', no_cache, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'user_id': user_id, 'no_cache': no_cache}
+        data = await self._call('get_group_member_info', params)
+        return GroupMemberInfo.decode(data)
+
+    async def get_group_member_list(self, group_id: int, no_cache: bool = False) -> list[GroupMemberInfo]:
+        """群聊相关 / 获取群成员列表"""
+        _check('get_group_member_list', 'group_id', group_id, int, 'int')
+        _check('get_group_member_list', 'no_cache', no_cache, bool, 'bool')
+        params: dict[str, Any] = {'group_id': group_id, 'no_cache': no_cache}
+        data = await self._call('get_group_member_list', params)
+        return [GroupMemberInfo.decode(item) for item in data] if isinstance(data, list) else []
+
+    async def get_group_honor_info(self, group_id: int, type: str = 'all') -> Any:
+        """群聊相关 / 获取群荣誉"""
+        _check('get_group_honor_info', 'group_id', group_id, int, 'int')
+        _check('get_group_honor_info', 'type', type, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'type': type}
+        return await self._call('get_group_honor_info', params)
+
+    async def get_group_info_ex(self, group_id: int) -> Any:
+        """群聊相关 / 获取群信息ex"""
+        _check('get_group_info_ex', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id}
+        return await self._call('get_group_info_ex', params)
+
+    async def get_group_at_all_remain(self, group_id: int) -> Any:
+        """群聊相关 / 获取群 @全体成员 剩余次数"""
+        _check('get_group_at_all_remain', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id}
+        return await self._call('get_group_at_all_remain', params)
+
+    async def get_group_shut_list(self, group_id: int) -> list[Any]:
+        """群聊相关 / 获取群禁言列表"""
+        _check('get_group_shut_list', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id}
+        data = await self._call('get_group_shut_list', params)
+        return data if isinstance(data, list) else []
+
+    async def get_group_ignored_notifies(self) -> Any:
+        """群聊相关 / 获取群过滤系统消息"""
+        params: dict[str, Any] = {}
+        return await self._call('get_group_ignored_notifies', params)
+
+    async def set_group_sign(self, group_id: int | str) -> Any:
+        """群聊相关 / 群打卡"""
+        _check('set_group_sign', 'group_id', group_id, (int, str), 'int | str')
+        params: dict[str, Any] = {'group_id': group_id}
+        return await self._call('set_group_sign', params)
+
+    async def send_group_sign(self, group_id: int | str) -> Any:
+        """群聊相关 / 群打卡"""
+        _check('send_group_sign', 'group_id', group_id, (int, str), 'int | str')
+        params: dict[str, Any] = {'group_id': group_id}
+        return await self._call('send_group_sign', params)
+
+    async def move_group_file(self, group_id: int | str, file_id: str, current_parent_directory: str, target_parent_directory: str) -> Any:
+        """文件相关 / 移动群文件"""
+        _check('move_group_file', 'group_id', group_id, (int, str), 'int | str')
+        _check('move_group_file', 'file_id', file_id, str, 'str')
+        _check('move_group_file', 'current_parent_directory', current_parent_directory, str, 'str')
+        _check('move_group_file', 'target_parent_directory', target_parent_directory, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'file_id': file_id, 'current_parent_directory': current_parent_directory, 'target_parent_directory': target_parent_directory}
+        return await self._call('move_group_file', params)
+
+    async def trans_group_file(self, group_id: int | str, file_id: str) -> Any:
+        """文件相关 / 转存为永久文件"""
+        _check('trans_group_file', 'group_id', group_id, (int, str), 'int | str')
+        _check('trans_group_file', 'file_id', file_id, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'file_id': file_id}
+        return await self._call('trans_group_file', params)
+
+    async def rename_group_file(self, group_id: int | str, file_id: str, current_parent_directory: str, new_name: str) -> Any:
+        """文件相关 / 重命名群文件"""
+        _check('rename_group_file', 'group_id', group_id, (int, str), 'int | str')
+        _check('rename_group_file', 'file_id', file_id, str, 'str')
+        _check('rename_group_file', 'current_parent_directory', current_parent_directory, str, 'str')
+        _check('rename_group_file', 'new_name', new_name, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'file_id': file_id, 'current_parent_directory': current_parent_directory, 'new_name': new_name}
+        return await self._call('rename_group_file', params)
+
+    async def get_file(self, file_id: str | None = None, file: str | None = None) -> FileInfo:
+        """文件相关 / 获取文件信息"""
+        if file_id is not None:
+            _check('get_file', 'file_id', file_id, str, 'str')
+        if file is not None:
+            _check('get_file', 'file', file, str, 'str')
+        params: dict[str, Any] = {}
+        if file_id is not None:
+            params['file_id'] = file_id
+        if file is not None:
+            params['file'] = file
+        data = await self._call('get_file', params)
+        return FileInfo.decode(data)
+
+    async def upload_group_file(self, group_id: int, file: str, name: str, folder: str | None = None) -> Any:
+        """文件相关 / 上传群文件"""
+        _check('upload_group_file', 'group_id', group_id, int, 'int')
+        _check('upload_group_file', 'file', file, str, 'str')
+        _check('upload_group_file', 'name', name, str, 'str')
+        if folder is not None:
+            _check('upload_group_file', 'folder', folder, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'file': file, 'name': name}
+        if folder is not None:
+            params['folder'] = folder
+        return await self._call('upload_group_file', params)
+
+    async def create_group_file_folder(self, group_id: int, name: str, parent_id: str | None = None) -> Any:
+        """文件相关 / 创建群文件文件夹"""
+        _check('create_group_file_folder', 'group_id', group_id, int, 'int')
+        _check('create_group_file_folder', 'name', name, str, 'str')
+        if parent_id is not None:
+            _check('create_group_file_folder', 'parent_id', parent_id, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'name': name}
+        if parent_id is not None:
+            params['parent_id'] = parent_id
+        return await self._call('create_group_file_folder', params)
+
+    async def delete_group_file(self, group_id: int, file_id: str) -> Any:
+        """文件相关 / 删除群文件"""
+        _check('delete_group_file', 'group_id', group_id, int, 'int')
+        _check('delete_group_file', 'file_id', file_id, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'file_id': file_id}
+        return await self._call('delete_group_file', params)
+
+    async def delete_group_folder(self, group_id: int, folder_id: str) -> Any:
+        """文件相关 / 删除群文件夹"""
+        _check('delete_group_folder', 'group_id', group_id, int, 'int')
+        _check('delete_group_folder', 'folder_id', folder_id, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'folder_id': folder_id}
+        return await self._call('delete_group_folder', params)
+
+    async def upload_private_file(self, user_id: int, file: str, name: str) -> Any:
+        """文件相关 / 上传私聊文件"""
+        _check('upload_private_file', 'user_id', user_id, int, 'int')
+        _check('upload_private_file', 'file', file, str, 'str')
+        _check('upload_private_file', 'name', name, str, 'str')
+        params: dict[str, Any] = {'user_id': user_id, 'file': file, 'name': name}
+        return await self._call('upload_private_file', params)
+
+    async def get_group_file_system_info(self, group_id: int) -> Any:
+        """文件相关 / 获取群文件系统信息"""
+        _check('get_group_file_system_info', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id}
+        return await self._call('get_group_file_system_info', params)
+
+    async def download_file(self, url: str | None = None, base64: str | None = None, name: str | None = None, headers: list[Any] | None = None) -> Any:
+        """文件相关 / 下载文件到缓存目录"""
+        if url is not None:
+            _check('download_file', 'url', url, str, 'str')
+        if base64 is not None:
+            _check('download_file', 'base64', base64, str, 'str')
+        if name is not None:
+            _check('download_file', 'name', name, str, 'str')
+        if headers is not None:
+            _check('download_file', 'headers', headers, list, 'list[Any]')
+        params: dict[str, Any] = {}
+        if url is not None:
+            params['url'] = url
+        if base64 is not None:
+            params['base64'] = base64
+        if name is not None:
+            params['name'] = name
+        if headers is not None:
+            params['headers'] = headers
+        return await self._call('download_file', params)
+
+    async def get_group_root_files(self, group_id: int) -> Any:
+        """文件相关 / 获取群根目录文件列表"""
+        _check('get_group_root_files', 'group_id', group_id, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id}
+        return await self._call('get_group_root_files', params)
+
+    async def get_group_files_by_folder(self, group_id: int, folder_id: str, file_count: int = 50) -> Any:
+        """文件相关 / 获取群子目录文件列表"""
+        _check('get_group_files_by_folder', 'group_id', group_id, int, 'int')
+        _check('get_group_files_by_folder', 'folder_id', folder_id, str, 'str')
+        _check('get_group_files_by_folder', 'file_count', file_count, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id, 'folder_id': folder_id, 'file_count': file_count}
+        return await self._call('get_group_files_by_folder', params)
+
+    async def get_group_file_url(self, group_id: int, file_id: str) -> Any:
+        """文件相关 / 获取群文件链接"""
+        _check('get_group_file_url', 'group_id', group_id, int, 'int')
+        _check('get_group_file_url', 'file_id', file_id, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'file_id': file_id}
+        return await self._call('get_group_file_url', params)
+
+    async def get_private_file_url(self, file_id: str) -> Any:
+        """文件相关 / 获取私聊文件链接"""
+        _check('get_private_file_url', 'file_id', file_id, str, 'str')
+        params: dict[str, Any] = {'file_id': file_id}
+        return await self._call('get_private_file_url', params)
+
+    async def get_clientkey(self) -> Any:
+        """密钥相关 / 获取clientkey"""
+        params: dict[str, Any] = {}
+        return await self._call('get_clientkey', params)
+
+    async def get_cookies(self, domain: str) -> Cookies:
+        """密钥相关 / 获取cookies"""
+        _check('get_cookies', 'domain', domain, str, 'str')
+        params: dict[str, Any] = {'domain': domain}
+        data = await self._call('get_cookies', params)
+        return Cookies.decode(data)
+
+    async def get_csrf_token(self) -> CsrfToken:
+        """密钥相关 / 获取 CSRF Token"""
+        params: dict[str, Any] = {}
+        data = await self._call('get_csrf_token', params)
+        return CsrfToken.decode(data)
+
+    async def get_credentials(self, domain: str) -> Any:
+        """密钥相关 / 获取 QQ 相关接口凭证"""
+        _check('get_credentials', 'domain', domain, str, 'str')
+        params: dict[str, Any] = {'domain': domain}
+        return await self._call('get_credentials', params)
+
+    async def nc_get_rkey(self) -> list[Any]:
+        """密钥相关 / nc获取rkey"""
+        params: dict[str, Any] = {}
+        data = await self._call('nc_get_rkey', params)
+        return data if isinstance(data, list) else []
+
+    async def get_rkey(self) -> list[Any]:
+        """密钥相关 / 获取rkey"""
+        params: dict[str, Any] = {}
+        data = await self._call('get_rkey', params)
+        return data if isinstance(data, list) else []
+
+    async def get_rkey_server(self) -> Any:
+        """密钥相关 / 获取rkey服务"""
+        params: dict[str, Any] = {}
+        return await self._call('get_rkey_server', params)
+
+    async def ocr_image(self, image: str) -> list[Any]:
+        """个人操作 / OCR 图片识别"""
+        _check('ocr_image', 'image', image, str, 'str')
+        params: dict[str, Any] = {'image': image}
+        data = await self._call('ocr_image', params)
+        return data if isinstance(data, list) else []
+
+    async def dot_ocr_image(self, image: str) -> list[Any]:
+        """个人操作 / .OCR 图片识别"""
+        _check('.ocr_image', 'image', image, str, 'str')
+        params: dict[str, Any] = {'image': image}
+        data = await self._call('.ocr_image', params)
+        return data if isinstance(data, list) else []
+
+    async def translate_en2zh(self, words: list[Any]) -> list[Any]:
+        """个人操作 / 英译中"""
+        _check('translate_en2zh', 'words', words, list, 'list[Any]')
+        params: dict[str, Any] = {'words': words}
+        data = await self._call('translate_en2zh', params)
+        return data if isinstance(data, list) else []
+
+    async def set_input_status(self, user_id: int, event_type: int) -> Any:
+        """个人操作 / 设置输入状态"""
+        _check('set_input_status', 'user_id', user_id, int, 'int')
+        _check('set_input_status', 'event_type', event_type, int, 'int')
+        params: dict[str, Any] = {'user_id': user_id, 'event_type': event_type}
+        return await self._call('set_input_status', params)
+
+    async def handle_quick_operation(self, context: dict[str, Any], operation: dict[str, Any]) -> Any:
+        """个人操作 / 对事件执行快速操作"""
+        _check('.handle_quick_operation', 'context', context, dict, 'dict[str, Any]')
+        _check('.handle_quick_operation', 'operation', operation, dict, 'dict[str, Any]')
+        params: dict[str, Any] = {'context': context, 'operation': operation}
+        return await self._call('.handle_quick_operation', params)
+
+    async def can_send_image(self) -> CanSend:
+        """个人操作 / 检查是否可以发送图片"""
+        params: dict[str, Any] = {}
+        data = await self._call('can_send_image', params)
+        return CanSend.decode(data)
+
+    async def can_send_record(self) -> CanSend:
+        """个人操作 / 检查是否可以发送语音"""
+        params: dict[str, Any] = {}
+        data = await self._call('can_send_record', params)
+        return CanSend.decode(data)
+
+    async def get_ai_characters(self, group_id: int, chat_type: int = 1) -> list[Any]:
+        """个人操作 / 获取AI语音人物"""
+        _check('get_ai_characters', 'group_id', group_id, int, 'int')
+        _check('get_ai_characters', 'chat_type', chat_type, int, 'int')
+        params: dict[str, Any] = {'group_id': group_id, 'chat_type': chat_type}
+        data = await self._call('get_ai_characters', params)
+        return data if isinstance(data, list) else []
+
+    async def get_ai_record(self, group_id: int, character: str, text: str) -> Any:
+        """个人操作 / 获取AI语音"""
+        _check('get_ai_record', 'group_id', group_id, int, 'int')
+        _check('get_ai_record', 'character', character, str, 'str')
+        _check('get_ai_record', 'text', text, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'character': character, 'text': text}
+        return await self._call('get_ai_record', params)
+
+    async def get_robot_uin_range(self) -> list[Any]:
+        """系统操作 / 获取机器人账号范围"""
+        params: dict[str, Any] = {}
+        data = await self._call('get_robot_uin_range', params)
+        return data if isinstance(data, list) else []
+
+    async def bot_exit(self) -> Any:
+        """系统操作 / 账号退出"""
+        params: dict[str, Any] = {}
+        return await self._call('bot_exit', params)
+
+    async def send_packet(self, cmd: str, data: str, rsp: bool = True) -> Any:
+        """系统操作 / 发送自定义组包"""
+        _check('send_packet', 'cmd', cmd, str, 'str')
+        _check('send_packet', 'data', data, str, 'str')
+        _check('send_packet', 'rsp', rsp, bool, 'bool')
+        params: dict[str, Any] = {'cmd': cmd, 'data': data, 'rsp': rsp}
+        return await self._call('send_packet', params)
+
+    async def get_packet_status(self) -> Any:
+        """系统操作 / 获取packet状态"""
+        params: dict[str, Any] = {}
+        return await self._call('get_packet_status', params)
+
+    async def get_version_info(self) -> VersionInfo:
+        """系统操作 / 获取版本信息"""
+        params: dict[str, Any] = {}
+        data = await self._call('get_version_info', params)
+        return VersionInfo.decode(data)
+
+    async def get_guild_list(self) -> Any:
+        """其他 / get_guild_list"""
+        params: dict[str, Any] = {}
+        return await self._call('get_guild_list', params)
+
+    async def get_guild_service_profile(self) -> Any:
+        """其他 / get_guild_service_profile"""
+        params: dict[str, Any] = {}
+        return await self._call('get_guild_service_profile', params)
+
+    async def check_url_safely(self, url: str) -> Any:
+        """其他 / 检查链接安全性"""
+        _check('check_url_safely', 'url', url, str, 'str')
+        params: dict[str, Any] = {'url': url}
+        return await self._call('check_url_safely', params)
+
+    async def click_inline_keyboard_button(self, group_id: int | str, bot_appid: str, button_id: str, callback_data: str, msg_seq: str) -> Any:
+        """其他 / 点击按钮"""
+        _check('click_inline_keyboard_button', 'group_id', group_id, (int, str), 'int | str')
+        _check('click_inline_keyboard_button', 'bot_appid', bot_appid, str, 'str')
+        _check('click_inline_keyboard_button', 'button_id', button_id, str, 'str')
+        _check('click_inline_keyboard_button', 'callback_data', callback_data, str, 'str')
+        _check('click_inline_keyboard_button', 'msg_seq', msg_seq, str, 'str')
+        params: dict[str, Any] = {'group_id': group_id, 'bot_appid': bot_appid, 'button_id': button_id, 'callback_data': callback_data, 'msg_seq': msg_seq}
+        return await self._call('click_inline_keyboard_button', params)
+
+    async def get_collection_list(self, category: int | str, count: int | str) -> Any:
+        """其他 / 获取收藏列表"""
+        _check('get_collection_list', 'category', category, (int, str), 'int | str')
+        _check('get_collection_list', 'count', count, (int, str), 'int | str')
+        params: dict[str, Any] = {'category': category, 'count': count}
+        return await self._call('get_collection_list', params)
+
+    async def get_group_ignore_add_request(self) -> Any:
+        """其他 / 获取被过滤的加群请求"""
+        params: dict[str, Any] = {}
+        return await self._call('get_group_ignore_add_request', params)
+
+    async def fetch_user_profile_like(self, qq: int) -> Any:
+        """其他 / fetch_user_profile_like"""
+        _check('fetch_user_profile_like', 'qq', qq, int, 'int')
+        params: dict[str, Any] = {'qq': qq}
+        return await self._call('fetch_user_profile_like', params)
+
+    async def get_word_slices(self, content: str) -> Any:
+        """其他 / 获取中文分词"""
+        _check('.get_word_slices', 'content', content, str, 'str')
+        params: dict[str, Any] = {'content': content}
+        return await self._call('.get_word_slices', params)
+
+
+ACTION_NAMES: frozenset[str] = frozenset({
+    'set_qq_profile',
+    'ArkSharePeer',
+    'send_poke',
+    'get_online_clients',
+    'mark_msg_as_read',
+    'ArkShareGroup',
+    'set_online_status',
+    'get_friends_with_category',
+    'set_qq_avatar',
+    'send_like',
+    'mark_private_msg_as_read',
+    'mark_group_msg_as_read',
+    'create_collection',
+    'set_friend_add_request',
+    'set_self_longnick',
+    'get_login_info',
+    'get_recent_contact',
+    'get_stranger_info',
+    'get_friend_list',
+    '_mark_all_as_read',
+    'get_profile_like',
+    'fetch_custom_face',
+    'delete_friend',
+    '_get_model_show',
+    '_set_model_show',
+    'nc_get_user_status',
+    'get_status',
+    'get_mini_app_ark',
+    'get_unidirectional_friend_list',
+    'set_diy_online_status',
+    'send_group_msg',
+    'send_private_msg',
+    'send_msg',
+    'send_group_forward_msg',
+    'send_private_forward_msg',
+    'send_forward_msg',
+    'forward_group_single_msg',
+    'forward_friend_single_msg',
+    'group_poke',
+    'friend_poke',
+    'delete_msg',
+    'get_group_msg_history',
+    'get_msg',
+    'get_forward_msg',
+    'set_msg_emoji_like',
+    'get_friend_msg_history',
+    'fetch_emoji_like',
+    'get_record',
+    'get_image',
+    'send_group_ai_record',
+    'set_group_remark',
+    'set_group_kick',
+    'get_group_system_msg',
+    'set_group_ban',
+    'get_essence_msg_list',
+    'set_group_whole_ban',
+    'set_group_portrait',
+    'set_group_admin',
+    'set_group_card',
+    'set_essence_msg',
+    'set_group_name',
+    'delete_essence_msg',
+    'set_group_leave',
+    '_send_group_notice',
+    'set_group_special_title',
+    '_get_group_notice',
+    'set_group_add_request',
+    'get_group_info',
+    'get_group_list',
+    '_del_group_notice',
+    'get_group_member_info',
+    'get_group_member_list',
+    'get_group_honor_info',
+    'get_group_info_ex',
+    'get_group_at_all_remain',
+    'get_group_shut_list',
+    'get_group_ignored_notifies',
+    'set_group_sign',
+    'send_group_sign',
+    'move_group_file',
+    'trans_group_file',
+    'rename_group_file',
+    'get_file',
+    'upload_group_file',
+    'create_group_file_folder',
+    'delete_group_file',
+    'delete_group_folder',
+    'upload_private_file',
+    'get_group_file_system_info',
+    'download_file',
+    'get_group_root_files',
+    'get_group_files_by_folder',
+    'get_group_file_url',
+    'get_private_file_url',
+    'get_clientkey',
+    'get_cookies',
+    'get_csrf_token',
+    'get_credentials',
+    'nc_get_rkey',
+    'get_rkey',
+    'get_rkey_server',
+    'ocr_image',
+    '.ocr_image',
+    'translate_en2zh',
+    'set_input_status',
+    '.handle_quick_operation',
+    'can_send_image',
+    'can_send_record',
+    'get_ai_characters',
+    'get_ai_record',
+    'get_robot_uin_range',
+    'bot_exit',
+    'send_packet',
+    'get_packet_status',
+    'get_version_info',
+    'get_guild_list',
+    'get_guild_service_profile',
+    'check_url_safely',
+    'click_inline_keyboard_button',
+    'get_collection_list',
+    'get_group_ignore_add_request',
+    'fetch_user_profile_like',
+    '.get_word_slices',
+})
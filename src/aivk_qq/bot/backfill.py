@@ -0,0 +1,231 @@
+"""
+断线补拉
+
+连接断开期间 NapCat 推送的事件会丢失。Backfill 记录每个会话最后看到的消息，
+重连后用 get_group_msg_history / get_friend_msg_history 拉取断线期间的消息:
+
+- 多个会话并发拉取，受 max_concurrency 限制；
+- 单个会话一次拉取 page_size 条，不足以覆盖断线区间时按 message_seq 向前翻页，最多 max_messages 条；
+- 按 message_id 去重（包括重连后已经实时收到的消息），按时间顺序注入事件总线；
+- 补拉的事件带有 "backfilled": True，处理器可以据此忽略（例如不回复过时的消息）。
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from .bus import Event, EventBus
+from .client import ActionCaller, ActionError
+from .shard import conversation_key
+
+logger = logging.getLogger("aivk.qq.bot.backfill")
+
+
+@dataclass(slots=True)
+class Cursor:
+    """会话的补拉游标"""
+
+    message_type: str
+    target: int
+    last_id: Any = None
+    last_time: int = 0
+    seen: deque[Any] = field(default_factory=lambda: deque(maxlen=256))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "message_type": self.message_type,
+            "target": self.target,
+            "last_id": self.last_id,
+            "last_time": self.last_time,
+        }
+
+
+class Backfill:
+    """
+    断线补拉
+
+    用法:
+        backfill = Backfill(conn, bus)
+        backfill.attach(bus)
+        conn.add_connect_listener(backfill.run)
+
+    Args:
+        caller: 调用历史消息接口的连接
+        bus: 补拉的事件注入该总线
+        max_concurrency: 同时补拉的会话数
+        page_size: 每次拉取的消息数
+        max_messages: 单个会话最多补拉的消息数
+        max_conversations: 最多跟踪的会话数（LRU）
+        horizon: 只补拉最近 horizon 秒内活跃过的会话
+    """
+
+    def __init__(
+        self,
+        caller: ActionCaller,
+        bus: EventBus,
+        *,
+        max_concurrency: int = 4,
+        page_size: int = 50,
+        max_messages: int = 200,
+        max_conversations: int = 2048,
+        horizon: float = 86400.0,
+    ) -> None:
+        self.caller = caller
+        self.bus = bus
+        self.max_concurrency = max_concurrency
+        self.page_size = page_size
+        self.max_messages = max_messages
+        self.max_conversations = max_conversations
+        self.horizon = horizon
+        self._cursors: OrderedDict[str, Cursor] = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.injected = 0
+        self.runs = 0
+
+    @property
+    def cursors(self) -> dict[str, Cursor]:
+        return dict(self._cursors)
+
+    def attach(self, bus: EventBus) -> None:
+        bus.add_handler(self._on_message, "message")
+
+    async def _on_message(self, event: Event) -> None:
+        self.observe(event)
+
+    def observe(self, event: Event) -> bool:
+        """
+        记录一条消息
+
+        Returns:
+            bool: 是否是第一次看到该消息
+        """
+        message_type = event.get("message_type")
+        if message_type == "group":
+            target = event.get("group_id")
+        elif message_type == "private":
+            target = event.get("user_id")
+        else:
+            return True
+        if target is None:
+            return True
+        key = conversation_key(event)
+        cursor = self._cursors.get(key)
+        if cursor is None:
+            cursor = self._cursors[key] = Cursor(message_type, int(target))
+            while len(self._cursors) > self.max_conversations:
+                self._cursors.popitem(last=False)
+        else:
+            self._cursors.move_to_end(key)
+        message_id = event.get("message_id")
+        if message_id is not None:
+            if message_id in cursor.seen:
+                return False
+            cursor.seen.append(message_id)
+        stamp = int(event.get("time") or 0)
+        if stamp >= cursor.last_time:
+            cursor.last_time = stamp
+            cursor.last_id = message_id
+        return True
+
+    def dump(self) -> dict[str, dict[str, Any]]:
+        """游标与去重窗口的快照"""
+        return {key: {**cursor.to_dict(), "seen": list(cursor.seen)} for key, cursor in self._cursors.items()}
+
+    def restore(self, cursors: dict[str, dict[str, Any]]) -> None:
+        """从快照恢复游标（warm restart），重连后从快照时的位置补拉"""
+        for key, data in cursors.items():
+            if key not in self._cursors:
+                cursor = Cursor(
+                    data["message_type"], int(data["target"]), data.get("last_id"), int(data.get("last_time") or 0)
+                )
+                cursor.seen.extend(data.get("seen") or ())
+                self._cursors[key] = cursor
+        while len(self._cursors) > self.max_conversations:
+            self._cursors.popitem(last=False)
+
+    async def _history(self, cursor: Cursor, message_seq: Any = None) -> list[Event]:
+        if cursor.message_type == "group":
+            action, params = "get_group_msg_history", {"group_id": cursor.target}
+        else:
+            action, params = "get_friend_msg_history", {"user_id": cursor.target}
+        params["count"] = self.page_size
+        if message_seq is not None:
+            params["message_seq"] = message_seq
+        response = await self.caller.execute(action, params)
+        if response.get("status") != "ok":
+            raise ActionError(f"{action} 失败: retcode={response.get('retcode')}")
+        return list((response.get("data") or {}).get("messages") or [])
+
+    async def _fill(self, key: str, cursor: Cursor, since: int) -> int:
+        collected: dict[Any, Event] = {}
+        message_seq: Any = None
+        while len(collected) < self.max_messages:
+            page = await self._history(cursor, message_seq)
+            if not page:
+                break
+            page.sort(key=lambda item: item.get("time") or 0)
+            for message in page:
+                if (message.get("time") or 0) >= since:
+                    collected.setdefault(message.get("message_id"), message)
+            oldest = page[0]
+            # 本页最早的消息已早于游标，说明断线区间已经覆盖
+            if (oldest.get("time") or 0) < since or len(page) < self.page_size:
+                break
+            next_seq = oldest.get("message_seq", oldest.get("message_id"))
+            if next_seq == message_seq:
+                break
+            message_seq = next_seq
+
+        injected = 0
+        for message in sorted(collected.values(), key=lambda item: item.get("time") or 0):
+            if not self.observe(message):
+                continue
+            message = dict(message)
+            message.setdefault("post_type", "message")
+            message["backfilled"] = True
+            await self.bus.dispatch(message)
+            injected += 1
+        if injected:
+            logger.info(f"补拉 {key}: {injected} 条消息")
+        return injected
+
+    async def run(self) -> int:
+        """
+        补拉所有活跃会话（作为连接监听器在重连后调用）
+
+        Returns:
+            int: 注入的消息数
+        """
+        if not self._cursors:
+            return 0
+        # 在第一次 await 之前记下各会话的游标：重连后实时收到的消息会推进游标，不能以它为起点
+        cutoff = time.time() - self.horizon
+        targets = [
+            (key, cursor, cursor.last_time) for key, cursor in self._cursors.items() if cursor.last_time >= cutoff
+        ]
+        async with self._lock:
+            self.runs += 1
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def fill(key: str, cursor: Cursor, since: int) -> int:
+                async with semaphore:
+                    try:
+                        return await self._fill(key, cursor, since)
+                    except ActionError as e:
+                        logger.warning(f"补拉 {key} 失败: {e}")
+                        return 0
+
+            started = time.perf_counter()
+            counts = await asyncio.gather(*(fill(key, cursor, since) for key, cursor, since in targets))
+            total = sum(counts)
+            self.injected += total
+            logger.info(
+                f"补拉完成: {len(targets)} 个会话，{total} 条消息，用时 {(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+            return total
+
+    def stats(self) -> dict[str, Any]:
+        return {"conversations": len(self._cursors), "runs": self.runs, "injected": self.injected}
@@ -0,0 +1,256 @@
+"""
+事件总线
+
+负责把NapCat推送的事件分发给已注册的处理器。
+客户端（WS/SSE/反向WS服务器）收到事件后调用 `EventBus.dispatch`，
+录制回放（capture/replay）也通过同一个入口注入事件。
+
+处理器可以返回 Action（或 Action 列表），总线会通过绑定的动作客户端执行；
+同步的 CPU 密集型处理器可以用 executor="thread"/"process" 卸载到池中运行。
+"""
+
+import asyncio
+import inspect
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .offload import Action, ExecutorHint, OffloadPool, check_handler, collect_actions
+from .trace import span, tracer
+
+if TYPE_CHECKING:
+    from .client import ActionCaller
+
+logger = logging.getLogger("aivk.qq.bot.bus")
+
+Event = dict[str, Any]
+Handler = Callable[[Event], Awaitable[Any]] | Callable[[Event], Any]
+
+
+@dataclass(slots=True)
+class HandlerEntry:
+    """已注册的处理器及其过滤条件"""
+
+    func: Handler
+    post_type: str | None = None
+    match: dict[str, Any] = field(default_factory=dict)
+    executor: ExecutorHint = "async"
+
+    def accepts(self, event: Event) -> bool:
+        if self.post_type is not None and event.get("post_type") != self.post_type:
+            return False
+        for key, value in self.match.items():
+            if event.get(key) != value:
+                return False
+        return True
+
+
+class EventBus:
+    """
+    事件总线
+
+    用法:
+        bus = EventBus()
+
+        @bus.on_message("group")
+        async def handle(event): ...
+
+        await bus.dispatch(event)
+
+    Args:
+        caller: 执行处理器返回的 Action 所用的动作客户端
+        offload: 线程池/进程池，为 None 时按需创建默认池
+    """
+
+    def __init__(self, caller: "ActionCaller | None" = None, offload: OffloadPool | None = None) -> None:
+        self._handlers: list[HandlerEntry] = []
+        self._filters: list[Callable[[Event], bool]] = []
+        self.caller = caller
+        self.offload = offload or OffloadPool()
+        self.dispatched = 0
+        self._active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closing = False
+        self._close_hooks: list[Callable[[], Awaitable[Any] | Any]] = []
+        self._metrics: dict[str, Callable[[], Any]] = {}
+
+    @property
+    def handlers(self) -> list[HandlerEntry]:
+        return list(self._handlers)
+
+    def add_handler(
+        self,
+        func: Handler,
+        post_type: str | None = None,
+        *,
+        executor: ExecutorHint = "async",
+        **match: Any,
+    ) -> HandlerEntry:
+        """
+        注册处理器
+
+        Args:
+            func: 处理函数，参数为事件字典；executor="async" 时必须是协程函数
+            post_type: 只处理该 post_type 的事件，None 表示全部
+            executor: "async" 在事件循环中运行；"thread"/"process" 在线程池/进程池中运行同步函数
+            **match: 额外的等值过滤条件，例如 message_type="group"
+
+        Raises:
+            ValueError: 处理器与 executor 不匹配
+        """
+        check_handler(func, executor)
+        entry = HandlerEntry(func=func, post_type=post_type, match=match, executor=executor)
+        self._handlers.append(entry)
+        return entry
+
+    def remove_handler(self, func: Handler) -> None:
+        self._handlers = [entry for entry in self._handlers if entry.func is not func]
+
+    def on(
+        self, post_type: str | None = None, *, executor: ExecutorHint = "async", **match: Any
+    ) -> Callable[[Handler], Handler]:
+        """装饰器：注册处理器"""
+
+        def decorator(func: Handler) -> Handler:
+            self.add_handler(func, post_type, executor=executor, **match)
+            return func
+
+        return decorator
+
+    def on_message(
+        self, message_type: str | None = None, *, executor: ExecutorHint = "async"
+    ) -> Callable[[Handler], Handler]:
+        """装饰器：注册消息处理器，message_type 为 "private"/"group"/None"""
+        if message_type is None:
+            return self.on("message", executor=executor)
+        return self.on("message", executor=executor, message_type=message_type)
+
+    def add_filter(self, predicate: Callable[[Event], bool]) -> None:
+        """添加前置过滤器，任一过滤器返回 False 的事件不会分发给处理器"""
+        self._filters.append(predicate)
+
+    def remove_filter(self, predicate: Callable[[Event], bool]) -> None:
+        self._filters.remove(predicate)
+
+    def add_close_hook(self, hook: Callable[[], Awaitable[Any] | Any]) -> None:
+        """注册关闭时调用的回调（可以是协程函数），aclose 按注册的相反顺序执行"""
+        self._close_hooks.append(hook)
+
+    def close(self) -> None:
+        """关闭线程池/进程池"""
+        self.offload.shutdown()
+
+    async def aclose(self) -> None:
+        """执行关闭回调（如停止插件管理器、调用插件 teardown），再关闭线程池/进程池"""
+        hooks, self._close_hooks = self._close_hooks[::-1], []
+        for hook in hooks:
+            try:
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"关闭回调 {hook!r} 失败: {e!r}")
+        self.close()
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        停止接收新事件，等待进行中的分发（包括处理器返回的动作）完成
+
+        Returns:
+            期限内全部完成时为 True
+        """
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except TimeoutError:
+            logger.warning(f"{timeout:.1f}s 内仍有 {self._active} 个事件未处理完")
+            return False
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "handlers": len(self._handlers),
+            "dispatched": self.dispatched,
+            "active": self._active,
+            "closing": self._closing,
+        }
+
+    def add_metrics(self, name: str, provider: Callable[[], Any]) -> None:
+        """
+        注册处理器入口（应用、插件管理器等）的指标
+
+        run_bot 把 metrics() 作为 app 项报告到运行时的指标端点。
+        """
+        self._metrics[name] = provider
+
+    def metrics(self) -> dict[str, Any]:
+        data: dict[str, Any] = {}
+        for name, provider in self._metrics.items():
+            try:
+                data[name] = provider()
+            except Exception as e:
+                data[name] = {"error": repr(e)}
+        return data
+
+    async def dispatch(self, event: Event) -> None:
+        """
+        分发事件到所有匹配的处理器
+
+        处理器并发执行，单个处理器抛出的异常只记录日志，不影响其它处理器。
+        处理器返回的 Action 依次通过 caller 发出。
+        被采样的事件在 trace.tracer 中记录各阶段耗时。
+        drain() 之后到达的事件被丢弃。
+        """
+        if self._closing:
+            return
+        self.dispatched += 1
+        self._active += 1
+        self._idle.clear()
+        try:
+            await self._dispatch(event)
+        finally:
+            self._active -= 1
+            if not self._active:
+                self._idle.set()
+
+    async def _dispatch(self, event: Event) -> None:
+        with tracer.root("dispatch", event) as root:
+            with span("filter"):
+                for predicate in self._filters:
+                    if not predicate(event):
+                        if root is not None:
+                            root.attrs["filtered"] = getattr(predicate, "__qualname__", repr(predicate))
+                        return
+            entries = [entry for entry in self._handlers if entry.accepts(event)]
+            if not entries:
+                return
+            results = await asyncio.gather(
+                *(self._invoke(entry, event) for entry in entries), return_exceptions=True
+            )
+        for entry, result in zip(entries, results):
+            if isinstance(result, BaseException):
+                logger.error(
+                    f"处理器 {getattr(entry.func, '__qualname__', entry.func)} 执行失败: {result!r}",
+                    exc_info=result,
+                )
+
+    async def _invoke(self, entry: HandlerEntry, event: Event) -> None:
+        with span("handler", handler=entry.func, executor=entry.executor):
+            if entry.executor == "async":
+                result = await entry.func(event)
+            else:
+                result = await self.offload.run(entry.executor, entry.func, event)
+        actions = collect_actions(result)
+        if actions:
+            await self.send(actions)
+
+    async def send(self, actions: list[Action]) -> None:
+        """通过绑定的动作客户端依次执行 Action"""
+        if self.caller is None:
+            logger.warning(f"事件总线未绑定动作客户端，丢弃 {len(actions)} 个动作")
+            return
+        for action in actions:
+            with span("action", action=action.action):
+                await self.caller.execute(action.action, action.params)
@@ -0,0 +1,106 @@
+"""
+带过期时间的 LRU 缓存
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from typing import Any
+
+
+class TTLCache:
+    """
+    LRU + TTL 缓存
+
+    Args:
+        maxsize: 最大条目数，超过后淘汰最久未使用的条目
+        ttl: 默认过期时间（秒），<= 0 表示不过期
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires, value = item
+        if expires and expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl > 0 else 0.0
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """未过期的条目快照"""
+        now = time.monotonic()
+        return [(key, value) for key, (expires, value) in self._data.items() if not expires or expires >= now]
+
+    def dump(self) -> list[list[Any]]:
+        """
+        未过期条目的快照 [键, 过期时刻（墙钟）, 值]，过期时刻为 0 表示不过期；按最近使用顺序排列
+
+        与 TokenBucket.dump 一样记录墙钟时间，停机期间同样计入有效期。
+        """
+        now = time.monotonic()
+        wall = time.time()
+        return [
+            [key, wall + (expires - now) if expires else 0.0, value]
+            for key, (expires, value) in self._data.items()
+            if not expires or expires >= now
+        ]
+
+    def restore(self, entries: Iterable[list[Any]]) -> int:
+        """
+        从快照恢复条目，扣除快照之后经过的时间（包括停机时间），已过期的条目被丢弃
+
+        Returns:
+            int: 恢复的条目数
+        """
+        from .snapshot import freeze
+
+        now = time.monotonic()
+        wall = time.time()
+        count = 0
+        for key, expires_at, value in entries:
+            key = freeze(key)
+            if key in self._data:
+                continue
+            if expires_at and expires_at <= wall:
+                continue
+            self._data[key] = (now + (expires_at - wall) if expires_at else 0.0, value)
+            count += 1
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return count
+
+
+_MISSING = object()
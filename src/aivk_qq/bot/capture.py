@@ -0,0 +1,254 @@
+"""
+流量录制与回放
+
+CaptureWriter 把客户端/服务器收发的原始帧连同时间戳写入分段的 gzip 日志，
+replay() 再把录制的入站事件按原始节奏（或尽可能快）送回事件总线，
+既可用于复现线上问题，也可作为路由/解析路径的基准语料与回归输入。
+
+段文件格式: 每行一个 JSON 对象
+    {"ts": 墙钟时间, "mono": 单调时钟, "dir": "in"|"out", "src": 来源名称, "raw": 原始帧文本}
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Literal
+
+from aivk.api import AivkIO
+
+from .bus import EventBus
+
+logger = logging.getLogger("aivk.qq.bot.capture")
+
+Direction = Literal["in", "out"]
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+
+def default_capture_dir() -> Path:
+    """默认录制目录: <AIVK_ROOT>/data/qq/capture"""
+    return AivkIO.get_aivk_root() / "data" / "qq" / "capture"
+
+
+@dataclass(slots=True, frozen=True)
+class Frame:
+    """一条录制的原始帧"""
+
+    ts: float
+    mono: float
+    direction: Direction
+    src: str
+    raw: str
+
+    def to_line(self) -> str:
+        return json.dumps(
+            {"ts": self.ts, "mono": self.mono, "dir": self.direction, "src": self.src, "raw": self.raw},
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_line(cls, line: str) -> "Frame":
+        data = json.loads(line)
+        return cls(ts=data["ts"], mono=data["mono"], direction=data["dir"], src=data["src"], raw=data["raw"])
+
+
+class CaptureWriter:
+    """
+    分段压缩录制器
+
+    Args:
+        directory: 段文件所在目录，默认 <AIVK_ROOT>/data/qq/capture
+        segment_bytes: 单个段的未压缩字节上限，超过后切换到新段
+        segment_seconds: 单个段的最长时长（秒）
+        compresslevel: gzip 压缩级别，录制路径上默认取较快的级别
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        *,
+        segment_bytes: int = 64 * 1024 * 1024,
+        segment_seconds: float = 3600.0,
+        compresslevel: int = 3,
+    ) -> None:
+        self.directory = Path(directory) if directory else default_capture_dir()
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.compresslevel = compresslevel
+        self._file: IO[str] | None = None
+        self._segment_started = 0.0
+        self._segment_size = 0
+        self._segment_index = 0
+        self.frames = 0
+
+    def record(self, direction: Direction, raw: str | bytes, src: str = "") -> None:
+        """记录一帧，raw 为线上收发的原始文本"""
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", errors="replace")
+        frame = Frame(ts=time.time(), mono=time.monotonic(), direction=direction, src=src, raw=raw)
+        line = frame.to_line() + "\n"
+        fp = self._current_segment(len(line))
+        fp.write(line)
+        self._segment_size += len(line)
+        self.frames += 1
+
+    def inbound(self, raw: str | bytes, src: str = "") -> None:
+        self.record("in", raw, src)
+
+    def outbound(self, raw: str | bytes, src: str = "") -> None:
+        self.record("out", raw, src)
+
+    def _current_segment(self, incoming: int) -> IO[str]:
+        now = time.monotonic()
+        if self._file is not None and (
+            self._segment_size + incoming > self.segment_bytes
+            or now - self._segment_started > self.segment_seconds
+        ):
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._segment_index += 1
+            name = f"capture-{time.strftime('%Y%m%d-%H%M%S')}-{self._segment_index:04d}{SEGMENT_SUFFIX}"
+            path = self.directory / name
+            self._file = gzip.open(path, "at", encoding="utf-8", compresslevel=self.compresslevel)
+            self._segment_started = now
+            self._segment_size = 0
+            logger.info(f"开始写入录制段: {path}")
+        return self._file
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def iter_segments(path: str | Path) -> list[Path]:
+    """返回录制段文件列表（按文件名排序）；path 可以是目录或单个段文件"""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    return sorted(path.glob(f"*{SEGMENT_SUFFIX}"))
+
+
+def read_frames(path: str | Path, direction: Direction | None = None) -> Iterator[Frame]:
+    """
+    依次读取录制帧
+
+    进程崩溃时最后一个段文件的 gzip 尾部可能不完整，读到最后一个完整的帧为止。
+
+    Args:
+        path: 录制目录或单个段文件
+        direction: 只读取指定方向的帧，None 表示全部
+    """
+    for segment in iter_segments(path):
+        with gzip.open(segment, "rt", encoding="utf-8") as fp:
+            try:
+                for line in fp:
+                    if not line.endswith("\n"):
+                        # 截断处只写了一半的行
+                        break
+                    if not line.strip():
+                        continue
+                    frame = Frame.from_line(line)
+                    if direction is None or frame.direction == direction:
+                        yield frame
+            except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+                logger.warning(f"录制段 {segment.name} 不完整，读到最后一个完整的帧为止: {e!r}")
+
+
+@dataclass(slots=True)
+class ReplayStats:
+    """回放统计"""
+
+    frames: int = 0
+    events: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.events / self.elapsed if self.elapsed > 0 else 0.0
+
+
+async def replay(
+    bus: EventBus,
+    path: str | Path,
+    *,
+    speed: float = 1.0,
+    src: str | None = None,
+    max_gap: float = 5.0,
+) -> ReplayStats:
+    """
+    把录制的入站帧按顺序送回事件总线
+
+    每个事件都会等待 `bus.dispatch` 完成后再送入下一个，保证回放顺序确定。
+    相邻帧的间隔取单调时钟之差；录制进程重启后单调时钟会重置，此时改用墙钟之差，
+    并把间隔限制在 [0, max_gap] 内，跨越停机时间的录制不会卡住回放。
+
+    Args:
+        bus: 目标事件总线
+        path: 录制目录或段文件
+        speed: 回放倍速；1.0 为原始节奏，0 表示不等待、尽可能快
+        src: 只回放指定来源的帧
+        max_gap: 相邻帧的最大等待间隔（秒，按原始节奏计）
+
+    Returns:
+        ReplayStats: 回放统计
+    """
+    stats = ReplayStats()
+    started = time.monotonic()
+    previous: Frame | None = None
+    # 按原始节奏应当到达当前帧的时刻（相对 started）
+    schedule = 0.0
+
+    for frame in read_frames(path, direction="in"):
+        if src is not None and frame.src != src:
+            continue
+        stats.frames += 1
+
+        if speed > 0:
+            if previous is not None:
+                gap = frame.mono - previous.mono
+                if gap < 0:
+                    gap = frame.ts - previous.ts
+                schedule += min(max(gap, 0.0), max_gap) / speed
+            previous = frame
+            delay = schedule - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        try:
+            event = json.loads(frame.raw)
+        except json.JSONDecodeError:
+            stats.skipped += 1
+            continue
+        # API 响应帧（带 echo、无 post_type）不是事件
+        if not isinstance(event, dict) or "post_type" not in event:
+            stats.skipped += 1
+            continue
+
+        await bus.dispatch(event)
+        stats.events += 1
+
+    stats.elapsed = time.monotonic() - started
+    logger.info(
+        f"回放完成: {stats.events} 个事件, 跳过 {stats.skipped} 帧, 用时 {stats.elapsed:.3f}s ({stats.rate:.0f} events/s)"
+    )
+    return stats
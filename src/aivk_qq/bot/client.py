@@ -0,0 +1,448 @@
+"""
+NapCat 传输层
+
+- HttpActionClient: 通过 HTTP 调用 NapCat 动作（对应 HTTP_SERVER 端口）
+- WSClient: 正向 WebSocket，既接收事件也调用动作（对应 WS_SERVER 端口）
+- WSServer: 反向 WebSocket 服务器，由 NapCat 主动连接
+
+所有传输都提供 `execute(action, params)` 并返回 OneBot 响应字典，
+都可以传入 CaptureWriter 录制原始收发帧。
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Protocol
+
+import aiohttp
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.exceptions import ConnectionClosed, InvalidStatus, InvalidURI, WebSocketException
+
+from .bus import Event, EventBus
+from .capture import CaptureWriter
+from .trace import received_at, span, tracer
+
+logger = logging.getLogger("aivk.qq.bot.client")
+
+
+class ActionError(Exception):
+    """动作调用失败（连接不可用、超时等传输层错误）"""
+
+
+class ActionNotSent(ActionError):
+    """
+    请求确定没有发出（未连接、连接建立失败），NapCat 不可能执行，可以安全地重发
+
+    其他 ActionError（超时、发出后连接断开）时 NapCat 可能已经执行了动作。
+    """
+
+
+class ActionQueued(ActionError):
+    """
+    请求暂时没有发出，但已经写入持久化发件箱，之后会自动补发（见 outbox.py）
+
+    调用方不要重发，否则会重复；需要确认结果时用同一个幂等键再次调用。
+    """
+
+
+class ActionFailed(ActionError):
+    """NapCat 返回了非 ok 的响应"""
+
+    def __init__(self, action: str, response: dict[str, Any]) -> None:
+        self.action = action
+        self.response = response
+        self.retcode = response.get("retcode")
+        message = response.get("wording") or response.get("message") or ""
+        super().__init__(f"{action} 失败: retcode={self.retcode} {message}".rstrip())
+
+
+class ActionCaller(Protocol):
+    """可以调用 NapCat 动作的对象"""
+
+    async def execute(
+        self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None
+    ) -> dict[str, Any]: ...
+
+
+def _auth_headers(token: str | None) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+class HttpActionClient:
+    """
+    HTTP 动作客户端
+
+    Args:
+        host: NapCat HTTP 服务器地址
+        port: NapCat HTTP 服务器端口
+        token: 访问令牌
+        name: 客户端名称，用于日志与录制来源
+        capture: 录制器，为 None 时不录制
+        timeout: 默认超时（秒）
+        limit: 连接池最大连接数
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 10146,
+        token: str | None = None,
+        *,
+        name: str = "http",
+        capture: CaptureWriter | None = None,
+        timeout: float = 30.0,
+        limit: int = 100,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.token = token
+        self.name = name
+        self.capture = capture
+        self.timeout = timeout
+        self.limit = limit
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                headers=_auth_headers(self.token),
+                connector=aiohttp.TCPConnector(limit=self.limit),
+            )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def execute(
+        self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None
+    ) -> dict[str, Any]:
+        await self.start()
+        assert self._session is not None
+        body = json.dumps(params or {}, ensure_ascii=False)
+        if self.capture is not None:
+            self.capture.outbound(json.dumps({"action": action, "params": params or {}}, ensure_ascii=False), self.name)
+        try:
+            with span("napcat", transport=self.name, action=action):
+                async with self._session.post(
+                    f"/{action}",
+                    data=body,
+                    headers={"Content-Type": "application/json"},
+                    timeout=aiohttp.ClientTimeout(total=timeout or self.timeout),
+                ) as response:
+                    text = await response.text()
+        except aiohttp.ClientConnectorError as e:
+            raise ActionNotSent(f"{self.name}: 连接 NapCat 失败，{action} 未发出: {e!r}") from e
+        except (aiohttp.ClientError, TimeoutError) as e:
+            raise ActionError(f"{self.name}: 调用 {action} 失败: {e!r}") from e
+        if self.capture is not None:
+            self.capture.inbound(text, self.name)
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ActionError(f"{self.name}: {action} 返回了无法解析的响应: {text[:200]!r}") from e
+
+
+class _EchoMixin:
+    """基于 echo 字段匹配请求与响应的公共逻辑"""
+
+    name: str
+    capture: CaptureWriter | None
+    bus: EventBus | None
+    timeout: float
+    _tasks: set[asyncio.Task[Any]]
+
+    def _init_echo(self) -> None:
+        self._pending: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        self._echo_seq = itertools.count(1)
+        self._connect_listeners: list[Callable[[], Awaitable[Any]]] = []
+
+    def add_connect_listener(self, listener: Callable[[], Awaitable[Any]]) -> None:
+        """注册连接（包括重连）成功后调用的协程函数，例如断线期间的消息补拉"""
+        self._connect_listeners.append(listener)
+
+    def _notify_connected(self) -> None:
+        for listener in self._connect_listeners:
+            task = asyncio.create_task(listener())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _next_echo(self) -> str:
+        return f"{self.name}-{next(self._echo_seq)}"
+
+    async def _handle_frame(self, raw: str | bytes) -> None:
+        received = time.time_ns() if tracer.enabled else 0
+        if self.capture is not None:
+            self.capture.inbound(raw, self.name)
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"{self.name}: 收到无法解析的帧: {raw[:200]!r}")
+            return
+        if not isinstance(data, dict):
+            return
+        echo = data.get("echo")
+        if echo is not None and "post_type" not in data:
+            future = self._pending.pop(str(echo), None)
+            if future is not None and not future.done():
+                future.set_result(data)
+            return
+        if self.bus is not None and "post_type" in data:
+            await self._on_event(data, received)
+
+    async def _on_event(self, event: Event, received: int = 0) -> None:
+        assert self.bus is not None
+        # 不阻塞读循环，事件处理在独立任务中运行；任务复制上下文时带上收帧时间
+        with received_at(received):
+            task = asyncio.create_task(self.bus.dispatch(event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _fail_pending(self, reason: str) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ActionError(reason))
+        self._pending.clear()
+
+    async def _send_action(
+        self, conn: ClientConnection | ServerConnection, action: str, params: dict[str, Any] | None, timeout: float | None
+    ) -> dict[str, Any]:
+        echo = self._next_echo()
+        payload = json.dumps({"action": action, "params": params or {}, "echo": echo}, ensure_ascii=False)
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._pending[echo] = future
+        if self.capture is not None:
+            self.capture.outbound(payload, self.name)
+        try:
+            with span("napcat", transport=self.name, action=action):
+                await conn.send(payload)
+                return await asyncio.wait_for(future, timeout or self.timeout)
+        except TimeoutError as e:
+            raise ActionError(f"{self.name}: 调用 {action} 超时") from e
+        except ConnectionClosed as e:
+            # 只有 send() 会抛出 ConnectionClosed：帧没有写出
+            raise ActionNotSent(f"{self.name}: 连接已关闭，{action} 未发出") from e
+        finally:
+            self._pending.pop(echo, None)
+
+
+class WSClient(_EchoMixin):
+    """
+    正向 WebSocket 客户端，自动重连
+
+    Args:
+        host: NapCat WS 服务器地址
+        port: NapCat WS 服务器端口
+        token: 访问令牌
+        bus: 收到的事件分发到该总线，为 None 时只用于调用动作
+        name: 客户端名称
+        capture: 录制器
+        path: WS 路径
+        reconnect_interval: 断线重连间隔（秒）
+        timeout: 动作调用默认超时（秒）
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 10147,
+        token: str | None = None,
+        *,
+        bus: EventBus | None = None,
+        name: str = "ws",
+        capture: CaptureWriter | None = None,
+        path: str = "/",
+        reconnect_interval: float = 3.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.token = token
+        self.bus = bus
+        self.name = name
+        self.capture = capture
+        self.path = path
+        self.reconnect_interval = reconnect_interval
+        self.timeout = timeout
+        self._conn: ClientConnection | None = None
+        self._connected = asyncio.Event()
+        self._runner: asyncio.Task[None] | None = None
+        self._tasks: set[asyncio.Task[Any]] = set()
+        self._init_echo()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}{self.path}"
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    async def start(self, wait: bool = True) -> None:
+        """
+        启动读循环；wait 为 True 时等待首次连接成功
+
+        Raises:
+            InvalidStatus / InvalidURI: 握手被拒绝（token 错误、路径错误等），重连也不会成功
+        """
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+        if wait:
+            connected = asyncio.ensure_future(self._connected.wait())
+            try:
+                await asyncio.wait({connected, self._runner}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                connected.cancel()
+            if self._runner.done():
+                self._runner.result()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except (asyncio.CancelledError, InvalidStatus, InvalidURI):
+                pass
+            self._runner = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with connect(self.url, additional_headers=_auth_headers(self.token)) as conn:
+                    self._conn = conn
+                    self._connected.set()
+                    logger.info(f"{self.name}: 已连接 {self.url}")
+                    self._notify_connected()
+                    async for raw in conn:
+                        await self._handle_frame(raw)
+            except asyncio.CancelledError:
+                raise
+            except (InvalidStatus, InvalidURI) as e:
+                # 4xx（鉴权失败、路径错误）与无效地址重试也不会成功，交给 start() 的调用方
+                if isinstance(e, InvalidURI) or 400 <= e.response.status_code < 500:
+                    logger.error(f"{self.name}: 握手被拒绝: {e}")
+                    raise
+                logger.warning(f"{self.name}: 握手失败: {e}，{self.reconnect_interval}s 后重连")
+            except (OSError, WebSocketException) as e:
+                logger.warning(f"{self.name}: 连接断开: {e!r}，{self.reconnect_interval}s 后重连")
+            finally:
+                self._conn = None
+                self._connected.clear()
+                self._fail_pending(f"{self.name}: 连接已断开")
+            await asyncio.sleep(self.reconnect_interval)
+
+    async def execute(
+        self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None
+    ) -> dict[str, Any]:
+        conn = self._conn
+        if conn is None:
+            raise ActionNotSent(f"{self.name}: 未连接")
+        return await self._send_action(conn, action, params, timeout)
+
+
+class WSServer(_EchoMixin):
+    """
+    反向 WebSocket 服务器
+
+    NapCat 以 X-Self-ID 头标识机器人账号，多个账号可以同时连接，
+    调用动作时通过 self_id 选择连接，未指定时使用最近连接的账号。
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+        token: 访问令牌，非空时校验 Authorization 头
+        bus: 事件总线
+        name: 服务器名称
+        capture: 录制器
+        timeout: 动作调用默认超时（秒）
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 10145,
+        token: str | None = None,
+        *,
+        bus: EventBus | None = None,
+        name: str = "ws_server",
+        capture: CaptureWriter | None = None,
+        timeout: float = 30.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.token = token
+        self.bus = bus
+        self.name = name
+        self.capture = capture
+        self.timeout = timeout
+        self._server: Server | None = None
+        self._connections: dict[int, ServerConnection] = {}
+        self._tasks: set[asyncio.Task[Any]] = set()
+        self._init_echo()
+
+    @property
+    def self_ids(self) -> list[int]:
+        return list(self._connections)
+
+    async def start(self) -> None:
+        self._server = await serve(self._handler, self.host, self.port)
+        logger.info(f"{self.name}: 监听 ws://{self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _handler(self, conn: ServerConnection) -> None:
+        headers = conn.request.headers if conn.request is not None else {}
+        if self.token and headers.get("Authorization") != f"Bearer {self.token}":
+            await conn.close(code=1008, reason="unauthorized")
+            return
+        try:
+            self_id = int(headers.get("X-Self-ID", 0))
+        except ValueError:
+            self_id = 0
+        self._connections[self_id] = conn
+        logger.info(f"{self.name}: 机器人 {self_id} 已连接")
+        self._notify_connected()
+        try:
+            async for raw in conn:
+                await self._handle_frame(raw)
+        except ConnectionClosed:
+            pass
+        finally:
+            if self._connections.get(self_id) is conn:
+                del self._connections[self_id]
+            logger.info(f"{self.name}: 机器人 {self_id} 已断开")
+
+    async def execute(
+        self,
+        action: str,
+        params: dict[str, Any] | None = None,
+        *,
+        timeout: float | None = None,
+        self_id: int | None = None,
+    ) -> dict[str, Any]:
+        if self_id is None:
+            if not self._connections:
+                raise ActionNotSent(f"{self.name}: 没有已连接的机器人")
+            conn = next(reversed(self._connections.values()))
+        else:
+            conn = self._connections.get(self_id)
+            if conn is None:
+                raise ActionNotSent(f"{self.name}: 机器人 {self_id} 未连接")
+        return await self._send_action(conn, action, params, timeout)
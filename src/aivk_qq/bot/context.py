@@ -0,0 +1,329 @@
+"""
+会话上下文
+
+为每个会话（群聊/私聊）维护一个滚动的、已渲染好的上下文窗口，随事件增量更新:
+
+    [12:00:01] 张三(10001): @李四 看这个 [图片]
+    [12:00:05] 李四(10002): [回复 张三] 好
+
+- CQ 码/消息段折叠为简短的占位符，@ 与回复解析为昵称；
+- 昵称来自事件中的 sender，缓存在 TTLCache 中；
+- 每个会话按 token 预算与消息条数裁剪最旧的行，渲染结果随写入增量维护，
+  读取 get_context() 不需要拉取历史或重新格式化。
+
+token 数为估算值：CJK 字符按 1 个计，其余字符按 4 个计 1 个。
+"""
+
+import html
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any
+
+from .bus import Event, EventBus
+from .cache import TTLCache
+from .shard import conversation_key
+
+_CQ = re.compile(r"\[CQ:([A-Za-z_]+)((?:,[^\]]*)?)\]")
+
+_PLACEHOLDERS: dict[str, str] = {
+    "face": "[表情]",
+    "mface": "[表情]",
+    "image": "[图片]",
+    "record": "[语音]",
+    "video": "[视频]",
+    "file": "[文件]",
+    "forward": "[合并转发]",
+    "node": "[合并转发]",
+    "json": "[卡片]",
+    "xml": "[卡片]",
+    "markdown": "[卡片]",
+    "dice": "[骰子]",
+    "rps": "[猜拳]",
+    "poke": "[戳一戳]",
+    "music": "[音乐]",
+    "contact": "[名片]",
+    "location": "[位置]",
+    "share": "[链接]",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数"""
+    cjk = sum(1 for ch in text if ord(ch) >= 0x2E80)
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def parse_cq(message: str) -> list[dict[str, Any]]:
+    """把 CQ 码字符串解析为消息段列表"""
+    segments: list[dict[str, Any]] = []
+    pos = 0
+    for match in _CQ.finditer(message):
+        if match.start() > pos:
+            segments.append({"type": "text", "data": {"text": html.unescape(message[pos : match.start()])}})
+        data: dict[str, str] = {}
+        for item in match.group(2).split(",")[1:]:
+            key, _, value = item.partition("=")
+            data[key] = value.replace("&#44;", ",").replace("&#91;", "[").replace("&#93;", "]").replace("&amp;", "&")
+        segments.append({"type": match.group(1), "data": data})
+        pos = match.end()
+    if pos < len(message):
+        segments.append({"type": "text", "data": {"text": html.unescape(message[pos:])}})
+    return segments
+
+
+@dataclass(slots=True)
+class ContextLine:
+    message_id: Any
+    user_id: int | None
+    name: str
+    text: str
+    tokens: int
+
+
+class ConversationContext:
+    """单个会话的上下文窗口"""
+
+    __slots__ = ("lines", "tokens", "rendered", "updated", "_by_id")
+
+    def __init__(self) -> None:
+        self.lines: deque[ContextLine] = deque()
+        self.tokens = 0
+        self.rendered = ""
+        self.updated = 0.0
+        self._by_id: dict[Any, ContextLine] = {}
+
+    def append(self, line: ContextLine, max_tokens: int, max_messages: int) -> None:
+        if line.message_id is not None and line.message_id in self._by_id:
+            return
+        self.lines.append(line)
+        self.tokens += line.tokens
+        if line.message_id is not None:
+            self._by_id[line.message_id] = line
+        self.rendered = f"{self.rendered}\n{line.text}" if self.rendered else line.text
+        self.updated = time.time()
+        self.trim(max_tokens, max_messages)
+
+    def trim(self, max_tokens: int, max_messages: int) -> None:
+        cut = 0
+        while len(self.lines) > 1 and (self.tokens > max_tokens or len(self.lines) > max_messages):
+            old = self.lines.popleft()
+            self.tokens -= old.tokens
+            self._by_id.pop(old.message_id, None)
+            cut += len(old.text) + 1
+        if cut:
+            self.rendered = self.rendered[cut:]
+
+    def remove(self, message_id: Any) -> bool:
+        line = self._by_id.pop(message_id, None)
+        if line is None:
+            return False
+        self.lines.remove(line)
+        self.tokens -= line.tokens
+        self.rendered = "\n".join(item.text for item in self.lines)
+        return True
+
+    def find(self, message_id: Any) -> ContextLine | None:
+        return self._by_id.get(message_id)
+
+    def tail(self, max_tokens: int) -> str:
+        """不超过 max_tokens 的最近若干行"""
+        if max_tokens >= self.tokens:
+            return self.rendered
+        picked: list[str] = []
+        used = 0
+        for line in reversed(self.lines):
+            if used + line.tokens > max_tokens and picked:
+                break
+            picked.append(line.text)
+            used += line.tokens
+        return "\n".join(reversed(picked))
+
+
+class ContextStore:
+    """
+    按会话维护上下文窗口
+
+    用法:
+        contexts = ContextStore(max_tokens=2000)
+        contexts.attach(bus)
+        text = contexts.get_context(group_id=123456)
+
+    Args:
+        max_tokens: 每个会话的 token 预算
+        max_messages: 每个会话保留的最大消息条数
+        max_conversations: 最多跟踪的会话数，超过后淘汰最久未更新的会话
+        nicknames: 昵称缓存，键为 (group_id, user_id)，私聊的 group_id 为 0
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        max_messages: int = 100,
+        max_conversations: int = 1024,
+        nicknames: TTLCache | None = None,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.max_conversations = max_conversations
+        self.nicknames = nicknames or TTLCache(maxsize=65536, ttl=3600)
+        self._conversations: OrderedDict[str, ConversationContext] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._conversations
+
+    def attach(self, bus: EventBus) -> None:
+        """在事件总线上注册消息与撤回处理器"""
+        bus.add_handler(self._on_event, "message")
+        bus.add_handler(self._on_event, "message_sent")
+        bus.add_handler(self._on_recall, "notice")
+
+    async def _on_event(self, event: Event) -> None:
+        self.add_message(event)
+
+    async def _on_recall(self, event: Event) -> None:
+        if event.get("notice_type") in ("group_recall", "friend_recall"):
+            conversation = self._conversations.get(conversation_key(event))
+            if conversation is not None:
+                conversation.remove(event.get("message_id"))
+
+    def nickname(self, group_id: int | None, user_id: Any) -> str:
+        name = self.nicknames.get((int(group_id or 0), str(user_id)))
+        if name is None and group_id:
+            name = self.nicknames.get((0, str(user_id)))
+        return name or str(user_id)
+
+    def _remember(self, event: Event) -> None:
+        sender = event.get("sender") or {}
+        user_id = sender.get("user_id") or event.get("user_id")
+        if user_id is None:
+            return
+        nickname = sender.get("nickname")
+        name = sender.get("card") or nickname
+        if name:
+            self.nicknames.set((int(event.get("group_id") or 0), str(user_id)), name)
+        if nickname:
+            self.nicknames.set((0, str(user_id)), nickname)
+
+    def render_message(self, event: Event, conversation: ConversationContext | None = None) -> str:
+        """把消息折叠为一行纯文本（不含时间与发送者）"""
+        message = event.get("message")
+        if message is None:
+            message = event.get("raw_message", "")
+        segments = parse_cq(message) if isinstance(message, str) else message
+        group_id = event.get("group_id")
+        parts: list[str] = []
+        for segment in segments:
+            kind = segment.get("type")
+            data = segment.get("data") or {}
+            if kind == "text":
+                parts.append(str(data.get("text", "")))
+            elif kind == "at":
+                qq = data.get("qq")
+                parts.append("@全体成员 " if qq == "all" else f"@{data.get('name') or self.nickname(group_id, qq)} ")
+            elif kind == "reply":
+                target = conversation.find(_as_id(data.get("id"))) if conversation is not None else None
+                parts.append(f"[回复 {target.name}] " if target is not None else "[回复] ")
+            elif kind == "image" and data.get("summary"):
+                parts.append(str(data["summary"]))
+            else:
+                parts.append(_PLACEHOLDERS.get(str(kind), f"[{kind}]"))
+        return " ".join("".join(parts).split())
+
+    def add_message(self, event: Event) -> bool:
+        """
+        把一条消息事件（或历史消息）加入所属会话
+
+        Returns:
+            bool: 是否加入
+        """
+        self._remember(event)
+        key = conversation_key(event)
+        if event.get("post_type") == "message_sent" and event.get("message_type") == "private":
+            # 机器人发出的私聊消息归入对方的会话
+            target = event.get("target_id") or event.get("user_id")
+            key = f"u{target}"
+        conversation = self._conversations.get(key)
+        text = self.render_message(event, conversation)
+        if not text:
+            return False
+        # 渲染为空的事件不创建会话
+        if conversation is None:
+            conversation = self._conversations[key] = ConversationContext()
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+        else:
+            self._conversations.move_to_end(key)
+
+        sender = event.get("sender") or {}
+        user_id = sender.get("user_id") or event.get("user_id")
+        name = self.nickname(event.get("group_id"), user_id)
+        stamp = time.strftime("%H:%M:%S", time.localtime(event.get("time") or time.time()))
+        line = f"[{stamp}] {name}({user_id}): {text}"
+        conversation.append(
+            ContextLine(event.get("message_id"), user_id, name, line, estimate_tokens(line)),
+            self.max_tokens,
+            self.max_messages,
+        )
+        return True
+
+    def seed(self, messages: list[Event]) -> int:
+        """用历史消息（get_group_msg_history/get_friend_msg_history 的 data.messages）填充会话"""
+        added = 0
+        for message in sorted(messages, key=lambda item: item.get("time") or 0):
+            added += self.add_message(message)
+        return added
+
+    def get(self, key: str) -> ConversationContext | None:
+        return self._conversations.get(key)
+
+    def discard(self, key: str) -> None:
+        self._conversations.pop(key, None)
+
+    def get_context(
+        self,
+        group_id: int | None = None,
+        user_id: int | None = None,
+        max_tokens: int | None = None,
+    ) -> str:
+        """
+        读取会话的已渲染上下文
+
+        Args:
+            group_id: 群号，与 user_id 二选一
+            user_id: 私聊对象
+            max_tokens: 小于会话预算时只返回最近的部分
+        """
+        key = f"g{group_id}" if group_id else f"u{user_id}"
+        conversation = self._conversations.get(key)
+        if conversation is None:
+            return ""
+        if max_tokens is None:
+            return conversation.rendered
+        return conversation.tail(max_tokens)
+
+    def reconfigure(self, max_tokens: int, max_messages: int) -> None:
+        """修改预算，已有会话立即按新预算裁剪"""
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        for conversation in self._conversations.values():
+            conversation.trim(max_tokens, max_messages)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "conversations": len(self._conversations),
+            "nicknames": len(self.nicknames),
+            "max_tokens": self.max_tokens,
+            "max_messages": self.max_messages,
+        }
+
+
+def _as_id(value: Any) -> Any:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
@@ -0,0 +1,76 @@
+"""
+NapCat 端点配置
+
+qq 配置中的端点键与默认端口（与 tests/testing_memo.md 中的约定一致）:
+
+    napcat_host       NapCat 地址，默认 127.0.0.1
+    http_port         NapCat HTTP 服务器，HttpActionClient 连接，默认 10146
+    sse_port          NapCat HTTP SSE 服务器，默认 10144
+    ws_port           NapCat WebSocket 服务器，WSClient 连接，默认 10147
+    ws_server_port    反向 WebSocket，WSServer 监听，默认 10145
+    http_server_port  反向 HTTP 上报，默认 10143
+    token             访问令牌
+"""
+
+from collections.abc import Mapping
+from typing import Any, Literal
+
+from .bus import EventBus
+from .capture import CaptureWriter
+from .client import HttpActionClient, WSClient, WSServer
+from .unified import UnifiedClient
+
+TransportKind = Literal["http", "ws", "ws-server", "auto"]
+
+DEFAULT_PORTS: dict[str, int] = {
+    "http_port": 10146,
+    "sse_port": 10144,
+    "ws_port": 10147,
+    "ws_server_port": 10145,
+    "http_server_port": 10143,
+}
+
+
+def endpoint(config: Mapping[str, Any], key: str) -> tuple[str, int]:
+    """返回 (host, port)；反向服务器的 host 为监听地址"""
+    port = int(config.get(key) or DEFAULT_PORTS[key])
+    if key in ("ws_server_port", "http_server_port"):
+        return str(config.get("listen_host") or "0.0.0.0"), port
+    return str(config.get("napcat_host") or "127.0.0.1"), port
+
+
+def build_transport(
+    kind: TransportKind,
+    config: Mapping[str, Any],
+    *,
+    bus: EventBus | None = None,
+    capture: CaptureWriter | None = None,
+    name: str | None = None,
+) -> HttpActionClient | WSClient | WSServer | UnifiedClient:
+    """
+    按配置创建传输
+
+    Args:
+        kind: "http" / "ws" / "ws-server" / "auto"（HTTP 与 WS 按延迟自动选择，见 unified.py）
+        config: qq 配置
+        bus: 事件总线（http 不接收事件，忽略）
+        capture: 录制器
+        name: 传输名称，默认与 kind 相同
+    """
+    token = config.get("token") or None
+    if kind == "http":
+        host, port = endpoint(config, "http_port")
+        return HttpActionClient(host, port, token, name=name or "http", capture=capture)
+    if kind == "ws":
+        host, port = endpoint(config, "ws_port")
+        return WSClient(host, port, token, bus=bus, name=name or "ws", capture=capture)
+    if kind == "ws-server":
+        host, port = endpoint(config, "ws_server_port")
+        return WSServer(host, port, token, bus=bus, name=name or "ws_server", capture=capture)
+    if kind == "auto":
+        prefix = name or "auto"
+        return UnifiedClient(
+            build_transport("http", config, capture=capture, name=f"{prefix}:http"),  # type: ignore[arg-type]
+            build_transport("ws", config, bus=bus, capture=capture, name=f"{prefix}:ws"),  # type: ignore[arg-type]
+        )
+    raise ValueError(f"未知的传输类型: {kind!r}")
@@ -0,0 +1,268 @@
+"""
+刷屏检测
+
+作为 EventBus 的前置过滤器，在处理器之前拦截刷屏消息:
+
+- 按 (群, 用户) 维护滑动窗口内的消息时间戳，窗口内超过 max_messages 条视为刷屏；
+- 对消息文本计算 64 位 simhash，窗口内与之前消息的汉明距离不超过 distance 的
+  近似重复消息达到 max_duplicates 条也视为刷屏（改几个字、加标点的复读同样命中）；
+- 跟踪的用户数超过 max_tracked 时按 LRU 淘汰。
+
+处置（撤回 delete_msg、禁言 set_group_ban）在后台按令牌桶限速发出:
+禁言与撤回分两个队列，禁言优先发出，先止住后续消息；待撤回的消息超过队列上限时丢弃最旧的撤回，
+不会挤掉禁言。同一用户在禁言期内只禁言一次，禁言被丢弃或发送失败时清除记录，下一条刷屏消息会重新禁言。
+群主/管理员的消息只拦截、不处置。
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .bus import Event
+from .ratelimit import Limiter, TokenBucket
+
+if TYPE_CHECKING:
+    from .client import ActionCaller
+
+logger = logging.getLogger("aivk.qq.bot.flood")
+
+
+def simhash(text: str) -> int:
+    """
+    64 位 simhash
+
+    只保留文字（去掉数字、标点、空白），特征为单字与二元组，
+    因此只改变序号、标点的复读得到相同或相近的指纹。
+    """
+    letters = "".join(ch for ch in text if ch.isalpha()).casefold()
+    text = letters or "".join(text.split()) or " "
+    grams = list(text) + [text[i : i + 2] for i in range(len(text) - 1)]
+    weights = [0] * 64
+    for gram in grams:
+        value = int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "little")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    result = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            result |= 1 << bit
+    return result
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+@dataclass(slots=True)
+class _Sender:
+    times: deque[float] = field(default_factory=deque)
+    hashes: deque[tuple[float, int]] = field(default_factory=deque)
+    flooding_until: float = 0.0
+
+
+class FloodGuard:
+    """
+    刷屏检测与处置
+
+    用法:
+        guard = FloodGuard()
+        bus.add_filter(guard.allow)
+        guard.start(conn)
+        ...
+        await guard.stop()
+
+    Args:
+        window: 滑动窗口（秒）
+        max_messages: 窗口内允许的最大消息数
+        max_duplicates: 窗口内允许的近似重复消息数
+        distance: simhash 汉明距离不超过该值视为近似重复
+        max_tracked: 最多跟踪的 (群, 用户) 数
+        ban_duration: 禁言时长（秒），0 表示不禁言
+        recall: 是否撤回刷屏消息
+        enforce_rate: 每秒最多发出的处置动作数
+        max_pending: 待发出的撤回动作上限（禁言单独计数，上限相同）
+        limiter: 处置动作的令牌桶（例如多进程共享的 SharedTokenBucket），默认按 enforce_rate 新建
+    """
+
+    def __init__(
+        self,
+        window: float = 10.0,
+        max_messages: int = 8,
+        max_duplicates: int = 3,
+        distance: int = 3,
+        max_tracked: int = 10000,
+        ban_duration: int = 300,
+        recall: bool = True,
+        enforce_rate: float = 2.0,
+        max_pending: int = 256,
+        limiter: Limiter | None = None,
+    ) -> None:
+        self.window = window
+        self.max_messages = max_messages
+        self.max_duplicates = max_duplicates
+        self.distance = distance
+        self.max_tracked = max_tracked
+        self.ban_duration = ban_duration
+        self.recall = recall
+        self.max_pending = max_pending
+        self.limiter = limiter or TokenBucket(enforce_rate, burst=max(1.0, enforce_rate))
+        self._senders: OrderedDict[tuple[int, int], _Sender] = OrderedDict()
+        self._banned: dict[tuple[int, int], float] = {}
+        self._bans: deque[dict[str, Any]] = deque()
+        self._recalls: deque[dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._caller: "ActionCaller | None" = None
+        self.blocked = 0
+        self.dropped = 0
+        self.enforced = 0
+
+    def reconfigure(self, **options: Any) -> None:
+        """修改检测参数，enforce_rate 同时调整令牌桶"""
+        for key, value in options.items():
+            if key == "enforce_rate":
+                self.limiter.rate = value
+                self.limiter.burst = max(1.0, value)
+            elif hasattr(self, key):
+                setattr(self, key, value)
+
+    def _sender(self, key: tuple[int, int]) -> _Sender:
+        sender = self._senders.get(key)
+        if sender is None:
+            sender = self._senders[key] = _Sender()
+            while len(self._senders) > self.max_tracked:
+                self._senders.popitem(last=False)
+        else:
+            self._senders.move_to_end(key)
+        return sender
+
+    def observe(self, event: Event, now: float | None = None) -> bool:
+        """
+        记录一条消息
+
+        Returns:
+            bool: 是否判定为刷屏
+        """
+        now = time.monotonic() if now is None else now
+        user_id = event.get("user_id")
+        key = (int(event.get("group_id") or 0), int(user_id or 0))
+        sender = self._sender(key)
+
+        horizon = now - self.window
+        while sender.times and sender.times[0] < horizon:
+            sender.times.popleft()
+        while sender.hashes and sender.hashes[0][0] < horizon:
+            sender.hashes.popleft()
+
+        sender.times.append(now)
+        text = event.get("raw_message")
+        duplicates = 0
+        if isinstance(text, str) and text:
+            fingerprint = simhash(text)
+            duplicates = sum(1 for _, other in sender.hashes if hamming(fingerprint, other) <= self.distance)
+            sender.hashes.append((now, fingerprint))
+
+        if len(sender.times) > self.max_messages or duplicates >= self.max_duplicates:
+            sender.flooding_until = now + self.window
+        return now < sender.flooding_until
+
+    def allow(self, event: Event) -> bool:
+        """EventBus 过滤器：刷屏消息返回 False 并安排处置"""
+        if event.get("post_type") != "message" or event.get("user_id") == event.get("self_id"):
+            return True
+        # 补拉的历史消息是一次性注入的，到达频率不反映发送频率
+        if event.get("backfilled"):
+            return True
+        if not self.observe(event):
+            return True
+        self.blocked += 1
+        sender = event.get("sender") or {}
+        if event.get("message_type") == "group" and sender.get("role") not in ("owner", "admin"):
+            self._enforce(event)
+        return False
+
+    def _enforce(self, event: Event) -> None:
+        group_id, user_id = event.get("group_id"), event.get("user_id")
+        if self.recall and event.get("message_id") is not None:
+            if len(self._recalls) >= self.max_pending:
+                self._recalls.popleft()
+                self.dropped += 1
+            self._recalls.append({"message_id": event["message_id"]})
+        if self.ban_duration > 0:
+            key = (int(group_id), int(user_id))
+            now = time.monotonic()
+            if self._banned.get(key, 0.0) <= now:
+                self._banned[key] = now + self.ban_duration
+                if len(self._bans) >= self.max_pending:
+                    dropped = self._bans.popleft()
+                    self._banned.pop((int(dropped["group_id"]), int(dropped["user_id"])), None)
+                    self.dropped += 1
+                self._bans.append({"group_id": group_id, "user_id": user_id, "duration": self.ban_duration})
+                self._expire_bans(now)
+        self._wakeup.set()
+
+    def _expire_bans(self, now: float) -> None:
+        if len(self._banned) > self.max_tracked:
+            self._banned = {key: until for key, until in self._banned.items() if until > now}
+
+    def start(self, caller: "ActionCaller") -> None:
+        """启动后台处置任务"""
+        self._caller = caller
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _next(self) -> tuple[str, dict[str, Any]] | None:
+        # 禁言优先发出，先止住后续消息
+        if self._bans:
+            return "set_group_ban", self._bans.popleft()
+        if self._recalls:
+            return "delete_msg", self._recalls.popleft()
+        return None
+
+    async def _run(self) -> None:
+        assert self._caller is not None
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._bans or self._recalls:
+                await self.limiter.acquire()
+                item = self._next()
+                if item is None:
+                    break
+                action, params = item
+                try:
+                    response = await self._caller.execute(action, params)
+                except Exception as e:
+                    logger.warning(f"刷屏处置 {action} 失败: {e!r}")
+                    response = None
+                if response is not None and response.get("status") == "ok":
+                    self.enforced += 1
+                    continue
+                if response is not None:
+                    logger.warning(f"刷屏处置 {action} 失败: {response}")
+                if action == "set_group_ban":
+                    # 没有禁言成功：清除记录，该用户的下一条刷屏消息重新禁言
+                    self._banned.pop((int(params["group_id"]), int(params["user_id"])), None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "tracked": len(self._senders),
+            "blocked": self.blocked,
+            "enforced": self.enforced,
+            "pending": len(self._bans) + len(self._recalls),
+            "pending_bans": len(self._bans),
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,324 @@
+"""
+图片 OCR 流水线
+
+繁忙的群里同一张表情包会被反复发送，每次都调用 ocr_image 既慢又消耗限流额度。ImagePipeline:
+
+- 以图片内容的 MD5 为键（QQ 的图片文件名本身就是内容 MD5，能直接取得时不下载）；
+  其他情况按 base64 / URL / get_image 取得内容后计算；
+- 只接受消息段中的 file 标识、base64:// 与指向公网地址的 http(s) URL，
+  不读取调用方给出的本地路径，也不下载内网地址；
+- OCR 结果存入 LRU + TTL 缓存，失败结果以较短的 negative_ttl 缓存，避免反复请求坏图；
+- 同一张图片的并发请求合并为一次调用；
+- OCR 调用受 concurrency 并发上限（以及可选的 rate 令牌桶）约束。
+
+用法:
+    pipeline = ImagePipeline(conn)
+
+    @bus.on_message("group")
+    async def moderate(event):
+        for result in await pipeline.ocr_event(event):
+            if "广告" in result.text: ...
+"""
+
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .bus import Event
+from .cache import TTLCache
+from .client import ActionCaller, ActionError
+from .context import parse_cq
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger("aivk.qq.bot.images")
+
+# QQ 图片文件名：32 位十六进制 MD5 加扩展名
+_MD5_NAME = re.compile(r"^(?:\{)?([0-9a-fA-F]{32})(?:\})?(?:\.\w+)?$")
+
+
+class ImageError(Exception):
+    """无法取得图片内容"""
+
+
+@dataclass(slots=True)
+class OcrResult:
+    key: str | None
+    texts: list[str] = field(default_factory=list)
+    items: list[Any] = field(default_factory=list)
+    cached: bool = False
+    elapsed_ms: float = 0.0
+    error: str | None = None
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.texts)
+
+
+def md5_from_name(name: str | None) -> str | None:
+    """从 QQ 图片文件名中取出内容 MD5"""
+    if not name:
+        return None
+    match = _MD5_NAME.match(Path(name).name)
+    return match.group(1).lower() if match else None
+
+
+def image_segments(event: Event) -> list[dict[str, Any]]:
+    """消息中的图片段（兼容数组与 CQ 码格式）"""
+    message = event.get("message")
+    if message is None:
+        return []
+    segments = parse_cq(message) if isinstance(message, str) else message
+    return [segment.get("data") or {} for segment in segments if segment.get("type") == "image"]
+
+
+def _public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def _md5(data: bytes) -> str:
+    return hashlib.md5(data, usedforsecurity=False).hexdigest()
+
+
+class ImagePipeline:
+    """
+    带缓存、请求合并与并发上限的 OCR 流水线
+
+    Args:
+        caller: 调用 ocr_image / get_image 的动作客户端
+        cache: OCR 结果缓存，多个流水线（例如多个账号）可以共享同一个
+        maxsize: 未传入 cache 时新建缓存的容量
+        ttl: OCR 结果的有效期（秒）
+        negative_ttl: 失败结果的缓存时间（秒）
+        concurrency: 同时进行的 OCR 调用数
+        rate: OCR 调用的每秒速率上限，<= 0 表示不限
+        action: OCR 动作名，"ocr_image" 或 ".ocr_image"
+        max_bytes: 下载图片计算哈希时的大小上限
+    """
+
+    def __init__(
+        self,
+        caller: ActionCaller,
+        *,
+        cache: TTLCache | None = None,
+        maxsize: int = 4096,
+        ttl: float = 86400.0,
+        negative_ttl: float = 300.0,
+        concurrency: int = 2,
+        rate: float = 0.0,
+        action: str = "ocr_image",
+        max_bytes: int = 20 * 1024 * 1024,
+    ) -> None:
+        self.caller = caller
+        self.cache = cache if cache is not None else TTLCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.action = action
+        self.max_bytes = max_bytes
+        self.limiter = TokenBucket(rate, burst=max(1.0, rate))
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # 图片引用 -> 内容键，避免重复下载与哈希
+        self._keys = TTLCache(maxsize=maxsize * 2, ttl=ttl)
+        self._inflight: dict[str, asyncio.Task[Any]] = {}
+        self._session: aiohttp.ClientSession | None = None
+        self.calls = 0
+        self.coalesced = 0
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _coalesce(self, token: str, factory: Any) -> Any:
+        """
+        同一 token 的并发请求只执行一次 factory()
+
+        factory() 在独立的任务中运行，某个等待者被取消不会取消它，也不会波及其他等待者。
+        """
+        task = self._inflight.get(token)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[token] = task
+            task.add_done_callback(lambda done: self._finish(token, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, token: str, task: asyncio.Task[Any]) -> None:
+        if self._inflight.get(token) is task:
+            del self._inflight[token]
+        # 等待者全部取消时避免 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    # region 内容键
+
+    async def content_key(self, image: str, hint: str | None = None) -> tuple[str, str]:
+        """
+        计算图片内容的 MD5
+
+        Args:
+            image: 传给 NapCat 的图片引用（http(s) URL、base64:// 或消息段中的 file）
+            hint: 消息段中的 file 字段，是 MD5 文件名时无需下载
+
+        Returns:
+            (内容键, 用于 OCR 的图片引用)
+
+        Raises:
+            ImageError: 无法取得图片内容，或图片引用是本地路径
+        """
+        if image.startswith("file://") or ("://" not in image and ("/" in image or "\\" in image)):
+            raise ImageError(f"不接受本地路径: {image}")
+        digest = md5_from_name(hint) or md5_from_name(image)
+        if digest is not None:
+            return digest, image
+        known = self._keys.get(image)
+        if known is not None:
+            return known
+        resolved = await self._coalesce(f"key:{image}", lambda: self._resolve(image))
+        self._keys.set(image, resolved)
+        return resolved
+
+    async def _resolve(self, image: str) -> tuple[str, str]:
+        if image.startswith("base64://"):
+            try:
+                return _md5(base64.b64decode(image[9:])), image
+            except ValueError as e:
+                raise ImageError(f"base64 图片无法解码: {e}") from e
+        if "://" in image:
+            return await self._download(image), image
+        # 消息段中的 file 标识：通过 get_image 取得本地路径或 URL
+        info = await self.image_info(image)
+        local = info.get("file")
+        if local and Path(local).is_file():
+            return await asyncio.to_thread(self._hash_file, Path(local)), local
+        if info.get("url"):
+            return await self._download(info["url"]), info["url"]
+        raise ImageError(f"无法取得图片内容: {image}")
+
+    def _hash_file(self, path: Path) -> str:
+        digest = hashlib.md5(usedforsecurity=False)
+        with path.open("rb") as fp:
+            while chunk := fp.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    async def _check_url(self, url: str) -> None:
+        """只允许解析到公网地址的 http(s) URL"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ImageError(f"不支持的图片地址: {url}")
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, parts.port or 0)
+        except OSError as e:
+            raise ImageError(f"无法解析图片地址 {parts.hostname}: {e}") from e
+        if not infos or not all(_public_address(info[4][0]) for info in infos):
+            raise ImageError(f"不下载内网地址的图片: {parts.hostname}")
+
+    async def _download(self, url: str) -> str:
+        await self._check_url(url)
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        digest = hashlib.md5(usedforsecurity=False)
+        size = 0
+        try:
+            # 不跟随重定向，避免跳转到内网地址
+            async with self._session.get(url, allow_redirects=False) as response:
+                if response.status != 200:
+                    raise ImageError(f"下载图片失败: HTTP {response.status}")
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ImageError(f"图片超过 {self.max_bytes} 字节")
+                    digest.update(chunk)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            raise ImageError(f"下载图片失败: {e!r}") from e
+        return digest.hexdigest()
+
+    # endregion
+
+    async def image_info(self, file: str) -> dict[str, Any]:
+        """get_image 的结果（带缓存）"""
+        cached = self.cache.get(("info", file))
+        if cached is not None:
+            return cached
+        response = await self.caller.execute("get_image", {"file": file})
+        if response.get("status") != "ok":
+            raise ImageError(f"get_image 失败: retcode={response.get('retcode')} {response.get('message') or ''}")
+        info = response.get("data") or {}
+        self.cache.set(("info", file), info)
+        return info
+
+    async def ocr(self, image: str, hint: str | None = None) -> OcrResult:
+        """识别一张图片；错误写入结果的 error 字段而不抛出"""
+        started = time.perf_counter()
+        try:
+            key, target = await self.content_key(image, hint)
+        except (ImageError, ActionError) as e:
+            return OcrResult(None, error=str(e), elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+        cached = self.cache.get(("ocr", key))
+        if cached is not None:
+            result = OcrResult(key, cached["texts"], cached["items"], True, error=cached.get("error"))
+        else:
+            result = await self._coalesce(f"ocr:{key}", lambda: self._call(key, target))
+        result = OcrResult(result.key, result.texts, result.items, result.cached, error=result.error)
+        result.elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    async def _call(self, key: str, image: str) -> OcrResult:
+        async with self._semaphore:
+            await self.limiter.acquire()
+            self.calls += 1
+            try:
+                response = await self.caller.execute(self.action, {"image": image})
+            except ActionError as e:
+                # 传输层错误不缓存，下次重试
+                return OcrResult(key, error=str(e))
+        if response.get("status") != "ok":
+            error = f"{self.action} 失败: retcode={response.get('retcode')} {response.get('message') or ''}".strip()
+            self.cache.set(("ocr", key), {"texts": [], "items": [], "error": error}, self.negative_ttl)
+            return OcrResult(key, error=error)
+        data = response.get("data")
+        # NapCat 返回 [{text, pa, charBox}, ...]，部分版本包在 {"texts": [...]} 中
+        items = data.get("texts", []) if isinstance(data, dict) else list(data or [])
+        texts = [item.get("text", "") if isinstance(item, dict) else str(item) for item in items]
+        self.cache.set(("ocr", key), {"texts": texts, "items": items}, self.ttl)
+        return OcrResult(key, texts, items)
+
+    async def ocr_many(self, images: list[str | tuple[str, str | None]]) -> list[OcrResult]:
+        """批量识别，重复的图片只识别一次；元素为图片引用或 (图片引用, file 提示)"""
+        pairs = [(item, None) if isinstance(item, str) else item for item in images]
+        return list(await asyncio.gather(*(self.ocr(image, hint) for image, hint in pairs)))
+
+    async def ocr_event(self, event: Event) -> list[OcrResult]:
+        """识别消息事件中的全部图片，供处理器使用"""
+        pairs = []
+        for data in image_segments(event):
+            image = data.get("url") or data.get("file")
+            if image:
+                pairs.append((image, data.get("file")))
+        if not pairs:
+            return []
+        return await self.ocr_many(pairs)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "cache_size": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
@@ -0,0 +1,264 @@
+"""
+关键词引擎
+
+把全部关键词规则编译为一个 Aho-Corasick 自动机，每条消息只扫描一遍，
+匹配耗时与规则数量无关（只与消息长度和命中数有关）。
+
+规则（qq 配置中的 keyword_rules，或通过 MCP 工具 keyword_rules_* 修改）:
+
+    {"keyword": "你好", "action": "reply", "reply": "你好呀"}
+    {"keyword": "广告", "action": "recall"}
+    {"keyword": "违禁词", "action": "ban", "duration": 600, "groups": [123456]}
+
+- action: reply 回复 / recall 撤回（delete_msg）/ ban 禁言（set_group_ban，仅群聊）
+- 匹配不区分大小写；groups 为空表示所有群与私聊
+- 同一消息命中多条规则时，撤回/禁言全部执行，回复只发送优先级最高（列表中最靠前）的一条
+- 断线补拉的历史消息（"backfilled": True）不回复；撤回/禁言由 moderate_backfilled 决定
+
+规则变化时新自动机在线程中编译，编译完成后原子替换，编译期间旧自动机继续服务。
+"""
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from .bus import Event, EventBus
+from .offload import Action
+
+logger = logging.getLogger("aivk.qq.bot.keywords")
+
+RuleAction = Literal["reply", "recall", "ban"]
+
+
+@dataclass(slots=True, frozen=True)
+class KeywordRule:
+    keyword: str
+    action: RuleAction = "reply"
+    reply: str | None = None
+    duration: int = 60
+    groups: frozenset[int] = frozenset()
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "KeywordRule":
+        """
+        Raises:
+            ValueError: 关键词为空、动作未知或 reply 规则缺少回复内容
+        """
+        keyword = str(data.get("keyword") or "")
+        action = data.get("action", "reply")
+        if not keyword:
+            raise ValueError("关键词不能为空")
+        if action not in ("reply", "recall", "ban"):
+            raise ValueError(f"未知的关键词动作: {action!r}")
+        if action == "reply" and not data.get("reply"):
+            raise ValueError(f"关键词 {keyword!r} 的 reply 规则缺少回复内容")
+        return cls(
+            keyword=keyword,
+            action=action,
+            reply=data.get("reply"),
+            duration=int(data.get("duration", 60)),
+            groups=frozenset(int(item) for item in data.get("groups") or ()),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {"keyword": self.keyword, "action": self.action}
+        if self.reply is not None:
+            data["reply"] = self.reply
+        if self.action == "ban":
+            data["duration"] = self.duration
+        if self.groups:
+            data["groups"] = sorted(self.groups)
+        return data
+
+    def applies_to(self, group_id: int | None) -> bool:
+        return not self.groups or (group_id is not None and int(group_id) in self.groups)
+
+
+class Automaton:
+    """
+    Aho-Corasick 自动机
+
+    节点的输出在编译时沿失败链合并，匹配时每个字符只需一次字典查找。
+
+    Args:
+        patterns: 模式串，返回的匹配结果为模式串的下标
+    """
+
+    __slots__ = ("_goto", "_fail", "_out", "size")
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+        count = 0
+        for index, pattern in enumerate(patterns):
+            count += 1
+            node = 0
+            for ch in pattern.casefold():
+                next_node = goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][ch] = next_node
+                    goto.append({})
+                    out.append([])
+                node = next_node
+            out[node].append(index)
+
+        fail = [0] * len(goto)
+        queue: deque[int] = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(ch, 0)
+                fail[child] = target if target != child else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(items) for items in out]
+        self.size = count
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+    def search(self, text: str) -> set[int]:
+        """返回 text 中出现的模式串下标"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        node = 0
+        for ch in text.casefold():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class KeywordEngine:
+    """
+    关键词规则引擎
+
+    用法:
+        engine = KeywordEngine(rules)
+        engine.attach(bus)
+        await engine.rebuild(new_rules)
+
+    Args:
+        rules: 规则列表，可以是 KeywordRule 或 dict
+        moderate_backfilled: 是否对补拉的历史消息执行撤回/禁言
+    """
+
+    def __init__(
+        self, rules: Iterable[KeywordRule | Mapping[str, Any]] = (), *, moderate_backfilled: bool = True
+    ) -> None:
+        self.moderate_backfilled = moderate_backfilled
+        self._rules: tuple[KeywordRule, ...] = ()
+        self._automaton = Automaton(())
+        self._lock = asyncio.Lock()
+        self.matched = 0
+        self.set_rules(rules)
+
+    @property
+    def rules(self) -> tuple[KeywordRule, ...]:
+        return self._rules
+
+    @staticmethod
+    def _normalize(rules: Iterable[KeywordRule | Mapping[str, Any]]) -> tuple[KeywordRule, ...]:
+        normalized: list[KeywordRule] = []
+        for rule in rules:
+            normalized.append(rule if isinstance(rule, KeywordRule) else KeywordRule.from_dict(rule))
+        return tuple(normalized)
+
+    @staticmethod
+    def _compile(rules: tuple[KeywordRule, ...]) -> Automaton:
+        return Automaton(rule.keyword for rule in rules)
+
+    def set_rules(self, rules: Iterable[KeywordRule | Mapping[str, Any]]) -> bool:
+        """
+        同步替换规则（在当前线程编译）
+
+        Returns:
+            bool: 规则是否变化
+        """
+        normalized = self._normalize(rules)
+        if normalized == self._rules:
+            return False
+        self._automaton = self._compile(normalized)
+        self._rules = normalized
+        return True
+
+    async def rebuild(self, rules: Iterable[KeywordRule | Mapping[str, Any]]) -> bool:
+        """
+        在线程中编译新规则并原子替换，规则未变化时不重新编译
+
+        Returns:
+            bool: 规则是否变化
+        """
+        normalized = self._normalize(rules)
+        async with self._lock:
+            if normalized == self._rules:
+                return False
+            automaton = await asyncio.to_thread(self._compile, normalized)
+            self._automaton, self._rules = automaton, normalized
+        logger.info(f"关键词自动机已重建: {len(normalized)} 条规则")
+        return True
+
+    def match(self, text: str, group_id: int | None = None) -> list[KeywordRule]:
+        """返回命中的规则（按规则顺序）"""
+        rules = self._rules
+        indexes = self._automaton.search(text)
+        return [rules[index] for index in sorted(indexes) if rules[index].applies_to(group_id)]
+
+    def actions_for(self, event: Event) -> list[Action]:
+        """根据消息事件命中的规则生成动作"""
+        text = event.get("raw_message")
+        if not isinstance(text, str) or not text:
+            return []
+        backfilled = bool(event.get("backfilled"))
+        if backfilled and not self.moderate_backfilled:
+            return []
+        group_id = event.get("group_id") if event.get("message_type") == "group" else None
+        rules = self.match(text, group_id)
+        if not rules:
+            return []
+        self.matched += 1
+        actions: list[Action] = []
+        if any(rule.action == "recall" for rule in rules):
+            actions.append(Action("delete_msg", {"message_id": event.get("message_id")}))
+        ban = next((rule for rule in rules if rule.action == "ban"), None)
+        if ban is not None and group_id is not None:
+            actions.append(
+                Action("set_group_ban", {"group_id": group_id, "user_id": event.get("user_id"), "duration": ban.duration})
+            )
+        # 对过时的消息回复没有意义
+        if not actions and not backfilled:
+            reply = next((rule.reply for rule in rules if rule.action == "reply"), None)
+            if reply is not None:
+                message = [
+                    {"type": "reply", "data": {"id": str(event.get("message_id"))}},
+                    {"type": "text", "data": {"text": reply}},
+                ]
+                if group_id is not None:
+                    actions.append(Action("send_group_msg", {"group_id": group_id, "message": message}))
+                else:
+                    actions.append(Action("send_private_msg", {"user_id": event.get("user_id"), "message": message}))
+        return actions
+
+    async def _on_message(self, event: Event) -> list[Action]:
+        return self.actions_for(event)
+
+    def attach(self, bus: EventBus) -> None:
+        """在事件总线上注册消息处理器"""
+        bus.add_handler(self._on_message, "message")
+
+    def stats(self) -> dict[str, Any]:
+        return {"rules": len(self._rules), "states": self._automaton.states, "matched": self.matched}
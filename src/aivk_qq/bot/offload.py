@@ -0,0 +1,112 @@
+"""
+CPU 密集型处理器的线程池/进程池卸载
+
+图片处理、OCR 后处理、文本生成这类同步计算会阻塞事件循环。
+注册处理器时指定 executor="thread" 或 executor="process"，
+事件总线会把事件转成可 pickle 的紧凑字典，交给受管的线程池或进程池执行，
+处理器返回的 Action 再回到事件循环，经由总线绑定的动作客户端发出。
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+logger = logging.getLogger("aivk.qq.bot.offload")
+
+ExecutorHint = Literal["async", "thread", "process"]
+EXECUTOR_HINTS: tuple[str, ...] = ("async", "thread", "process")
+
+
+@dataclass(slots=True, frozen=True)
+class Action:
+    """
+    处理器返回的待执行动作
+
+    例如: return Action("send_group_msg", {"group_id": gid, "message": text})
+    """
+
+    action: str
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+def compact_event(event: dict[str, Any]) -> dict[str, Any]:
+    """
+    生成传给线程池/进程池的事件副本
+
+    去掉以下划线开头的内部注解（追踪上下文等不可 pickle 或无需跨进程的字段），
+    其余字段都是 JSON 原生类型，可以直接 pickle。
+    """
+    return {key: value for key, value in event.items() if not key.startswith("_")}
+
+
+def collect_actions(result: Any) -> list[Action]:
+    """把处理器返回值规整为 Action 列表；None 或其它类型返回空列表"""
+    if result is None:
+        return []
+    if isinstance(result, Action):
+        return [result]
+    if isinstance(result, (list, tuple)):
+        return [item for item in result if isinstance(item, Action)]
+    return []
+
+
+def check_handler(func: Callable[..., Any], executor: str) -> None:
+    """
+    注册时校验处理器与执行器提示是否匹配
+
+    Raises:
+        ValueError: 提示无效，或处理器不能在该执行器中运行
+    """
+    if executor not in EXECUTOR_HINTS:
+        raise ValueError(f"executor 仅支持 {', '.join(EXECUTOR_HINTS)}，收到: {executor!r}")
+    is_coroutine = inspect.iscoroutinefunction(func)
+    if executor == "async" and not is_coroutine:
+        raise ValueError(f"处理器 {func.__qualname__} 不是协程函数，请使用 executor='thread' 或 'process'")
+    if executor != "async" and is_coroutine:
+        raise ValueError(f"处理器 {func.__qualname__} 是协程函数，不能在 {executor} 执行器中运行")
+    if executor == "process" and "<locals>" in func.__qualname__:
+        raise ValueError(f"处理器 {func.__qualname__} 必须定义在模块顶层才能在进程池中运行")
+
+
+class OffloadPool:
+    """
+    受管的线程池与进程池，按需创建
+
+    Args:
+        thread_workers: 线程池大小，默认 min(32, CPU 数 + 4)
+        process_workers: 进程池大小，默认 CPU 数
+    """
+
+    def __init__(self, thread_workers: int | None = None, process_workers: int | None = None) -> None:
+        self.thread_workers = thread_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.process_workers = process_workers or (os.cpu_count() or 1)
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+
+    def _executor(self, hint: str) -> Executor:
+        if hint == "thread":
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(self.thread_workers, thread_name_prefix="aivk-qq-handler")
+            return self._threads
+        if hint == "process":
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(self.process_workers)
+            return self._processes
+        raise ValueError(f"未知的执行器: {hint!r}")
+
+    async def run(self, hint: str, func: Callable[[dict[str, Any]], Any], event: dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(hint), func, compact_event(event))
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._threads is not None:
+            self._threads.shutdown(wait=wait, cancel_futures=not wait)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait, cancel_futures=not wait)
+            self._processes = None
@@ -0,0 +1,424 @@
+"""
+持久化发件箱
+
+发送类动作先写入追加日志并落盘，再发给 NapCat；进程或 NapCat 重启后未确认的动作会重新发送:
+
+    <AIVK_ROOT>/data/qq/outbox/outbox.log   每行一条 JSON 记录
+        {"op": "put", "key": "...", "action": "send_group_msg", "params": {...}, "ts": ...}
+        {"op": "done", "key": "...", "status": "ok", "ts": ...}
+
+- 组提交：同一时间窗口（commit_interval）内的记录合并为一次 write + fsync，
+  高发送速率下每条消息的落盘成本很低；
+- NapCat 返回 status: ok（或明确的失败）时追加 done 记录；
+- 幂等键：调用方可传入 key（例如 f"reply:{message_id}"），同一 key 只会被记录和发送一次，
+  处理器在补拉、分片重启或回放后重复执行时不会重复回复；已完成的 key 返回记录的状态；
+- 请求确定没有发出（未连接、连接建立失败）时保持待发送并定期重试，调用方收到 ActionQueued，
+  不应自行重发；
+- 写日志失败时条目作废，调用方收到 ActionNotSent（没有发出，可以重发）；
+- 超时或发出后连接断开时 NapCat 可能已经执行，记为 done（status: unknown）不再重发，
+  调用方收到 ActionError；
+- 启动时回放没有 done 记录的条目，并把日志压缩为只含待发送条目。
+
+语义为至少一次：NapCat 已发送但 done 记录落盘前进程崩溃时，该条目在重启后会再发送一次。
+只有 DURABLE_ACTIONS 中的动作经过日志，查询类动作直接透传。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from aivk.api import AivkIO
+
+from .client import ActionCaller, ActionError, ActionNotSent, ActionQueued
+from .trace import span
+
+logger = logging.getLogger("aivk.qq.bot.outbox")
+
+DURABLE_ACTIONS = frozenset({
+    "send_msg",
+    "send_group_msg",
+    "send_private_msg",
+    "send_group_forward_msg",
+    "send_private_forward_msg",
+    "send_forward_msg",
+    "forward_group_single_msg",
+    "forward_friend_single_msg",
+    "send_poke",
+    "group_poke",
+    "friend_poke",
+    "delete_msg",
+    "set_group_ban",
+    "set_group_whole_ban",
+    "set_group_kick",
+    "set_group_card",
+    "set_group_sign",
+    "set_msg_emoji_like",
+    "set_essence_msg",
+    "send_like",
+})
+
+
+def default_outbox_dir() -> Path:
+    return AivkIO.get_aivk_root() / "data" / "qq" / "outbox"
+
+
+def _queued(action: str, key: str, cause: ActionNotSent) -> ActionQueued:
+    return ActionQueued(f"{action} 暂时未能发出，已进入发件箱稍后补发（key={key}）: {cause}")
+
+
+class Outbox:
+    """
+    持久化发件箱，实现 ActionCaller，可以替代连接作为 EventBus/ShardRouter 的 caller
+
+    用法:
+        outbox = Outbox(conn)
+        await outbox.open()          # 回放上次未确认的动作
+        await outbox.execute("send_group_msg", {...}, key="reply:123")
+        await outbox.close()
+
+    Args:
+        caller: 实际发送动作的连接
+        directory: 日志目录，默认 <AIVK_ROOT>/data/qq/outbox
+        commit_interval: 组提交窗口（秒）
+        retry_interval: 连接错误后的重试间隔（秒）
+        compact_bytes: 日志超过该大小且没有待发送条目时压缩
+        remember: 记住已完成幂等键的数量
+    """
+
+    def __init__(
+        self,
+        caller: ActionCaller,
+        directory: str | Path | None = None,
+        *,
+        commit_interval: float = 0.005,
+        retry_interval: float = 5.0,
+        compact_bytes: int = 16 * 1024 * 1024,
+        remember: int = 65536,
+    ) -> None:
+        self.caller = caller
+        self.directory = Path(directory) if directory else default_outbox_dir()
+        self.path = self.directory / "outbox.log"
+        self.commit_interval = commit_interval
+        self.retry_interval = retry_interval
+        self.compact_bytes = compact_bytes
+        self.remember = remember
+        self._pending: dict[str, tuple[str, dict[str, Any]]] = {}
+        self._done: OrderedDict[str, str] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        self._buffer: list[bytes] = []
+        self._waiters: list[tuple[str, asyncio.Future[None]]] = []
+        self._flush_scheduled = False
+        self._fp: Any = None
+        self._write_lock = asyncio.Lock()
+        self._retry_task: asyncio.Task[None] | None = None
+        self.commits = 0
+        self.records = 0
+        self.unknown = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # region 日志
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with self.path.open("rb") as fp:
+            for raw in fp:
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                key = record.get("key")
+                if record.get("op") == "put":
+                    self._pending[key] = (record["action"], record.get("params") or {})
+                elif record.get("op") == "done":
+                    self._pending.pop(key, None)
+                    status = record.get("status", "ok")
+                    # unsent：写日志失败而作废的条目，调用方可以用同一个 key 重发
+                    if status != "unsent":
+                        self._remember(key, status)
+
+    def _remember(self, key: str, status: str) -> None:
+        self._done[key] = status
+        self._done.move_to_end(key)
+        while len(self._done) > self.remember:
+            self._done.popitem(last=False)
+
+    def _rewrite(self) -> None:
+        """只保留待发送条目与最近完成的幂等键（同步，写入新文件后原子替换）"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("wb") as fp:
+            for key, status in self._done.items():
+                fp.write(self._encode({"op": "done", "key": key, "status": status}))
+            for key, (action, params) in self._pending.items():
+                fp.write(self._encode({"op": "put", "key": key, "action": action, "params": params}))
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _encode(record: dict[str, Any]) -> bytes:
+        record.setdefault("ts", time.time())
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+    def _append(self, record: dict[str, Any], durable: bool) -> asyncio.Future[None] | None:
+        self._buffer.append(self._encode(record))
+        waiter: asyncio.Future[None] | None = None
+        if durable:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append((record["key"], waiter))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_later(self.commit_interval, self._schedule_flush)
+        return waiter
+
+    def _schedule_flush(self) -> None:
+        asyncio.ensure_future(self._flush())
+
+    async def _flush(self) -> None:
+        async with self._write_lock:
+            await self._flush_unlocked()
+
+    async def _flush_unlocked(self) -> None:
+        self._flush_scheduled = False
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        waiters, self._waiters = self._waiters, []
+        try:
+            await asyncio.to_thread(self._write_batch, b"".join(batch))
+        except OSError as e:
+            # 这一批没有落盘：条目作废（不进入重试），调用方可以安全地重发；
+            # 已经写出一部分时，补一条 unsent 记录，避免重启后被回放
+            logger.error(f"发件箱: 写入日志失败，丢弃 {len(batch)} 条记录（{len(waiters)} 条待发送）: {e!r}")
+            for key, waiter in waiters:
+                self._pending.pop(key, None)
+                self._append({"op": "done", "key": key, "status": "unsent"}, durable=False)
+                if not waiter.done():
+                    waiter.set_exception(ActionNotSent(f"写入发件箱失败，未发出: {e!r}"))
+                    waiter.exception()
+            return
+        self.commits += 1
+        self.records += len(batch)
+        for _, waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _write_batch(self, data: bytes) -> None:
+        self._fp.write(data)
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+    # endregion
+
+    async def open(self) -> int:
+        """
+        加载日志、压缩并回放未确认的动作
+
+        Returns:
+            int: 回放的条目数
+        """
+        await asyncio.to_thread(self._load)
+        await asyncio.to_thread(self._rewrite)
+        self._fp = self.path.open("ab")
+        replay = list(self._pending.items())
+        if replay:
+            logger.info(f"发件箱: 回放 {len(replay)} 条未确认的动作")
+        for key, (action, params) in replay:
+            try:
+                await self._deliver(key, action, params)
+            except ActionNotSent as e:
+                logger.warning(f"发件箱: 回放失败，稍后重试: {e}")
+                break
+            except ActionError:
+                continue
+        self._retry_task = asyncio.create_task(self._retry_loop())
+        return len(replay)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        关闭前尽量送出待发送的条目：等待进行中的发送并补发一轮
+
+        期限内未送出的条目保留在日志中，下次 open() 时重放。
+
+        Returns:
+            期限内没有剩余待发送条目时为 True
+        """
+
+        async def flush_pending() -> None:
+            if self._inflight:
+                await asyncio.gather(*(asyncio.shield(f) for f in self._inflight.values()), return_exceptions=True)
+            for key, (action, params) in list(self._pending.items()):
+                if key in self._inflight:
+                    continue
+                try:
+                    await self._deliver(key, action, params)
+                except ActionNotSent:
+                    break
+                except ActionError:
+                    continue
+
+        try:
+            await asyncio.wait_for(flush_pending(), timeout)
+        except TimeoutError:
+            pass
+        if self._pending:
+            logger.warning(f"发件箱: 关闭时仍有 {len(self._pending)} 条待发送，下次启动时重放")
+        return not self._pending
+
+    async def close(self) -> None:
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            try:
+                await self._retry_task
+            except asyncio.CancelledError:
+                pass
+        await self._flush()
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    async def execute(
+        self,
+        action: str,
+        params: dict[str, Any] | None = None,
+        *,
+        timeout: float | None = None,
+        key: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        发送动作；DURABLE_ACTIONS 先落盘再发送
+
+        Args:
+            key: 幂等键，相同的 key 只发送一次；为 None 时自动生成
+
+        Returns:
+            NapCat 的响应；key 已完成时返回记录的状态（deduplicated 为 True）
+
+        Raises:
+            ActionQueued: 暂时未能发出，条目已落盘，稍后自动补发（不要重发）
+            ActionNotSent: 写日志失败，没有发出（可以重发）
+            ActionError: 结果未知（超时等，不会重发）
+        """
+        if action not in DURABLE_ACTIONS or self._fp is None:
+            return await self.caller.execute(action, params, timeout=timeout)
+        key = key or uuid.uuid4().hex
+        status = self._done.get(key)
+        if status is not None:
+            return {
+                "status": status,
+                "retcode": 0 if status == "ok" else -1,
+                "data": None,
+                "message": "duplicate",
+                "deduplicated": True,
+            }
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        # 从落盘开始就登记为进行中：同一 key 的并发调用等待同一个结果，重试循环也不会抢先发送
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        if key in self._pending:
+            action, params = self._pending[key]
+        else:
+            params = params or {}
+            self._pending[key] = (action, params)
+            waiter = self._append({"op": "put", "key": key, "action": action, "params": params}, durable=True)
+            assert waiter is not None
+            try:
+                with span("outbox", action=action):
+                    await waiter
+            except BaseException as e:
+                self._inflight.pop(key, None)
+                future.set_exception(e if isinstance(e, Exception) else ActionError(f"{action} 被中断"))
+                future.exception()
+                raise
+        try:
+            return await self._deliver(key, action, params, timeout, future)
+        except ActionNotSent as e:
+            raise _queued(action, key, e) from e
+
+    async def _deliver(
+        self,
+        key: str,
+        action: str,
+        params: dict[str, Any],
+        timeout: float | None = None,
+        future: asyncio.Future[dict[str, Any]] | None = None,
+    ) -> dict[str, Any]:
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+        try:
+            response = await self.caller.execute(action, params, timeout=timeout)
+        except ActionNotSent as e:
+            # 确定没有发出：保持待发送，由重试循环补发；等待同一 key 的调用方收到 ActionQueued
+            future.set_exception(_queued(action, key, e))
+            future.exception()
+            raise
+        except ActionError as e:
+            # 超时或发出后断开：NapCat 可能已经执行，重发会造成重复，记为完成
+            self.unknown += 1
+            self._complete(key, "unknown")
+            logger.warning(f"发件箱: {action} 结果未知，不再重发: {e}")
+            future.set_exception(e)
+            future.exception()
+            raise
+        except BaseException as e:
+            # 取消等：条目保留，等待者不能永远挂起
+            future.set_exception(e if isinstance(e, Exception) else ActionError(f"{action} 被中断"))
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        # 明确的失败（参数错误、权限不足等）重试也不会成功，同样记为完成
+        self._complete(key, "ok" if response.get("status") == "ok" else "failed")
+        future.set_result(response)
+        return response
+
+    def _complete(self, key: str, status: str) -> None:
+        self._pending.pop(key, None)
+        self._remember(key, status)
+        self._append({"op": "done", "key": key, "status": status}, durable=False)
+
+    async def _retry_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            for key, (action, params) in list(self._pending.items()):
+                if key in self._inflight:
+                    continue
+                try:
+                    await self._deliver(key, action, params)
+                except ActionNotSent as e:
+                    logger.debug(f"发件箱: 重试 {action} 失败: {e}")
+                    break
+                except ActionError:
+                    continue
+            if not self._pending and self.path.stat().st_size > self.compact_bytes:
+                async with self._write_lock:
+                    await self._flush_unlocked()
+                    self._fp.close()
+                    await asyncio.to_thread(self._rewrite)
+                    self._fp = self.path.open("ab")
+                logger.info("发件箱: 日志已压缩")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "inflight": len(self._inflight),
+            "commits": self.commits,
+            "records": self.records,
+            "unknown": self.unknown,
+            "remembered": len(self._done),
+            "records_per_commit": round(self.records / self.commits, 2) if self.commits else 0.0,
+        }
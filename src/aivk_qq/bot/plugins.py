@@ -0,0 +1,469 @@
+"""
+插件系统
+
+插件来源:
+
+- 入口点：分组 aivk_qq.plugins，值为 "module:setup"；
+- 目录：<AIVK_ROOT>/data/qq/plugins 下的 <name>.py 或 <name>/__init__.py。
+
+插件模块提供 setup(bus)（可以是协程函数），在传入的总线上注册处理器，与 `aivk-qq run -a` 的入口相同；
+可选提供 teardown()，热重载、卸载或主总线关闭（EventBus.aclose）时调用。模块顶层可以声明触发条件，加载器不导入模块，只解析源码读取它:
+
+    PLUGIN = {
+        "post_type": "message",        # 字符串或列表，默认 "message"
+        "commands": ["/echo", "/help"], # raw_message 以其中之一开头时触发
+        "match": {"message_type": "group"},
+    }
+
+- 惰性加载：插件在第一个满足触发条件的事件到达时才导入并执行 setup；
+- 热重载：轮询插件文件的 mtime，变化后丢弃旧处理器、重新读取触发条件，已加载的插件重新导入，连接不受影响；
+- 隔离：每个插件有独立的事件总线，异常只记入该插件；导入与 setup 在空白的 contextvars 上下文中执行，
+  插件启动的后台任务不会继承触发加载的那次分发的追踪上下文；单次分发超过 budget 秒被取消，不拖慢其他插件；
+  连续加载失败的插件在文件再次变化前不会重试；
+- stats() 报告每个插件的加载耗时、处理次数、错误、超时与处理耗时，`aivk-qq run` 的指标端点
+  （/metrics 的 app.plugins）可以直接查看。
+
+用法（也可以直接作为入口 `aivk-qq run -a aivk_qq.bot.plugins:setup`，未指定 -a 时的默认值）:
+
+    manager = PluginManager(bus)
+    manager.attach(bus)
+    manager.start()
+"""
+
+import ast
+import asyncio
+import contextvars
+import importlib
+import importlib.metadata
+import importlib.util
+import inspect
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from aivk.api import AivkIO
+
+from .bus import Event, EventBus
+
+logger = logging.getLogger("aivk.qq.bot.plugins")
+
+ENTRY_POINT_GROUP = "aivk_qq.plugins"
+# 目录插件导入后的模块名前缀，模块名为 aivk_qq_plugin_<name>
+MODULE_PREFIX = "aivk_qq_plugin"
+
+
+def default_plugin_dir() -> Path:
+    return AivkIO.get_aivk_root() / "data" / "qq" / "plugins"
+
+
+def read_manifest(path: Path | None) -> dict[str, Any]:
+    """不导入模块，从源码中读取顶层的 PLUGIN = {...}"""
+    if path is None:
+        return {}
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.warning(f"读取插件 {path} 失败: {e!r}")
+        return {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "PLUGIN" for target in node.targets
+        ):
+            try:
+                manifest = ast.literal_eval(node.value)
+            except ValueError:
+                logger.warning(f"{path}: PLUGIN 必须是字面量字典")
+                return {}
+            return manifest if isinstance(manifest, dict) else {}
+    return {}
+
+
+@dataclass(slots=True)
+class Trigger:
+    """由 PLUGIN 声明得到的触发条件"""
+
+    post_types: frozenset[str] | None = frozenset({"message"})
+    commands: tuple[str, ...] = ()
+    match: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_manifest(cls, manifest: dict[str, Any]) -> "Trigger":
+        post_type = manifest.get("post_type", "message")
+        if post_type is None or post_type == "*":
+            post_types = None
+        elif isinstance(post_type, str):
+            post_types = frozenset({post_type})
+        else:
+            post_types = frozenset(post_type)
+        return cls(post_types, tuple(manifest.get("commands") or ()), dict(manifest.get("match") or {}))
+
+    def accepts(self, event: Event) -> bool:
+        if self.post_types is not None and event.get("post_type") not in self.post_types:
+            return False
+        for key, value in self.match.items():
+            if event.get(key) != value:
+                return False
+        if self.commands:
+            text = str(event.get("raw_message") or "").lstrip()
+            return text.startswith(self.commands)
+        return True
+
+
+@dataclass(slots=True)
+class PluginStats:
+    load_ms: float | None = None
+    loads: int = 0
+    events: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "load_ms": self.load_ms,
+            "loads": self.loads,
+            "events": self.events,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self.total_ms / self.events, 3) if self.events else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+            "last_error": self.last_error,
+        }
+
+
+@dataclass(slots=True)
+class Plugin:
+    """一个已发现的插件"""
+
+    name: str
+    source: str
+    module_name: str
+    attr: str = "setup"
+    path: Path | None = None
+    trigger: Trigger = field(default_factory=Trigger)
+    module: ModuleType | None = None
+    bus: EventBus | None = None
+    failed: bool = False
+    stamp: tuple[float, int] | None = None
+    stats: PluginStats = field(default_factory=PluginStats)
+
+    @property
+    def loaded(self) -> bool:
+        return self.bus is not None
+
+
+def _stamp(path: Path | None) -> tuple[float, int] | None:
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+class PluginManager:
+    """
+    发现、惰性加载与热重载插件
+
+    Args:
+        bus: 主事件总线，插件总线共享其 caller 与线程池/进程池
+        directory: 插件目录，默认 <AIVK_ROOT>/data/qq/plugins
+        entry_points: 是否加载入口点插件
+        budget: 单个插件处理一个事件的时间上限（秒）
+        interval: 检查插件文件变化的间隔（秒）
+    """
+
+    def __init__(
+        self,
+        bus: EventBus,
+        directory: str | Path | None = None,
+        *,
+        entry_points: bool = True,
+        budget: float = 10.0,
+        interval: float = 2.0,
+    ) -> None:
+        self.bus = bus
+        self.directory = Path(directory) if directory else default_plugin_dir()
+        self.entry_points = entry_points
+        self.budget = budget
+        self.interval = interval
+        self._plugins: dict[str, Plugin] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._watcher: asyncio.Task[None] | None = None
+
+    @property
+    def plugins(self) -> dict[str, Plugin]:
+        return dict(self._plugins)
+
+    # region 发现
+
+    def _discover_entry_points(self) -> list[Plugin]:
+        found = []
+        for ep in importlib.metadata.entry_points(group=ENTRY_POINT_GROUP):
+            module_name, _, attr = ep.value.partition(":")
+            path = None
+            try:
+                spec = importlib.util.find_spec(module_name)
+            except (ImportError, ValueError):
+                spec = None
+            if spec is not None and spec.origin and spec.origin.endswith(".py"):
+                path = Path(spec.origin)
+            found.append(Plugin(ep.name, "entry_point", module_name, attr or "setup", path))
+        return found
+
+    def _discover_directory(self) -> list[Plugin]:
+        if not self.directory.is_dir():
+            return []
+        found = []
+        for child in sorted(self.directory.iterdir()):
+            if child.name.startswith(("_", ".")):
+                continue
+            if child.is_file() and child.suffix == ".py":
+                path = child
+            elif child.is_dir() and (child / "__init__.py").is_file():
+                path = child / "__init__.py"
+            else:
+                continue
+            name = child.stem if child.is_file() else child.name
+            found.append(Plugin(name, "directory", f"{MODULE_PREFIX}_{name}", "setup", path))
+        return found
+
+    def discover(self, entry_points: bool | None = None) -> list[str]:
+        """
+        扫描插件（不导入），已发现的插件保留加载状态
+
+        Args:
+            entry_points: 是否扫描入口点，默认按构造参数；热重载只扫描目录
+
+        Returns:
+            list[str]: 新发现的插件名
+        """
+        found = self._discover_directory()
+        if self.entry_points if entry_points is None else entry_points:
+            found += self._discover_entry_points()
+        added = []
+        for plugin in found:
+            if plugin.name in self._plugins:
+                continue
+            plugin.trigger = Trigger.from_manifest(read_manifest(plugin.path))
+            plugin.stamp = _stamp(plugin.path)
+            self._plugins[plugin.name] = plugin
+            self._locks[plugin.name] = asyncio.Lock()
+            added.append(plugin.name)
+        if added:
+            logger.info(f"发现插件: {added}")
+        return added
+
+    # endregion
+
+    # region 加载
+
+    def _import(self, plugin: Plugin) -> ModuleType:
+        if plugin.source == "entry_point":
+            module = sys.modules.get(plugin.module_name)
+            if module is not None and plugin.stats.loads:
+                return importlib.reload(module)
+            return importlib.import_module(plugin.module_name)
+        assert plugin.path is not None
+        # 热重载时丢弃旧模块及其子模块，重新执行
+        for name in [name for name in sys.modules if name == plugin.module_name or name.startswith(f"{plugin.module_name}.")]:
+            del sys.modules[name]
+        locations = [str(plugin.path.parent)] if plugin.path.name == "__init__.py" else None
+        spec = importlib.util.spec_from_file_location(
+            plugin.module_name, plugin.path, submodule_search_locations=locations
+        )
+        if spec is None or spec.loader is None:
+            raise ImportError(f"无法加载 {plugin.path}")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[plugin.module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[plugin.module_name]
+            raise
+        return module
+
+    async def load(self, name: str) -> bool:
+        """导入插件并执行 setup，已加载时直接返回"""
+        plugin = self._plugins[name]
+        async with self._locks[name]:
+            if plugin.loaded:
+                return True
+            if plugin.failed:
+                return False
+            started = time.perf_counter()
+            try:
+                # 加载由某次事件分发触发，在空白上下文中执行，避免插件的后台任务挂在那次分发的追踪上
+                context = contextvars.Context()
+                # 导入在线程中进行，模块顶层的耗时操作不阻塞事件循环
+                loop = asyncio.get_running_loop()
+                module = await loop.run_in_executor(None, context.run, self._import, plugin)
+                setup = getattr(module, plugin.attr, None)
+                if not callable(setup):
+                    raise ImportError(f"插件 {name} 缺少可调用的 {plugin.attr}")
+                bus = EventBus(self.bus.caller, self.bus.offload)
+                result = context.run(setup, bus)
+                if inspect.iscoroutine(result):
+                    await asyncio.wait_for(asyncio.create_task(result, context=context), self.budget)
+                elif inspect.isawaitable(result):
+                    await asyncio.wait_for(result, self.budget)
+            except Exception as e:
+                plugin.failed = True
+                plugin.stats.last_error = repr(e)
+                logger.error(f"加载插件 {name} 失败: {e!r}", exc_info=e)
+                return False
+            plugin.module = module
+            plugin.bus = bus
+            plugin.stats.loads += 1
+            plugin.stats.load_ms = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(f"已加载插件 {name}（{plugin.stats.load_ms}ms，{len(bus.handlers)} 个处理器）")
+            return True
+
+    async def unload(self, name: str) -> None:
+        plugin = self._plugins[name]
+        async with self._locks[name]:
+            self._unload(plugin)
+
+    def _unload(self, plugin: Plugin) -> None:
+        module, plugin.module, plugin.bus = plugin.module, None, None
+        teardown = getattr(module, "teardown", None) if module is not None else None
+        if callable(teardown):
+            try:
+                teardown()
+            except Exception as e:
+                logger.warning(f"插件 {plugin.name} teardown 失败: {e!r}")
+
+    # endregion
+
+    # region 分发
+
+    def attach(self, bus: EventBus) -> None:
+        bus.add_handler(self.dispatch)
+
+    async def dispatch(self, event: Event) -> None:
+        """把事件交给触发条件匹配的插件，各插件并发处理、互不影响"""
+        targets = [plugin for plugin in self._plugins.values() if not plugin.failed and plugin.trigger.accepts(event)]
+        if targets:
+            await asyncio.gather(*(self._deliver(plugin, event) for plugin in targets))
+
+    async def _deliver(self, plugin: Plugin, event: Event) -> None:
+        if not plugin.loaded and not await self.load(plugin.name):
+            return
+        bus = plugin.bus
+        if bus is None:
+            return
+        stats = plugin.stats
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(bus.dispatch(event), self.budget)
+        except TimeoutError:
+            stats.timeouts += 1
+            logger.warning(f"插件 {plugin.name} 处理事件超过 {self.budget}s，已取消")
+        except Exception as e:
+            # 插件总线已经隔离了处理器异常，这里兜底 Action 发送等失败
+            stats.errors += 1
+            stats.last_error = repr(e)
+            logger.error(f"插件 {plugin.name} 处理失败: {e!r}")
+        elapsed = (time.perf_counter() - started) * 1000
+        stats.events += 1
+        stats.total_ms += elapsed
+        stats.max_ms = max(stats.max_ms, elapsed)
+
+    # endregion
+
+    # region 热重载
+
+    async def check(self) -> list[str]:
+        """
+        检查插件文件变化并重新加载
+
+        Returns:
+            list[str]: 发生变化的插件名（包括新增与删除）
+        """
+        changed = self.discover(entry_points=False)
+        present = {plugin.name for plugin in self._discover_directory()}
+        for name, plugin in list(self._plugins.items()):
+            if plugin.source == "directory" and name not in present:
+                async with self._locks[name]:
+                    self._unload(plugin)
+                del self._plugins[name]
+                del self._locks[name]
+                logger.info(f"插件 {name} 已删除，卸载")
+                changed.append(name)
+                continue
+            stamp = _stamp(plugin.path)
+            if stamp == plugin.stamp:
+                continue
+            plugin.stamp = stamp
+            changed.append(name)
+            async with self._locks[name]:
+                was_loaded = plugin.loaded
+                self._unload(plugin)
+                plugin.failed = False
+                plugin.trigger = Trigger.from_manifest(read_manifest(plugin.path))
+            if was_loaded:
+                # 已经在用的插件立即重新加载，让错误尽早暴露
+                if await self.load(name):
+                    logger.info(f"插件 {name} 已热重载")
+        return changed
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"检查插件变化失败: {e!r}", exc_info=e)
+
+    def start(self) -> None:
+        """发现插件并开始监视文件变化"""
+        self.discover()
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+        for plugin in self._plugins.values():
+            self._unload(plugin)
+
+    # endregion
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            name: {
+                "source": plugin.source,
+                "loaded": plugin.loaded,
+                "failed": plugin.failed,
+                **plugin.stats.to_dict(),
+            }
+            for name, plugin in self._plugins.items()
+        }
+
+
+def setup(bus: EventBus) -> None:
+    """
+    处理器入口：挂载插件管理器
+
+    `aivk-qq run` 未指定 -a 时使用；多进程分片时每个工作进程各自惰性加载插件。
+    主总线关闭（EventBus.aclose）时停止监视并调用各插件的 teardown；
+    stats() 注册为总线指标 plugins，run_bot 在指标端点的 app.plugins 下报告。
+    """
+    manager = PluginManager(bus)
+    manager.attach(bus)
+    manager.start()
+    bus.add_close_hook(manager.stop)
+    bus.add_metrics("plugins", manager.stats)
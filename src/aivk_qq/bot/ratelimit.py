@@ -0,0 +1,113 @@
+"""
+令牌桶限流
+
+QQ 对单个账号的发送频率有上限，所有出站动作都应经过限流。
+"""
+
+import asyncio
+import time
+from collections.abc import Container
+from typing import TYPE_CHECKING, Any, Protocol
+
+from .trace import span
+
+if TYPE_CHECKING:
+    from .client import ActionCaller
+
+
+class TokenBucket:
+    """
+    异步令牌桶
+
+    Args:
+        rate: 每秒补充的令牌数，<= 0 表示不限流
+        burst: 桶容量（允许的突发量）
+    """
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """立即尝试取令牌，不等待"""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        取令牌，不足时等待
+
+        Returns:
+            float: 等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        # 串行化等待者，保证先到先得
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                delay = (tokens - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+        return waited
+
+    def dump(self) -> dict[str, float]:
+        """令牌数快照（墙钟时间）"""
+        self._refill()
+        return {"tokens": self._tokens, "time": time.time()}
+
+    def restore(self, state: dict[str, Any]) -> None:
+        """按快照之后经过的时间补充令牌；重启不会让桶变满，突发额度不因重启而重置"""
+        elapsed = max(0.0, time.time() - float(state["time"]))
+        self._tokens = min(self.burst, float(state["tokens"]) + elapsed * max(self.rate, 0.0))
+        self._updated = time.monotonic()
+
+
+class Limiter(Protocol):
+    """TokenBucket 与 SharedTokenBucket 的公共接口"""
+
+    rate: float
+    burst: float
+
+    async def acquire(self, tokens: float = 1.0) -> float: ...
+
+    def dump(self) -> dict[str, float]: ...
+
+    def restore(self, state: dict[str, Any]) -> None: ...
+
+
+class LimitedCaller:
+    """
+    发出动作前先取令牌的 ActionCaller
+
+    Args:
+        caller: 实际发出动作的客户端
+        limiter: 令牌桶
+        actions: 需要限流的动作，None 表示全部
+    """
+
+    def __init__(self, caller: "ActionCaller", limiter: Limiter, actions: Container[str] | None = None) -> None:
+        self.caller = caller
+        self.limiter = limiter
+        self.actions = actions
+
+    async def execute(
+        self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None
+    ) -> dict[str, Any]:
+        if self.actions is None or action in self.actions:
+            with span("ratelimit"):
+                await self.limiter.acquire()
+        return await self.caller.execute(action, params, timeout=timeout)
@@ -0,0 +1,234 @@
+"""
+机器人运行入口（`aivk-qq run`）
+
+workers == 1 时在当前进程内直接运行处理器；
+workers > 1 时当前进程只负责接入与出站，事件按会话分片到工作进程。
+MCP 服务器与指标端点可以作为 Runtime 的服务运行在同一个事件循环中，见 bot/runtime.py。
+"""
+
+import asyncio
+import inspect
+import logging
+
+from ..config import ConfigStore, QQConfig
+from .backfill import Backfill
+from .bus import Event, EventBus
+from .capture import CaptureWriter
+from .client import WSClient, WSServer
+from .endpoints import build_transport
+from .flood import FloodGuard
+from .keywords import KeywordEngine
+from .outbox import DURABLE_ACTIONS, Outbox
+from .ratelimit import LimitedCaller
+from .runtime import Runtime
+from .scheduler import JobStore, Scheduler
+from .shard import ShardRouter, load_app
+from .snapshot import Snapshotter
+from .state import account_rate_key, open_backend, shared_limiter
+from .trace import default_trace_dir, tracer
+from .unified import UnifiedClient
+
+logger = logging.getLogger("aivk.qq.bot.runner")
+
+
+def _account_limits(config: QQConfig) -> tuple[float, float]:
+    """bot_uid 账号的发送限流参数，与 MCP 服务器中该账号的配置一致"""
+    for entry in config.accounts:
+        if config.bot_uid is not None and int(entry.get("self_id", 0)) == config.bot_uid:
+            return float(entry.get("rate", config.rate)), float(entry.get("burst", config.burst))
+    return config.rate, config.burst
+
+
+async def run_bot(
+    app: str,
+    store: ConfigStore,
+    *,
+    transport: str = "ws",
+    workers: int = 1,
+    capture: CaptureWriter | None = None,
+    runtime: Runtime | None = None,
+) -> None:
+    """
+    运行机器人直到被取消或 runtime.stop()
+
+    Args:
+        app: 处理器入口 "module:function"
+        store: qq 配置存储，运行期间监视配置文件变化
+        transport: 事件接入方式 "ws"（正向）、"ws-server"（反向）或 "auto"（正向 WS 接收事件，
+            动作按延迟在 HTTP 与 WS 之间选择）
+        workers: 工作进程数
+        capture: 录制器
+        runtime: 共用事件循环的运行时，提供启动阶段计时、同循环服务（MCP 服务器等）、
+            指标与关闭期限；为 None 时只运行机器人
+    """
+    runtime = runtime or Runtime(drain_timeout=store.snapshot.drain_timeout, use_uvloop=False)
+    tracer.configure(**store.snapshot.trace_options(), path=default_trace_dir() / "bot.jsonl", service="aivk-qq/bot")
+    bus = EventBus()
+    # 限流器放在共享状态后端上，同一账号的多个进程（包括 MCP 服务器）合计不超过同一个速率
+    backend = open_backend(store.snapshot.state_backend)
+    uid = store.snapshot.bot_uid or "bot"
+    send_limiter = shared_limiter(backend, account_rate_key(uid), *_account_limits(store.snapshot))
+
+    def allowed(event: Event) -> bool:
+        # 每次读取最新快照，修改 allowed_groups 后立即生效
+        return store.snapshot.group_allowed(event.get("group_id"))
+
+    bus.add_filter(allowed)
+
+    # 刷屏检测在处理器（包括分片路由）之前拦截
+    enforce_rate = store.snapshot.flood_enforce_rate
+    flood = FloodGuard(
+        **store.snapshot.flood_options(),
+        limiter=shared_limiter(backend, f"flood:{uid}", enforce_rate, max(1.0, enforce_rate)),
+    )
+    if store.snapshot.flood_enabled:
+        bus.add_filter(flood.allow)
+
+    with runtime.phase("keywords"):
+        keywords = KeywordEngine(store.snapshot.keyword_rules)
+        keywords.attach(bus)
+    rebuilds: set[asyncio.Task[None]] = set()
+
+    async def reload_keywords(rules: tuple[dict, ...]) -> None:
+        try:
+            await keywords.rebuild(rules)
+        except ValueError as e:
+            logger.error(f"关键词规则无效，继续使用旧规则: {e}")
+
+    def on_config_change(old: QQConfig, new: QQConfig) -> None:
+        if old.flood_options() != new.flood_options():
+            flood.reconfigure(**new.flood_options())
+        if old.flood_enabled != new.flood_enabled:
+            if new.flood_enabled:
+                bus.add_filter(flood.allow)
+            else:
+                bus.remove_filter(flood.allow)
+        if _account_limits(old) != _account_limits(new):
+            send_limiter.rate, send_limiter.burst = _account_limits(new)
+        if old.trace_options() != new.trace_options():
+            tracer.configure(**new.trace_options())
+        if old.keyword_rules != new.keyword_rules:
+            task = asyncio.create_task(reload_keywords(new.keyword_rules))
+            rebuilds.add(task)
+            task.add_done_callback(rebuilds.discard)
+
+    unsubscribe = store.subscribe(on_config_change)
+    conn = build_transport(transport, store.to_dict(), bus=bus, capture=capture)  # type: ignore[arg-type]
+    assert isinstance(conn, (WSClient, WSServer, UnifiedClient))
+    # 发件箱在 open() 之前直接透传，之后发送类动作先落盘
+    outbox = Outbox(conn) if store.snapshot.outbox_enabled else None
+    caller = outbox or conn
+    # 处理器、关键词回复、工作进程与定时任务的发送类动作经过账号限流；
+    # 同循环服务（MCP 服务器）的账号自带同一个键的限流，直接使用 caller
+    limited = LimitedCaller(caller, send_limiter, DURABLE_ACTIONS)
+    bus.caller = limited
+
+    backfill: Backfill | None = None
+    if store.snapshot.backfill_enabled:
+        backfill = Backfill(
+            conn,
+            bus,
+            max_concurrency=store.snapshot.backfill_concurrency,
+            max_messages=store.snapshot.backfill_max_messages,
+        )
+        backfill.attach(bus)
+        conn.add_connect_listener(backfill.run)
+
+    router: ShardRouter | None = None
+    with runtime.phase("app"):
+        if workers > 1:
+            router = ShardRouter(app, workers, limited)
+            bus.add_handler(router.route)
+            router.start()
+        else:
+            result = load_app(app)(bus)
+            if inspect.isawaitable(result):
+                await result
+
+    snapshot = store.snapshot
+    scheduler = Scheduler(
+        JobStore(),
+        limited,
+        jitter=snapshot.scheduler_jitter,
+        limiter=shared_limiter(backend, f"scheduler:{uid}", snapshot.scheduler_rate, max(1.0, snapshot.scheduler_rate)),
+    )
+
+    # 在连接之前恢复快照，首次连接的补拉即可从上次退出时的游标开始
+    snapshots: Snapshotter | None = None
+    if snapshot.snapshot_enabled:
+        with runtime.phase("snapshot"):
+            snapshots = Snapshotter("bot", interval=snapshot.snapshot_interval)
+            if backfill is not None:
+                snapshots.register("cursors", backfill.dump, backfill.restore)
+            snapshots.register("flood_limiter", flood.limiter.dump, flood.limiter.restore)
+            snapshots.register("scheduler_limiter", scheduler.limiter.dump, scheduler.limiter.restore)
+            await snapshots.restore()
+            snapshots.start()
+
+    runtime.add_metrics("bus", bus.stats)
+    # 处理器入口注册的指标，例如插件管理器的每插件加载耗时与处理耗时（分片时在各工作进程内，不在此报告）
+    runtime.add_metrics("app", bus.metrics)
+    runtime.add_metrics("flood", flood.stats)
+    runtime.add_metrics("keywords", keywords.stats)
+    runtime.add_metrics("trace", tracer.stats)
+    if outbox is not None:
+        runtime.add_metrics("outbox", outbox.stats)
+    if backfill is not None:
+        runtime.add_metrics("backfill", backfill.stats)
+    if snapshots is not None:
+        runtime.add_metrics("snapshots", snapshots.stats)
+    if router is not None:
+        runtime.add_metrics("shards", router.stats)
+    if isinstance(conn, UnifiedClient):
+        runtime.add_metrics("transport", conn.metrics)
+
+    watcher: asyncio.Task[None] | None = None
+    try:
+        await runtime.start_services(bus, caller)
+        with runtime.phase("connect"):
+            await conn.start()
+        if outbox is not None:
+            with runtime.phase("outbox"):
+                await outbox.open()
+        flood.start(limited)
+        scheduler.start()
+        watcher = asyncio.create_task(store.watch())
+        runtime.mark_started()
+        logger.info(f"机器人已启动: transport={transport}, workers={workers}, 关键词规则={len(keywords.rules)}")
+        await runtime.wait()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        unsubscribe()
+
+        async def close() -> None:
+            # 先停止插件（teardown），再关闭它们可能还在使用的发件箱与连接
+            await bus.aclose()
+            if snapshots is not None:
+                await snapshots.stop()
+            if outbox is not None:
+                await outbox.close()
+            await conn.stop()
+            await backend.close()
+            await tracer.aflush()
+            if capture is not None:
+                capture.close()
+
+        try:
+            # 先停止产生新的动作，再在期限内排空处理器、同循环服务与发件箱，最后断开连接
+            await flood.stop()
+            await scheduler.stop()
+            await asyncio.gather(bus.drain(runtime.remaining()), runtime.stop_services())
+            # 工作进程排空后其动作仍需经由 conn 发出
+            if router is not None:
+                await router.stop(timeout=max(1.0, runtime.remaining()))
+            if outbox is not None:
+                await outbox.drain(runtime.remaining())
+        finally:
+            # 再次收到信号时排空被取消，但快照、发件箱日志、连接与录制文件仍要正常关闭
+            closing = asyncio.ensure_future(close())
+            try:
+                await asyncio.shield(closing)
+            except asyncio.CancelledError:
+                await closing
+                raise
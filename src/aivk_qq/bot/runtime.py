@@ -0,0 +1,265 @@
+"""
+单事件循环运行时（`aivk-qq run`）
+
+机器人、MCP 服务器（sse / streamable-http）、定时任务与指标端点运行在同一个事件循环中，
+共用一组到 NapCat 的连接与同一条事件流，不必为每个组件各起一个进程:
+
+- 可选 uvloop；
+- SIGINT / SIGTERM 触发有序关闭：停止接收新事件与工具调用，在 drain_timeout 期限内
+  排空进行中的处理器、工具调用与发件箱，然后断开连接；关闭期间再次收到信号时立即取消；
+- 记录启动各阶段的耗时，启动完成后写入日志，并通过指标端点报告。
+
+用法:
+    runtime = Runtime(drain_timeout=10)
+    runtime.add_service("mcp", start, stop)
+    runtime.run(lambda: run_bot(app, store, runtime=runtime))
+
+服务在机器人的事件总线与动作客户端就绪后、连接 NapCat 之前按注册顺序启动，
+关闭时在排空处理器的同时按相反顺序停止。
+"""
+
+import asyncio
+import importlib.util
+import json
+import logging
+import signal
+import time
+from collections.abc import Awaitable, Callable, Coroutine, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from .bus import EventBus
+    from .client import ActionCaller
+
+logger = logging.getLogger("aivk.qq.bot.runtime")
+
+StartHook = Callable[["EventBus", "ActionCaller"], Awaitable[Any]]
+StopHook = Callable[[], Awaitable[Any]]
+
+
+def uvloop_available() -> bool:
+    return importlib.util.find_spec("uvloop") is not None
+
+
+@dataclass(slots=True)
+class Service:
+    """与机器人共用事件循环的组件"""
+
+    name: str
+    start: StartHook
+    stop: StopHook
+    started: bool = False
+
+
+class Runtime:
+    """
+    单事件循环运行时
+
+    Args:
+        drain_timeout: 关闭时排空处理器、工具调用与出站队列的总期限（秒）
+        use_uvloop: 已安装 uvloop 时使用 uvloop 事件循环
+    """
+
+    def __init__(self, *, drain_timeout: float = 10.0, use_uvloop: bool = True) -> None:
+        self.drain_timeout = drain_timeout
+        self.use_uvloop = use_uvloop
+        self.phases: dict[str, float] = {}
+        self.loop_name = "asyncio"
+        self._services: list[Service] = []
+        self._metrics: dict[str, Callable[[], Any]] = {}
+        self._stop: asyncio.Event | None = None
+        self._deadline: float | None = None
+        self._main: asyncio.Task[Any] | None = None
+        self._created = time.perf_counter()
+        self._started_at: float | None = None
+        self._metrics_runner: web.AppRunner | None = None
+
+    # region 阶段计时
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """记录一个启动阶段的耗时（毫秒）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def mark_started(self) -> None:
+        """启动完成：输出各阶段耗时"""
+        self._started_at = time.time()
+        total = round((time.perf_counter() - self._created) * 1000, 2)
+        self.phases["total"] = total
+        detail = ", ".join(f"{name}={elapsed}ms" for name, elapsed in self.phases.items() if name != "total")
+        logger.info(f"启动完成，用时 {total}ms（loop={self.loop_name}）: {detail}")
+
+    # endregion
+
+    # region 服务
+
+    def add_service(self, name: str, start: StartHook, stop: StopHook) -> None:
+        """
+        注册与机器人共用事件循环的服务
+
+        Args:
+            start: start(bus, caller)，在机器人的总线与动作客户端就绪后调用
+            stop: 关闭时调用，应在 remaining() 秒内完成
+        """
+        self._services.append(Service(name, start, stop))
+
+    async def start_services(self, bus: "EventBus", caller: "ActionCaller") -> None:
+        for service in self._services:
+            with self.phase(service.name):
+                await service.start(bus, caller)
+            service.started = True
+
+    async def stop_services(self) -> None:
+        """按注册的相反顺序停止服务，每个服务受剩余期限约束"""
+        for service in reversed(self._services):
+            if not service.started:
+                continue
+            service.started = False
+            try:
+                await asyncio.wait_for(service.stop(), max(0.1, self.remaining()))
+            except TimeoutError:
+                logger.warning(f"{service.name}: 未能在期限内停止")
+            except Exception as e:
+                logger.error(f"{service.name}: 停止失败: {e!r}", exc_info=e)
+
+    # endregion
+
+    # region 关闭
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop is not None and self._stop.is_set()
+
+    def _event(self) -> asyncio.Event:
+        if self._stop is None:
+            self._stop = asyncio.Event()
+        return self._stop
+
+    def stop(self, reason: str = "") -> None:
+        """开始有序关闭；已在关闭时再次调用则立即取消主任务"""
+        event = self._event()
+        if event.is_set():
+            if self._main is not None and not self._main.done():
+                logger.warning("再次收到退出信号，立即取消")
+                self._main.cancel()
+            return
+        logger.info(f"正在关闭{f'（{reason}）' if reason else ''}，排空期限 {self.drain_timeout}s")
+        event.set()
+
+    async def wait(self) -> None:
+        """等待 stop() 被调用"""
+        await self._event().wait()
+
+    def remaining(self) -> float:
+        """关闭排空的剩余时间（秒），第一次调用时开始计时"""
+        now = time.monotonic()
+        if self._deadline is None:
+            self._deadline = now + self.drain_timeout
+        return max(0.0, self._deadline - now)
+
+    # endregion
+
+    # region 指标端点
+
+    def add_metrics(self, name: str, provider: Callable[[], Any]) -> None:
+        """注册指标，provider() 返回可 JSON 序列化的值"""
+        self._metrics[name] = provider
+
+    def metrics(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "loop": self.loop_name,
+            "started_at": self._started_at,
+            "uptime": round(time.time() - self._started_at, 1) if self._started_at else 0.0,
+            "stopping": self.stopping,
+            "phases_ms": self.phases,
+            "services": [service.name for service in self._services if service.started],
+        }
+        for name, provider in self._metrics.items():
+            try:
+                data[name] = provider()
+            except Exception as e:
+                data[name] = {"error": repr(e)}
+        return data
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.json_response(self.metrics(), dumps=lambda value: json.dumps(value, ensure_ascii=False, default=str))
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        if self.stopping or self._started_at is None:
+            return web.json_response({"status": "stopping" if self.stopping else "starting"}, status=503)
+        return web.json_response({"status": "ok"})
+
+    async def serve_metrics(self, host: str, port: int) -> bool:
+        """
+        在 http://host:port/metrics 提供 JSON 指标，/healthz 用于存活探测
+
+        指标端点是可选的：端口被占用等绑定失败只记录错误，不影响机器人启动。
+
+        Returns:
+            bool: 是否开始监听
+        """
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        app.router.add_get("/healthz", self._handle_health)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError as e:
+            await runner.cleanup()
+            logger.error(f"指标端点无法监听 {host}:{port}，已跳过: {e}")
+            return False
+        self._metrics_runner = runner
+        logger.info(f"指标端点: http://{host}:{port}/metrics")
+        return True
+
+    async def close_metrics(self) -> None:
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+            self._metrics_runner = None
+
+    # endregion
+
+    # region 入口
+
+    def run(self, main: Callable[[], Coroutine[Any, Any, Any]]) -> None:
+        """在新的事件循环中运行 main() 直到结束（阻塞）"""
+        factory: Callable[[], asyncio.AbstractEventLoop] | None = None
+        if self.use_uvloop:
+            if uvloop_available():
+                import uvloop
+
+                factory = uvloop.new_event_loop
+                self.loop_name = "uvloop"
+            else:
+                logger.warning("未安装 uvloop，使用默认事件循环（pip install uvloop 以启用）")
+        with asyncio.Runner(loop_factory=factory) as runner:
+            runner.run(self._run(main))
+
+    async def _run(self, main: Callable[[], Coroutine[Any, Any, Any]]) -> None:
+        loop = asyncio.get_running_loop()
+        self._main = asyncio.current_task()
+        installed: list[signal.Signals] = []
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop, sig.name)
+            except (NotImplementedError, RuntimeError):
+                # Windows 不支持，Ctrl+C 由 asyncio.Runner 取消主任务，同样会执行关闭流程
+                continue
+            installed.append(sig)
+        try:
+            await main()
+        finally:
+            for sig in installed:
+                loop.remove_signal_handler(sig)
+            await self.close_metrics()
+
+    # endregion
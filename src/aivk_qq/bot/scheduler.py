@@ -0,0 +1,473 @@
+"""
+定时任务
+
+在机器人进程内运行的调度器，通过共享的连接发出动作（定时公告、提醒、群打卡 set_group_sign 等）:
+
+- 任务保存在 <AIVK_ROOT>/data/qq/jobs.json，MCP 工具或手动修改后调度器自动重新加载；
+- 支持 cron 表达式（分 时 日 月 周，以及 @hourly/@daily/@weekly/@monthly/@yearly）与一次性任务
+  （at 为时间戳或 ISO 时间，如 "2026-12-01T08:00"）；
+- 手动编辑出错的任务（字段类型不对、cron 无法解析）在加载时跳过并记录日志，不影响其他任务；
+- 到期时间放在最小堆中，调度循环只睡到最近的到期时间；
+- 同一时刻到期的任务按任务 id 哈希错开 0~jitter 秒，发送再经过令牌桶限速，避免瞬时突发。
+
+    {"id": "sign-123", "action": "set_group_sign", "params": {"group_id": 123}, "cron": "0 8 * * *"}
+    {"id": "remind", "action": "send_group_msg", "params": {...}, "at": 1767225600}
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+import zlib
+from collections.abc import Callable, Mapping
+from dataclasses import asdict, dataclass, field, fields, replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aivk.api import AivkIO
+
+from ..config import atomic_write_json, file_stamp, locked
+from .ratelimit import Limiter, TokenBucket
+
+if TYPE_CHECKING:
+    from .client import ActionCaller
+
+logger = logging.getLogger("aivk.qq.bot.scheduler")
+
+_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_field(text: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in text.split(","):
+        expr, slash, step_text = part.partition("/")
+        step = int(step_text) if slash else 1
+        if expr == "*":
+            start, end = low, high
+        elif "-" in expr:
+            first, last = expr.split("-", 1)
+            start, end = int(first), int(last)
+        else:
+            start = int(expr)
+            end = high if slash else start
+        if step <= 0 or not low <= start <= end <= high:
+            raise ValueError(f"cron 字段超出范围: {part!r}（{low}-{high}）")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(slots=True, frozen=True)
+class CronSpec:
+    """五段式 cron 表达式（本地时间）"""
+
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    any_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, expr: str) -> "CronSpec":
+        """
+        Raises:
+            ValueError: 表达式格式错误
+        """
+        parts = _ALIASES.get(expr.strip(), expr).split()
+        if len(parts) != 5:
+            raise ValueError(f"cron 表达式应为 5 段（分 时 日 月 周）: {expr!r}")
+        minutes, hours, days, months, weekdays = (
+            _parse_field(part, low, high) for part, (low, high) in zip(parts, _RANGES)
+        )
+        # 周日可写作 0 或 7
+        weekdays = frozenset(day % 7 for day in weekdays)
+        return cls(minutes, hours, days, months, weekdays, parts[2] == "*", parts[4] == "*")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        # 与 cron 一致：日与周同时限定时满足其一即可
+        return in_days or in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        moment 之后（不含）的下一个触发时间
+
+        Raises:
+            ValueError: 五年内没有匹配的时间（例如 2 月 30 日）
+        """
+        current = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while current <= limit:
+            if current.month not in self.months:
+                year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+                current = current.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(current):
+                current = current.replace(hour=0, minute=0) + timedelta(days=1)
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+            else:
+                return current
+        raise ValueError("cron 表达式在五年内没有匹配的时间")
+
+
+def parse_time(value: Any) -> float:
+    """
+    时间戳或 ISO 时间（本地时间，如 "2026-12-01T08:00"）转换为时间戳
+
+    Raises:
+        ValueError: 无法解析
+    """
+    if isinstance(value, bool) or not isinstance(value, int | float | str):
+        raise ValueError(f"时间应为时间戳或 ISO 时间: {value!r}")
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+_FIELD_TYPES = (
+    ("id", str),
+    ("action", str),
+    ("params", dict),
+    ("cron", str),
+    ("enabled", bool),
+    ("jitter", bool),
+    ("last_status", str),
+    ("runs", int),
+)
+
+
+def _check(values: Mapping[str, Any], name: str, kind: type) -> None:
+    value = values.get(name)
+    if value is not None and (not isinstance(value, kind) or (isinstance(value, bool) and kind is not bool)):
+        raise ValueError(f"任务字段 {name} 应为 {kind.__name__}: {value!r}")
+
+
+@dataclass(slots=True, frozen=True)
+class Job:
+    id: str
+    action: str
+    params: dict[str, Any] = field(default_factory=dict)
+    cron: str | None = None
+    at: float | None = None
+    enabled: bool = True
+    jitter: bool = True
+    last_run: float | None = None
+    last_status: str | None = None
+    runs: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Job":
+        """
+        校验字段类型，at 可以是时间戳或 ISO 时间
+
+        Raises:
+            ValueError: 缺少 id/action、字段类型错误、cron 无法解析，或 cron 与 at 不是恰好提供一个
+        """
+        if not isinstance(data, Mapping):
+            raise ValueError(f"任务应为对象: {data!r}")
+        known = {f.name for f in fields(cls)}
+        # null 等同于未提供，使用默认值
+        values = {key: value for key, value in data.items() if key in known and value is not None}
+        if not values.get("id") or not values.get("action"):
+            raise ValueError("任务需要 id 与 action")
+        for name, kind in _FIELD_TYPES:
+            _check(values, name, kind)
+        for name in ("at", "last_run"):
+            if name in values:
+                values[name] = parse_time(values[name])
+        job = cls(**values)
+        if (job.cron is None) == (job.at is None):
+            raise ValueError(f"任务 {job.id} 需要且只能提供 cron 或 at 之一")
+        if job.cron is not None:
+            CronSpec.parse(job.cron)
+        return job
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def next_run(self, after: float) -> float | None:
+        """after 之后的下一次运行时间（时间戳），不再运行时为 None"""
+        if not self.enabled:
+            return None
+        if self.at is not None:
+            return self.at if self.last_run is None else None
+        assert self.cron is not None
+        return CronSpec.parse(self.cron).next_after(datetime.fromtimestamp(after)).timestamp()
+
+
+def default_jobs_path() -> Path:
+    return AivkIO.get_aivk_root() / "data" / "qq" / "jobs.json"
+
+
+class JobStore:
+    """
+    任务存储（jobs.json）
+
+    机器人（记录运行结果）与 MCP 服务器（增删任务）可能同时写入，
+    每次修改都在文件锁内重新读取、修改、写回。
+
+    Args:
+        path: 文件路径，默认 <AIVK_ROOT>/data/qq/jobs.json
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path else default_jobs_path()
+        self._stamp: tuple[int, int] | None = None
+        self._jobs: dict[str, Job] = {}
+        self.reload(force=True)
+
+    @property
+    def jobs(self) -> dict[str, Job]:
+        return dict(self._jobs)
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        文件被外部修改时重新加载
+
+        Returns:
+            bool: 是否重新加载
+        """
+        stamp = file_stamp(self.path)
+        if not force and stamp == self._stamp:
+            return False
+        jobs: dict[str, Job] = {}
+        if stamp is not None:
+            try:
+                items = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"读取任务文件失败: {e!r}")
+                return False
+            if not isinstance(items, list):
+                logger.warning(f"任务文件应为列表，忽略: {self.path}")
+                items = []
+            for item in items:
+                try:
+                    job = Job.from_dict(item)
+                except (TypeError, ValueError) as e:
+                    logger.error(f"忽略无效任务 {item!r}: {e}")
+                    continue
+                jobs[job.id] = job
+        self._jobs = jobs
+        self._stamp = stamp
+        return True
+
+    def save(self) -> None:
+        with locked(self.path):
+            self._save()
+
+    def _save(self) -> None:
+        atomic_write_json(self.path, [job.to_dict() for job in self._jobs.values()])
+        self._stamp = file_stamp(self.path)
+
+    def _update(self, change: Callable[[dict[str, Job]], bool]) -> bool:
+        """在文件锁内重新读取、执行 change(jobs)，返回 True 时写回"""
+        with locked(self.path):
+            external = file_stamp(self.path) != self._stamp
+            self.reload(force=True)
+            changed = change(self._jobs)
+            if changed:
+                self._save()
+            if external:
+                # 顺带读到了其他进程的修改，让下一次 reload() 报告变化以便调度器重建堆
+                self._stamp = None
+            return changed
+
+    def put(self, job: Job) -> None:
+        def change(jobs: dict[str, Job]) -> bool:
+            jobs[job.id] = job
+            return True
+
+        self._update(change)
+
+    def remove(self, job_id: str) -> bool:
+        return self._update(lambda jobs: jobs.pop(job_id, None) is not None)
+
+    def record(self, job_id: str, ran_at: float, status: str) -> None:
+        """记录一次运行，一次性任务运行后停用"""
+
+        def change(jobs: dict[str, Job]) -> bool:
+            job = jobs.get(job_id)
+            if job is None:
+                return False
+            jobs[job_id] = replace(
+                job,
+                last_run=ran_at,
+                last_status=status,
+                runs=job.runs + 1,
+                enabled=job.enabled and job.at is None,
+            )
+            return True
+
+        self._update(change)
+
+
+class Scheduler:
+    """
+    任务调度器
+
+    用法:
+        scheduler = Scheduler(JobStore(), conn)
+        scheduler.start()
+        ...
+        await scheduler.stop()
+
+    Args:
+        store: 任务存储
+        caller: 发出动作的共享连接
+        jitter: 同一时刻到期任务的最大错开秒数
+        rate: 每秒最多发出的任务动作数
+        poll: 检查任务文件变化的间隔（秒）
+        misfire_grace: 一次性任务错过运行时间后仍补发的期限（秒）
+        limiter: 任务动作的令牌桶（例如多进程共享的 SharedTokenBucket），默认按 rate 新建
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        caller: "ActionCaller",
+        *,
+        jitter: float = 30.0,
+        rate: float = 5.0,
+        poll: float = 2.0,
+        misfire_grace: float = 300.0,
+        limiter: Limiter | None = None,
+    ) -> None:
+        self.store = store
+        self.caller = caller
+        self.jitter = jitter
+        self.limiter = limiter or TokenBucket(rate, burst=max(1.0, rate))
+        self.poll = poll
+        self.misfire_grace = misfire_grace
+        self._heap: list[tuple[float, int, str, float]] = []
+        self._due: dict[str, float] = {}
+        self._seq = itertools.count()
+        self._task: asyncio.Task[None] | None = None
+        self._running: set[asyncio.Task[None]] = set()
+        self._firing: set[str] = set()
+        self._wakeup = asyncio.Event()
+
+    def _offset(self, job: Job) -> float:
+        if not job.jitter or self.jitter <= 0:
+            return 0.0
+        return zlib.crc32(job.id.encode()) % 1000 / 1000 * self.jitter
+
+    def _push(self, job: Job, now: float) -> None:
+        if job.id in self._firing:
+            # 运行结束后由 _fire 重新调度
+            return
+        if job.at is not None and job.last_run is None and job.enabled and job.at < now - self.misfire_grace:
+            logger.warning(f"一次性任务 {job.id} 已错过运行时间，跳过")
+            self.store.record(job.id, now, "missed")
+            return
+        due = job.next_run(now)
+        if due is None:
+            self._due.pop(job.id, None)
+            return
+        self._due[job.id] = due
+        heapq.heappush(self._heap, (due + self._offset(job), next(self._seq), job.id, due))
+
+    def reschedule(self) -> None:
+        """按任务存储重建堆"""
+        now = time.time()
+        self._heap.clear()
+        self._due.clear()
+        for job in self.store.jobs.values():
+            self._push(job, now)
+        self._wakeup.set()
+
+    def upcoming(self) -> list[tuple[str, float]]:
+        """(任务 id, 下次运行时间)，按时间排序"""
+        return sorted(self._due.items(), key=lambda item: item[1])
+
+    def start(self) -> None:
+        self.reschedule()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        logger.info(f"调度器已启动: {len(self._due)} 个待运行任务")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _run(self) -> None:
+        next_poll = time.monotonic() + self.poll
+        while True:
+            if time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + self.poll
+                if self.store.reload():
+                    logger.info("任务文件已变化，重新调度")
+                    self.reschedule()
+
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, job_id, due = heapq.heappop(self._heap)
+                job = self.store.get(job_id)
+                # 任务被修改或删除后，堆中的旧条目作废
+                if job is None or self._due.get(job_id) != due:
+                    continue
+                self._due.pop(job_id, None)
+                self._firing.add(job_id)
+                task = asyncio.create_task(self._fire(job, due))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            timeout = next_poll - time.monotonic()
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - time.time())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, timeout))
+            except TimeoutError:
+                pass
+
+    async def _fire(self, job: Job, due: float) -> None:
+        try:
+            await self.limiter.acquire()
+        except asyncio.CancelledError:
+            self._firing.discard(job.id)
+            raise
+        ran_at = time.time()
+        try:
+            response = await self.caller.execute(job.action, job.params)
+            status = str(response.get("status", "unknown"))
+        except Exception as e:
+            logger.warning(f"任务 {job.id} 执行失败: {e!r}")
+            status = "error"
+        logger.info(f"任务 {job.id} 已运行（计划 {datetime.fromtimestamp(due):%Y-%m-%d %H:%M}）: {status}")
+        self._firing.discard(job.id)
+        self.store.record(job.id, ran_at, status)
+        current = self.store.get(job.id)
+        if current is not None:
+            self._push(current, max(ran_at, due))
@@ -0,0 +1,390 @@
+"""
+多进程分片处理
+
+一个入口进程（WSClient 或反向 WSServer）接收全部事件，
+按会话（group_id，其次 user_id）哈希分发到 N 个工作进程:
+
+    NapCat ──> 入口进程 ──events[i]──> 工作进程 i ──> EventBus
+                  ^                         │
+                  └──────── requests ───────┘  (共享的出站动作通道)
+
+- 同一会话的事件总是进入同一个工作进程，并在该进程内串行处理，保证会话内顺序；
+- 不同会话在工作进程内并发处理；
+- 所有工作进程通过同一条请求队列把动作交回入口进程，由入口进程唯一的连接发给 NapCat；
+- 队列有容量上限，队列满时丢弃事件（计数）、动作以 ActionNotSent 失败，不会无限堆积；
+- 入口进程定期检查工作进程是否存活，退出的工作进程被重新拉起；
+  工作进程等待动作响应有超时，入口进程退出时立即让等待中的动作失败并退出。
+
+工作进程通过 app 入口（"module:function"）注册处理器，函数签名为 setup(bus)，可以是协程函数。
+"""
+
+import asyncio
+import importlib
+import inspect
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import zlib
+from collections.abc import Callable
+from multiprocessing.queues import Queue
+from typing import Any
+
+from .bus import Event, EventBus
+from .client import ActionCaller, ActionError, ActionNotSent
+
+logger = logging.getLogger("aivk.qq.bot.shard")
+
+# 队列中的停止信号
+_STOP = None
+
+# 阻塞读取队列的超时（秒），超时后检查对端进程是否存活
+_POLL = 1.0
+
+
+def _parent_alive() -> bool:
+    parent = mp.parent_process()
+    return parent is None or parent.is_alive()
+
+
+def conversation_key(event: Event) -> str:
+    """事件所属会话：群聊按群号，私聊按用户，其余按机器人账号"""
+    if event.get("group_id"):
+        return f"g{event['group_id']}"
+    if event.get("user_id"):
+        return f"u{event['user_id']}"
+    return f"s{event.get('self_id', 0)}"
+
+
+def shard_of(event: Event, workers: int) -> int:
+    """稳定哈希（跨进程一致，不受 PYTHONHASHSEED 影响）"""
+    return zlib.crc32(conversation_key(event).encode()) % workers
+
+
+def load_app(app: str) -> Callable[[EventBus], Any]:
+    """
+    解析 "module:function" 形式的处理器入口
+
+    Raises:
+        ValueError: 格式错误或找不到函数
+    """
+    module_name, _, attr = app.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"处理器入口格式应为 module:function，收到: {app!r}")
+    module = importlib.import_module(module_name)
+    setup = getattr(module, attr, None)
+    if not callable(setup):
+        raise ValueError(f"{module_name} 中找不到可调用对象 {attr}")
+    return setup
+
+
+class ShardCaller:
+    """
+    工作进程侧的动作客户端：把请求交给入口进程执行
+
+    Args:
+        index: 工作进程序号
+        requests: 共享的请求队列
+        responses: 本进程的响应队列
+        generation: 该序号的第几次启动，入口进程据此丢弃发给已退出进程的响应
+        timeout: 调用方未给出超时时等待响应的时间（秒）
+        grace: 在动作超时之外额外等待的时间，让入口进程的超时错误先返回
+    """
+
+    def __init__(
+        self,
+        index: int,
+        requests: Queue,
+        responses: Queue,
+        generation: int = 0,
+        *,
+        timeout: float = 30.0,
+        grace: float = 5.0,
+    ) -> None:
+        self.index = index
+        self.generation = generation
+        self.timeout = timeout
+        self.grace = grace
+        self._requests = requests
+        self._responses = responses
+        self._seq = itertools.count(1)
+        self._pending: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        self._reader: asyncio.Task[None] | None = None
+        self.dropped = 0
+
+    def start(self) -> None:
+        self._reader = asyncio.create_task(self._read_responses())
+
+    async def stop(self) -> None:
+        # 唤醒阻塞在队列上的读线程
+        self._responses.put(_STOP)
+        if self._reader is not None:
+            await self._reader
+            self._reader = None
+
+    def _fail_pending(self, message: str) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ActionError(message))
+
+    async def _read_responses(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                response = await loop.run_in_executor(None, self._responses.get, True, _POLL)
+            except queue.Empty:
+                if not _parent_alive():
+                    self._fail_pending("入口进程已退出")
+                    break
+                continue
+            if response is _STOP:
+                break
+            req_id, ok, payload = response
+            future = self._pending.pop(req_id, None)
+            if future is None or future.done():
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(ActionError(payload))
+
+    async def execute(
+        self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None
+    ) -> dict[str, Any]:
+        req_id = next(self._seq)
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        try:
+            self._requests.put_nowait((self.index, self.generation, req_id, action, params or {}, timeout))
+        except queue.Full as e:
+            self.dropped += 1
+            raise ActionNotSent(f"{action}: 请求队列已满") from e
+        self._pending[req_id] = future
+        try:
+            return await asyncio.wait_for(future, (timeout or self.timeout) + self.grace)
+        except TimeoutError as e:
+            raise ActionError(f"{action}: 等待入口进程响应超时") from e
+        finally:
+            self._pending.pop(req_id, None)
+
+
+class _OrderedDispatcher:
+    """按会话串行、跨会话并发地分发事件"""
+
+    def __init__(self, bus: EventBus) -> None:
+        self.bus = bus
+        self._tails: dict[str, asyncio.Task[None]] = {}
+
+    def submit(self, event: Event) -> None:
+        key = conversation_key(event)
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._run(previous, event))
+        self._tails[key] = task
+        task.add_done_callback(lambda t: self._release(key, t))
+
+    def _release(self, key: str, task: asyncio.Task[None]) -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _run(self, previous: asyncio.Task[None] | None, event: Event) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        await self.bus.dispatch(event)
+
+    async def drain(self) -> None:
+        while self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+
+async def _worker(index: int, generation: int, app: str, events: Queue, requests: Queue, responses: Queue) -> None:
+    caller = ShardCaller(index, requests, responses, generation)
+    caller.start()
+    bus = EventBus(caller=caller)
+    setup = load_app(app)
+    result = setup(bus)
+    if inspect.isawaitable(result):
+        await result
+    dispatcher = _OrderedDispatcher(bus)
+    loop = asyncio.get_running_loop()
+    logger.info(f"工作进程 {index} 已就绪，处理器 {len(bus.handlers)} 个")
+    try:
+        while True:
+            try:
+                event = await loop.run_in_executor(None, events.get, True, _POLL)
+            except queue.Empty:
+                if not _parent_alive():
+                    logger.error(f"工作进程 {index}: 入口进程已退出")
+                    break
+                continue
+            if event is _STOP:
+                break
+            dispatcher.submit(event)
+        await dispatcher.drain()
+    finally:
+        await bus.aclose()
+        await caller.stop()
+        logger.info(f"工作进程 {index} 已退出")
+
+
+def _worker_main(index: int, generation: int, app: str, events: Queue, requests: Queue, responses: Queue) -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s - worker{index} - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(_worker(index, generation, app, events, requests, responses))
+
+
+class ShardRouter:
+    """
+    入口进程侧：启动工作进程、分发事件、代为执行工作进程的动作
+
+    Args:
+        app: 处理器入口 "module:function"
+        workers: 工作进程数
+        caller: 入口进程持有的 NapCat 连接
+        max_queue: 每个事件队列、响应队列与共享请求队列的容量
+        check_interval: 检查工作进程存活的间隔（秒）
+    """
+
+    def __init__(
+        self,
+        app: str,
+        workers: int,
+        caller: ActionCaller,
+        *,
+        max_queue: int = 1024,
+        check_interval: float = 1.0,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers 至少为 1")
+        self.app = app
+        self.workers = workers
+        self.caller = caller
+        self.max_queue = max_queue
+        self.check_interval = check_interval
+        self._ctx = mp.get_context("spawn")
+        self._requests: Queue = self._ctx.Queue(max_queue)
+        self._events: list[Queue] = []
+        self._responses: list[Queue] = []
+        self._processes: list[Any] = []
+        self._generations = [0] * workers
+        for i in range(workers):
+            self._spawn(i)
+        self._pump: asyncio.Task[None] | None = None
+        self._watcher: asyncio.Task[None] | None = None
+        self._inflight: set[asyncio.Task[None]] = set()
+        self._stopping = False
+        self.routed = [0] * workers
+        self.dropped = [0] * workers
+        self.restarts = [0] * workers
+
+    def _spawn(self, index: int) -> Any:
+        """为 index 新建队列与进程（未启动）；旧进程的队列随之丢弃"""
+        events, responses = self._ctx.Queue(self.max_queue), self._ctx.Queue(self.max_queue)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._generations[index], self.app, events, self._requests, responses),
+            name=f"aivk-qq-worker-{index}",
+        )
+        if index < len(self._processes):
+            self._events[index], self._responses[index], self._processes[index] = events, responses, process
+        else:
+            self._events.append(events)
+            self._responses.append(responses)
+            self._processes.append(process)
+        return process
+
+    def start(self) -> None:
+        # 提前校验入口，避免每个工作进程各自失败
+        load_app(self.app)
+        for process in self._processes:
+            process.start()
+        self._pump = asyncio.create_task(self._pump_requests())
+        self._watcher = asyncio.create_task(self._watch())
+        logger.info(f"已启动 {self.workers} 个工作进程")
+
+    async def _watch(self) -> None:
+        """定期检查工作进程，退出的进程重新拉起"""
+        while not self._stopping:
+            await asyncio.sleep(self.check_interval)
+            for index, process in enumerate(self._processes):
+                if self._stopping or process.is_alive():
+                    continue
+                logger.error(f"{process.name} 意外退出（exitcode={process.exitcode}），重新启动")
+                self._generations[index] += 1
+                self.restarts[index] += 1
+                try:
+                    self._spawn(index).start()
+                except OSError as e:
+                    logger.error(f"重新启动 {process.name} 失败，稍后重试: {e!r}")
+
+    async def route(self, event: Event) -> None:
+        """作为入口总线的处理器注册，把事件投递到对应的工作进程；队列满时丢弃"""
+        index = shard_of(event, self.workers)
+        try:
+            self._events[index].put_nowait(event)
+        except queue.Full:
+            self.dropped[index] += 1
+            if self.dropped[index] % 100 == 1:
+                logger.warning(f"工作进程 {index} 的事件队列已满，已丢弃 {self.dropped[index]} 个事件")
+            return
+        self.routed[index] += 1
+
+    async def _pump_requests(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            request = await loop.run_in_executor(None, self._requests.get)
+            if request is _STOP:
+                break
+            task = asyncio.create_task(self._execute(*request))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _execute(
+        self, index: int, generation: int, req_id: int, action: str, params: dict[str, Any], timeout: float | None
+    ) -> None:
+        try:
+            response = await self.caller.execute(action, params, timeout=timeout)
+            reply = (req_id, True, response)
+        except Exception as e:
+            reply = (req_id, False, f"{action}: {e!r}")
+        # 发出请求的进程已经退出，新进程的请求编号从头开始，不能把响应交给它
+        if generation != self._generations[index]:
+            return
+        try:
+            self._responses[index].put_nowait(reply)
+        except queue.Full:
+            # 工作进程不再读取响应，等待方会超时
+            self.dropped[index] += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "routed": self.routed,
+            "dropped": self.dropped,
+            "restarts": self.restarts,
+            "alive": [process.is_alive() for process in self._processes],
+            "inflight": len(self._inflight),
+        }
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """通知工作进程处理完队列后退出，再关闭出站通道"""
+        self._stopping = True
+        if self._watcher is not None:
+            self._watcher.cancel()
+        loop = asyncio.get_running_loop()
+        for events in self._events:
+            # 队列满时等待工作进程腾出空间，最多等到 timeout
+            try:
+                await loop.run_in_executor(None, events.put, _STOP, True, timeout)
+            except queue.Full:
+                pass
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"{process.name} 未在 {timeout}s 内退出，强制终止")
+                process.terminate()
+        await loop.run_in_executor(None, self._requests.put, _STOP)
+        if self._pump is not None:
+            await self._pump
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
@@ -0,0 +1,442 @@
+"""
+状态快照（快速热重启）
+
+定期把内存状态写成紧凑的二进制快照，重启时内存映射加载，无需重新拉取群列表、成员列表等:
+
+    <AIVK_ROOT>/data/qq/state/<name>.snap
+
+    b"AQSN" | u8 版本 | u32 索引长度 | 索引 | 段 1 | 段 2 | ...
+    索引为 {段名: [偏移, 长度]}，每个段是一个独立编码的值
+
+编码为 msgpack 格式（nil/bool/int/float/str/bin/array/map）。安装了 msgpack 时使用其 C 实现，
+否则使用这里的纯 Python 实现，两者读写同一种文件。
+
+加载时只解析索引，各段在 restore 时才从映射中解码；组件按墙钟时间换算剩余 TTL 与令牌，
+已过期的条目直接丢弃，其余条目照常使用，到期后在下一次访问时重新拉取（惰性重新验证）。
+
+用法:
+    snapshots = Snapshotter("bot")
+    snapshots.register("cursors", backfill.dump, backfill.restore)
+    await snapshots.restore()
+    snapshots.start()            # 每 interval 秒写一次
+    await snapshots.stop()       # 退出前最后写一次
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from aivk.api import AivkIO
+
+logger = logging.getLogger("aivk.qq.bot.snapshot")
+
+MAGIC = b"AQSN"
+VERSION = 1
+
+try:
+    import msgpack as _msgpack
+except ImportError:
+    _msgpack = None
+
+
+# region 编码
+
+
+class SnapshotError(ValueError):
+    """快照文件损坏或版本不兼容"""
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(value)
+        elif -32 <= value < 0:
+            out.append(value & 0xFF)
+        elif 0 <= value <= 0xFFFFFFFF:
+            out += struct.pack(">BI", 0xCE, value)
+        elif 0 <= value <= 0xFFFFFFFFFFFFFFFF:
+            out += struct.pack(">BQ", 0xCF, value)
+        elif -0x80000000 <= value < 0:
+            out += struct.pack(">Bi", 0xD2, value)
+        else:
+            out += struct.pack(">Bq", 0xD3, value)
+    elif isinstance(value, float):
+        out += struct.pack(">Bd", 0xCB, value)
+    elif isinstance(value, str):
+        data = value.encode()
+        size = len(data)
+        if size < 32:
+            out.append(0xA0 | size)
+        elif size <= 0xFF:
+            out += struct.pack(">BB", 0xD9, size)
+        elif size <= 0xFFFF:
+            out += struct.pack(">BH", 0xDA, size)
+        else:
+            out += struct.pack(">BI", 0xDB, size)
+        out += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        size = len(value)
+        if size <= 0xFF:
+            out += struct.pack(">BB", 0xC4, size)
+        elif size <= 0xFFFF:
+            out += struct.pack(">BH", 0xC5, size)
+        else:
+            out += struct.pack(">BI", 0xC6, size)
+        out += value
+    elif isinstance(value, (list, tuple)):
+        size = len(value)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size <= 0xFFFF:
+            out += struct.pack(">BH", 0xDC, size)
+        else:
+            out += struct.pack(">BI", 0xDD, size)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        size = len(value)
+        if size < 16:
+            out.append(0x80 | size)
+        elif size <= 0xFFFF:
+            out += struct.pack(">BH", 0xDE, size)
+        else:
+            out += struct.pack(">BI", 0xDF, size)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"无法编码的类型: {type(value).__name__}")
+
+
+# 定长前缀: 类型字节 -> (struct 格式, 长度)
+_FIXED = {
+    0xCC: (">B", 1), 0xCD: (">H", 2), 0xCE: (">I", 4), 0xCF: (">Q", 8),
+    0xD0: (">b", 1), 0xD1: (">h", 2), 0xD2: (">i", 4), 0xD3: (">q", 8),
+    0xCA: (">f", 4), 0xCB: (">d", 8),
+}
+_SIZED = {0xD9: (">B", 1), 0xDA: (">H", 2), 0xDB: (">I", 4), 0xC4: (">B", 1), 0xC5: (">H", 2), 0xC6: (">I", 4)}
+_CONTAINER = {0xDC: (">H", 2), 0xDD: (">I", 4), 0xDE: (">H", 2), 0xDF: (">I", 4)}
+
+
+def _unpack(buf: memoryview, pos: int) -> tuple[Any, int]:
+    code = buf[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xE0:
+        return code - 0x100, pos
+    if 0xA0 <= code <= 0xBF:
+        size = code & 0x1F
+        return bytes(buf[pos:pos + size]).decode(), pos + size
+    if 0x90 <= code <= 0x9F:
+        return _unpack_array(buf, pos, code & 0x0F)
+    if 0x80 <= code <= 0x8F:
+        return _unpack_map(buf, pos, code & 0x0F)
+    if code == 0xC0:
+        return None, pos
+    if code == 0xC2:
+        return False, pos
+    if code == 0xC3:
+        return True, pos
+    if code in _FIXED:
+        fmt, size = _FIXED[code]
+        return struct.unpack_from(fmt, buf, pos)[0], pos + size
+    if code in _SIZED:
+        fmt, width = _SIZED[code]
+        size = struct.unpack_from(fmt, buf, pos)[0]
+        pos += width
+        data = bytes(buf[pos:pos + size])
+        return (data.decode() if code >= 0xD9 else data), pos + size
+    if code in _CONTAINER:
+        fmt, width = _CONTAINER[code]
+        size = struct.unpack_from(fmt, buf, pos)[0]
+        pos += width
+        return (_unpack_array if code <= 0xDD else _unpack_map)(buf, pos, size)
+    raise SnapshotError(f"无法解码的类型字节 0x{code:02x}")
+
+
+def _unpack_array(buf: memoryview, pos: int, size: int) -> tuple[list[Any], int]:
+    items = []
+    for _ in range(size):
+        item, pos = _unpack(buf, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(buf: memoryview, pos: int, size: int) -> tuple[dict[Any, Any], int]:
+    result = {}
+    for _ in range(size):
+        key, pos = _unpack(buf, pos)
+        value, pos = _unpack(buf, pos)
+        result[key] = value
+    return result, pos
+
+
+def packb(value: Any) -> bytes:
+    """编码为 msgpack"""
+    if _msgpack is not None:
+        return _msgpack.packb(value, use_bin_type=True)
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def unpackb(data: bytes | memoryview) -> Any:
+    """解码 msgpack"""
+    if _msgpack is not None:
+        return _msgpack.unpackb(data, raw=False, strict_map_key=False, use_list=True)
+    value, _ = _unpack(data if isinstance(data, memoryview) else memoryview(data), 0)
+    return value
+
+
+def freeze(value: Any) -> Any:
+    """把解码得到的列表递归转换为元组，用于恢复元组形式的缓存键"""
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+# endregion
+
+# region 文件
+
+
+def default_snapshot_dir() -> Path:
+    return AivkIO.get_aivk_root() / "data" / "qq" / "state"
+
+
+def write_snapshot(path: Path, sections: dict[str, Any]) -> int:
+    """
+    原子写入快照
+
+    Returns:
+        int: 文件大小（字节）
+    """
+    encoded = {name: packb(value) for name, value in sections.items()}
+    index: dict[str, list[int]] = {}
+    offset = 0
+    for name, data in encoded.items():
+        index[name] = [offset, len(data)]
+        offset += len(data)
+    header = packb(index)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.stem}-", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(MAGIC + struct.pack(">BI", VERSION, len(header)) + header)
+            for data in encoded.values():
+                fp.write(data)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return 9 + len(header) + offset
+
+
+def _decode(chunk: memoryview, path: Path) -> Any:
+    try:
+        return unpackb(chunk)
+    except (IndexError, struct.error, UnicodeDecodeError, ValueError) as e:
+        raise SnapshotError(f"{path} 已损坏: {e!r}") from e
+
+
+class SnapshotReader:
+    """
+    内存映射的快照，只在访问时解码对应的段
+
+    用法:
+        with SnapshotReader(path) as reader:
+            cursors = reader.section("cursors")
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fp = path.open("rb")
+        try:
+            self._map = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            self._fp.close()
+            raise SnapshotError(f"{path} 为空") from None
+        try:
+            self._index, self._base = self._read_header()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_header(self) -> tuple[dict[str, list[int]], int]:
+        with memoryview(self._map) as view:
+            if len(view) < 9 or bytes(view[:4]) != MAGIC:
+                raise SnapshotError(f"{self.path} 不是快照文件")
+            version, size = struct.unpack_from(">BI", view, 4)
+            if version != VERSION:
+                raise SnapshotError(f"{self.path} 版本 {version} 不受支持")
+            with view[9:9 + size] as chunk:
+                index = _decode(chunk, self.path)
+        if not isinstance(index, dict):
+            raise SnapshotError(f"{self.path} 索引损坏")
+        return index, 9 + size
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._index)
+
+    def section(self, name: str, default: Any = None) -> Any:
+        entry = self._index.get(name)
+        if entry is None:
+            return default
+        offset, size = entry
+        start = self._base + offset
+        if start + size > len(self._map):
+            raise SnapshotError(f"{self.path} 的段 {name} 被截断")
+        with memoryview(self._map) as view, view[start:start + size] as chunk:
+            return _decode(chunk, self.path)
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+        self._fp.close()
+
+    def __enter__(self) -> "SnapshotReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# endregion
+
+
+class Snapshotter:
+    """
+    定期快照已注册组件的状态
+
+    Args:
+        name: 快照名，文件为 <directory>/<name>.snap
+        directory: 快照目录，默认 <AIVK_ROOT>/data/qq/state
+        interval: 写快照的间隔（秒）
+        max_age: 早于该时间（秒）的快照不加载
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: str | Path | None = None,
+        *,
+        interval: float = 60.0,
+        max_age: float = 86400.0,
+    ) -> None:
+        self.path = (Path(directory) if directory else default_snapshot_dir()) / f"{name}.snap"
+        self.interval = interval
+        self.max_age = max_age
+        self._sections: dict[str, tuple[Callable[[], Any], Callable[[Any], None]]] = {}
+        self._task: asyncio.Task[None] | None = None
+        self.saves = 0
+        self.last_bytes = 0
+        self.last_save_ms = 0.0
+        self.restore_ms: float | None = None
+
+    def register(self, name: str, dump: Callable[[], Any], load: Callable[[Any], None]) -> None:
+        """
+        注册一个段
+
+        Args:
+            dump: 返回可编码的状态（在事件循环中调用，应当很快）
+            load: 用快照中的状态恢复组件
+        """
+        self._sections[name] = (dump, load)
+
+    def _read(self) -> dict[str, Any]:
+        """在线程中映射文件并解码已注册的段"""
+        if not self.path.exists():
+            return {}
+        if time.time() - self.path.stat().st_mtime > self.max_age:
+            logger.info(f"快照 {self.path} 已过期，忽略")
+            return {}
+        with SnapshotReader(self.path) as reader:
+            return {name: reader.section(name) for name in self._sections if name in reader.names}
+
+    async def restore(self) -> list[str]:
+        """
+        加载快照并恢复各组件，损坏的快照被忽略
+
+        Returns:
+            list[str]: 恢复的段名
+        """
+        started = time.perf_counter()
+        try:
+            data = await asyncio.to_thread(self._read)
+        except (OSError, SnapshotError) as e:
+            logger.warning(f"读取快照失败，冷启动: {e}")
+            return []
+        restored = []
+        for name, state in data.items():
+            try:
+                self._sections[name][1](state)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"恢复 {name} 失败: {e!r}")
+                continue
+            restored.append(name)
+        self.restore_ms = round((time.perf_counter() - started) * 1000, 2)
+        if restored:
+            logger.info(f"已从快照恢复 {restored}，用时 {self.restore_ms}ms")
+        return restored
+
+    async def save(self) -> int:
+        sections = {name: dump() for name, (dump, _) in self._sections.items()}
+        started = time.perf_counter()
+        self.last_bytes = await asyncio.to_thread(write_snapshot, self.path, sections)
+        self.last_save_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.saves += 1
+        return self.last_bytes
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """停止定期快照并写最后一次"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.save()
+        except (OSError, TypeError) as e:
+            logger.warning(f"写快照失败: {e!r}")
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except (OSError, TypeError) as e:
+                logger.warning(f"写快照失败: {e!r}")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "sections": list(self._sections),
+            "saves": self.saves,
+            "bytes": self.last_bytes,
+            "save_ms": self.last_save_ms,
+            "restore_ms": self.restore_ms,
+        }
@@ -0,0 +1,652 @@
+"""
+共享状态后端
+
+多个工作进程或多台主机运行同一批账号时，限流、去重窗口与缓存必须共享，否则各进程分别限流，
+合计仍会超过 QQ 对单个账号的频率上限。StateBackend 定义统一接口，有三种实现:
+
+    memory://                     进程内（默认，单进程）
+    sqlite:///path/to/state.db    同一主机的多个进程（WAL 模式，写操作在 BEGIN IMMEDIATE 事务中）
+    redis://host:6379/0           多台主机；任何兼容 Redis 协议（RESP）并支持 EVAL 的服务
+
+原语:
+
+- get / set(ttl, nx) / delete / incr(ttl)：值以 JSON 存储，set(nx=True) 可用作去重（首次出现返回 True）；
+- take(key, rate, burst)：原子令牌桶，取到令牌返回 0，否则返回需要等待的秒数（不扣令牌）；
+- batch()：把多个操作一次发出（Redis 为流水线，SQLite 为单个事务），按顺序返回结果。
+
+SharedTokenBucket 基于 take() 实现与 TokenBucket 相同的 acquire() 接口；后端不可用时
+退回进程内令牌桶，恢复后自动切回。shared_limiter() 按后端类型选择两者之一。
+"""
+
+import asyncio
+import json
+import logging
+import math
+import sqlite3
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote, urlparse
+
+from aivk.api import AivkIO
+
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger("aivk.qq.bot.state")
+
+# 令牌桶状态 {tokens, ts} 的过期时间：补满所需时间之后再保留 1 秒
+_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local n = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= n then
+    tokens = tokens - n
+else
+    wait = (n - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens))
+redis.call('HSET', KEYS[1], 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+_INCR = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if tonumber(ARGV[2]) > 0 and redis.call('PTTL', KEYS[1]) < 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+
+class StateError(Exception):
+    """状态后端不可用或返回了错误"""
+
+
+def _bucket_step(tokens: float, ts: float, now: float, rate: float, burst: float, n: float) -> tuple[float, float]:
+    """令牌桶的一步：返回 (新的令牌数, 需要等待的秒数)"""
+    tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+    if tokens >= n:
+        return tokens - n, 0.0
+    return tokens, (n - tokens) / rate
+
+
+class Batch:
+    """
+    批量操作，execute() 一次发出并按顺序返回结果
+
+    用法:
+        batch = backend.batch()
+        batch.set("seen:1", True, ttl=60, nx=True)
+        batch.incr("count")
+        first, count = await batch.execute()
+    """
+
+    def __init__(self, backend: "StateBackend") -> None:
+        self._backend = backend
+        self.ops: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def get(self, key: str) -> "Batch":
+        self.ops.append(("get", (key,), {}))
+        return self
+
+    def set(self, key: str, value: Any, ttl: float | None = None, *, nx: bool = False) -> "Batch":
+        self.ops.append(("set", (key, value), {"ttl": ttl, "nx": nx}))
+        return self
+
+    def delete(self, *keys: str) -> "Batch":
+        self.ops.append(("delete", keys, {}))
+        return self
+
+    def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> "Batch":
+        self.ops.append(("incr", (key, amount), {"ttl": ttl}))
+        return self
+
+    def take(self, key: str, rate: float, burst: float, tokens: float = 1.0) -> "Batch":
+        if rate <= 0:
+            raise ValueError("批量操作中的令牌桶 rate 必须大于 0")
+        self.ops.append(("take", (key, rate, burst, tokens), {}))
+        return self
+
+    async def execute(self) -> list[Any]:
+        if not self.ops:
+            return []
+        ops, self.ops = self.ops, []
+        return await self._backend._execute(ops)
+
+
+class StateBackend:
+    """状态后端接口；子类实现 _execute，单个操作也作为只有一项的批量执行"""
+
+    async def _execute(self, ops: Sequence[tuple[str, tuple[Any, ...], dict[str, Any]]]) -> list[Any]:
+        raise NotImplementedError
+
+    def batch(self) -> Batch:
+        return Batch(self)
+
+    async def get(self, key: str) -> Any:
+        return (await self._execute([("get", (key,), {})]))[0]
+
+    async def set(self, key: str, value: Any, ttl: float | None = None, *, nx: bool = False) -> bool:
+        """写入；nx 为 True 时只在键不存在时写入，返回是否写入"""
+        return (await self._execute([("set", (key, value), {"ttl": ttl, "nx": nx})]))[0]
+
+    async def delete(self, *keys: str) -> int:
+        return (await self._execute([("delete", keys, {})]))[0]
+
+    async def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        """自增；ttl 只在键新建时设置（固定窗口计数）"""
+        return (await self._execute([("incr", (key, amount), {"ttl": ttl})]))[0]
+
+    async def take(self, key: str, rate: float, burst: float, tokens: float = 1.0) -> float:
+        """
+        原子令牌桶
+
+        Returns:
+            float: 0 表示已取得令牌，否则为需要等待的秒数（未扣令牌）
+        """
+        if rate <= 0:
+            return 0.0
+        return (await self._execute([("take", (key, rate, burst, tokens), {})]))[0]
+
+    async def close(self) -> None:
+        pass
+
+
+# region memory
+
+
+class MemoryBackend(StateBackend):
+    """进程内后端，事件循环单线程执行，天然原子"""
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float, Any]] = {}
+
+    def _get(self, key: str, now: float) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires and expires < now:
+            del self._data[key]
+            return None
+        return value
+
+    async def _execute(self, ops: Sequence[tuple[str, tuple[Any, ...], dict[str, Any]]]) -> list[Any]:
+        now = time.monotonic()
+        results: list[Any] = []
+        for op, args, kwargs in ops:
+            if op == "get":
+                results.append(self._get(args[0], now))
+            elif op == "set":
+                key, value = args
+                if kwargs.get("nx") and self._get(key, now) is not None:
+                    results.append(False)
+                    continue
+                ttl = kwargs.get("ttl")
+                self._data[key] = (now + ttl if ttl else 0.0, value)
+                results.append(True)
+            elif op == "delete":
+                results.append(sum(self._data.pop(key, None) is not None for key in args))
+            elif op == "incr":
+                key, amount = args
+                current = self._get(key, now)
+                expires = self._data[key][0] if current is not None else 0.0
+                if current is None and kwargs.get("ttl"):
+                    expires = now + kwargs["ttl"]
+                value = int(current or 0) + amount
+                self._data[key] = (expires, value)
+                results.append(value)
+            elif op == "take":
+                key, rate, burst, n = args
+                state = self._get(key, now) or (burst, now)
+                tokens, wait = _bucket_step(state[0], state[1], now, rate, burst, n)
+                self._data[key] = (now + burst / rate + 1.0, (tokens, now))
+                results.append(wait)
+            else:
+                raise ValueError(f"未知操作: {op}")
+        return results
+
+
+# endregion
+
+# region sqlite
+
+
+class SQLiteBackend(StateBackend):
+    """
+    SQLite 后端，同一主机的多个进程共享一个数据库文件
+
+    所有操作在专用线程中执行；一个批量操作是一个 BEGIN IMMEDIATE 事务，
+    令牌桶的读-改-写因此跨进程原子。时间使用墙钟，各进程需要在同一主机上。
+
+    Args:
+        path: 数据库文件
+        busy_timeout: 等待其他进程释放写锁的时间（秒）
+    """
+
+    def __init__(self, path: str | Path, *, busy_timeout: float = 5.0) -> None:
+        self.path = Path(path)
+        self.busy_timeout = busy_timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aivk-qq-state")
+        self._conn: sqlite3.Connection | None = None
+        self._ops = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+            self._conn = conn
+        return self._conn
+
+    def _run(self, ops: Sequence[tuple[str, tuple[Any, ...], dict[str, Any]]]) -> list[Any]:
+        conn = self._connect()
+        now = time.time()
+        results: list[Any] = []
+
+        def read(key: str) -> Any:
+            row = conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires >= ?)", (key, now)
+            ).fetchone()
+            return None if row is None else json.loads(row[0])
+
+        def write(key: str, value: Any, expires: float | None) -> None:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires),
+            )
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for op, args, kwargs in ops:
+                if op == "get":
+                    results.append(read(args[0]))
+                elif op == "set":
+                    key, value = args
+                    if kwargs.get("nx") and read(key) is not None:
+                        results.append(False)
+                        continue
+                    ttl = kwargs.get("ttl")
+                    write(key, value, now + ttl if ttl else None)
+                    results.append(True)
+                elif op == "delete":
+                    results.append(
+                        sum(conn.execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount for key in args)
+                    )
+                elif op == "incr":
+                    key, amount = args
+                    row = conn.execute(
+                        "SELECT value, expires FROM kv WHERE key = ? AND (expires IS NULL OR expires >= ?)", (key, now)
+                    ).fetchone()
+                    if row is None:
+                        value, expires = amount, (now + kwargs["ttl"] if kwargs.get("ttl") else None)
+                    else:
+                        value, expires = int(json.loads(row[0])) + amount, row[1]
+                    write(key, value, expires)
+                    results.append(value)
+                elif op == "take":
+                    key, rate, burst, n = args
+                    state = read(key) or [burst, now]
+                    tokens, wait = _bucket_step(state[0], state[1], now, rate, burst, n)
+                    write(key, [tokens, now], now + burst / rate + 1.0)
+                    results.append(wait)
+                else:
+                    raise ValueError(f"未知操作: {op}")
+            self._ops += 1
+            if self._ops % 1000 == 0:
+                conn.execute("DELETE FROM kv WHERE expires < ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    async def _execute(self, ops: Sequence[tuple[str, tuple[Any, ...], dict[str, Any]]]) -> list[Any]:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._run, ops)
+        except sqlite3.Error as e:
+            raise StateError(f"sqlite: {e}") from e
+
+    async def close(self) -> None:
+        def close() -> None:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        await asyncio.get_running_loop().run_in_executor(self._executor, close)
+        self._executor.shutdown(wait=False)
+
+
+# endregion
+
+# region redis
+
+
+class RedisBackend(StateBackend):
+    """
+    Redis 协议后端（RESP2），不依赖 redis 客户端库
+
+    单连接流水线：命令按顺序写出，响应按顺序匹配，批量操作一次写出全部命令。
+    令牌桶与带 TTL 的自增用 EVAL 在服务端原子执行。连接断开后下一次操作自动重连。
+
+    Args:
+        host: 服务地址
+        port: 服务端口
+        db: 数据库编号
+        password: 密码（AUTH）
+        prefix: 键前缀，多个部署共用一个实例时区分
+        timeout: 单次操作超时（秒）
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6379,
+        *,
+        db: int = 0,
+        password: str | None = None,
+        username: str | None = None,
+        prefix: str = "aivk:qq:",
+        timeout: float = 5.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.username = username
+        self.prefix = prefix
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._waiting: list[tuple[asyncio.Future[list[Any]], int]] = []
+        self._read_task: asyncio.Task[None] | None = None
+        self._connect_lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(*parts: Any) -> bytes:
+        out = [b"*%d\r\n" % len(parts)]
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    async def _read_reply(self, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line:
+            raise StateError("redis: 连接已关闭")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            return StateError(f"redis: {body.decode()}")
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = await reader.readexactly(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(body)
+            if size < 0:
+                return None
+            return [await self._read_reply(reader) for _ in range(size)]
+        raise StateError(f"redis: 无法解析的响应 {line[:50]!r}")
+
+    async def _connect(self) -> None:
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+            except (OSError, TimeoutError) as e:
+                raise StateError(f"redis: 无法连接 {self.host}:{self.port}: {e!r}") from e
+            handshake = []
+            if self.password:
+                auth = ("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)
+                handshake.append(self._encode(*auth))
+            if self.db:
+                handshake.append(self._encode("SELECT", self.db))
+            if handshake:
+                writer.write(b"".join(handshake))
+                await writer.drain()
+                for _ in handshake:
+                    reply = await self._read_reply(reader)
+                    if isinstance(reply, StateError):
+                        writer.close()
+                        raise reply
+            self._reader, self._writer = reader, writer
+            self._read_task = asyncio.create_task(self._read_loop(reader))
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        replies: list[Any] = []
+        try:
+            while True:
+                reply = await self._read_reply(reader)
+                if not self._waiting:
+                    raise StateError("redis: 收到了没有对应请求的响应")
+                future, count = self._waiting[0]
+                replies.append(reply)
+                if len(replies) == count:
+                    self._waiting.pop(0)
+                    if not future.done():
+                        future.set_result(replies)
+                    replies = []
+        except (OSError, StateError, asyncio.IncompleteReadError) as e:
+            self._fail(StateError(f"redis: 连接中断: {e!r}"))
+        finally:
+            if self._reader is reader:
+                if self._writer is not None:
+                    self._writer.close()
+                self._reader = self._writer = None
+
+    def _fail(self, error: Exception) -> None:
+        waiting, self._waiting = self._waiting, []
+        for future, _ in waiting:
+            if not future.done():
+                future.set_exception(error)
+
+    async def command(self, *commands: Sequence[Any]) -> list[Any]:
+        """流水线发送多条原始命令，按顺序返回响应（错误响应以 StateError 实例返回）"""
+        await self._connect()
+        assert self._writer is not None
+        future: asyncio.Future[list[Any]] = asyncio.get_running_loop().create_future()
+        self._waiting.append((future, len(commands)))
+        self._writer.write(b"".join(self._encode(*command) for command in commands))
+        try:
+            await self._writer.drain()
+        except OSError as e:
+            self._writer.close()
+            raise StateError(f"redis: 写入失败: {e!r}") from e
+        try:
+            # 超时后响应仍会按顺序到达并被丢弃，请求与响应不会错位
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except TimeoutError as e:
+            raise StateError(f"redis: {self.timeout}s 内没有响应") from e
+
+    def _to_command(self, op: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[Any, ...]:
+        key = self.prefix + args[0] if args else ""
+        if op == "get":
+            return ("GET", key)
+        if op == "set":
+            command: tuple[Any, ...] = ("SET", key, json.dumps(args[1], ensure_ascii=False))
+            if kwargs.get("ttl"):
+                command += ("PX", max(1, math.ceil(kwargs["ttl"] * 1000)))
+            if kwargs.get("nx"):
+                command += ("NX",)
+            return command
+        if op == "delete":
+            return ("DEL", *(self.prefix + item for item in args))
+        if op == "incr":
+            ttl = kwargs.get("ttl")
+            return ("EVAL", _INCR, 1, key, args[1], math.ceil(ttl * 1000) if ttl else 0)
+        if op == "take":
+            _, rate, burst, n = args
+            return ("EVAL", _TOKEN_BUCKET, 1, key, repr(float(rate)), repr(float(burst)), repr(float(n)))
+        raise ValueError(f"未知操作: {op}")
+
+    async def _execute(self, ops: Sequence[tuple[str, tuple[Any, ...], dict[str, Any]]]) -> list[Any]:
+        replies = await self.command(*(self._to_command(op, args, kwargs) for op, args, kwargs in ops))
+        results: list[Any] = []
+        for (op, _, _), reply in zip(ops, replies):
+            if isinstance(reply, StateError):
+                raise reply
+            if op == "get":
+                results.append(None if reply is None else json.loads(reply))
+            elif op == "set":
+                results.append(reply == "OK")
+            elif op == "take":
+                results.append(float(reply))
+            else:
+                results.append(int(reply))
+        return results
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+            self._read_task = None
+
+
+# endregion
+
+
+def default_state_path() -> Path:
+    return AivkIO.get_aivk_root() / "data" / "qq" / "state" / "shared.db"
+
+
+def open_backend(url: str | None = None) -> StateBackend:
+    """
+    按 URL 创建后端
+
+        memory:// | sqlite:///abs/path.db | sqlite://（默认路径）| redis://[user:password@]host:port/db
+
+    Raises:
+        ValueError: 不支持的 URL
+    """
+    if not url or url == "memory://":
+        return MemoryBackend()
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        path = unquote(parsed.path)
+        return SQLiteBackend(path if path else default_state_path())
+    if parsed.scheme in ("redis", "valkey"):
+        db = parsed.path.lstrip("/")
+        return RedisBackend(
+            parsed.hostname or "127.0.0.1",
+            parsed.port or 6379,
+            db=int(db) if db else 0,
+            username=unquote(parsed.username) if parsed.username else None,
+            password=unquote(parsed.password) if parsed.password else None,
+        )
+    raise ValueError(f"不支持的状态后端: {url!r}")
+
+
+class SharedTokenBucket:
+    """
+    跨进程共享的令牌桶，接口与 TokenBucket 一致
+
+    后端不可用（StateError）时改用进程内令牌桶，只记录一次警告，retry_interval 秒后再尝试后端。
+
+    Args:
+        backend: 状态后端
+        key: 桶的键，同一账号的所有进程使用同一个键
+        rate: 每秒补充的令牌数，<= 0 表示不限流
+        burst: 桶容量
+        retry_interval: 后端不可用后再次尝试的间隔（秒）
+    """
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        key: str,
+        rate: float,
+        burst: float | None = None,
+        *,
+        retry_interval: float = 30.0,
+    ) -> None:
+        self.backend = backend
+        self.key = key
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.retry_interval = retry_interval
+        self.degraded = False
+        self._local = TokenBucket(rate, self.burst)
+        self._retry_at = 0.0
+
+    async def _take_local(self, tokens: float) -> float:
+        # 热重载只修改 rate / burst，使用前同步给本地桶
+        self._local.rate = self.rate
+        self._local.burst = self.burst
+        return await self._local.acquire(tokens)
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        取令牌，不足时等待
+
+        Returns:
+            float: 等待的秒数
+        """
+        waited = 0.0
+        while True:
+            if self.degraded and time.monotonic() < self._retry_at:
+                return waited + await self._take_local(tokens)
+            try:
+                wait = await self.backend.take(self.key, self.rate, self.burst, tokens)
+            except StateError as e:
+                if not self.degraded:
+                    logger.warning(f"共享限流 {self.key} 不可用，改用进程内令牌桶: {e}")
+                    self.degraded = True
+                self._retry_at = time.monotonic() + self.retry_interval
+                continue
+            if self.degraded:
+                logger.info(f"共享限流 {self.key} 已恢复")
+                self.degraded = False
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def dump(self) -> dict[str, float]:
+        """状态保存在后端中，快照里不需要"""
+        return {}
+
+    def restore(self, state: dict[str, Any]) -> None:
+        pass
+
+
+def account_rate_key(self_id: int | str) -> str:
+    """账号发送限流的键；MCP 服务器与机器人进程使用同一个键，合计不超过账号的速率"""
+    return f"rate:{self_id}"
+
+
+def shared_limiter(
+    backend: StateBackend | None, key: str, rate: float, burst: float | None = None
+) -> TokenBucket | SharedTokenBucket:
+    """backend 为 None 或进程内后端时返回 TokenBucket，否则返回以 key 共享的 SharedTokenBucket"""
+    if backend is None or isinstance(backend, MemoryBackend):
+        return TokenBucket(rate, burst)
+    return SharedTokenBucket(backend, key, rate, burst)
@@ -0,0 +1,201 @@
+"""
+健康检查（`aivk-qq status` 与 MCP 工具 napcat_status）
+
+并发探测所有配置的端点，整体在一个超时窗口内完成:
+
+    http        NapCat HTTP 服务器     get_status / get_version_info / get_packet_status
+    sse         NapCat HTTP SSE 服务器  同上（动作接口与 HTTP 服务器一致）
+    ws          NapCat WebSocket 服务器 同上
+    ws_server   反向 WebSocket（本机监听） 端口是否在监听
+    http_server 反向 HTTP 上报（本机监听）  端口是否在监听
+    mcp         MCP 服务器（sse/streamable-http） HTTP 是否可达
+
+每个动作端点采样 samples 轮，报告可达性、往返延迟分位数（毫秒）与 NapCat 返回的版本；
+另外读取 <AIVK_ROOT>/data/qq/napcat_root/.version。结果为可直接 JSON 序列化的 dict。
+"""
+
+import asyncio
+import time
+from collections.abc import Mapping
+from typing import Any
+
+import aiohttp
+from aivk.api import AivkIO
+
+from .client import ActionCaller, ActionError, HttpActionClient, WSClient
+from .endpoints import endpoint
+
+PROBE_ACTIONS = ("get_status", "get_version_info", "get_packet_status")
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """p50/p90/p99/max（毫秒）"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))] * 1000, 2)
+
+    return {"p50": pick(50), "p90": pick(90), "p99": pick(99), "max": round(ordered[-1] * 1000, 2)}
+
+
+def napcat_dot_version() -> str | None:
+    path = AivkIO.get_aivk_root() / "data" / "qq" / "napcat_root" / ".version"
+    try:
+        return path.read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+async def _probe_actions(caller: ActionCaller, result: dict[str, Any], samples: int, timeout: float) -> None:
+    latencies: list[float] = []
+    errors: list[str] = []
+
+    async def call(action: str) -> None:
+        started = time.perf_counter()
+        try:
+            response = await caller.execute(action, {}, timeout=timeout)
+        except (ActionError, OSError, TimeoutError) as e:
+            errors.append(f"{action}: {e}")
+            return
+        latencies.append(time.perf_counter() - started)
+        if response.get("status") != "ok":
+            errors.append(f"{action}: retcode={response.get('retcode')} {response.get('message') or ''}".strip())
+            return
+        data = response.get("data") or {}
+        if action == "get_status":
+            result["online"] = data.get("online")
+            result["good"] = data.get("good")
+        elif action == "get_version_info":
+            result["version"] = {key: data.get(key) for key in ("app_name", "app_version", "protocol_version")}
+        elif action == "get_packet_status":
+            result["packet_ok"] = True
+
+    for _ in range(samples):
+        await asyncio.gather(*(call(action) for action in PROBE_ACTIONS))
+        result["latency_ms"] = percentiles(latencies)
+        result["reachable"] = bool(latencies)
+    result["samples"] = len(latencies)
+    if errors:
+        result["errors"] = sorted(set(errors))
+    result["healthy"] = bool(latencies) and not errors and result.get("online") is not False
+
+
+async def _probe_http(config: Mapping[str, Any], key: str, result: dict[str, Any], samples: int, timeout: float) -> None:
+    host, port = endpoint(config, key)
+    result["url"] = f"http://{host}:{port}"
+    client = HttpActionClient(host, port, config.get("token") or None, name=key, timeout=timeout, limit=8)
+    try:
+        await _probe_actions(client, result, samples, timeout)
+    finally:
+        await client.close()
+
+
+async def _probe_ws(config: Mapping[str, Any], result: dict[str, Any], samples: int, timeout: float) -> None:
+    host, port = endpoint(config, "ws_port")
+    client = WSClient(host, port, config.get("token") or None, name="ws", timeout=timeout)
+    result["url"] = client.url
+    try:
+        try:
+            await asyncio.wait_for(client.start(wait=True), timeout)
+        except TimeoutError:
+            result["errors"] = [f"{timeout}s 内未能连接"]
+            return
+        await _probe_actions(client, result, samples, timeout)
+    finally:
+        await client.stop()
+
+
+async def _probe_listen(config: Mapping[str, Any], key: str, result: dict[str, Any], timeout: float) -> None:
+    host, port = endpoint(config, key)
+    target = "127.0.0.1" if host in ("0.0.0.0", "") else host
+    result["url"] = f"tcp://{target}:{port}"
+    started = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(target, port), timeout)
+    except (OSError, TimeoutError) as e:
+        result["errors"] = [repr(e)]
+        return
+    writer.close()
+    result["latency_ms"] = percentiles([time.perf_counter() - started])
+    result["reachable"] = result["healthy"] = True
+
+
+async def _probe_mcp(config: Mapping[str, Any], result: dict[str, Any], timeout: float) -> None:
+    transport = config.get("transport") or "stdio"
+    result["transport"] = transport
+    if transport == "stdio":
+        result["skipped"] = "stdio 传输无网络端点"
+        result["healthy"] = True
+        return
+    host = config.get("host") or "localhost"
+    path = "/sse" if transport == "sse" else "/mcp"
+    url = f"http://{host}:{config.get('port') or 10141}{path}"
+    result["url"] = url
+    started = time.perf_counter()
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            # SSE 是长连接，收到响应头即可
+            async with session.get(url, headers={"Accept": "text/event-stream"}) as response:
+                status = response.status
+    except (aiohttp.ClientError, TimeoutError) as e:
+        result["errors"] = [repr(e)]
+        return
+    result["latency_ms"] = percentiles([time.perf_counter() - started])
+    result["http_status"] = status
+    result["reachable"] = True
+    # streamable-http 不带会话的 GET 会返回 4xx，但说明服务器在运行
+    result["healthy"] = status < 500
+
+
+async def probe_all(
+    config: Mapping[str, Any],
+    *,
+    samples: int = 3,
+    timeout: float = 5.0,
+    only: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    并发探测所有端点
+
+    Args:
+        config: qq 配置
+        samples: 每个动作端点的采样轮数
+        timeout: 整体超时（秒），超时未完成的探测记为 timeout
+        only: 只探测这些端点
+    """
+    probes: dict[str, Any] = {
+        "http": lambda r: _probe_http(config, "http_port", r, samples, timeout),
+        "sse": lambda r: _probe_http(config, "sse_port", r, samples, timeout),
+        "ws": lambda r: _probe_ws(config, r, samples, timeout),
+        "ws_server": lambda r: _probe_listen(config, "ws_server_port", r, timeout),
+        "http_server": lambda r: _probe_listen(config, "http_server_port", r, timeout),
+        "mcp": lambda r: _probe_mcp(config, r, timeout),
+    }
+    if only:
+        probes = {name: probe for name, probe in probes.items() if name in only}
+
+    results: dict[str, dict[str, Any]] = {name: {"reachable": False, "healthy": False} for name in probes}
+    started = time.perf_counter()
+    tasks = {name: asyncio.create_task(probe(results[name])) for name, probe in probes.items()}
+    done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    for name, task in tasks.items():
+        if task in pending:
+            results[name]["timeout"] = True
+        elif task.exception() is not None:
+            results[name].setdefault("errors", []).append(repr(task.exception()))
+
+    napcat = [results[name] for name in ("http", "sse", "ws") if name in results]
+    return {
+        "time": time.time(),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "healthy": any(item["healthy"] for item in napcat) if napcat else all(
+            item["healthy"] for item in results.values()
+        ),
+        "napcat_dot_version": napcat_dot_version(),
+        "endpoints": results,
+    }
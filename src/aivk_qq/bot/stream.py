@@ -0,0 +1,320 @@
+"""
+流式回复
+
+把逐步生成的文本（异步迭代器）边生成边发出:
+
+- 私聊生成期间定期发送 set_input_status（"对方正在输入"），QQ 群聊没有输入状态；
+- 文本按句子边界切分，攒够 min_chars 或等待超过 first_flush 秒就发送，
+  相邻两条消息至少间隔 interval 秒，用户在一秒内就能看到开头；
+- 超过 max_messages 条后剩余内容不再逐条发送，结束时打包为一条合并转发消息
+  （send_group_forward_msg / send_private_forward_msg）。
+
+用法:
+    async def tokens():
+        async for delta in llm.stream(...):
+            yield delta
+
+    await stream_reply(conn, tokens(), group_id=123456)
+
+MCP 工具把多次调用串成一个流时用 StreamRegistry 管理：每个会话同时进行的流有上限，
+结束（包括空闲超时、发送失败）的流保留一段时间，stream_end 仍能取回结果或错误。
+"""
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections.abc import AsyncIterator, Coroutine
+from dataclasses import dataclass
+from typing import Any
+
+from .client import ActionCaller
+
+logger = logging.getLogger("aivk.qq.bot.stream")
+
+_SENTENCE_END = re.compile(r"[。！？!?；;…\n]+|[.](?=\s)")
+
+# set_input_status 的 event_type：1 为正在输入
+_TYPING = 1
+
+
+def split_sentences(text: str, min_chars: int, max_chars: int) -> tuple[list[str], str]:
+    """
+    切出完整的句块
+
+    Returns:
+        (可以发送的块, 剩余未成句的文本)
+    """
+    chunks: list[str] = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+        if end - start >= min_chars:
+            chunks.append(text[start:end])
+            start = end
+    rest = text[start:]
+    # 一直没有句子边界的长文本强制切分
+    while len(rest) > max_chars:
+        chunks.append(rest[:max_chars])
+        rest = rest[max_chars:]
+    return [chunk.strip() for chunk in chunks if chunk.strip()], rest
+
+
+@dataclass(slots=True)
+class StreamResult:
+    messages: int = 0
+    forwarded: bool = False
+    chars: int = 0
+    first_message_ms: float | None = None
+    elapsed_ms: float = 0.0
+
+
+async def stream_reply(
+    caller: ActionCaller,
+    chunks: AsyncIterator[str],
+    *,
+    group_id: int | None = None,
+    user_id: int | None = None,
+    min_chars: int = 20,
+    max_chars: int = 300,
+    first_flush: float = 0.8,
+    interval: float = 1.0,
+    max_messages: int = 5,
+    nickname: str = "AIVK",
+    self_id: int | None = None,
+) -> StreamResult:
+    """
+    流式发送回复
+
+    Args:
+        caller: 动作客户端
+        chunks: 文本增量
+        group_id: 群号，与 user_id 二选一
+        user_id: 私聊对象
+        min_chars: 一条消息的最少字符数（句子边界处切分）
+        max_chars: 没有句子边界时强制切分的长度
+        first_flush: 首条消息最长等待时间（秒），到时有内容就发送
+        interval: 相邻消息的最小间隔（秒）
+        max_messages: 逐条发送的上限，超出部分打包为合并转发
+        nickname: 合并转发节点显示的昵称
+        self_id: 合并转发节点的 QQ 号（机器人账号）
+    """
+    if not group_id and not user_id:
+        raise ValueError("group_id 与 user_id 至少提供一个")
+    started = time.perf_counter()
+    result = StreamResult()
+    buffer = ""
+    overflow: list[str] = []
+    last_sent = 0.0
+    typing_sent = 0.0
+
+    async def send(text: str) -> None:
+        nonlocal last_sent
+        wait = last_sent + interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if group_id:
+            await caller.execute("send_group_msg", {"group_id": group_id, "message": text})
+        else:
+            await caller.execute("send_private_msg", {"user_id": user_id, "message": text})
+        last_sent = time.monotonic()
+        result.messages += 1
+        if result.first_message_ms is None:
+            result.first_message_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    async def typing() -> None:
+        nonlocal typing_sent
+        if group_id or time.monotonic() - typing_sent < 5.0:
+            return
+        typing_sent = time.monotonic()
+        try:
+            await caller.execute("set_input_status", {"user_id": user_id, "event_type": _TYPING})
+        except Exception:
+            # 输入状态只是提示，失败不影响回复
+            pass
+
+    async def emit(pieces: list[str]) -> None:
+        for piece in pieces:
+            if result.messages < max_messages - 1 and not overflow:
+                await send(piece)
+            else:
+                overflow.append(piece)
+
+    await typing()
+    async for delta in chunks:
+        if not delta:
+            continue
+        result.chars += len(delta)
+        buffer += delta
+        ready, buffer = split_sentences(buffer, min_chars, max_chars)
+        if not ready and result.messages == 0 and buffer.strip() and time.perf_counter() - started >= first_flush:
+            ready, buffer = [buffer.strip()], ""
+        if ready:
+            await emit(ready)
+        await typing()
+
+    if buffer.strip():
+        await emit([buffer.strip()])
+
+    if overflow:
+        if len(overflow) == 1 and result.messages < max_messages:
+            await send(overflow[0])
+        else:
+            nodes = [
+                {
+                    "type": "node",
+                    "data": {
+                        "nickname": nickname,
+                        "user_id": str(self_id or ""),
+                        "content": [{"type": "text", "data": {"text": piece}}],
+                    },
+                }
+                for piece in _pack(overflow, max_chars * 4)
+            ]
+            if group_id:
+                await caller.execute("send_group_forward_msg", {"group_id": group_id, "messages": nodes})
+            else:
+                await caller.execute("send_private_forward_msg", {"user_id": user_id, "messages": nodes})
+            result.forwarded = True
+            result.messages += 1
+    result.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def _pack(pieces: list[str], limit: int) -> list[str]:
+    """把句块合并为不超过 limit 字符的段落，减少合并转发的节点数"""
+    packed: list[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > limit:
+            packed.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        packed.append(current)
+    return packed
+
+
+class TextStream:
+    """
+    由外部逐段推送文本的异步迭代器，供 MCP 工具把多次调用串成一个流
+
+    Args:
+        idle_timeout: 超过该时间没有新文本时结束流（秒）
+    """
+
+    _END = object()
+
+    def __init__(self, idle_timeout: float = 120.0) -> None:
+        self.idle_timeout = idle_timeout
+        self._queue: asyncio.Queue[Any] = asyncio.Queue()
+        self.closed = False
+
+    def push(self, text: str) -> None:
+        if self.closed:
+            raise RuntimeError("流已结束")
+        self._queue.put_nowait(text)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._queue.put_nowait(self._END)
+
+    def __aiter__(self) -> "TextStream":
+        return self
+
+    async def __anext__(self) -> str:
+        try:
+            item = await asyncio.wait_for(self._queue.get(), self.idle_timeout)
+        except TimeoutError:
+            self.closed = True
+            raise StopAsyncIteration from None
+        if item is self._END:
+            raise StopAsyncIteration
+        return item
+
+
+@dataclass(slots=True)
+class _Entry:
+    stream: TextStream
+    task: "asyncio.Task[StreamResult]"
+    owner: int
+    finished_at: float | None = None
+
+
+class StreamRegistry:
+    """
+    按 stream_id 管理进行中的流式回复
+
+    Args:
+        max_per_owner: 单个会话同时进行的流上限，<= 0 表示不限制
+        keep: 已结束的流保留多久（秒），期间 end() 仍能取回结果
+    """
+
+    def __init__(self, max_per_owner: int = 4, keep: float = 300.0) -> None:
+        self.max_per_owner = max_per_owner
+        self.keep = keep
+        self._entries: dict[str, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def open(self, stream: TextStream, reply: Coroutine[Any, Any, StreamResult], owner: int = 0) -> str:
+        """
+        在后台运行 reply（通常是读取 stream 的 stream_reply）
+
+        Raises:
+            RuntimeError: 该会话进行中的流已达上限
+        """
+        self._purge()
+        active = sum(1 for entry in self._entries.values() if entry.owner == owner and not entry.task.done())
+        if self.max_per_owner > 0 and active >= self.max_per_owner:
+            reply.close()
+            raise RuntimeError(f"进行中的流已达上限 {self.max_per_owner}，请先 stream_end")
+        stream_id = uuid.uuid4().hex[:12]
+        task = asyncio.create_task(reply)
+        entry = self._entries[stream_id] = _Entry(stream, task, owner)
+        task.add_done_callback(lambda _: self._finished(stream_id, entry))
+        return stream_id
+
+    def _finished(self, stream_id: str, entry: _Entry) -> None:
+        entry.finished_at = time.monotonic()
+        entry.stream.closed = True
+        if not entry.task.cancelled() and entry.task.exception() is not None:
+            logger.warning(f"流式回复 {stream_id} 失败: {entry.task.exception()!r}")
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        for stream_id, entry in list(self._entries.items()):
+            if entry.finished_at is not None and now - entry.finished_at > self.keep:
+                del self._entries[stream_id]
+
+    def _get(self, stream_id: str) -> _Entry:
+        self._purge()
+        entry = self._entries.get(stream_id)
+        if entry is None:
+            raise KeyError(f"流不存在或已结束: {stream_id}")
+        return entry
+
+    def push(self, stream_id: str, text: str) -> None:
+        """
+        Raises:
+            KeyError: 流不存在
+            RuntimeError: 流已结束（空闲超时或发送失败），调用 end() 取回结果
+        """
+        entry = self._get(stream_id)
+        if entry.task.done():
+            raise RuntimeError(f"流 {stream_id} 已结束（空闲超时或发送失败），请调用 stream_end 获取结果")
+        entry.stream.push(text)
+
+    async def end(self, stream_id: str) -> StreamResult:
+        """结束流，等待剩余内容发出并返回统计；回复失败时抛出其异常"""
+        entry = self._get(stream_id)
+        entry.stream.close()
+        try:
+            return await asyncio.shield(entry.task)
+        finally:
+            if entry.task.done():
+                self._entries.pop(stream_id, None)
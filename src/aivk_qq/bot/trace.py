@@ -0,0 +1,535 @@
+"""
+事件到回复的链路追踪
+
+回复慢的时候，需要知道时间花在了解码、过滤、处理器、缓存未命中、限流等待还是 NapCat 往返上。
+每个被采样的入站事件（以及每次 MCP 工具调用）生成一个 trace id，随 contextvars 贯穿
+分发、处理器、工具调用与出站动作，各阶段记录为 span:
+
+    decode          收到帧到解析完成
+    dispatch        总线分发（根 span）
+    filter          前置过滤器（白名单、刷屏检测）
+    handler         单个处理器，attributes.handler 为处理器名
+    action          处理器返回的 Action
+    outbox          发送类动作落盘
+    ratelimit       账号令牌桶等待
+    cache           只读动作缓存，attributes.hit 表示是否命中
+    napcat          一次 NapCat 动作往返，attributes.transport / action
+    mcp             MCP 工具调用（根 span）
+
+完成的 trace 进入环形缓冲区（Tracer.recent / slowest），并以 OTLP/JSON 格式逐行追加到
+<AIVK_ROOT>/data/qq/traces/<service>.jsonl（与 OpenTelemetry Collector 的 file exporter
+格式相同，可以直接导入），`aivk-qq trace` 读取这些文件列出最慢的 trace。
+在事件循环中写文件交给线程池，同一时间只有一批在写，其余继续在缓冲中累积。
+
+采样率为 0（默认）时，根 span 只做一次比较，子 span 只读取一次 ContextVar，
+不创建任何对象。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator, Mapping
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from aivk.api import AivkIO
+
+logger = logging.getLogger("aivk.qq.bot.trace")
+
+# 根 span 从事件中记录的属性
+EVENT_ATTRS = (
+    "post_type",
+    "message_type",
+    "notice_type",
+    "request_type",
+    "self_id",
+    "group_id",
+    "user_id",
+    "message_id",
+)
+
+_NOOP: AbstractContextManager[None] = nullcontext()
+
+
+def _new_id(size: int) -> str:
+    return os.urandom(size).hex()
+
+
+def _attr_value(value: Any) -> dict[str, Any]:
+    """OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if not isinstance(value, str):
+        value = getattr(value, "__qualname__", None) or repr(value)
+    return {"stringValue": value}
+
+
+def _from_attr_value(value: Mapping[str, Any]) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    for key in ("stringValue", "doubleValue", "boolValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+@dataclass(slots=True)
+class Span:
+    """一个阶段的起止时间（Unix 纳秒）"""
+
+    name: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int = 0
+    attrs: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return max(0, self.end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self, trace_id: str) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            # SPAN_KIND_SERVER / SPAN_KIND_INTERNAL
+            "kind": 2 if self.parent_id is None else 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _attr_value(value)} for key, value in self.attrs.items()],
+        }
+        if self.error is not None:
+            data["status"] = {"code": 2, "message": self.error}
+        return data
+
+    @classmethod
+    def from_otlp(cls, data: Mapping[str, Any]) -> "Span":
+        status = data.get("status") or {}
+        return cls(
+            name=data.get("name", ""),
+            span_id=data.get("spanId", ""),
+            parent_id=data.get("parentSpanId") or None,
+            start_ns=int(data.get("startTimeUnixNano", 0)),
+            end_ns=int(data.get("endTimeUnixNano", 0)),
+            attrs={item["key"]: _from_attr_value(item.get("value") or {}) for item in data.get("attributes", [])},
+            error=status.get("message") if status.get("code") == 2 else None,
+        )
+
+
+@dataclass(slots=True)
+class Trace:
+    """一个事件（或工具调用）从接收到完成的全部 span，spans[0] 为根 span"""
+
+    trace_id: str
+    spans: list[Span] = field(default_factory=list)
+    service: str = "aivk-qq"
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    @property
+    def name(self) -> str:
+        return self.root.name
+
+    @property
+    def start_ns(self) -> int:
+        return min(span.start_ns for span in self.spans)
+
+    @property
+    def duration_ms(self) -> float:
+        return max(0, max(span.end_ns for span in self.spans) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest"""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service}}]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "aivk.qq"},
+                            "spans": [span.to_otlp(self.trace_id) for span in self.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    @classmethod
+    def from_otlp(cls, data: Mapping[str, Any]) -> list["Trace"]:
+        traces: dict[str, Trace] = {}
+        for resource in data.get("resourceSpans", []):
+            service = "aivk-qq"
+            for item in (resource.get("resource") or {}).get("attributes", []):
+                if item.get("key") == "service.name":
+                    service = _from_attr_value(item.get("value") or {}) or service
+            for scope in resource.get("scopeSpans", []):
+                for raw in scope.get("spans", []):
+                    trace_id = raw.get("traceId", "")
+                    trace = traces.setdefault(trace_id, cls(trace_id, service=service))
+                    trace.spans.append(Span.from_otlp(raw))
+        for trace in traces.values():
+            # 根 span 排在最前，其余按开始时间
+            trace.spans.sort(key=lambda span: (span.parent_id is not None, span.start_ns))
+        return [trace for trace in traces.values() if trace.spans]
+
+
+# 当前 trace 与当前 span，asyncio 任务创建时自动复制
+_trace: ContextVar[Trace | None] = ContextVar("aivk_qq_trace", default=None)
+_parent: ContextVar[str | None] = ContextVar("aivk_qq_span", default=None)
+# 传输层收到帧的时间 (开始解析, 解析完成)，由根 span 记录为 decode
+_received: ContextVar[tuple[int, int] | None] = ContextVar("aivk_qq_received", default=None)
+
+
+def current() -> Trace | None:
+    """当前任务所属的 trace，未采样时为 None"""
+    return _trace.get()
+
+
+class _SpanScope:
+    __slots__ = ("_trace", "_span", "_token")
+
+    def __init__(self, trace: Trace, name: str, attrs: dict[str, Any]) -> None:
+        self._trace = trace
+        self._span = Span(name, _new_id(8), None, 0, attrs=attrs)
+
+    def __enter__(self) -> Span:
+        span = self._span
+        span.parent_id = _parent.get()
+        span.start_ns = time.time_ns()
+        self._token = _parent.set(span.span_id)
+        return span
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        span = self._span
+        span.end_ns = time.time_ns()
+        if exc is not None:
+            span.error = repr(exc)
+        _parent.reset(self._token)
+        self._trace.spans.append(span)
+
+
+def span(name: str, **attrs: Any) -> AbstractContextManager[Span | None]:
+    """
+    记录当前 trace 中的一个阶段；当前任务未被采样时返回空上下文
+
+    用法:
+        with span("cache", action=action) as s:
+            ...
+            if s is not None:
+                s.attrs["hit"] = True
+    """
+    trace = _trace.get()
+    if trace is None:
+        return _NOOP
+    return _SpanScope(trace, name, attrs)
+
+
+class _RootScope:
+    __slots__ = ("_tracer", "_trace", "_span", "_tokens")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self._trace = Trace(_new_id(16), service=tracer.service)
+        self._span = Span(name, _new_id(8), None, 0, attrs=attrs)
+
+    def __enter__(self) -> Span:
+        trace, root = self._trace, self._span
+        now = time.time_ns()
+        received = _received.get()
+        root.start_ns = received[0] if received is not None else now
+        trace.spans.append(root)
+        if received is not None:
+            trace.spans.append(Span("decode", _new_id(8), root.span_id, received[0], received[1]))
+        self._tokens = (_trace.set(trace), _parent.set(root.span_id), _received.set(None))
+        return root
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        root = self._span
+        root.end_ns = time.time_ns()
+        if exc is not None:
+            root.error = repr(exc)
+        trace_token, parent_token, received_token = self._tokens
+        _received.reset(received_token)
+        _parent.reset(parent_token)
+        _trace.reset(trace_token)
+        self._tracer.finish(self._trace)
+
+
+class _Received:
+    __slots__ = ("_value", "_token")
+
+    def __init__(self, value: tuple[int, int]) -> None:
+        self._value = value
+
+    def __enter__(self) -> None:
+        self._token = _received.set(self._value)
+
+    def __exit__(self, *exc: Any) -> None:
+        _received.reset(self._token)
+
+
+def received_at(start_ns: int) -> AbstractContextManager[None]:
+    """
+    标记传输层收到帧的时间，其中创建的分发任务会把收帧到现在记录为 decode span
+
+    start_ns 为 0（未采样）时返回空上下文。
+    """
+    if not start_ns:
+        return _NOOP
+    return _Received((start_ns, time.time_ns()))
+
+
+def default_trace_dir() -> Path:
+    return AivkIO.get_aivk_root() / "data" / "qq" / "traces"
+
+
+class Tracer:
+    """
+    按采样率生成 trace，保存在环形缓冲区并导出到 JSONL 文件
+
+    Args:
+        sample_rate: 采样率 0~1，0 表示关闭
+        capacity: 环形缓冲区保存的 trace 数
+        path: 导出文件，为 None 时只保存在内存中
+        service: 导出时的 service.name
+        max_bytes: 导出文件超过该大小时轮转为 <name>.jsonl.1
+        flush_interval: 导出缓冲的最长停留时间（秒）
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        capacity: int = 256,
+        path: Path | None = None,
+        *,
+        service: str = "aivk-qq",
+        max_bytes: int = 16 * 1024 * 1024,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.service = service
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._recent: deque[Trace] = deque(maxlen=capacity)
+        self._buffer: list[str] = []
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+        self._writing: asyncio.Future[None] | None = None
+        self.sampled = 0
+        self.exported = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def configure(
+        self,
+        sample_rate: float | None = None,
+        capacity: int | None = None,
+        path: Path | None = None,
+        service: str | None = None,
+    ) -> None:
+        """修改采样率、缓冲区容量或导出文件；切换文件前先写出缓冲"""
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, sample_rate))
+        if capacity is not None and capacity != self._recent.maxlen:
+            self._recent = deque(self._recent, maxlen=capacity)
+        if path is not None and path != self.path:
+            self.flush()
+            self.path = path
+        if service is not None:
+            self.service = service
+
+    def root(self, name: str, event: Mapping[str, Any] | None = None, **attrs: Any) -> AbstractContextManager[Span | None]:
+        """
+        开始一个 trace；已在 trace 中时（例如插件总线嵌套分发）退化为子 span
+
+        Args:
+            name: 根 span 名称
+            event: 事件，EVENT_ATTRS 中的字段记录为属性
+        """
+        if _trace.get() is not None:
+            return span(name, **attrs)
+        rate = self.sample_rate
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return _NOOP
+        if event is not None:
+            attrs.update((key, event[key]) for key in EVENT_ATTRS if event.get(key) is not None)
+        return _RootScope(self, name, attrs)
+
+    def finish(self, trace: Trace) -> None:
+        self.sampled += 1
+        self._recent.append(trace)
+        if self.path is None:
+            return
+        self._buffer.append(json.dumps(trace.to_otlp(), ensure_ascii=False, separators=(",", ":")))
+        if len(self._buffer) >= 64 or time.monotonic() - self._flushed >= self.flush_interval:
+            self._flush_soon()
+
+    def _take(self) -> tuple[Path, list[str]] | None:
+        self._flushed = time.monotonic()
+        if not self._buffer or self.path is None:
+            return None
+        lines, self._buffer = self._buffer, []
+        return self.path, lines
+
+    def _write(self, path: Path, lines: list[str]) -> None:
+        with self._lock:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if path.exists() and path.stat().st_size > self.max_bytes:
+                    os.replace(path, path.with_name(path.name + ".1"))
+                with path.open("a", encoding="utf-8") as fp:
+                    fp.write("\n".join(lines) + "\n")
+            except OSError as e:
+                logger.warning(f"写入 trace 失败: {e}")
+                return
+            self.exported += len(lines)
+
+    def _flush_soon(self) -> None:
+        """在事件循环中把写文件交给线程；上一批还没写完时继续缓冲"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._writing is not None and not self._writing.done():
+            return
+        batch = self._take()
+        if batch is not None:
+            self._writing = loop.run_in_executor(None, self._write, *batch)
+
+    def flush(self) -> None:
+        """把缓冲的 trace 同步追加到导出文件（会阻塞，事件循环中请用 aflush）"""
+        batch = self._take()
+        if batch is not None:
+            self._write(*batch)
+
+    async def aflush(self) -> None:
+        """等待进行中的写入，再在线程中写出剩余的缓冲，用于关闭时"""
+        writing, self._writing = self._writing, None
+        if writing is not None and not writing.done():
+            await asyncio.shield(writing)
+        batch = self._take()
+        if batch is not None:
+            await asyncio.to_thread(self._write, *batch)
+
+    def recent(self) -> list[Trace]:
+        return list(self._recent)
+
+    def slowest(self, count: int = 10) -> list[Trace]:
+        return sorted(self._recent, key=lambda trace: trace.duration_ms, reverse=True)[:count]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "sampled": self.sampled,
+            "exported": self.exported,
+            "buffered": len(self._recent),
+            "path": str(self.path) if self.path else None,
+        }
+
+
+# 进程内共享的追踪器，由 run_bot 与 MCP 服务器按配置设置
+tracer = Tracer()
+
+
+# region 读取与展示
+
+
+def read_traces(paths: list[Path], limit: int = 5000) -> list[Trace]:
+    """读取导出文件中最近的 limit 行 trace，跳过无法解析的行"""
+    traces: list[Trace] = []
+    for path in paths:
+        try:
+            with path.open(encoding="utf-8") as fp:
+                lines = deque(fp, maxlen=limit)
+        except OSError:
+            continue
+        for line in lines:
+            try:
+                traces.extend(Trace.from_otlp(json.loads(line)))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+    return traces
+
+
+def trace_files(directory: Path | None = None) -> list[Path]:
+    directory = directory or default_trace_dir()
+    return sorted(directory.glob("*.jsonl")) if directory.is_dir() else []
+
+
+def _walk(trace: Trace) -> Iterator[tuple[int, Span]]:
+    children: dict[str | None, list[Span]] = {}
+    for item in trace.spans[1:]:
+        children.setdefault(item.parent_id, []).append(item)
+
+    def visit(node: Span, depth: int) -> Iterator[tuple[int, Span]]:
+        yield depth, node
+        for child in sorted(children.get(node.span_id, []), key=lambda s: s.start_ns):
+            yield from visit(child, depth + 1)
+
+    yield from visit(trace.root, 0)
+
+
+def summarize(trace: Trace) -> dict[str, Any]:
+    """trace 的可 JSON 序列化摘要，span 按树形顺序展开"""
+    start = trace.start_ns
+    return {
+        "trace_id": trace.trace_id,
+        "service": trace.service,
+        "name": trace.name,
+        "start": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start / 1e9)),
+        "duration_ms": round(trace.duration_ms, 3),
+        "attributes": trace.root.attrs,
+        "spans": [
+            {
+                "depth": depth,
+                "name": item.name,
+                "offset_ms": round((item.start_ns - start) / 1e6, 3),
+                "duration_ms": round(item.duration_ms, 3),
+                "attributes": item.attrs,
+                "error": item.error,
+            }
+            for depth, item in _walk(trace)
+        ],
+    }
+
+
+def format_trace(trace: Trace) -> str:
+    summary = summarize(trace)
+    attrs = " ".join(f"{key}={value}" for key, value in summary["attributes"].items())
+    lines = [
+        f"{summary['duration_ms']:>10.2f}ms  {summary['service']}  {summary['name']}  "
+        f"{summary['start']}  trace={summary['trace_id']}" + (f"  {attrs}" if attrs else "")
+    ]
+    for item in summary["spans"][1:]:
+        detail = " ".join(f"{key}={value}" for key, value in item["attributes"].items())
+        line = f"{'':>12}+{item['offset_ms']:>9.2f}ms {item['duration_ms']:>9.2f}ms  {'  ' * item['depth']}{item['name']}"
+        if detail:
+            line += f"  {detail}"
+        if item["error"]:
+            line += f"  ! {item['error']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# endregion
@@ -0,0 +1,252 @@
+"""
+统一动作客户端：HTTP 连接池 + 正向 WebSocket
+
+同时保持 HttpActionClient 与 WSClient 两条传输，按滚动延迟与错误率为每个动作选择传输:
+
+- 每条传输维护 EWMA 延迟与 EWMA 错误率，得分 = 延迟 × (1 + error_penalty × 错误率)，选得分低的；
+- 连续失败 max_failures 次的传输熔断 cooldown 秒，期间只走另一条；WS 未连接时直接视为不可用；
+- 请求确定没有发出（ActionNotSent：未连接、连接建立失败）时透明地切换到另一条重试；
+  超时或发出后断开时 NapCat 可能已经执行，只有只读动作（get_*、can_* 等，见 read_only）切换，
+  其余动作直接抛出，避免被执行两次，也不会在超时后再等第二条传输的一整个超时；
+- 每 explore_every 次调用分给较慢的传输一次，使它的延迟估计保持新鲜，网络变化后能切回；
+- 文件上传下载等耗时动作、参数超过 large_bytes 的动作（例如 base64 图片）固定走 HTTP，
+  不占用 WS 通道，不阻塞事件接收与其他动作的响应。
+
+事件仍由 WSClient 接收并分发到总线；metrics() 报告每条传输的延迟、错误率与路由计数。
+"""
+
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from .client import ActionError, ActionNotSent, HttpActionClient, WSClient
+
+logger = logging.getLogger("aivk.qq.bot.unified")
+
+# 耗时或响应体很大的动作，固定走 HTTP
+# 只读动作：重复执行没有副作用，结果未知时也可以换一条传输重试
+READ_ONLY_PREFIXES = ("get_", "can_", ".get_", "_get_", "nc_get_", "fetch_")
+READ_ONLY_ACTIONS = frozenset({
+    "ocr_image",
+    ".ocr_image",
+    "check_url_safely",
+    "translate_en2zh",
+})
+
+
+def read_only(action: str) -> bool:
+    return action.startswith(READ_ONLY_PREFIXES) or action in READ_ONLY_ACTIONS
+
+
+HTTP_ACTIONS = frozenset({
+    "upload_group_file",
+    "upload_private_file",
+    "download_file",
+    "get_file",
+    "get_image",
+    "get_record",
+    "ocr_image",
+    ".ocr_image",
+    "get_group_file_url",
+    "get_private_file_url",
+    "get_group_root_files",
+    "get_group_files_by_folder",
+    "get_group_msg_history",
+    "get_friend_msg_history",
+    "get_friend_list",
+    "get_group_list",
+    "get_group_member_list",
+    "clean_cache",
+})
+
+
+@dataclass(slots=True)
+class TransportStats:
+    """一条传输的滚动统计"""
+
+    name: str
+    latency: float | None = None
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    failures: int = 0
+    down_until: float = 0.0
+    routed: int = 0
+    failovers: int = 0
+    last_error: str | None = None
+
+    def record(self, elapsed: float, alpha: float) -> None:
+        self.calls += 1
+        self.failures = 0
+        self.latency = elapsed if self.latency is None else (1 - alpha) * self.latency + alpha * elapsed
+        self.error_rate *= 1 - alpha
+
+    def fail(self, error: Exception, alpha: float) -> None:
+        self.calls += 1
+        self.errors += 1
+        self.failures += 1
+        self.error_rate = (1 - alpha) * self.error_rate + alpha
+        self.last_error = str(error)
+
+    def to_dict(self, now: float) -> dict[str, Any]:
+        return {
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "calls": self.calls,
+            "errors": self.errors,
+            "routed": self.routed,
+            "failovers": self.failovers,
+            "circuit_open": self.down_until > now,
+            "last_error": self.last_error,
+        }
+
+
+class UnifiedClient:
+    """
+    按延迟与健康度在 HTTP 与 WS 之间路由动作的客户端
+
+    用法与 WSClient 相同（start / stop / execute / add_connect_listener），
+    可以直接替代 WSClient 作为 run_bot 的连接。
+
+    Args:
+        http: HTTP 动作客户端
+        ws: 正向 WebSocket 客户端（同时负责接收事件）
+        alpha: EWMA 平滑系数
+        error_penalty: 错误率对得分的放大系数
+        max_failures: 连续失败多少次后熔断
+        cooldown: 熔断时长（秒）
+        explore_every: 每多少次调用分给较慢的传输一次，0 表示不探索
+        large_bytes: 参数序列化后超过该字节数的动作走 HTTP
+        long_timeout: 调用方给出的超时超过该值（秒）时视为长耗时动作，走 HTTP
+    """
+
+    def __init__(
+        self,
+        http: HttpActionClient,
+        ws: WSClient,
+        *,
+        alpha: float = 0.2,
+        error_penalty: float = 4.0,
+        max_failures: int = 3,
+        cooldown: float = 10.0,
+        explore_every: int = 50,
+        large_bytes: int = 64 * 1024,
+        long_timeout: float = 60.0,
+    ) -> None:
+        self.http = http
+        self.ws = ws
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.explore_every = explore_every
+        self.large_bytes = large_bytes
+        self.long_timeout = long_timeout
+        self._stats = {"http": TransportStats("http"), "ws": TransportStats("ws")}
+        self._clients: dict[str, Any] = {"http": http, "ws": ws}
+        self._seq = 0
+        self.pinned = 0
+
+    @property
+    def connected(self) -> bool:
+        return self.ws.connected
+
+    def add_connect_listener(self, listener: Callable[[], Awaitable[Any]]) -> None:
+        self.ws.add_connect_listener(listener)
+
+    async def start(self, wait: bool = True) -> None:
+        await self.http.start()
+        await self.ws.start(wait=wait)
+
+    async def stop(self) -> None:
+        await self.ws.stop()
+        await self.http.close()
+
+    def _available(self, name: str, now: float) -> bool:
+        if name == "ws" and not self.ws.connected:
+            return False
+        return self._stats[name].down_until <= now
+
+    def _score(self, name: str) -> float:
+        stats = self._stats[name]
+        # 没有样本的传输得分为 0，优先试用一次
+        latency = stats.latency if stats.latency is not None else 0.0
+        return latency * (1 + self.error_penalty * stats.error_rate)
+
+    def _pinned_http(self, action: str, params: dict[str, Any] | None, timeout: float | None) -> bool:
+        if action in HTTP_ACTIONS or (timeout is not None and timeout > self.long_timeout):
+            return True
+        if not params:
+            return False
+        return len(json.dumps(params, ensure_ascii=False)) > self.large_bytes
+
+    def route(self, action: str, params: dict[str, Any] | None = None, timeout: float | None = None) -> list[str]:
+        """返回按优先级排列的候选传输"""
+        if self._pinned_http(action, params, timeout):
+            return ["http"]
+        return self._candidates()
+
+    def _candidates(self) -> list[str]:
+        now = time.monotonic()
+        order = sorted(("ws", "http"), key=self._score)
+        self._seq += 1
+        if self.explore_every and self._seq % self.explore_every == 0:
+            order.reverse()
+        available = [name for name in order if self._available(name, now)]
+        # 全部熔断时仍然尝试，熔断只是偏好
+        return available or [name for name in order if name != "ws" or self.ws.connected] or ["http"]
+
+    async def execute(
+        self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None
+    ) -> dict[str, Any]:
+        if self._pinned_http(action, params, timeout):
+            self.pinned += 1
+            candidates = ["http"]
+        else:
+            candidates = self._candidates()
+        last_error: ActionError | None = None
+        for attempt, name in enumerate(candidates):
+            stats = self._stats[name]
+            if attempt:
+                stats.failovers += 1
+            stats.routed += 1
+            started = time.perf_counter()
+            try:
+                response = await self._clients[name].execute(action, params, timeout=timeout)
+            except ActionError as e:
+                self._on_failure(stats, e)
+                last_error = e
+                # 请求可能已经发出时 NapCat 可能已经执行了动作，只有只读动作切换重试
+                if not isinstance(e, ActionNotSent) and not read_only(action):
+                    raise
+                continue
+            stats.record(time.perf_counter() - started, self.alpha)
+            return response
+        assert last_error is not None
+        raise last_error
+
+    def _on_failure(self, stats: TransportStats, error: ActionError) -> None:
+        stats.fail(error, self.alpha)
+        if stats.failures >= self.max_failures and stats.down_until <= time.monotonic():
+            stats.down_until = time.monotonic() + self.cooldown
+            logger.warning(f"{stats.name}: 连续失败 {stats.failures} 次，熔断 {self.cooldown}s: {error}")
+
+    @property
+    def preferred(self) -> str:
+        """当前普通动作会优先选择的传输"""
+        now = time.monotonic()
+        order = sorted(("ws", "http"), key=self._score)
+        return next((name for name in order if self._available(name, now)), "http")
+
+    def metrics(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "preferred": self.preferred,
+            "ws_connected": self.ws.connected,
+            "pinned_http": self.pinned,
+            "transports": {name: stats.to_dict(now) for name, stats in self._stats.items()},
+        }
+
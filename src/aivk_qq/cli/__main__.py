@@ -1,5 +1,6 @@
 # pyright: reportArgumentType=false,reportPrivateUsage=false,reportUnknownVariableType=false,reportUnknownParameterType=false,reportUnknownMemberType=false,reportMissingParameterType=false,reportUnusedCallResult=false
 import asyncio
+import json
 import os
 from pathlib import Path
 import shutil
@@ -12,6 +13,7 @@ from aivk.api import AivkIO
 from ..napcat.installer import NapcatInstaller
 from ..__about__ import __version__, __author__
 from ..base.utils import _get_cmd
+from ..config import get_store
 
 import logging
 
@@ -76,7 +78,13 @@ def config(path, bot_uid, root):
 
     _update_path(path)
 
-    aivk_qq_config = AivkIO.get_config("qq")
+    store = get_store()
+    aivk_qq_config = store.to_dict()
+
+    if bot_uid:
+        aivk_qq_config["bot_uid"] = int(bot_uid)
+    if root:
+        aivk_qq_config["root"] = int(root)
 
     if not shutil.which("uv"):
         click.secho("⚠️ UV未安装", fg="bright_red")
@@ -106,9 +114,10 @@ def config(path, bot_uid, root):
             raise SystemExit(1)
 
 
-    click.secho("\n📝 当前配置:", fg="bright_green")
-    AivkIO.save_config("qq", aivk_qq_config)
-    click.secho("\n✅ 配置已保存", fg="bright_green", bold=True)
+    if store.update(aivk_qq_config):
+        click.secho("\n✅ 配置已保存", fg="bright_green", bold=True)
+    else:
+        click.secho("\n✅ 配置未变化", fg="bright_green", bold=True)
 
     _list_config(aivk_qq_config)
 
@@ -136,7 +145,8 @@ def init(path, force ):
 
     _update_path(path)
 
-    aivk_qq_config = AivkIO.get_config("qq")
+    store = get_store()
+    aivk_qq_config = store.to_dict()
 
     if aivk_qq_config.get("bot_uid", None) is None or aivk_qq_config.get("root", None) is None:
         click.secho("⚠️ 受控机器人的QQ号或超级管理员QQ号未设置", fg="bright_red")
@@ -144,8 +154,8 @@ def init(path, force ):
             aivk_qq_config["bot_uid"] = click.prompt("请输入受控机器人的QQ号", type=int)
             aivk_qq_config["root"] = click.prompt("请输入超级管理员QQ号", type=int)
     
-    AivkIO.save_config("qq", aivk_qq_config)
-    click.secho("\n✅ 配置已保存", fg="bright_green")
+    if store.update(aivk_qq_config):
+        click.secho("\n✅ 配置已保存", fg="bright_green")
     
     AivkIO.add_module_id("qq")
 
@@ -320,8 +330,11 @@ def version(path):
 @cli.command()
 @click.option("--port", "-p", help="MCP服务器端口")
 @click.option("--host", "-h", help="MCP服务器地址")
-@click.option("--transport", "-t", type=click.Choice(['sse', 'stdio']), default="stdio", help="MCP服务器传输协议") # 二选一选项
-def mcp(port, host, transport):
+@click.option("--transport", "-t", type=click.Choice(['sse', 'stdio', 'streamable-http']), default="stdio", help="MCP服务器传输协议")
+@click.option("--max-concurrency", "-c", type=int, help="同时执行的工具调用上限（HTTP模式）")
+@click.option("--debug/--no-debug", default=None, help="调试模式（默认关闭）")
+@click.option("--uvloop/--no-uvloop", default=None, help="使用uvloop事件循环（HTTP模式，需安装uvloop）")
+def mcp(port, host, transport, max_concurrency, debug, uvloop):
     """
     启动MCP服务器
     """
@@ -329,7 +342,8 @@ def mcp(port, host, transport):
     click.secho("🖥️ AIVK-QQ MCP服务器 🖥️", fg="bright_cyan", bold=True)
     click.echo("="*50)
     
-    aivk_qq_config = AivkIO.get_config("qq")
+    store = get_store()
+    aivk_qq_config = store.to_dict()
     
     click.secho("⚙️ 配置MCP服务器参数...", fg="bright_blue")
     
@@ -351,6 +365,18 @@ def mcp(port, host, transport):
         click.secho("设置MCP服务器传输协议为: ", fg="bright_green", nl=False)
         click.secho(f"{transport}", fg="yellow")
         aivk_qq_config["transport"] = transport
+
+    if max_concurrency:
+        click.secho("🚦 ", nl=False)
+        click.secho("设置工具调用并发上限为: ", fg="bright_green", nl=False)
+        click.secho(f"{max_concurrency}", fg="yellow")
+        aivk_qq_config["mcp_max_concurrency"] = max_concurrency
+
+    if debug is not None:
+        aivk_qq_config["mcp_debug"] = debug
+
+    if uvloop is not None:
+        aivk_qq_config["mcp_uvloop"] = uvloop
     
     click.secho("\n📝 当前配置:", fg="bright_green")
     
@@ -366,16 +392,172 @@ def mcp(port, host, transport):
             click.secho(f"{str(value):<30}", fg="yellow")
     click.secho("-"*50, fg="bright_blue")
     
-    AivkIO.save_config("qq", aivk_qq_config)
-    click.secho("\n✅ 配置已保存", fg="bright_green")
+    if store.update(aivk_qq_config):
+        click.secho("\n✅ 配置已保存", fg="bright_green")
     AivkIO.add_module_id("qq")
     
     click.echo("\n" + "-"*50)
     click.secho("🚀 启动MCP服务器...", fg="bright_magenta", bold=True)
     click.echo("-"*50 + "\n")
     
-    from ..mcp import mcp
-    mcp.run(transport=transport)
+    from ..mcp.server import run_server
+    run_server(transport)
+
+
+# region run
+@cli.command()
+@click.option("--path", "-p", help="Path to the AIVK ROOT directory")
+@click.option("--app", "-a", default="aivk_qq.bot.plugins:setup", show_default=True, help="处理器入口，格式 module:function，函数签名 setup(bus)；默认加载插件目录与入口点插件")
+@click.option("--workers", "-w", type=int, default=1, show_default=True, help="工作进程数，大于1时按会话分片")
+@click.option("--transport", "-t", type=click.Choice(["ws", "ws-server", "auto"]), default="ws", help="事件接入方式：正向WS / 反向WS / 正向WS+HTTP按延迟自动选择")
+@click.option("--capture", "-c", is_flag=True, help="录制原始收发帧到 data/qq/capture")
+@click.option("--mcp", "mcp_transport", type=click.Choice(["sse", "streamable-http"]), help="在同一事件循环中运行MCP服务器（与机器人共用NapCat连接）")
+@click.option("--metrics-port", type=int, help="指标端点端口（/metrics、/healthz），0 表示不启动")
+@click.option("--uvloop/--no-uvloop", default=None, help="使用uvloop事件循环（需安装uvloop）")
+@click.option("--drain-timeout", type=float, help="关闭时排空处理器与发件箱的期限（秒）")
+def run(path, app, workers, transport, capture, mcp_transport, metrics_port, uvloop, drain_timeout):
+    """
+    启动机器人
+    -a 处理器入口 module:function，默认加载 data/qq/plugins 下的插件
+    -w 工作进程数
+    --mcp 同时运行MCP服务器，机器人、MCP服务器、定时任务与指标端点共用一个事件循环
+    """
+    from ..bot.capture import CaptureWriter
+    from ..bot.runner import run_bot
+    from ..bot.runtime import Runtime
+
+    click.echo("\n" + "="*50)
+    click.secho("🤖 AIVK-QQ 机器人 🤖", fg="bright_cyan", bold=True)
+    click.echo("="*50)
+
+    _update_path(path)
+
+    if workers < 1:
+        click.secho("❌ 工作进程数至少为1", fg="bright_red")
+        sys.exit(1)
+
+    store = get_store()
+
+    click.secho("📡 ", nl=False)
+    click.secho("接入方式: ", fg="bright_green", nl=False)
+    click.secho(f"{transport}", fg="yellow")
+    click.secho("⚙️ ", nl=False)
+    click.secho("工作进程数: ", fg="bright_green", nl=False)
+    click.secho(f"{workers}", fg="yellow")
+
+    writer = CaptureWriter() if capture else None
+    if writer is not None:
+        click.secho("📼 ", nl=False)
+        click.secho("录制目录: ", fg="bright_green", nl=False)
+        click.secho(f"{writer.directory}", fg="yellow")
+
+    config = store.snapshot
+    runtime = Runtime(
+        drain_timeout=config.drain_timeout if drain_timeout is None else drain_timeout,
+        use_uvloop=config.run_uvloop if uvloop is None else uvloop,
+    )
+    if mcp_transport:
+        click.secho("🖥️ ", nl=False)
+        click.secho("MCP服务器: ", fg="bright_green", nl=False)
+        click.secho(f"{mcp_transport} http://{config.host}:{config.port}", fg="yellow")
+        with runtime.phase("mcp_import"):
+            from ..mcp.server import embed
+        embed(runtime, mcp_transport)
+
+    metrics_port = config.metrics_port if metrics_port is None else metrics_port
+
+    async def main():
+        if metrics_port:
+            with runtime.phase("metrics"):
+                await runtime.serve_metrics(config.metrics_host, metrics_port)
+        await run_bot(app, store, transport=transport, workers=workers, capture=writer, runtime=runtime)
+
+    try:
+        runtime.run(main)
+    except KeyboardInterrupt:
+        pass
+    click.secho("\n👋 机器人已停止", fg="bright_green")
+
+
+# region status
+@cli.command()
+@click.option("--path", "-p", help="Path to the AIVK ROOT directory")
+@click.option("--samples", "-n", type=int, default=3, show_default=True, help="每个端点的采样轮数")
+@click.option("--timeout", "-T", type=float, default=5.0, show_default=True, help="整体超时（秒）")
+@click.option("--endpoint", "-e", "endpoints", multiple=True,
+              type=click.Choice(["http", "sse", "ws", "ws_server", "http_server", "mcp"]), help="只探测指定端点，可重复")
+@click.option("--format", "-f", "output", type=click.Choice(["json", "text"]), default="json", show_default=True, help="输出格式")
+def status(path, samples, timeout, endpoints, output):
+    """
+    并发探测NapCat各端点与MCP服务器的健康状况
+    输出 JSON（默认）；健康时退出码为0，否则为1
+    """
+    from ..bot.status import probe_all
+
+    _update_path(path)
+    report = asyncio.run(
+        probe_all(get_store().to_dict(), samples=max(1, samples), timeout=timeout, only=list(endpoints) or None)
+    )
+
+    if output == "json":
+        click.echo(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        click.secho(f"NapCat .version: {report['napcat_dot_version'] or '未知'}", fg="bright_green")
+        for name, item in report["endpoints"].items():
+            color = "bright_green" if item["healthy"] else "bright_red"
+            mark = "✅" if item["healthy"] else ("⏱️" if item.get("timeout") else "❌")
+            latency = item.get("latency_ms") or {}
+            version = (item.get("version") or {}).get("app_version")
+            click.secho(f"{mark} {name:<12}", fg=color, nl=False)
+            click.echo(
+                f" {item.get('url', '')}"
+                + (f"  p50={latency['p50']}ms p90={latency['p90']}ms" if latency else "")
+                + (f"  v{version}" if version else "")
+            )
+            for error in item.get("errors", []):
+                click.secho(f"    {error}", fg="yellow")
+        click.secho(f"用时 {report['elapsed_ms']}ms", fg="bright_black")
+    sys.exit(0 if report["healthy"] else 1)
+
+
+# region trace
+@cli.command()
+@click.option("--path", "-p", help="Path to the AIVK ROOT directory")
+@click.option("--count", "-n", type=int, default=10, show_default=True, help="显示最慢的多少条")
+@click.option("--file", "files", multiple=True, type=click.Path(path_type=Path), help="trace 文件，默认 data/qq/traces/*.jsonl，可重复")
+@click.option("--scan", type=int, default=5000, show_default=True, help="每个文件读取最近多少行")
+@click.option("--name", help="只看根 span 为该名称的 trace，例如 dispatch / mcp")
+@click.option("--id", "trace_id", help="只显示指定 trace id（前缀即可）")
+@click.option("--format", "-f", "output", type=click.Choice(["json", "text"]), default="text", show_default=True, help="输出格式")
+def trace(path, count, files, scan, name, trace_id, output):
+    """
+    查看最近最慢的链路追踪
+    需要在配置中设置 trace_sample_rate（0~1）后运行 aivk-qq run / mcp
+    """
+    from ..bot.trace import format_trace, read_traces, summarize, trace_files
+
+    _update_path(path)
+    paths = list(files) or trace_files()
+    if not paths:
+        click.secho("没有 trace 文件：请在配置中设置 trace_sample_rate 后运行机器人或MCP服务器", fg="yellow")
+        sys.exit(1)
+    traces = read_traces(paths, limit=max(1, scan))
+    if name:
+        traces = [item for item in traces if item.name == name]
+    if trace_id:
+        traces = [item for item in traces if item.trace_id.startswith(trace_id)]
+    traces.sort(key=lambda item: item.duration_ms, reverse=True)
+    traces = traces[: max(1, count)]
+
+    if output == "json":
+        click.echo(json.dumps([summarize(item) for item in traces], ensure_ascii=False, indent=2))
+        return
+    if not traces:
+        click.secho("没有匹配的 trace", fg="yellow")
+        return
+    for item in traces:
+        click.echo(format_trace(item))
+        click.echo()
 
 
 # region help
@@ -0,0 +1,419 @@
+"""
+qq 配置存储
+
+进程内只加载一次配置，对外提供类型化的只读快照 `QQConfig`:
+
+- 只有内容变化时才写盘，写入采用临时文件 + rename，避免半写的配置文件；
+- 只保存与默认值不同的项，以后修改默认值对未显式设置的项同样生效；
+- 轮询文件的 mtime/size，外部修改后自动重新加载并通知订阅者，
+  运行中的 MCP 服务器或机器人无需重启即可应用限流、端口、允许的群等配置。
+
+配置以 <AIVK_ROOT>/data/qq/config.json 为准，内容同步到 AivkIO.get_config("qq")，保持 aivk 侧可见:
+首次使用时从 AivkIO 导入；之后通过 aivk 修改 AivkIO 中的 qq 配置时，轮询发现与上次同步的内容不同，
+导入并写回 config.json，两边不会各自生效。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import MISSING, dataclass, field, fields
+from pathlib import Path
+from types import UnionType
+from typing import Any, get_args, get_origin
+
+from aivk.api import AivkIO
+
+logger = logging.getLogger("aivk.qq.config")
+
+
+@dataclass(slots=True, frozen=True)
+class QQConfig:
+    """qq 配置的类型化快照，未知键保存在 extra 中"""
+
+    bot_uid: int | None = None
+    root: int | None = None
+    # MCP 服务器
+    host: str = "localhost"
+    port: int = 10141
+    transport: str = "stdio"
+    mcp_debug: bool = False
+    mcp_uvloop: bool = True
+    mcp_max_concurrency: int = 32
+    mcp_max_queue: int = 256
+    mcp_session_concurrency: int = 4
+    mcp_drain_timeout: float = 10.0
+    # NapCat 端点
+    napcat_host: str = "127.0.0.1"
+    listen_host: str = "0.0.0.0"
+    http_port: int = 10146
+    sse_port: int = 10144
+    ws_port: int = 10147
+    ws_server_port: int = 10145
+    http_server_port: int = 10143
+    token: str | None = None
+    # 账号与限流
+    accounts: tuple[dict[str, Any], ...] = ()
+    default_account: int | None = None
+    rate: float = 1.0
+    burst: float = 5.0
+    # 共享状态后端（memory:// / sqlite:///path / redis://host:6379/0），多进程共享限流，见 bot/state.py
+    state_backend: str = "memory://"
+    # 只处理这些群的事件，空表示不限制
+    allowed_groups: frozenset[int] = frozenset()
+    expose_actions: bool | tuple[str, ...] = False
+    # 会话上下文：MCP 服务器连接 NapCat WebSocket 接收事件并维护上下文窗口
+    context_enabled: bool = False
+    context_max_tokens: int = 2000
+    context_max_messages: int = 100
+    # 刷屏检测，见 bot/flood.py
+    flood_enabled: bool = False
+    flood_window: float = 10.0
+    flood_max_messages: int = 8
+    flood_max_duplicates: int = 3
+    flood_ban_duration: int = 300
+    flood_recall: bool = True
+    flood_enforce_rate: float = 2.0
+    # 发送类动作先写入持久化发件箱，见 bot/outbox.py
+    outbox_enabled: bool = True
+    # 断线补拉，见 bot/backfill.py
+    backfill_enabled: bool = True
+    backfill_concurrency: int = 4
+    backfill_max_messages: int = 200
+    # 状态快照（热重启），见 bot/snapshot.py
+    snapshot_enabled: bool = True
+    snapshot_interval: float = 60.0
+    # 图片 OCR 缓存，见 bot/images.py
+    ocr_cache_size: int = 4096
+    ocr_ttl: float = 86400.0
+    ocr_concurrency: int = 2
+    # 定时任务，见 bot/scheduler.py
+    scheduler_jitter: float = 30.0
+    scheduler_rate: float = 5.0
+    # 关键词规则，见 bot/keywords.py
+    keyword_rules: tuple[dict[str, Any], ...] = ()
+    # 单事件循环运行时（aivk-qq run），见 bot/runtime.py；metrics_port 为 0 时不启动指标端点
+    run_uvloop: bool = True
+    drain_timeout: float = 10.0
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 10142
+    # 链路追踪采样率（0 关闭）与环形缓冲区容量，见 bot/trace.py
+    trace_sample_rate: float = 0.0
+    trace_capacity: int = 256
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "QQConfig":
+        """
+        按字段声明的类型校验并转换（"2.5" -> 2.5，列表 -> tuple/frozenset）
+
+        Raises:
+            ValueError: 某一项的值无法转换为声明的类型
+        """
+        known = {f.name: f.type for f in fields(cls) if f.name != "extra"}
+        kwargs: dict[str, Any] = {}
+        for key in known.keys() & data.keys():
+            value = data[key]
+            if value is None:
+                continue
+            try:
+                kwargs[key] = _coerce(known[key], value)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"配置项 {key} 无效: {value!r}（{e}）") from None
+        kwargs["extra"] = {key: value for key, value in data.items() if key not in known}
+        return cls(**kwargs)
+
+    def to_dict(self, *, defaults: bool = True) -> dict[str, Any]:
+        """
+        Args:
+            defaults: 为 False 时省略与默认值相同的项（写盘用）
+        """
+        data: dict[str, Any] = {}
+        for f in fields(self):
+            if f.name == "extra":
+                continue
+            value = getattr(self, f.name)
+            if not defaults and value == _default(f):
+                continue
+            if isinstance(value, frozenset):
+                value = sorted(value)
+            elif isinstance(value, tuple):
+                value = list(value)
+            data[f.name] = value
+        data.update(self.extra)
+        return data
+
+    def flood_options(self) -> dict[str, Any]:
+        """FloodGuard 的构造参数"""
+        return {
+            "window": self.flood_window,
+            "max_messages": self.flood_max_messages,
+            "max_duplicates": self.flood_max_duplicates,
+            "ban_duration": self.flood_ban_duration,
+            "recall": self.flood_recall,
+            "enforce_rate": self.flood_enforce_rate,
+        }
+
+    def trace_options(self) -> dict[str, Any]:
+        """Tracer.configure 的参数"""
+        return {"sample_rate": self.trace_sample_rate, "capacity": self.trace_capacity}
+
+    def group_allowed(self, group_id: int | None) -> bool:
+        return not self.allowed_groups or group_id is None or int(group_id) in self.allowed_groups
+
+
+def _default(f: Any) -> Any:
+    return f.default_factory() if f.default_factory is not MISSING else f.default
+
+
+def _coerce(annotation: Any, value: Any) -> Any:
+    """把 JSON 中的值转换为字段声明的类型，无法转换时抛出 ValueError/TypeError"""
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is UnionType:
+        for arg in args:
+            if arg is type(None):
+                continue
+            try:
+                return _coerce(arg, value)
+            except (ValueError, TypeError):
+                continue
+        raise TypeError(f"应为 {annotation}")
+    if annotation is bool:
+        if not isinstance(value, bool):
+            raise TypeError("应为 true/false")
+        return value
+    if annotation in (int, float):
+        if isinstance(value, bool) or not isinstance(value, int | float | str):
+            raise TypeError(f"应为{'整数' if annotation is int else '数字'}")
+        if annotation is int and isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError("应为整数")
+            return int(value)
+        return annotation(value)
+    if annotation is str:
+        if isinstance(value, bool) or not isinstance(value, str | int | float):
+            raise TypeError("应为字符串")
+        return str(value)
+    if origin in (tuple, frozenset):
+        if isinstance(value, str | bytes | Mapping) or not isinstance(value, Iterable):
+            raise TypeError("应为列表")
+        return origin(_coerce(args[0], item) for item in value)
+    if origin is dict:
+        if not isinstance(value, Mapping):
+            raise TypeError("应为对象")
+        return dict(value)
+    return value
+
+
+Listener = Callable[[QQConfig, QQConfig], None]
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """写入临时文件并 fsync 后 rename，读者不会看到半写的文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.stem}-", suffix=path.suffix, dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, ensure_ascii=False, indent=2)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def locked(path: Path) -> Iterator[None]:
+    """
+    跨进程互斥访问 path（使用旁边的 .lock 文件加排他锁）
+
+    与 atomic_write_json 配合实现读-改-写：机器人与 MCP 服务器同时修改同一个文件时不会互相覆盖。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f".{path.name}.lock"), "a+b") as fp:
+        if sys.platform == "win32":
+            import msvcrt
+
+            fp.seek(0)
+            msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
+
+def file_stamp(path: Path) -> tuple[int, int] | None:
+    """文件的 (mtime_ns, size)，用于轮询外部修改；文件不存在时为 None"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def default_config_path() -> Path:
+    return AivkIO.get_aivk_root() / "data" / "qq" / "config.json"
+
+
+class ConfigStore:
+    """
+    配置存储
+
+    Args:
+        path: 配置文件路径，默认 <AIVK_ROOT>/data/qq/config.json
+        mirror: 变更时是否同步写回 AivkIO
+    """
+
+    def __init__(self, path: str | Path | None = None, *, mirror: bool = True) -> None:
+        self.path = Path(path) if path else default_config_path()
+        self.mirror = mirror
+        self._listeners: list[Listener] = []
+        self._stamp: tuple[int, int] | None = None
+        # 上次与 AivkIO 同步的配置，用于发现通过 aivk 进行的修改
+        self._mirrored: QQConfig | None = None
+        self._snapshot = self._load()
+
+    @property
+    def snapshot(self) -> QQConfig:
+        return self._snapshot
+
+    def to_dict(self) -> dict[str, Any]:
+        """可修改的配置副本，修改后通过 update() 提交"""
+        return self._snapshot.to_dict()
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        return file_stamp(self.path)
+
+    def _aivk_config(self) -> QQConfig:
+        return QQConfig.from_dict(dict(AivkIO.get_config("qq") or {}))
+
+    def _load(self) -> QQConfig:
+        stamp = self._file_stamp()
+        if stamp is None:
+            # 首次运行：从 AivkIO 导入已有配置
+            config = self._aivk_config()
+            self._mirrored = config
+            logger.debug(f"配置文件不存在，从 AivkIO 导入: {self.path}")
+        else:
+            config = QQConfig.from_dict(json.loads(self.path.read_text(encoding="utf-8")))
+            self._sync_aivk(config)
+        self._stamp = stamp
+        return config
+
+    def _sync_aivk(self, config: QQConfig) -> None:
+        if not self.mirror:
+            return
+        if self._mirrored is None:
+            self._mirrored = self._aivk_config()
+        if config != self._mirrored:
+            AivkIO.save_config("qq", config.to_dict(defaults=False))
+            self._mirrored = config
+
+    def _write(self, config: QQConfig) -> None:
+        atomic_write_json(self.path, config.to_dict(defaults=False))
+        self._stamp = self._file_stamp()
+        self._sync_aivk(config)
+
+    def update(self, changes: Mapping[str, Any] | None = None, /, **kwargs: Any) -> bool:
+        """
+        合并变更并保存
+
+        Returns:
+            bool: 配置是否发生变化（未变化时不写盘）
+        """
+        data = self.to_dict()
+        data.update(changes or {})
+        data.update(kwargs)
+        new = QQConfig.from_dict(data)
+        if new == self._snapshot and self._stamp is not None:
+            return False
+        self._write(new)
+        self._publish(new)
+        return True
+
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        """订阅配置变化，listener(old, new)；返回取消订阅函数"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _publish(self, new: QQConfig) -> None:
+        old, self._snapshot = self._snapshot, new
+        if old == new:
+            return
+        for listener in list(self._listeners):
+            try:
+                listener(old, new)
+            except Exception as e:
+                logger.error(f"配置监听器执行失败: {e!r}", exc_info=e)
+
+    def reload(self) -> bool:
+        """
+        文件或 AivkIO 中的配置被外部修改时重新加载；两者都被修改时以文件为准
+
+        Returns:
+            bool: 是否重新加载
+        """
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return self._import_aivk()
+        try:
+            new = self._load()
+        except (OSError, ValueError, TypeError) as e:
+            # 编辑器可能还没写完或写错了：保留旧配置，文件再次变化时重试
+            self._stamp = stamp
+            logger.warning(f"重新加载配置失败，继续使用当前配置: {e!r}")
+            return False
+        logger.info(f"配置文件已变化，重新加载: {self.path}")
+        self._publish(new)
+        return True
+
+    def _import_aivk(self) -> bool:
+        if not self.mirror or self._mirrored is None:
+            return False
+        try:
+            external = self._aivk_config()
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"读取 AivkIO 中的 qq 配置失败: {e!r}")
+            return False
+        if external == self._mirrored:
+            return False
+        logger.info("AivkIO 中的 qq 配置已被修改，导入")
+        self._mirrored = external
+        self._write(external)
+        self._publish(external)
+        return True
+
+    async def watch(self, interval: float = 1.0) -> None:
+        """轮询配置文件直到被取消"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.reload()
+            except Exception as e:
+                # 单次失败（如 AivkIO 写入出错）不能让热重载永久停止
+                logger.error(f"检查配置变化失败: {e!r}", exc_info=e)
+
+
+_store: ConfigStore | None = None
+
+
+def get_store() -> ConfigStore:
+    """进程内共享的配置存储（在设置 AIVK 根目录之后首次调用）"""
+    global _store
+    if _store is None or _store.path != default_config_path():
+        _store = ConfigStore()
+    return _store
@@ -1,5 +1,14 @@
-from .server import mcp
+from typing import Any
 
 __all__ = [
     "mcp",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str) -> Any:
+    # 导入 server 会读取配置并创建账号、连接状态后端；只用到 accounts/batch 等子模块时不触发
+    if name == "mcp":
+        from .server import mcp
+
+        return mcp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
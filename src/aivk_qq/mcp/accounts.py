@@ -0,0 +1,221 @@
+"""
+MCP 服务器的多账号路由
+
+一个 MCP 服务器可以同时管理多个 NapCat 实例，按机器人 QQ 号（self_id）区分。
+每个账号拥有独立的 HTTP 连接池、限流器与缓存，互不影响。
+限流只作用于发送类动作（DURABLE_ACTIONS，与机器人的 LimitedCaller 相同），查询、OCR、取图等
+只读动作不消耗账号的发送额度。
+
+qq 配置示例:
+
+    {
+        "bot_uid": 10001,
+        "accounts": [
+            {"self_id": 10001, "napcat_host": "127.0.0.1", "http_port": 10146, "token": "..."},
+            {"self_id": 10002, "napcat_host": "10.0.0.2", "http_port": 10146, "rate": 2, "burst": 5}
+        ]
+    }
+
+未配置 accounts 时，使用 bot_uid 与顶层端点配置生成单个账号。
+默认账号为 default_account，其次 bot_uid，其次第一个账号。
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..bot.cache import TTLCache
+from ..bot.client import ActionCaller, HttpActionClient
+from ..bot.endpoints import endpoint
+from ..bot.outbox import DURABLE_ACTIONS
+from ..bot.ratelimit import TokenBucket
+from ..bot.state import SharedTokenBucket, StateBackend, account_rate_key, shared_limiter
+from ..bot.trace import span
+
+logger = logging.getLogger("aivk.qq.mcp.accounts")
+
+# 账号级别的默认限流：每秒 1 条，允许突发 5 条
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 5.0
+
+
+@dataclass(slots=True)
+class Account:
+    """一个受控的机器人账号"""
+
+    self_id: int
+    client: HttpActionClient
+    limiter: TokenBucket | SharedTokenBucket
+    cache: TTLCache = field(default_factory=lambda: TTLCache(maxsize=512, ttl=300.0))
+    # 与机器人运行在同一进程时改用机器人的连接，见 AccountPool.share
+    shared: ActionCaller | None = None
+
+    async def execute(
+        self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None
+    ) -> dict[str, Any]:
+        """调用动作，发送类动作先取令牌"""
+        if action in DURABLE_ACTIONS:
+            with span("ratelimit"):
+                await self.limiter.acquire()
+        caller = self.shared or self.client
+        return await caller.execute(action, params, timeout=timeout)
+
+    async def cached(self, action: str, params: dict[str, Any] | None = None, ttl: float | None = None) -> dict[str, Any]:
+        """
+        调用只读动作并缓存成功的响应
+        """
+        key = (action, json.dumps(params or {}, sort_keys=True, ensure_ascii=False))
+        with span("cache", action=action) as current:
+            response = self.cache.get(key)
+            if current is not None:
+                current.attrs["hit"] = response is not None
+            if response is None:
+                response = await self.execute(action, params)
+                if response.get("status") == "ok":
+                    self.cache.set(key, response, ttl)
+        return response
+
+
+def _account_from_config(
+    entry: Mapping[str, Any], defaults: Mapping[str, Any], backend: StateBackend | None = None
+) -> Account:
+    merged = {**defaults, **entry}
+    self_id = int(merged["self_id"])
+    host, port = endpoint(merged, "http_port")
+    client = HttpActionClient(host, port, merged.get("token") or None, name=f"http:{self_id}")
+    rate = float(merged.get("rate", DEFAULT_RATE))
+    burst = float(merged.get("burst", DEFAULT_BURST))
+    # 共享后端上的令牌桶按账号取键，多个 MCP 服务器进程（以及机器人进程）合计不超过同一个速率
+    limiter = shared_limiter(backend, account_rate_key(self_id), rate, burst)
+    return Account(self_id=self_id, client=client, limiter=limiter)
+
+
+class AccountPool:
+    """按 self_id 管理多个账号"""
+
+    def __init__(
+        self, accounts: list[Account], default: int | None = None, backend: StateBackend | None = None
+    ) -> None:
+        self._accounts = {account.self_id: account for account in accounts}
+        self.backend = backend
+        self._shared: dict[int, ActionCaller] = {}
+        if default is None or default not in self._accounts:
+            default = accounts[0].self_id if accounts else None
+        self.default = default
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], backend: StateBackend | None = None) -> "AccountPool":
+        """
+        Args:
+            config: qq 配置
+            backend: 共享状态后端，非进程内后端时各账号的限流在进程之间共享
+        """
+        entries = config.get("accounts") or []
+        if not entries and config.get("bot_uid"):
+            entries = [{"self_id": config["bot_uid"]}]
+        # 顶层端点配置作为每个账号的默认值
+        defaults = {key: value for key, value in config.items() if key != "accounts"}
+        accounts = [_account_from_config(entry, defaults, backend) for entry in entries]
+        default = config.get("default_account") or config.get("bot_uid")
+        pool = cls(accounts, int(default) if default else None, backend)
+        logger.info(f"已加载 {len(accounts)} 个账号，默认账号: {pool.default}")
+        return pool
+
+    @property
+    def self_ids(self) -> list[int]:
+        return list(self._accounts)
+
+    def get(self, self_id: int | str | None = None) -> Account:
+        """
+        选择账号，self_id 为空时使用默认账号
+
+        Raises:
+            KeyError: 账号不存在或未配置任何账号
+        """
+        if self_id in (None, ""):
+            self_id = self.default
+        if self_id is None:
+            raise KeyError("未配置任何机器人账号，请先执行 aivk-qq config")
+        account = self._accounts.get(int(self_id))
+        if account is None:
+            raise KeyError(f"未知账号 {self_id}，可用账号: {self.self_ids}")
+        return account
+
+    def share(self, self_id: int, caller: ActionCaller | None) -> bool:
+        """
+        让账号改用已有的动作客户端（例如同一事件循环中机器人的连接），不再单独连接 NapCat
+
+        caller 为 None 时恢复使用账号自己的 HTTP 连接。热重载后仍然生效。
+
+        Returns:
+            账号存在时为 True
+        """
+        if caller is None:
+            self._shared.pop(self_id, None)
+        else:
+            self._shared[self_id] = caller
+        account = self._accounts.get(self_id)
+        if account is None:
+            return False
+        account.shared = caller
+        return True
+
+    def reconfigure(self, config: Mapping[str, Any]) -> None:
+        """
+        应用新配置（热重载）
+
+        端点未变化的账号保留连接池、缓存与令牌桶，仅更新限流参数；
+        端点变化或被移除的账号关闭旧连接。
+        """
+        fresh = AccountPool.from_config(config, self.backend)
+        for self_id, account in fresh._accounts.items():
+            current = self._accounts.get(self_id)
+            if current is None or _endpoint_of(current) != _endpoint_of(account):
+                continue
+            current.limiter.rate = account.limiter.rate
+            current.limiter.burst = account.limiter.burst
+            fresh._accounts[self_id] = current
+        retired = [
+            account for self_id, account in self._accounts.items()
+            if fresh._accounts.get(self_id) is not account
+        ]
+        self._accounts = fresh._accounts
+        self.default = fresh.default
+        for self_id, caller in self._shared.items():
+            if self_id in self._accounts:
+                self._accounts[self_id].shared = caller
+        for account in retired:
+            try:
+                asyncio.get_running_loop().create_task(account.client.close())
+            except RuntimeError:
+                pass
+
+    def dump(self) -> dict[str, dict[str, Any]]:
+        """各账号缓存与令牌桶的快照，见 bot/snapshot.py"""
+        return {
+            str(self_id): {"cache": account.cache.dump(), "limiter": account.limiter.dump()}
+            for self_id, account in self._accounts.items()
+        }
+
+    def restore(self, state: dict[str, dict[str, Any]]) -> None:
+        """按 self_id 恢复快照，已不存在的账号被忽略"""
+        for self_id, data in state.items():
+            account = self._accounts.get(int(self_id))
+            if account is None:
+                continue
+            account.cache.restore(data.get("cache") or ())
+            if data.get("limiter"):
+                account.limiter.restore(data["limiter"])
+
+    async def close(self) -> None:
+        for account in self._accounts.values():
+            await account.client.close()
+        if self.backend is not None:
+            await self.backend.close()
+
+
+def _endpoint_of(account: Account) -> tuple[str, int, str | None]:
+    return account.client.host, account.client.port, account.client.token
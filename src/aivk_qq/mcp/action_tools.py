@@ -0,0 +1,924 @@
+# 此文件由 scripts/gen_actions.py 根据 bot/spec/napcat_actions.json 生成，请勿手动修改
+
+"""
+为每个 NapCat 动作注册 MCP 工具
+
+工具参数与 NapcatActions 的方法签名一致，另加可选的 account（机器人QQ号）。
+"""
+
+from collections.abc import Collection
+from dataclasses import asdict, is_dataclass
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+
+from ..bot.actions import Message, NapcatActions
+from .accounts import AccountPool
+
+
+def _encode(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    return value
+
+
+def register_action_tools(
+    mcp: FastMCP,
+    accounts: AccountPool,
+    categories: Collection[str] | None = None,
+    exclude: Collection[str] = (),
+) -> int:
+    """
+    注册动作工具
+
+    Args:
+        mcp: MCP 服务器
+        accounts: 账号池
+        categories: 只注册这些分类（账号相关/消息相关/群聊相关/文件相关/密钥相关/个人操作/系统操作/其他），None 表示全部
+        exclude: 跳过的工具名（例如服务器中已手写的工具）
+
+    Returns:
+        int: 注册的工具数量
+    """
+    registered = 0
+
+    if categories is None or '账号相关' in categories:
+
+        async def set_qq_profile(nickname: str, personal_note: str | None = None, sex: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_qq_profile(nickname, personal_note, sex))
+
+        if 'set_qq_profile' not in exclude:
+            mcp.add_tool(set_qq_profile, name='set_qq_profile', description='设置账号信息（set_qq_profile），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def ark_share_peer(user_id: int | str | None = None, group_id: int | str | None = None, phoneNumber: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).ark_share_peer(user_id, group_id, phoneNumber))
+
+        if 'ark_share_peer' not in exclude:
+            mcp.add_tool(ark_share_peer, name='ark_share_peer', description='获取推荐好友/群聊卡片（ArkSharePeer），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_poke(user_id: int, group_id: int | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_poke(user_id, group_id))
+
+        if 'send_poke' not in exclude:
+            mcp.add_tool(send_poke, name='send_poke', description='发送戳一戳（send_poke），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_online_clients(no_cache: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_online_clients(no_cache))
+
+        if 'get_online_clients' not in exclude:
+            mcp.add_tool(get_online_clients, name='get_online_clients', description='获取当前账号在线客户端列表（get_online_clients），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def mark_msg_as_read(group_id: int | None = None, user_id: int | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).mark_msg_as_read(group_id, user_id))
+
+        if 'mark_msg_as_read' not in exclude:
+            mcp.add_tool(mark_msg_as_read, name='mark_msg_as_read', description='设置消息已读（mark_msg_as_read），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def ark_share_group(group_id: int | str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).ark_share_group(group_id))
+
+        if 'ark_share_group' not in exclude:
+            mcp.add_tool(ark_share_group, name='ark_share_group', description='获取推荐群聊卡片（ArkShareGroup），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_online_status(status: int, ext_status: int = 0, battery_status: int = 0, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_online_status(status, ext_status, battery_status))
+
+        if 'set_online_status' not in exclude:
+            mcp.add_tool(set_online_status, name='set_online_status', description='设置在线状态（set_online_status），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_friends_with_category(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_friends_with_category())
+
+        if 'get_friends_with_category' not in exclude:
+            mcp.add_tool(get_friends_with_category, name='get_friends_with_category', description='获取好友分组列表（get_friends_with_category），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_qq_avatar(file: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_qq_avatar(file))
+
+        if 'set_qq_avatar' not in exclude:
+            mcp.add_tool(set_qq_avatar, name='set_qq_avatar', description='设置头像（set_qq_avatar），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_like(user_id: int, times: int = 1, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_like(user_id, times))
+
+        if 'send_like' not in exclude:
+            mcp.add_tool(send_like, name='send_like', description='点赞（send_like），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def mark_private_msg_as_read(user_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).mark_private_msg_as_read(user_id))
+
+        if 'mark_private_msg_as_read' not in exclude:
+            mcp.add_tool(mark_private_msg_as_read, name='mark_private_msg_as_read', description='设置私聊已读（mark_private_msg_as_read），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def mark_group_msg_as_read(group_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).mark_group_msg_as_read(group_id))
+
+        if 'mark_group_msg_as_read' not in exclude:
+            mcp.add_tool(mark_group_msg_as_read, name='mark_group_msg_as_read', description='设置群聊已读（mark_group_msg_as_read），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def create_collection(rawData: str, brief: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).create_collection(rawData, brief))
+
+        if 'create_collection' not in exclude:
+            mcp.add_tool(create_collection, name='create_collection', description='创建收藏（create_collection），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_friend_add_request(flag: str, approve: bool = True, remark: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_friend_add_request(flag, approve, remark))
+
+        if 'set_friend_add_request' not in exclude:
+            mcp.add_tool(set_friend_add_request, name='set_friend_add_request', description='处理好友请求（set_friend_add_request），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_self_longnick(longNick: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_self_longnick(longNick))
+
+        if 'set_self_longnick' not in exclude:
+            mcp.add_tool(set_self_longnick, name='set_self_longnick', description='设置个性签名（set_self_longnick），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_login_info(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_login_info())
+
+        if 'get_login_info' not in exclude:
+            mcp.add_tool(get_login_info, name='get_login_info', description='获取登录号信息（get_login_info），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_recent_contact(count: int = 10, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_recent_contact(count))
+
+        if 'get_recent_contact' not in exclude:
+            mcp.add_tool(get_recent_contact, name='get_recent_contact', description='最近消息列表（get_recent_contact），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_stranger_info(user_id: int, no_cache: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_stranger_info(user_id, no_cache))
+
+        if 'get_stranger_info' not in exclude:
+            mcp.add_tool(get_stranger_info, name='get_stranger_info', description='获取账号信息（get_stranger_info），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_friend_list(no_cache: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_friend_list(no_cache))
+
+        if 'get_friend_list' not in exclude:
+            mcp.add_tool(get_friend_list, name='get_friend_list', description='获取好友列表（get_friend_list），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def mark_all_as_read(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).mark_all_as_read())
+
+        if 'mark_all_as_read' not in exclude:
+            mcp.add_tool(mark_all_as_read, name='mark_all_as_read', description='设置所有消息已读（_mark_all_as_read），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_profile_like(user_id: int | None = None, start: int = 0, count: int = 10, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_profile_like(user_id, start, count))
+
+        if 'get_profile_like' not in exclude:
+            mcp.add_tool(get_profile_like, name='get_profile_like', description='获取点赞列表（get_profile_like），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def fetch_custom_face(count: int = 48, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).fetch_custom_face(count))
+
+        if 'fetch_custom_face' not in exclude:
+            mcp.add_tool(fetch_custom_face, name='fetch_custom_face', description='获取收藏表情（fetch_custom_face），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def delete_friend(user_id: int, temp_block: bool | None = None, temp_both_del: bool | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).delete_friend(user_id, temp_block, temp_both_del))
+
+        if 'delete_friend' not in exclude:
+            mcp.add_tool(delete_friend, name='delete_friend', description='删除好友（delete_friend），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_model_show(model: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_model_show(model))
+
+        if 'get_model_show' not in exclude:
+            mcp.add_tool(get_model_show, name='get_model_show', description='获取在线机型（_get_model_show），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_model_show(model: str, model_show: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_model_show(model, model_show))
+
+        if 'set_model_show' not in exclude:
+            mcp.add_tool(set_model_show, name='set_model_show', description='设置在线机型（_set_model_show），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def nc_get_user_status(user_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).nc_get_user_status(user_id))
+
+        if 'nc_get_user_status' not in exclude:
+            mcp.add_tool(nc_get_user_status, name='nc_get_user_status', description='获取用户状态（nc_get_user_status），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_status(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_status())
+
+        if 'get_status' not in exclude:
+            mcp.add_tool(get_status, name='get_status', description='获取状态（get_status），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_mini_app_ark(type: str | None = None, title: str | None = None, desc: str | None = None, picUrl: str | None = None, jumpUrl: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_mini_app_ark(type, title, desc, picUrl, jumpUrl))
+
+        if 'get_mini_app_ark' not in exclude:
+            mcp.add_tool(get_mini_app_ark, name='get_mini_app_ark', description='获取小程序卡片（get_mini_app_ark），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_unidirectional_friend_list(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_unidirectional_friend_list())
+
+        if 'get_unidirectional_friend_list' not in exclude:
+            mcp.add_tool(get_unidirectional_friend_list, name='get_unidirectional_friend_list', description='获取单向好友列表（get_unidirectional_friend_list），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_diy_online_status(face_id: int | str, face_type: int | str | None = None, wording: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_diy_online_status(face_id, face_type, wording))
+
+        if 'set_diy_online_status' not in exclude:
+            mcp.add_tool(set_diy_online_status, name='set_diy_online_status', description='设置自定义在线状态（set_diy_online_status），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+    if categories is None or '消息相关' in categories:
+
+        async def send_group_msg(group_id: int, message: Message, auto_escape: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_group_msg(group_id, message, auto_escape))
+
+        if 'send_group_msg' not in exclude:
+            mcp.add_tool(send_group_msg, name='send_group_msg', description='发送群聊消息（send_group_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_private_msg(user_id: int, message: Message, auto_escape: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_private_msg(user_id, message, auto_escape))
+
+        if 'send_private_msg' not in exclude:
+            mcp.add_tool(send_private_msg, name='send_private_msg', description='发送私聊消息（send_private_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_msg(message: Message, message_type: str | None = None, user_id: int | None = None, group_id: int | None = None, auto_escape: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_msg(message, message_type, user_id, group_id, auto_escape))
+
+        if 'send_msg' not in exclude:
+            mcp.add_tool(send_msg, name='send_msg', description='发送消息（send_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_group_forward_msg(group_id: int, messages: list[Any], account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_group_forward_msg(group_id, messages))
+
+        if 'send_group_forward_msg' not in exclude:
+            mcp.add_tool(send_group_forward_msg, name='send_group_forward_msg', description='发送群合并转发消息（send_group_forward_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_private_forward_msg(user_id: int, messages: list[Any], account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_private_forward_msg(user_id, messages))
+
+        if 'send_private_forward_msg' not in exclude:
+            mcp.add_tool(send_private_forward_msg, name='send_private_forward_msg', description='发送私聊合并转发消息（send_private_forward_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_forward_msg(messages: list[Any], group_id: int | None = None, user_id: int | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_forward_msg(messages, group_id, user_id))
+
+        if 'send_forward_msg' not in exclude:
+            mcp.add_tool(send_forward_msg, name='send_forward_msg', description='发送合并转发消息（send_forward_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def forward_group_single_msg(group_id: int, message_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).forward_group_single_msg(group_id, message_id))
+
+        if 'forward_group_single_msg' not in exclude:
+            mcp.add_tool(forward_group_single_msg, name='forward_group_single_msg', description='消息转发到群（forward_group_single_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def forward_friend_single_msg(user_id: int, message_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).forward_friend_single_msg(user_id, message_id))
+
+        if 'forward_friend_single_msg' not in exclude:
+            mcp.add_tool(forward_friend_single_msg, name='forward_friend_single_msg', description='消息转发到私聊（forward_friend_single_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def group_poke(group_id: int, user_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).group_poke(group_id, user_id))
+
+        if 'group_poke' not in exclude:
+            mcp.add_tool(group_poke, name='group_poke', description='发送群聊戳一戳（group_poke），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def friend_poke(user_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).friend_poke(user_id))
+
+        if 'friend_poke' not in exclude:
+            mcp.add_tool(friend_poke, name='friend_poke', description='发送私聊戳一戳（friend_poke），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def delete_msg(message_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).delete_msg(message_id))
+
+        if 'delete_msg' not in exclude:
+            mcp.add_tool(delete_msg, name='delete_msg', description='撤回消息（delete_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_msg_history(group_id: int, message_seq: int | None = None, count: int = 20, reverseOrder: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_msg_history(group_id, message_seq, count, reverseOrder))
+
+        if 'get_group_msg_history' not in exclude:
+            mcp.add_tool(get_group_msg_history, name='get_group_msg_history', description='获取群历史消息（get_group_msg_history），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_msg(message_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_msg(message_id))
+
+        if 'get_msg' not in exclude:
+            mcp.add_tool(get_msg, name='get_msg', description='获取消息详情（get_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_forward_msg(message_id: int | str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_forward_msg(message_id))
+
+        if 'get_forward_msg' not in exclude:
+            mcp.add_tool(get_forward_msg, name='get_forward_msg', description='获取合并转发消息（get_forward_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_msg_emoji_like(message_id: int, emoji_id: int, set: bool = True, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_msg_emoji_like(message_id, emoji_id, set))
+
+        if 'set_msg_emoji_like' not in exclude:
+            mcp.add_tool(set_msg_emoji_like, name='set_msg_emoji_like', description='贴表情（set_msg_emoji_like），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_friend_msg_history(user_id: int, message_seq: int | None = None, count: int = 20, reverseOrder: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_friend_msg_history(user_id, message_seq, count, reverseOrder))
+
+        if 'get_friend_msg_history' not in exclude:
+            mcp.add_tool(get_friend_msg_history, name='get_friend_msg_history', description='获取好友历史消息（get_friend_msg_history），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def fetch_emoji_like(message_id: int, emojiId: str, emojiType: str, count: int = 20, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).fetch_emoji_like(message_id, emojiId, emojiType, count))
+
+        if 'fetch_emoji_like' not in exclude:
+            mcp.add_tool(fetch_emoji_like, name='fetch_emoji_like', description='获取贴表情详情（fetch_emoji_like），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_record(file: str, out_format: str = 'mp3', account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_record(file, out_format))
+
+        if 'get_record' not in exclude:
+            mcp.add_tool(get_record, name='get_record', description='获取语音消息详情（get_record），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_image(file: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_image(file))
+
+        if 'get_image' not in exclude:
+            mcp.add_tool(get_image, name='get_image', description='获取图片消息详情（get_image），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_group_ai_record(group_id: int, character: str, text: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_group_ai_record(group_id, character, text))
+
+        if 'send_group_ai_record' not in exclude:
+            mcp.add_tool(send_group_ai_record, name='send_group_ai_record', description='发送群AI语音（send_group_ai_record），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+    if categories is None or '群聊相关' in categories:
+
+        async def set_group_remark(group_id: int | str, remark: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_remark(group_id, remark))
+
+        if 'set_group_remark' not in exclude:
+            mcp.add_tool(set_group_remark, name='set_group_remark', description='设置群备注（set_group_remark），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_kick(group_id: int, user_id: int, reject_add_request: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_kick(group_id, user_id, reject_add_request))
+
+        if 'set_group_kick' not in exclude:
+            mcp.add_tool(set_group_kick, name='set_group_kick', description='群踢人（set_group_kick），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_system_msg(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_system_msg())
+
+        if 'get_group_system_msg' not in exclude:
+            mcp.add_tool(get_group_system_msg, name='get_group_system_msg', description='获取群系统消息（get_group_system_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_ban(group_id: int, user_id: int, duration: int = 1800, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_ban(group_id, user_id, duration))
+
+        if 'set_group_ban' not in exclude:
+            mcp.add_tool(set_group_ban, name='set_group_ban', description='群禁言（set_group_ban），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_essence_msg_list(group_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_essence_msg_list(group_id))
+
+        if 'get_essence_msg_list' not in exclude:
+            mcp.add_tool(get_essence_msg_list, name='get_essence_msg_list', description='获取群精华消息（get_essence_msg_list），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_whole_ban(group_id: int, enable: bool = True, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_whole_ban(group_id, enable))
+
+        if 'set_group_whole_ban' not in exclude:
+            mcp.add_tool(set_group_whole_ban, name='set_group_whole_ban', description='全体禁言（set_group_whole_ban），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_portrait(group_id: int, file: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_portrait(group_id, file))
+
+        if 'set_group_portrait' not in exclude:
+            mcp.add_tool(set_group_portrait, name='set_group_portrait', description='设置群头像（set_group_portrait），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_admin(group_id: int, user_id: int, enable: bool = True, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_admin(group_id, user_id, enable))
+
+        if 'set_group_admin' not in exclude:
+            mcp.add_tool(set_group_admin, name='set_group_admin', description='设置群管理（set_group_admin），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_card(group_id: int, user_id: int, card: str = '', account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_card(group_id, user_id, card))
+
+        if 'set_group_card' not in exclude:
+            mcp.add_tool(set_group_card, name='set_group_card', description='设置群成员名片（set_group_card），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_essence_msg(message_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_essence_msg(message_id))
+
+        if 'set_essence_msg' not in exclude:
+            mcp.add_tool(set_essence_msg, name='set_essence_msg', description='设置群精华消息（set_essence_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_name(group_id: int, group_name: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_name(group_id, group_name))
+
+        if 'set_group_name' not in exclude:
+            mcp.add_tool(set_group_name, name='set_group_name', description='设置群名（set_group_name），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def delete_essence_msg(message_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).delete_essence_msg(message_id))
+
+        if 'delete_essence_msg' not in exclude:
+            mcp.add_tool(delete_essence_msg, name='delete_essence_msg', description='删除群精华消息（delete_essence_msg），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_leave(group_id: int, is_dismiss: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_leave(group_id, is_dismiss))
+
+        if 'set_group_leave' not in exclude:
+            mcp.add_tool(set_group_leave, name='set_group_leave', description='退群（set_group_leave），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_group_notice(group_id: int, content: str, image: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_group_notice(group_id, content, image))
+
+        if 'send_group_notice' not in exclude:
+            mcp.add_tool(send_group_notice, name='send_group_notice', description='发送群公告（_send_group_notice），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_special_title(group_id: int, user_id: int, special_title: str = '', account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_special_title(group_id, user_id, special_title))
+
+        if 'set_group_special_title' not in exclude:
+            mcp.add_tool(set_group_special_title, name='set_group_special_title', description='设置群头衔（set_group_special_title），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_notice(group_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_notice(group_id))
+
+        if 'get_group_notice' not in exclude:
+            mcp.add_tool(get_group_notice, name='get_group_notice', description='获取群公告（_get_group_notice），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_add_request(flag: str, approve: bool = True, reason: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_add_request(flag, approve, reason))
+
+        if 'set_group_add_request' not in exclude:
+            mcp.add_tool(set_group_add_request, name='set_group_add_request', description='处理加群请求（set_group_add_request），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_info(group_id: int, no_cache: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_info(group_id, no_cache))
+
+        if 'get_group_info' not in exclude:
+            mcp.add_tool(get_group_info, name='get_group_info', description='获取群信息（get_group_info），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_list(no_cache: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_list(no_cache))
+
+        if 'get_group_list' not in exclude:
+            mcp.add_tool(get_group_list, name='get_group_list', description='获取群列表（get_group_list），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def del_group_notice(group_id: int, notice_id: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).del_group_notice(group_id, notice_id))
+
+        if 'del_group_notice' not in exclude:
+            mcp.add_tool(del_group_notice, name='del_group_notice', description='删除群公告（_del_group_notice），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_member_info(group_id: int, user_id: int, no_cache: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_member_info(group_id, user_id, no_cache))
+
+        if 'get_group_member_info' not in exclude:
+            mcp.add_tool(get_group_member_info, name='get_group_member_info', description='获取群成员信息（get_group_member_info），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_member_list(group_id: int, no_cache: bool = False, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_member_list(group_id, no_cache))
+
+        if 'get_group_member_list' not in exclude:
+            mcp.add_tool(get_group_member_list, name='get_group_member_list', description='获取群成员列表（get_group_member_list），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_honor_info(group_id: int, type: str = 'all', account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_honor_info(group_id, type))
+
+        if 'get_group_honor_info' not in exclude:
+            mcp.add_tool(get_group_honor_info, name='get_group_honor_info', description='获取群荣誉（get_group_honor_info），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_info_ex(group_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_info_ex(group_id))
+
+        if 'get_group_info_ex' not in exclude:
+            mcp.add_tool(get_group_info_ex, name='get_group_info_ex', description='获取群信息ex（get_group_info_ex），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_at_all_remain(group_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_at_all_remain(group_id))
+
+        if 'get_group_at_all_remain' not in exclude:
+            mcp.add_tool(get_group_at_all_remain, name='get_group_at_all_remain', description='获取群 @全体成员 剩余次数（get_group_at_all_remain），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_shut_list(group_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_shut_list(group_id))
+
+        if 'get_group_shut_list' not in exclude:
+            mcp.add_tool(get_group_shut_list, name='get_group_shut_list', description='获取群禁言列表（get_group_shut_list），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_ignored_notifies(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_ignored_notifies())
+
+        if 'get_group_ignored_notifies' not in exclude:
+            mcp.add_tool(get_group_ignored_notifies, name='get_group_ignored_notifies', description='获取群过滤系统消息（get_group_ignored_notifies），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_group_sign(group_id: int | str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_group_sign(group_id))
+
+        if 'set_group_sign' not in exclude:
+            mcp.add_tool(set_group_sign, name='set_group_sign', description='群打卡（set_group_sign），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_group_sign(group_id: int | str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_group_sign(group_id))
+
+        if 'send_group_sign' not in exclude:
+            mcp.add_tool(send_group_sign, name='send_group_sign', description='群打卡（send_group_sign），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+    if categories is None or '文件相关' in categories:
+
+        async def move_group_file(group_id: int | str, file_id: str, current_parent_directory: str, target_parent_directory: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).move_group_file(group_id, file_id, current_parent_directory, target_parent_directory))
+
+        if 'move_group_file' not in exclude:
+            mcp.add_tool(move_group_file, name='move_group_file', description='移动群文件（move_group_file），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def trans_group_file(group_id: int | str, file_id: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).trans_group_file(group_id, file_id))
+
+        if 'trans_group_file' not in exclude:
+            mcp.add_tool(trans_group_file, name='trans_group_file', description='转存为永久文件（trans_group_file），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def rename_group_file(group_id: int | str, file_id: str, current_parent_directory: str, new_name: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).rename_group_file(group_id, file_id, current_parent_directory, new_name))
+
+        if 'rename_group_file' not in exclude:
+            mcp.add_tool(rename_group_file, name='rename_group_file', description='重命名群文件（rename_group_file），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_file(file_id: str | None = None, file: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_file(file_id, file))
+
+        if 'get_file' not in exclude:
+            mcp.add_tool(get_file, name='get_file', description='获取文件信息（get_file），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def upload_group_file(group_id: int, file: str, name: str, folder: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).upload_group_file(group_id, file, name, folder))
+
+        if 'upload_group_file' not in exclude:
+            mcp.add_tool(upload_group_file, name='upload_group_file', description='上传群文件（upload_group_file），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def create_group_file_folder(group_id: int, name: str, parent_id: str | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).create_group_file_folder(group_id, name, parent_id))
+
+        if 'create_group_file_folder' not in exclude:
+            mcp.add_tool(create_group_file_folder, name='create_group_file_folder', description='创建群文件文件夹（create_group_file_folder），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def delete_group_file(group_id: int, file_id: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).delete_group_file(group_id, file_id))
+
+        if 'delete_group_file' not in exclude:
+            mcp.add_tool(delete_group_file, name='delete_group_file', description='删除群文件（delete_group_file），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def delete_group_folder(group_id: int, folder_id: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).delete_group_folder(group_id, folder_id))
+
+        if 'delete_group_folder' not in exclude:
+            mcp.add_tool(delete_group_folder, name='delete_group_folder', description='删除群文件夹（delete_group_folder），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def upload_private_file(user_id: int, file: str, name: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).upload_private_file(user_id, file, name))
+
+        if 'upload_private_file' not in exclude:
+            mcp.add_tool(upload_private_file, name='upload_private_file', description='上传私聊文件（upload_private_file），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_file_system_info(group_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_file_system_info(group_id))
+
+        if 'get_group_file_system_info' not in exclude:
+            mcp.add_tool(get_group_file_system_info, name='get_group_file_system_info', description='获取群文件系统信息（get_group_file_system_info），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def download_file(url: str | None = None, base64: str | None = None, name: str | None = None, headers: list[Any] | None = None, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).download_file(url, base64, name, headers))
+
+        if 'download_file' not in exclude:
+            mcp.add_tool(download_file, name='download_file', description='下载文件到缓存目录（download_file），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_root_files(group_id: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_root_files(group_id))
+
+        if 'get_group_root_files' not in exclude:
+            mcp.add_tool(get_group_root_files, name='get_group_root_files', description='获取群根目录文件列表（get_group_root_files），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_files_by_folder(group_id: int, folder_id: str, file_count: int = 50, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_files_by_folder(group_id, folder_id, file_count))
+
+        if 'get_group_files_by_folder' not in exclude:
+            mcp.add_tool(get_group_files_by_folder, name='get_group_files_by_folder', description='获取群子目录文件列表（get_group_files_by_folder），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_file_url(group_id: int, file_id: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_file_url(group_id, file_id))
+
+        if 'get_group_file_url' not in exclude:
+            mcp.add_tool(get_group_file_url, name='get_group_file_url', description='获取群文件链接（get_group_file_url），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_private_file_url(file_id: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_private_file_url(file_id))
+
+        if 'get_private_file_url' not in exclude:
+            mcp.add_tool(get_private_file_url, name='get_private_file_url', description='获取私聊文件链接（get_private_file_url），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+    if categories is None or '密钥相关' in categories:
+
+        async def get_clientkey(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_clientkey())
+
+        if 'get_clientkey' not in exclude:
+            mcp.add_tool(get_clientkey, name='get_clientkey', description='获取clientkey（get_clientkey），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_cookies(domain: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_cookies(domain))
+
+        if 'get_cookies' not in exclude:
+            mcp.add_tool(get_cookies, name='get_cookies', description='获取cookies（get_cookies），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_csrf_token(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_csrf_token())
+
+        if 'get_csrf_token' not in exclude:
+            mcp.add_tool(get_csrf_token, name='get_csrf_token', description='获取 CSRF Token（get_csrf_token），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_credentials(domain: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_credentials(domain))
+
+        if 'get_credentials' not in exclude:
+            mcp.add_tool(get_credentials, name='get_credentials', description='获取 QQ 相关接口凭证（get_credentials），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def nc_get_rkey(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).nc_get_rkey())
+
+        if 'nc_get_rkey' not in exclude:
+            mcp.add_tool(nc_get_rkey, name='nc_get_rkey', description='nc获取rkey（nc_get_rkey），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_rkey(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_rkey())
+
+        if 'get_rkey' not in exclude:
+            mcp.add_tool(get_rkey, name='get_rkey', description='获取rkey（get_rkey），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_rkey_server(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_rkey_server())
+
+        if 'get_rkey_server' not in exclude:
+            mcp.add_tool(get_rkey_server, name='get_rkey_server', description='获取rkey服务（get_rkey_server），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+    if categories is None or '个人操作' in categories:
+
+        async def ocr_image(image: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).ocr_image(image))
+
+        if 'ocr_image' not in exclude:
+            mcp.add_tool(ocr_image, name='ocr_image', description='OCR 图片识别（ocr_image），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def dot_ocr_image(image: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).dot_ocr_image(image))
+
+        if 'dot_ocr_image' not in exclude:
+            mcp.add_tool(dot_ocr_image, name='dot_ocr_image', description='.OCR 图片识别（.ocr_image），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def translate_en2zh(words: list[Any], account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).translate_en2zh(words))
+
+        if 'translate_en2zh' not in exclude:
+            mcp.add_tool(translate_en2zh, name='translate_en2zh', description='英译中（translate_en2zh），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def set_input_status(user_id: int, event_type: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).set_input_status(user_id, event_type))
+
+        if 'set_input_status' not in exclude:
+            mcp.add_tool(set_input_status, name='set_input_status', description='设置输入状态（set_input_status），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def handle_quick_operation(context: dict[str, Any], operation: dict[str, Any], account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).handle_quick_operation(context, operation))
+
+        if 'handle_quick_operation' not in exclude:
+            mcp.add_tool(handle_quick_operation, name='handle_quick_operation', description='对事件执行快速操作（.handle_quick_operation），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def can_send_image(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).can_send_image())
+
+        if 'can_send_image' not in exclude:
+            mcp.add_tool(can_send_image, name='can_send_image', description='检查是否可以发送图片（can_send_image），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def can_send_record(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).can_send_record())
+
+        if 'can_send_record' not in exclude:
+            mcp.add_tool(can_send_record, name='can_send_record', description='检查是否可以发送语音（can_send_record），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_ai_characters(group_id: int, chat_type: int = 1, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_ai_characters(group_id, chat_type))
+
+        if 'get_ai_characters' not in exclude:
+            mcp.add_tool(get_ai_characters, name='get_ai_characters', description='获取AI语音人物（get_ai_characters），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_ai_record(group_id: int, character: str, text: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_ai_record(group_id, character, text))
+
+        if 'get_ai_record' not in exclude:
+            mcp.add_tool(get_ai_record, name='get_ai_record', description='获取AI语音（get_ai_record），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+    if categories is None or '系统操作' in categories:
+
+        async def get_robot_uin_range(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_robot_uin_range())
+
+        if 'get_robot_uin_range' not in exclude:
+            mcp.add_tool(get_robot_uin_range, name='get_robot_uin_range', description='获取机器人账号范围（get_robot_uin_range），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def bot_exit(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).bot_exit())
+
+        if 'bot_exit' not in exclude:
+            mcp.add_tool(bot_exit, name='bot_exit', description='账号退出（bot_exit），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def send_packet(cmd: str, data: str, rsp: bool = True, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).send_packet(cmd, data, rsp))
+
+        if 'send_packet' not in exclude:
+            mcp.add_tool(send_packet, name='send_packet', description='发送自定义组包（send_packet），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_packet_status(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_packet_status())
+
+        if 'get_packet_status' not in exclude:
+            mcp.add_tool(get_packet_status, name='get_packet_status', description='获取packet状态（get_packet_status），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_version_info(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_version_info())
+
+        if 'get_version_info' not in exclude:
+            mcp.add_tool(get_version_info, name='get_version_info', description='获取版本信息（get_version_info），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+    if categories is None or '其他' in categories:
+
+        async def get_guild_list(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_guild_list())
+
+        if 'get_guild_list' not in exclude:
+            mcp.add_tool(get_guild_list, name='get_guild_list', description='get_guild_list（get_guild_list），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_guild_service_profile(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_guild_service_profile())
+
+        if 'get_guild_service_profile' not in exclude:
+            mcp.add_tool(get_guild_service_profile, name='get_guild_service_profile', description='get_guild_service_profile（get_guild_service_profile），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def check_url_safely(url: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).check_url_safely(url))
+
+        if 'check_url_safely' not in exclude:
+            mcp.add_tool(check_url_safely, name='check_url_safely', description='检查链接安全性（check_url_safely），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def click_inline_keyboard_button(group_id: int | str, bot_appid: str, button_id: str, callback_data: str, msg_seq: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).click_inline_keyboard_button(group_id, bot_appid, button_id, callback_data, msg_seq))
+
+        if 'click_inline_keyboard_button' not in exclude:
+            mcp.add_tool(click_inline_keyboard_button, name='click_inline_keyboard_button', description='点击按钮（click_inline_keyboard_button），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_collection_list(category: int | str, count: int | str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_collection_list(category, count))
+
+        if 'get_collection_list' not in exclude:
+            mcp.add_tool(get_collection_list, name='get_collection_list', description='获取收藏列表（get_collection_list），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_group_ignore_add_request(account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_group_ignore_add_request())
+
+        if 'get_group_ignore_add_request' not in exclude:
+            mcp.add_tool(get_group_ignore_add_request, name='get_group_ignore_add_request', description='获取被过滤的加群请求（get_group_ignore_add_request），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def fetch_user_profile_like(qq: int, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).fetch_user_profile_like(qq))
+
+        if 'fetch_user_profile_like' not in exclude:
+            mcp.add_tool(fetch_user_profile_like, name='fetch_user_profile_like', description='fetch_user_profile_like（fetch_user_profile_like），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+        async def get_word_slices(content: str, account: int | None = None) -> Any:
+            return _encode(await NapcatActions(accounts.get(account)).get_word_slices(content))
+
+        if 'get_word_slices' not in exclude:
+            mcp.add_tool(get_word_slices, name='get_word_slices', description='获取中文分词（.get_word_slices），account 为机器人QQ号，留空使用默认账号')
+            registered += 1
+
+    return registered
@@ -0,0 +1,205 @@
+"""
+批量动作
+
+一次 MCP 调用执行一组有序的 NapCat 动作，减少智能体每一步的工具往返:
+
+    [
+        {"id": "m", "action": "get_group_member_info", "params": {"group_id": 1, "user_id": 2}},
+        {"id": "h", "action": "get_group_msg_history", "params": {"group_id": 1, "count": 5}},
+        {"id": "r", "action": "send_group_msg",
+         "params": {"group_id": 1, "message": "你好 {{m.data.card}}"}},
+        {"action": "set_msg_emoji_like",
+         "params": {"message_id": {"$ref": "r.data.message_id"}, "emoji_id": 76}}
+    ]
+
+- {"$ref": "id.path"} 整体替换为之前步骤响应中的值；字符串中的 {{id.path}} 做文本替换；
+- 引用只能指向列表中更靠前的步骤，"after": ["id"] 可声明没有引用的先后依赖；
+- 没有依赖关系的步骤并发执行，依赖失败的步骤会被跳过；
+- 发往同一会话（同一账号的同一个群或私聊）的发送类步骤按列表顺序依次执行，
+  前一条失败不影响后一条；目标由引用决定的发送步骤排在之前所有发送步骤之后。
+"""
+
+import asyncio
+import re
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+_TEMPLATE = re.compile(r"\{\{\s*([A-Za-z0-9_\-]+(?:\.[A-Za-z0-9_\-]+)*)\s*\}\}")
+
+Executor = Callable[[str, dict[str, Any], Any], Awaitable[dict[str, Any]]]
+
+# 会在会话中产生消息的动作，同一会话内保持顺序
+SEND_ACTIONS = frozenset({
+    "send_msg",
+    "send_group_msg",
+    "send_private_msg",
+    "send_forward_msg",
+    "send_group_forward_msg",
+    "send_private_forward_msg",
+    "forward_group_single_msg",
+    "forward_friend_single_msg",
+})
+
+
+class BatchError(ValueError):
+    """批量请求格式错误"""
+
+
+@dataclass(slots=True)
+class Step:
+    id: str
+    index: int
+    action: str
+    params: Any
+    account: Any = None
+    deps: set[str] = field(default_factory=set)
+    # 同一会话中的上一个发送步骤：只等待它结束，不要求成功
+    follows: str | None = None
+
+
+def _conversation(action: str, params: Any, account: Any) -> tuple[Any, ...] | None:
+    """发送步骤的目标会话；目标来自引用等无法静态确定时为 None"""
+    if not isinstance(params, dict):
+        return None
+    group_id, user_id = params.get("group_id"), params.get("user_id")
+    if action == "send_msg" and params.get("message_type") == "private":
+        group_id = None
+    target = ("group", group_id) if group_id is not None else ("private", user_id)
+    if not isinstance(target[1], int | str):
+        return None
+    return (str(account), target[0], str(target[1]))
+
+
+def _collect_refs(value: Any, refs: set[str]) -> None:
+    if isinstance(value, dict):
+        if set(value) == {"$ref"}:
+            refs.add(str(value["$ref"]).split(".", 1)[0])
+            return
+        for item in value.values():
+            _collect_refs(item, refs)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_refs(item, refs)
+    elif isinstance(value, str):
+        for match in _TEMPLATE.finditer(value):
+            refs.add(match.group(1).split(".", 1)[0])
+
+
+def _lookup(results: dict[str, dict[str, Any]], path: str) -> Any:
+    step_id, _, rest = path.partition(".")
+    value: Any = results[step_id]
+    for part in rest.split(".") if rest else []:
+        if isinstance(value, list):
+            value = value[int(part)]
+        elif isinstance(value, dict):
+            value = value[part]
+        else:
+            raise KeyError(path)
+    return value
+
+
+def _resolve(value: Any, results: dict[str, dict[str, Any]]) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"$ref"}:
+            return _lookup(results, str(value["$ref"]))
+        return {key: _resolve(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item, results) for item in value]
+    if isinstance(value, str) and "{{" in value:
+        return _TEMPLATE.sub(lambda m: str(_lookup(results, m.group(1))), value)
+    return value
+
+
+def parse_steps(raw_steps: list[dict[str, Any]], max_steps: int = 32) -> list[Step]:
+    """
+    校验并解析步骤
+
+    Raises:
+        BatchError: 步骤格式错误、id 重复、引用了不存在或更靠后的步骤
+    """
+    if not raw_steps:
+        raise BatchError("steps 不能为空")
+    if len(raw_steps) > max_steps:
+        raise BatchError(f"单次最多 {max_steps} 个步骤")
+    steps: list[Step] = []
+    # 已解析的步骤 id -> 序号
+    seen: dict[str, int] = {}
+    # 每个会话最后一个发送步骤、最后一个发送步骤、最后一个目标未知的发送步骤
+    last_send: dict[tuple[Any, ...], str] = {}
+    last_any: str | None = None
+    last_unknown: str | None = None
+    for index, raw in enumerate(raw_steps):
+        if not isinstance(raw, dict) or not raw.get("action"):
+            raise BatchError(f"第 {index} 个步骤缺少 action")
+        step_id = str(raw.get("id") or index)
+        if step_id in seen:
+            raise BatchError(f"步骤 id 重复: {step_id}")
+        params = raw.get("params") or {}
+        deps: set[str] = set()
+        _collect_refs(params, deps)
+        deps.update(str(item) for item in raw.get("after") or [])
+        unknown = deps - seen.keys()
+        if unknown:
+            raise BatchError(f"步骤 {step_id} 引用了不存在或更靠后的步骤: {sorted(unknown)}")
+        seen[step_id] = index
+        step = Step(step_id, index, str(raw["action"]), params, raw.get("account"), deps)
+        if step.action in SEND_ACTIONS:
+            conversation = _conversation(step.action, params, step.account)
+            if conversation is None:
+                step.follows, last_unknown = last_any, step_id
+            else:
+                # 上一个同会话发送与上一个目标未知的发送中较晚的一个
+                previous = [item for item in (last_send.get(conversation), last_unknown) if item is not None]
+                step.follows = max(previous, key=seen.__getitem__, default=None)
+                last_send[conversation] = step_id
+            last_any = step_id
+        steps.append(step)
+    return steps
+
+
+async def run_batch(steps: list[Step], execute: Executor, max_concurrency: int = 8) -> list[dict[str, Any]]:
+    """
+    按依赖关系执行步骤，返回与步骤顺序一致的结果列表
+
+    Args:
+        steps: parse_steps 的结果
+        execute: execute(action, params, account) -> OneBot 响应
+        max_concurrency: 同时执行的步骤上限
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    done: dict[str, asyncio.Task[dict[str, Any]]] = {}
+    responses: dict[str, dict[str, Any]] = {}
+
+    async def run_step(step: Step) -> dict[str, Any]:
+        result: dict[str, Any] = {"id": step.id, "action": step.action}
+        if step.follows is not None:
+            await done[step.follows]
+        for dep in step.deps:
+            dep_result = await done[dep]
+            if dep_result["status"] != "ok":
+                result.update(status="skipped", error=f"依赖的步骤 {dep} 未成功")
+                return result
+        try:
+            params = _resolve(step.params, responses)
+        except (KeyError, IndexError, ValueError) as e:
+            result.update(status="error", error=f"无法解析引用: {e}")
+            return result
+        started = time.perf_counter()
+        try:
+            async with semaphore:
+                response = await execute(step.action, params, step.account)
+        except Exception as e:
+            result.update(status="error", error=repr(e))
+            return result
+        finally:
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        responses[step.id] = response
+        result["status"] = "ok" if response.get("status") == "ok" else "failed"
+        result["response"] = response
+        return result
+
+    for step in steps:
+        done[step.id] = asyncio.create_task(run_step(step))
+    return list(await asyncio.gather(*done.values()))
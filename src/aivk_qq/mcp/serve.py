@@ -0,0 +1,259 @@
+"""
+MCP 服务器的高并发 HTTP 运行模式
+
+- GatedFastMCP: 所有工具调用经过 ToolGate，限制全局并发、排队长度与每个会话的并发；
+- serve_http(): 自行创建 uvicorn 服务器运行 SSE 或 streamable-HTTP 应用，
+  可选 uvloop，关闭时先拒绝新的工具调用并在期限内排空执行中的调用。
+
+streamable-HTTP 需要 mcp>=1.8（FastMCP.streamable_http_app），uvloop 为可选依赖。
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Coroutine, Iterator, Sequence
+from typing import Any
+
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+
+from ..bot.runtime import uvloop_available
+from ..bot.trace import tracer
+
+logger = logging.getLogger("aivk.qq.mcp.serve")
+
+
+class ServerBusy(RuntimeError):
+    """排队已满或服务器正在关闭"""
+
+
+class ToolGate:
+    """
+    工具调用闸门
+
+    Args:
+        max_concurrent: 全局同时执行的工具调用上限
+        max_queue: 等待执行的调用上限，超过后直接拒绝
+        per_session: 单个会话同时执行的工具调用上限，<= 0 表示不限制
+    """
+
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 256, per_session: int = 4) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.per_session = per_session
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._sessions: defaultdict[int, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(per_session)
+        )
+        self._session_users: defaultdict[int, int] = defaultdict(int)
+        self._pending = 0
+        self._running = 0
+        self._closed = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        return self._pending - self._running
+
+    def close(self) -> None:
+        """停止接收新的工具调用"""
+        self._closed = True
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        等待执行中与排队中的调用完成
+
+        Returns:
+            bool: 是否在期限内排空
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    async def run(self, session_key: int, call: Coroutine[Any, Any, Any]) -> Any:
+        """在闸门内执行协程 call"""
+        if self._closed or self.waiting >= self.max_queue:
+            self.rejected += 1
+            call.close()
+            if self._closed:
+                raise ServerBusy("服务器正在关闭，拒绝新的工具调用")
+            raise ServerBusy(f"服务器繁忙：排队中的工具调用已达上限 {self.max_queue}")
+
+        self._pending += 1
+        self._idle.clear()
+        self._session_users[session_key] += 1
+        session_gate = self._sessions[session_key] if self.per_session > 0 else None
+        try:
+            if session_gate is not None:
+                await session_gate.acquire()
+            try:
+                async with self._global:
+                    self._running += 1
+                    try:
+                        return await call
+                    finally:
+                        self._running -= 1
+                        self.completed += 1
+            finally:
+                if session_gate is not None:
+                    session_gate.release()
+        finally:
+            # 排队期间被取消时协程从未执行，关闭以免泄漏
+            call.close()
+            self._pending -= 1
+            self._session_users[session_key] -= 1
+            if self._session_users[session_key] <= 0:
+                del self._session_users[session_key]
+                self._sessions.pop(session_key, None)
+            if self._pending == 0:
+                self._idle.set()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._running,
+            "waiting": self.waiting,
+            "sessions": len(self._session_users),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "per_session": self.per_session,
+        }
+
+
+class GatedFastMCP(FastMCP):
+    """工具调用经过 ToolGate 的 FastMCP"""
+
+    def __init__(self, *args: Any, gate: ToolGate | None = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.gate = gate or ToolGate()
+
+    def session_key(self) -> int:
+        """当前请求所属会话的标识，不在请求中时为 0"""
+        try:
+            return id(self.get_context().session)
+        except (LookupError, ValueError):
+            return 0
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Sequence[Any]:
+        session_key = self.session_key()
+        started = time.perf_counter()
+        try:
+            with tracer.root("mcp", tool=name):
+                return await self.gate.run(session_key, super().call_tool(name, arguments))
+        finally:
+            logger.debug(f"工具 {name} 用时 {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+def supports_streamable_http(mcp: FastMCP) -> bool:
+    return hasattr(mcp, "streamable_http_app")
+
+
+class _DrainingServer(uvicorn.Server):
+    """关闭时先排空工具调用，再关闭连接"""
+
+    def __init__(
+        self, config: uvicorn.Config, gate: ToolGate, drain_timeout: float, handle_signals: bool = True
+    ) -> None:
+        super().__init__(config)
+        self.gate = gate
+        self.drain_timeout = drain_timeout
+        self.handle_signals = handle_signals
+
+    @contextlib.contextmanager
+    def capture_signals(self) -> Iterator[None]:
+        # 嵌入 aivk-qq run 时信号由 Runtime 处理，关闭时设置 should_exit
+        if not self.handle_signals:
+            yield
+            return
+        with super().capture_signals():
+            yield
+
+    def install_signal_handlers(self) -> None:
+        # uvicorn < 0.29
+        if self.handle_signals:
+            super().install_signal_handlers()  # type: ignore[misc]
+
+    async def shutdown(self, sockets: list[Any] | None = None) -> None:
+        self.gate.close()
+        stats = self.gate.stats()
+        logger.info(f"正在关闭：等待 {stats['running']} 个执行中、{stats['waiting']} 个排队中的工具调用")
+        if not await self.gate.drain(self.drain_timeout):
+            logger.warning(f"{self.drain_timeout}s 内未能排空工具调用，强制关闭")
+        await super().shutdown(sockets=sockets)
+
+
+def build_http_server(
+    mcp: GatedFastMCP,
+    transport: str,
+    *,
+    host: str,
+    port: int,
+    loop: str = "asyncio",
+    drain_timeout: float = 10.0,
+    debug: bool = False,
+    handle_signals: bool = True,
+) -> _DrainingServer:
+    """
+    创建 SSE 或 streamable-HTTP 的 uvicorn 服务器，可以 run() 独立运行或在已有事件循环中 await serve()
+
+    Raises:
+        RuntimeError: 当前 mcp 版本不支持 streamable-HTTP
+    """
+    if transport == "streamable-http":
+        if not supports_streamable_http(mcp):
+            raise RuntimeError("当前 mcp 版本不支持 streamable-http，请升级到 mcp>=1.8")
+        app = mcp.streamable_http_app()  # type: ignore[attr-defined]
+    elif transport == "sse":
+        app = mcp.sse_app()
+    else:
+        raise ValueError(f"serve_http 不支持的传输协议: {transport}")
+
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        loop=loop,
+        log_level="debug" if debug else "info",
+        timeout_graceful_shutdown=int(drain_timeout) + 1,
+    )
+    logger.info(
+        f"MCP服务器: {transport} http://{host}:{port} loop={loop} "
+        f"并发上限={mcp.gate.max_concurrent} 排队上限={mcp.gate.max_queue} 单会话并发={mcp.gate.per_session}"
+    )
+    return _DrainingServer(config, mcp.gate, drain_timeout, handle_signals)
+
+
+def serve_http(
+    mcp: GatedFastMCP,
+    transport: str,
+    *,
+    host: str,
+    port: int,
+    use_uvloop: bool = True,
+    drain_timeout: float = 10.0,
+    debug: bool = False,
+) -> None:
+    """
+    以 SSE 或 streamable-HTTP 方式运行 MCP 服务器（阻塞直到退出）
+
+    Raises:
+        RuntimeError: 当前 mcp 版本不支持 streamable-HTTP
+    """
+    loop = "uvloop" if use_uvloop and uvloop_available() else "asyncio"
+    if use_uvloop and loop != "uvloop":
+        logger.warning("未安装 uvloop，使用默认事件循环（pip install uvloop 以启用）")
+    build_http_server(
+        mcp, transport, host=host, port=port, loop=loop, drain_timeout=drain_timeout, debug=debug
+    ).run()
@@ -12,12 +12,38 @@ from logging import Logger
 from typing import Any
 
 
+import asyncio
 import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict, replace
+from datetime import datetime
 
 import locale
 from mcp.server.fastmcp import FastMCP
 from aivk.api import AivkIO
 
+from ..bot.bus import EventBus
+from ..bot.cache import TTLCache
+from ..bot.client import ActionCaller
+from ..bot.context import ContextStore
+from ..bot.endpoints import build_transport, endpoint
+from ..bot.images import ImagePipeline
+from ..bot.keywords import KeywordRule
+from ..bot.runtime import Runtime
+from ..bot.scheduler import Job, JobStore
+from ..bot.snapshot import Snapshotter
+from ..bot.state import open_backend
+from ..bot.status import probe_all
+from ..bot.stream import StreamRegistry, TextStream, stream_reply
+from ..bot.trace import default_trace_dir, tracer
+from ..config import QQConfig, get_store
+from .accounts import AccountPool
+from .action_tools import register_action_tools
+from .batch import parse_steps, run_batch
+from .serve import GatedFastMCP, ToolGate, build_http_server, serve_http
+
 
 
 # 配置日志格式，使用适当的编码设置避免中文乱码
@@ -31,24 +57,96 @@ logging.basicConfig(
 
 logger: Logger = logging.getLogger("aivk.qq.mcp")
 
-aivk_qq_config = AivkIO.get_config("qq")
-port: Any = aivk_qq_config.get("port", 10141)
-host = aivk_qq_config.get("host", "localhost")
-transport = aivk_qq_config.get("transport", "stdio")
+store = get_store()
+aivk_qq_config = store.snapshot
+port: Any = aivk_qq_config.port
+host = aivk_qq_config.host
+transport = aivk_qq_config.transport
 
 # 使用logger输出当前配置信息
 logger.info(f"当前MCP服务器传输协议为: {transport}")
 logger.info(f"当前配置: {aivk_qq_config}")
 logger.info("服务已启动")
 
-mcp = FastMCP(name="aivk_qq", instructions="AIVK QQ MCP Server" , port=port, host=host, debug=True)
+_watcher: asyncio.Task[None] | None = None
+
+contexts = ContextStore(
+    max_tokens=aivk_qq_config.context_max_tokens,
+    max_messages=aivk_qq_config.context_max_messages,
+)
+_context_bus = EventBus()
+contexts.attach(_context_bus)
+_context_feed: Any = None
+_snapshots: Snapshotter | None = None
+# 由 embed() 运行在 aivk-qq run 的事件循环中，配置监视与事件由机器人提供
+_embedded = False
 
-aivk_qq_config["port"] = port
-aivk_qq_config["host"] = host
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """
+    监视配置文件变化；启用会话上下文时连接 NapCat WebSocket 接收事件
+    SSE 模式下每个会话都会进入 lifespan，只启动一次
+    """
+    global _watcher, _context_feed, _snapshots
+    if not _embedded and (_watcher is None or _watcher.done()):
+        _watcher = asyncio.create_task(store.watch())
+    if tracer.path is None:
+        # 与机器人运行在同一进程时沿用机器人的导出文件
+        tracer.configure(**store.snapshot.trace_options(), path=default_trace_dir() / "mcp.jsonl", service="aivk-qq/mcp")
+    if store.snapshot.snapshot_enabled and _snapshots is None:
+        # 恢复账号缓存（群列表、成员信息等）与令牌桶，重启后无需重新拉取
+        _snapshots = Snapshotter("mcp", interval=store.snapshot.snapshot_interval)
+        _snapshots.register("accounts", accounts.dump, accounts.restore)
+        _snapshots.register("nicknames", contexts.nicknames.dump, contexts.nicknames.restore)
+        _snapshots.register("ocr", _ocr_cache.dump, _ocr_cache.restore)
+        await _snapshots.restore()
+        _snapshots.start()
+    if store.snapshot.context_enabled and _context_feed is None and not _embedded:
+        _context_feed = build_transport("ws", store.to_dict(), bus=_context_bus, name="context")
+        await _context_feed.start(wait=False)
+    try:
+        yield
+    finally:
+        if _snapshots is not None:
+            try:
+                await _snapshots.save()
+            except (OSError, TypeError) as e:
+                logger.warning(f"写快照失败: {e!r}")
+        await tracer.aflush()
+
+
+mcp = GatedFastMCP(
+    name="aivk_qq",
+    instructions="AIVK QQ MCP Server",
+    port=port,
+    host=host,
+    debug=aivk_qq_config.mcp_debug,
+    lifespan=_lifespan,
+    gate=ToolGate(
+        max_concurrent=aivk_qq_config.mcp_max_concurrency,
+        max_queue=aivk_qq_config.mcp_max_queue,
+        per_session=aivk_qq_config.mcp_session_concurrency,
+    ),
+)
 
 AivkIO.add_module_id("qq")
 AivkIO.add_module_id("qq_mcp")
-AivkIO.save_config("qq", aivk_qq_config)
+# 只有配置变化时才写盘
+store.update(port=port, host=host)
+
+accounts = AccountPool.from_config(store.to_dict(), open_backend(aivk_qq_config.state_backend))
+
+
+def _on_config_change(old: QQConfig, new: QQConfig) -> None:
+    accounts.reconfigure(new.to_dict())
+    if (old.context_max_tokens, old.context_max_messages) != (new.context_max_tokens, new.context_max_messages):
+        contexts.reconfigure(new.context_max_tokens, new.context_max_messages)
+    if (old.port, old.host, old.transport) != (new.port, new.host, new.transport):
+        logger.warning("MCP服务器地址/端口/传输协议的修改需要重启后生效")
+
+
+store.subscribe(_on_config_change)
 
 
 @mcp.tool(name="ping", description="Ping the server")
@@ -59,9 +157,423 @@ def ping():
     return "pong"
 
 
+@mcp.tool(name="server_stats", description="查看MCP服务器的工具调用并发与排队情况")
+def server_stats() -> dict[str, Any]:
+    """
+    查看MCP服务器状态
+    """
+    return mcp.gate.stats()
+
+
+@mcp.tool(
+    name="napcat_status",
+    description="并发探测NapCat各端点（http/sse/ws/反向服务器）与MCP服务器：可达性、延迟分位数、NapCat版本",
+)
+async def napcat_status(samples: int = 3, timeout: float = 5.0, endpoints: list[str] | None = None) -> dict[str, Any]:
+    """
+    NapCat健康检查
+    """
+    return await probe_all(store.to_dict(), samples=max(1, min(samples, 10)), timeout=timeout, only=endpoints)
+
+
+@mcp.tool(name="list_accounts", description="列出可用的机器人账号及默认账号")
+def list_accounts() -> dict[str, Any]:
+    """
+    列出可用的机器人账号
+    """
+    return {"accounts": accounts.self_ids, "default": accounts.default}
+
+
+@mcp.tool(name="send_group_msg", description="发送群消息，account 为机器人QQ号，留空使用默认账号")
+async def send_group_msg(group_id: int, message: str, account: int | None = None) -> dict[str, Any]:
+    """
+    发送群消息
+    """
+    return await accounts.get(account).execute("send_group_msg", {"group_id": group_id, "message": message})
+
+
+@mcp.tool(name="send_private_msg", description="发送私聊消息，account 为机器人QQ号，留空使用默认账号")
+async def send_private_msg(user_id: int, message: str, account: int | None = None) -> dict[str, Any]:
+    """
+    发送私聊消息
+    """
+    return await accounts.get(account).execute("send_private_msg", {"user_id": user_id, "message": message})
+
+
+@mcp.tool(name="get_group_list", description="获取群列表（带缓存），account 留空使用默认账号")
+async def get_group_list(account: int | None = None) -> dict[str, Any]:
+    """
+    获取群列表
+    """
+    return await accounts.get(account).cached("get_group_list")
+
+
+@mcp.tool(name="get_group_member_info", description="获取群成员信息（带缓存），account 留空使用默认账号")
+async def get_group_member_info(group_id: int, user_id: int, account: int | None = None) -> dict[str, Any]:
+    """
+    获取群成员信息
+    """
+    return await accounts.get(account).cached("get_group_member_info", {"group_id": group_id, "user_id": user_id})
+
+
+@mcp.tool(name="call_action", description="调用任意NapCat动作，params 为动作参数，account 留空使用默认账号")
+async def call_action(action: str, params: dict[str, Any] | None = None, account: int | None = None) -> dict[str, Any]:
+    """
+    调用任意NapCat动作
+    """
+    return await accounts.get(account).execute(action, params)
+
+
+@mcp.tool(
+    name="batch",
+    description=(
+        "一次执行多个NapCat动作。steps 为有序列表，每项 {id, action, params, account?, after?}；"
+        "params 中 {\"$ref\": \"id.data.字段\"} 引用之前步骤的响应，字符串中可用 {{id.data.字段}}；"
+        "无依赖的步骤并发执行，发往同一会话的消息按列表顺序发送，返回与 steps 顺序一致的结果"
+    ),
+)
+async def batch(steps: list[dict[str, Any]], account: int | None = None, max_concurrency: int = 8) -> dict[str, Any]:
+    """
+    批量执行NapCat动作
+    """
+    parsed = parse_steps(steps)
+
+    async def execute(action: str, params: dict[str, Any], step_account: Any) -> dict[str, Any]:
+        return await accounts.get(step_account or account).execute(action, params)
+
+    started = time.perf_counter()
+    results = await run_batch(parsed, execute, max_concurrency=max(1, min(max_concurrency, 32)))
+    return {"results": results, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+@mcp.tool(
+    name="get_context",
+    description=(
+        "读取会话最近的聊天上下文（已折叠图片/表情等为占位符、@与回复解析为昵称，按 token 预算裁剪）。"
+        "group_id 与 user_id 二选一；会话尚无上下文时拉取一次历史消息填充"
+    ),
+)
+async def get_context(
+    group_id: int | None = None,
+    user_id: int | None = None,
+    max_tokens: int | None = None,
+    account: int | None = None,
+) -> dict[str, Any]:
+    """
+    读取会话上下文
+    """
+    if not group_id and not user_id:
+        raise ValueError("group_id 与 user_id 至少提供一个")
+    key = f"g{group_id}" if group_id else f"u{user_id}"
+    if _context_feed is None:
+        # 未接收事件时上下文不会增量更新，每次重新拉取
+        contexts.discard(key)
+    if key not in contexts:
+        if group_id:
+            response = await accounts.get(account).execute(
+                "get_group_msg_history", {"group_id": group_id, "count": contexts.max_messages}
+            )
+        else:
+            response = await accounts.get(account).execute(
+                "get_friend_msg_history", {"user_id": user_id, "count": contexts.max_messages}
+            )
+        if response.get("status") == "ok":
+            contexts.seed((response.get("data") or {}).get("messages") or [])
+    conversation = contexts.get(key)
+    return {
+        "conversation": key,
+        "messages": len(conversation.lines) if conversation else 0,
+        "tokens": conversation.tokens if conversation else 0,
+        "context": contexts.get_context(group_id, user_id, max_tokens),
+    }
+
+
+@mcp.tool(name="keyword_rules_list", description="列出关键词规则（自动回复/撤回/禁言）")
+def keyword_rules_list() -> dict[str, Any]:
+    """
+    列出关键词规则
+    """
+    return {"rules": list(store.snapshot.keyword_rules)}
+
+
+@mcp.tool(
+    name="keyword_rules_add",
+    description=(
+        "添加或替换关键词规则（按 keyword 去重）。每条规则 {keyword, action: reply|recall|ban, reply?, duration?, groups?}；"
+        "规则写入配置文件，运行中的机器人自动重建匹配自动机"
+    ),
+)
+def keyword_rules_add(rules: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    添加关键词规则
+    """
+    new_rules = [KeywordRule.from_dict(rule).to_dict() for rule in rules]
+    keys = {rule["keyword"] for rule in new_rules}
+    kept = [rule for rule in store.snapshot.keyword_rules if rule.get("keyword") not in keys]
+    merged = kept + new_rules
+    # from_dict 已完成全部校验，自动机由运行中的机器人在线程中重建
+    store.update(keyword_rules=merged)
+    return {"rules": len(merged)}
+
+
+@mcp.tool(name="keyword_rules_remove", description="按关键词删除关键词规则")
+def keyword_rules_remove(keywords: list[str]) -> dict[str, Any]:
+    """
+    删除关键词规则
+    """
+    targets = set(keywords)
+    kept = [rule for rule in store.snapshot.keyword_rules if rule.get("keyword") not in targets]
+    removed = len(store.snapshot.keyword_rules) - len(kept)
+    store.update(keyword_rules=kept)
+    return {"removed": removed, "rules": len(kept)}
+
+
+# 每个会话最多 4 条进行中的流；结束的流保留 5 分钟，stream_end 仍能取回结果或错误
+_streams = StreamRegistry(max_per_owner=4, keep=300.0)
+
+
+@mcp.tool(
+    name="stream_begin",
+    description=(
+        "开始一条流式回复，返回 stream_id。之后用 stream_push 逐段推送生成的文本，"
+        "机器人按句子分条发送（私聊显示正在输入），过长的内容自动打包为合并转发；最后调用 stream_end"
+    ),
+)
+async def stream_begin(
+    group_id: int | None = None,
+    user_id: int | None = None,
+    account: int | None = None,
+    interval: float = 1.0,
+    max_messages: int = 5,
+) -> dict[str, Any]:
+    """
+    开始流式回复
+    """
+    if not group_id and not user_id:
+        raise ValueError("group_id 与 user_id 至少提供一个")
+    target = accounts.get(account)
+    stream = TextStream()
+    reply = stream_reply(
+        target,
+        stream,
+        group_id=group_id,
+        user_id=user_id,
+        interval=interval,
+        max_messages=max_messages,
+        self_id=target.self_id,
+    )
+    return {"stream_id": _streams.open(stream, reply, owner=mcp.session_key())}
+
+
+@mcp.tool(name="stream_push", description="向流式回复推送一段文本")
+def stream_push(stream_id: str, text: str) -> dict[str, Any]:
+    """
+    推送文本
+    """
+    _streams.push(stream_id, text)
+    return {"ok": True}
+
 
+@mcp.tool(name="stream_end", description="结束流式回复，发送剩余内容并返回发送统计")
+async def stream_end(stream_id: str) -> dict[str, Any]:
+    """
+    结束流式回复
+    """
+    return asdict(await _streams.end(stream_id))
+
+
+# OCR 结果按图片内容缓存，各账号共享；每个账号一条流水线（合并请求与并发上限）
+_ocr_cache = TTLCache(maxsize=aivk_qq_config.ocr_cache_size, ttl=aivk_qq_config.ocr_ttl)
+_pipelines: dict[int, ImagePipeline] = {}
+
+
+def _pipeline(account: int | None) -> ImagePipeline:
+    target = accounts.get(account)
+    pipeline = _pipelines.get(target.self_id)
+    if pipeline is None or pipeline.caller is not target:
+        config = store.snapshot
+        pipeline = _pipelines[target.self_id] = ImagePipeline(
+            target, cache=_ocr_cache, ttl=config.ocr_ttl, concurrency=config.ocr_concurrency
+        )
+    return pipeline
+
+
+@mcp.tool(
+    name="image_ocr",
+    description=(
+        "识别图片中的文字。images 为公网图片 URL / base64:// / 消息段中的 file（不接受本地路径）；"
+        "按图片内容缓存，同一张图片不会重复调用 ocr_image，account 留空使用默认账号"
+    ),
+)
+async def image_ocr(images: list[str], account: int | None = None) -> dict[str, Any]:
+    """
+    批量OCR（带缓存）
+    """
+    pipeline = _pipeline(account)
+    started = time.perf_counter()
+    results = await pipeline.ocr_many(images[:32])
+    return {
+        "results": [{**asdict(result), "text": result.text} for result in results],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "stats": pipeline.stats(),
+    }
+
+
+jobs = JobStore()
+
+
+@mcp.tool(name="schedule_list", description="列出定时任务（cron/一次性），由 aivk-qq run 运行的机器人执行")
+def schedule_list() -> dict[str, Any]:
+    """
+    列出定时任务
+    """
+    jobs.reload()
+    return {"jobs": [job.to_dict() for job in jobs.jobs.values()]}
+
+
+@mcp.tool(
+    name="schedule_add",
+    description=(
+        "添加或替换定时任务：到时通过机器人连接执行 NapCat 动作 action(params)。"
+        "cron 为五段式表达式（分 时 日 月 周，本地时间，如 \"0 8 * * *\"）；"
+        "一次性任务用 at（ISO 时间或时间戳）或 delay（秒）。jitter=false 时不错开执行时间"
+    ),
+)
+def schedule_add(
+    id: str,
+    action: str,
+    params: dict[str, Any] | None = None,
+    cron: str | None = None,
+    at: str | float | None = None,
+    delay: float | None = None,
+    jitter: bool = True,
+) -> dict[str, Any]:
+    """
+    添加定时任务
+    """
+    if delay is not None:
+        at = time.time() + delay
+    job = Job.from_dict(
+        {"id": id, "action": action, "params": params or {}, "cron": cron, "at": at, "jitter": jitter}
+    )
+    jobs.put(job)
+    next_run = job.next_run(time.time())
+    return {"job": job.to_dict(), "next_run": datetime.fromtimestamp(next_run).isoformat() if next_run else None}
+
+
+@mcp.tool(name="schedule_remove", description="删除定时任务")
+def schedule_remove(id: str) -> dict[str, Any]:
+    """
+    删除定时任务
+    """
+    return {"removed": jobs.remove(id)}
+
+
+@mcp.tool(name="schedule_enable", description="启用或停用定时任务")
+def schedule_enable(id: str, enabled: bool = True) -> dict[str, Any]:
+    """
+    启用或停用定时任务
+    """
+    jobs.reload()
+    job = jobs.get(id)
+    if job is None:
+        raise KeyError(f"定时任务不存在: {id}")
+    jobs.put(replace(job, enabled=enabled))
+    return {"job": jobs.get(id).to_dict()}  # type: ignore[union-attr]
+
+
+# 按需暴露生成的类型化动作工具：expose_actions 为 true 表示全部，或为分类列表
+expose_actions = aivk_qq_config.expose_actions
+if expose_actions:
+    _categories = None if expose_actions is True else list(expose_actions)
+    _count = register_action_tools(
+        mcp,
+        accounts,
+        categories=_categories,
+        exclude={"send_group_msg", "send_private_msg", "get_group_list", "get_group_member_info"},
+    )
+    logger.info(f"已注册 {_count} 个NapCat动作工具")
+
+
+
+
+
+def embed(runtime: Runtime, transport_name: str) -> None:
+    """
+    把 sse / streamable-http MCP 服务器注册为 runtime 的服务，与机器人共用事件循环
+
+    bot_uid 对应的账号（端点与机器人相同时）改用机器人的连接，不再单独连接 NapCat；
+    启用会话上下文时直接订阅机器人的事件总线，不再另开 WebSocket。
+    """
+    if transport_name not in ("sse", "streamable-http"):
+        raise ValueError(f"嵌入运行只支持 sse / streamable-http，不支持 {transport_name}")
+    server: Any = None
+    serving: asyncio.Task[None] | None = None
+
+    async def start(bus: EventBus, caller: ActionCaller) -> None:
+        global _embedded, _context_feed
+        nonlocal server, serving
+        _embedded = True
+        config = store.snapshot
+        if config.bot_uid is not None and config.bot_uid in accounts.self_ids:
+            account = accounts.get(config.bot_uid)
+            if (account.client.host, account.client.port) == endpoint(store.to_dict(), "http_port"):
+                accounts.share(config.bot_uid, caller)
+        if config.context_enabled and _context_feed is None:
+            contexts.attach(bus)
+            _context_feed = bus
+        server = build_http_server(
+            mcp,
+            transport_name,
+            host=config.host,
+            port=config.port,
+            loop=runtime.loop_name,
+            drain_timeout=runtime.drain_timeout,
+            debug=config.mcp_debug,
+            handle_signals=False,
+        )
+        serving = asyncio.create_task(server.serve())
+        # 等待端口开始监听，启动失败时立即报告
+        while not server.started and not serving.done():
+            await asyncio.sleep(0.01)
+        if serving.done():
+            await serving
+            raise RuntimeError("MCP服务器启动失败")
+
+    async def stop() -> None:
+        if server is not None and serving is not None:
+            server.should_exit = True
+            await serving
+        if _snapshots is not None:
+            await _snapshots.stop()
+        await accounts.close()
+
+    runtime.add_service("mcp", start, stop)
+    runtime.add_metrics("mcp", mcp.gate.stats)
+
+
+def run_server(transport_name: str | None = None) -> None:
+    """
+    按配置运行MCP服务器
+
+    stdio 使用 FastMCP 自带的运行方式；sse / streamable-http 使用 serve_http 的高并发模式。
+    """
+    config = store.snapshot
+    transport_name = transport_name or config.transport
+    if transport_name == "stdio":
+        mcp.run(transport="stdio")
+        return
+    serve_http(
+        mcp,
+        transport_name,
+        host=config.host,
+        port=config.port,
+        use_uvloop=config.mcp_uvloop,
+        drain_timeout=config.mcp_drain_timeout,
+        debug=config.mcp_debug,
+    )
 
 
 if __name__ == "__main__":
 
-    mcp.run(transport=transport)
+    run_server(transport)
@@ -0,0 +1,67 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from aivk_qq.mcp.accounts import AccountPool
+
+
+class Recorder:
+    """记录调用的假 NapCat"""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        self.calls.append(action)
+        return {"status": "ok", "retcode": 0, "data": {"action": action}}
+
+
+def pool(**config: Any) -> AccountPool:
+    return AccountPool.from_config({"napcat_host": "127.0.0.1", "http_port": 10146, **config})
+
+
+def test_account_selection():
+    accounts = pool(accounts=[{"self_id": 1}, {"self_id": 2, "http_port": 20146}], default_account=2)
+    assert accounts.self_ids == [1, 2]
+    assert accounts.get().self_id == 2
+    assert accounts.get("1").self_id == 1
+    assert accounts.get(1).client.port == 10146 and accounts.get(2).client.port == 20146
+    with pytest.raises(KeyError):
+        accounts.get(3)
+    assert pool(bot_uid=7).get().self_id == 7
+    with pytest.raises(KeyError):
+        pool().get()
+
+
+def test_accounts_have_isolated_limiters_and_caches():
+    accounts = pool(accounts=[{"self_id": 1, "rate": 2.0}, {"self_id": 2}])
+    first, second = accounts.get(1), accounts.get(2)
+    assert first.limiter is not second.limiter and first.cache is not second.cache
+    assert (first.limiter.rate, second.limiter.rate) == (2.0, 1.0)
+    first.shared, second.shared = Recorder(), Recorder()
+
+    async def run() -> None:
+        await first.cached("get_group_list")
+        await first.cached("get_group_list")
+        await second.cached("get_group_list")
+
+    asyncio.run(run())
+    assert first.shared.calls == ["get_group_list"]
+    assert second.shared.calls == ["get_group_list"]
+
+
+def test_only_send_actions_consume_the_account_budget():
+    account = pool(accounts=[{"self_id": 1, "rate": 0.01, "burst": 1}]).get(1)
+    account.shared = Recorder()
+
+    async def run() -> None:
+        for _ in range(20):
+            await asyncio.wait_for(account.execute("get_image", {"file": "x"}), 0.1)
+        await account.execute("send_group_msg", {"group_id": 1, "message": "hi"})
+        # 令牌已用完，下一条发送要等待
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(account.execute("send_group_msg", {"group_id": 1, "message": "hi"}), 0.1)
+        await asyncio.wait_for(account.execute("get_group_info", {"group_id": 1}), 0.1)
+
+    asyncio.run(run())
@@ -0,0 +1,78 @@
+import asyncio
+import importlib.util
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from aivk_qq.bot.actions import FriendInfo, LoginInfo, MessageId, NapcatActions
+from aivk_qq.bot.client import ActionFailed
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_generator():
+    spec = importlib.util.spec_from_file_location("gen_actions", ROOT / "scripts" / "gen_actions.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Recorder:
+    """返回固定响应的假 NapCat"""
+
+    def __init__(self, response: dict[str, Any]) -> None:
+        self.response = response
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        self.calls.append((action, params or {}))
+        return self.response
+
+
+def test_generated_files_are_up_to_date():
+    gen = load_generator()
+    spec = json.loads(gen.SPEC.read_text(encoding="utf-8"))
+    # 修改规格或生成器后需要重新运行 scripts/gen_actions.py
+    assert gen.ACTIONS_OUT.read_text(encoding="utf-8") == gen.generate_actions(spec)
+    assert gen.TOOLS_OUT.read_text(encoding="utf-8") == gen.generate_tools(spec)
+
+
+def test_structs_ignore_unknown_and_missing_fields():
+    info = LoginInfo.decode({"user_id": 1, "extra": "ignored"})
+    assert info == LoginInfo(user_id=1, nickname=None)
+    assert MessageId.decode(None) == MessageId()
+    assert MessageId.decode([1, 2]) == MessageId()
+
+
+def test_parameters_are_checked_before_sending():
+    recorder = Recorder({"status": "ok", "retcode": 0, "data": {"message_id": 5}})
+    actions = NapcatActions(recorder)
+
+    async def run() -> None:
+        with pytest.raises(TypeError, match="group_id"):
+            await actions.send_group_msg("123", "hi")
+        with pytest.raises(TypeError, match="message"):
+            await actions.send_group_msg(123, 42)
+        with pytest.raises(TypeError, match="no_cache"):
+            await actions.get_friend_list(no_cache="yes")
+        assert recorder.calls == []
+        assert await actions.send_group_msg(123, [{"type": "text", "data": {"text": "hi"}}]) == MessageId(5)
+        # 可选参数为 None 时不发送
+        await actions.send_poke(7)
+        assert recorder.calls[-1] == ("send_poke", {"user_id": 7})
+
+    asyncio.run(run())
+
+
+def test_responses_are_decoded():
+    async def run(response: dict[str, Any]) -> Any:
+        return await NapcatActions(Recorder(response)).get_friend_list()
+
+    friends = asyncio.run(run({"status": "ok", "data": [{"user_id": 1, "nickname": "a", "foo": 1}, "bad"]}))
+    assert friends == [FriendInfo(user_id=1, nickname="a"), FriendInfo()]
+    assert asyncio.run(run({"status": "ok", "data": None})) == []
+    with pytest.raises(ActionFailed) as error:
+        asyncio.run(run({"status": "failed", "retcode": 1400, "message": "bad request"}))
+    assert error.value.retcode == 1400 and error.value.action == "get_friend_list"
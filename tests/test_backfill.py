@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Any
+
+from aivk_qq.bot.backfill import Backfill
+from aivk_qq.bot.bus import EventBus
+from aivk_qq.bot.flood import FloodGuard
+from aivk_qq.bot.keywords import KeywordEngine
+
+GROUP = 1000
+USER = 42
+
+
+class History:
+    """返回固定历史消息、记录其余动作的假 NapCat"""
+
+    def __init__(self, messages: list[dict[str, Any]]) -> None:
+        self.messages = messages
+        self.sent: list[tuple[str, dict[str, Any]]] = []
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        if action == "get_group_msg_history":
+            return {"status": "ok", "retcode": 0, "data": {"messages": list(self.messages)}}
+        self.sent.append((action, params or {}))
+        return {"status": "ok", "retcode": 0, "data": None}
+
+
+def message(message_id: int, stamp: float, text: str) -> dict[str, Any]:
+    return {
+        "post_type": "message",
+        "message_type": "group",
+        "group_id": GROUP,
+        "user_id": USER,
+        "self_id": 1,
+        "message_id": message_id,
+        "time": int(stamp),
+        "raw_message": text,
+        "sender": {"role": "member"},
+    }
+
+
+def backfill_replay(**keyword_options: Any) -> tuple[History, FloodGuard]:
+    """断线两小时期间每 10 分钟一条消息，重连后一次性补拉"""
+    start = time.time() - 2 * 3600
+    history = History([message(100 + i, start + 600 * (i + 1), f"广告 第{i}条") for i in range(12)])
+
+    async def scenario() -> FloodGuard:
+        bus = EventBus(history)
+        flood = FloodGuard(window=10.0, max_messages=3, max_duplicates=2)
+        bus.add_filter(flood.allow)
+        keywords = KeywordEngine(
+            [{"keyword": "广告", "action": "reply", "reply": "请勿发广告"}], **keyword_options
+        )
+        keywords.attach(bus)
+        backfill = Backfill(history, bus)
+        backfill.attach(bus)
+        # 断线前最后一条实时消息建立游标
+        await bus.dispatch(message(99, start, "在吗"))
+        assert await backfill.run() == 12
+        flood.start(history)
+        await asyncio.sleep(0.05)
+        await flood.stop()
+        bus.close()
+        return flood
+
+    return history, asyncio.run(scenario())
+
+
+def test_backfilled_history_is_not_flood():
+    history, flood = backfill_replay()
+    assert flood.blocked == 0
+    assert not [action for action, _ in history.sent if action in ("set_group_ban", "delete_msg")]
+
+
+def test_backfilled_history_gets_no_keyword_reply():
+    history, _ = backfill_replay()
+    assert not [action for action, _ in history.sent if action == "send_group_msg"]
+
+
+def test_keyword_moderation_of_backfilled_history_is_optional():
+    engine = KeywordEngine([{"keyword": "广告", "action": "recall"}])
+    event = {**message(1, time.time(), "广告"), "backfilled": True}
+    assert [action.action for action in engine.actions_for(event)] == ["delete_msg"]
+    engine = KeywordEngine([{"keyword": "广告", "action": "recall"}], moderate_backfilled=False)
+    assert engine.actions_for(event) == []
+
+
+def test_live_burst_is_still_flood():
+    flood = FloodGuard(window=10.0, max_messages=3)
+    now = time.time()
+    results = [flood.allow(message(i, now, f"第{i}条")) for i in range(5)]
+    assert results[-1] is False
+    assert flood.blocked >= 1
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from aivk_qq.mcp.batch import BatchError, parse_steps, run_batch
+
+
+class Napcat:
+    """按动作返回响应的假执行器，delays 中的动作先等待，fail 中的动作返回失败"""
+
+    def __init__(self, delays: dict[str, float] | None = None, fail: set[str] | None = None) -> None:
+        self.delays = delays or {}
+        self.fail = fail or set()
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    async def __call__(self, action: str, params: dict[str, Any], account: Any) -> dict[str, Any]:
+        await asyncio.sleep(self.delays.get(action, 0))
+        self.calls.append((action, params))
+        if action in self.fail:
+            return {"status": "failed", "retcode": 100, "data": None}
+        if action == "get_group_member_info":
+            return {"status": "ok", "retcode": 0, "data": {"card": "小明", "user_id": params["user_id"]}}
+        return {"status": "ok", "retcode": 0, "data": {"message_id": len(self.calls)}}
+
+
+def run(steps: list[dict[str, Any]], napcat: Napcat) -> list[dict[str, Any]]:
+    return asyncio.run(run_batch(parse_steps(steps), napcat))
+
+
+def test_refs_and_templates_are_resolved():
+    napcat = Napcat()
+    results = run(
+        [
+            {"id": "m", "action": "get_group_member_info", "params": {"group_id": 1, "user_id": 2}},
+            {"id": "r", "action": "send_group_msg", "params": {"group_id": 1, "message": "你好 {{m.data.card}}"}},
+            {"action": "set_msg_emoji_like", "params": {"message_id": {"$ref": "r.data.message_id"}, "emoji_id": 76}},
+        ],
+        napcat,
+    )
+    assert [result["status"] for result in results] == ["ok", "ok", "ok"]
+    assert napcat.calls[1] == ("send_group_msg", {"group_id": 1, "message": "你好 小明"})
+    assert napcat.calls[2] == ("set_msg_emoji_like", {"message_id": 2, "emoji_id": 76})
+
+
+def test_steps_after_a_failed_dependency_are_skipped():
+    napcat = Napcat(fail={"get_group_member_info"})
+    results = run(
+        [
+            {"id": "m", "action": "get_group_member_info", "params": {"group_id": 1, "user_id": 2}},
+            {"id": "r", "action": "send_group_msg", "params": {"group_id": 1, "message": "{{m.data.card}}"}},
+            {"id": "a", "action": "send_like", "params": {"user_id": 2}, "after": ["m"]},
+            {"id": "b", "action": "get_status"},
+        ],
+        napcat,
+    )
+    assert [result["status"] for result in results] == ["failed", "skipped", "skipped", "ok"]
+    assert [action for action, _ in napcat.calls] == ["get_group_member_info", "get_status"]
+
+
+def test_invalid_steps_are_rejected():
+    with pytest.raises(BatchError):
+        parse_steps([])
+    with pytest.raises(BatchError):
+        parse_steps([{"id": "a", "action": "get_status"}, {"id": "a", "action": "get_status"}])
+    with pytest.raises(BatchError):
+        parse_steps([{"action": "send_group_msg", "params": {"group_id": 1, "message": {"$ref": "later.data"}}}])
+
+
+def test_sends_to_the_same_conversation_keep_their_order():
+    # 第一条消息较慢，没有顺序保证时第二条会先到
+    napcat = Napcat(delays={"send_group_forward_msg": 0.05})
+    results = run(
+        [
+            {"id": "a", "action": "send_group_forward_msg", "params": {"group_id": 1, "messages": []}},
+            {"id": "b", "action": "send_group_msg", "params": {"group_id": 1, "message": "第二条"}},
+            {"id": "c", "action": "send_group_msg", "params": {"group_id": 2, "message": "别的群"}},
+        ],
+        napcat,
+    )
+    assert all(result["status"] == "ok" for result in results)
+    assert [params.get("group_id") for _, params in napcat.calls] == [2, 1, 1]
+    assert napcat.calls[1][0] == "send_group_forward_msg"
+
+
+def test_failed_send_does_not_skip_the_next_send():
+    napcat = Napcat(fail={"send_group_forward_msg"})
+    results = run(
+        [
+            {"action": "send_group_forward_msg", "params": {"group_id": 1, "messages": []}},
+            {"action": "send_group_msg", "params": {"group_id": 1, "message": "hi"}},
+        ],
+        napcat,
+    )
+    assert [result["status"] for result in results] == ["failed", "ok"]
+
+
+def test_send_with_referenced_target_follows_earlier_sends():
+    steps = parse_steps(
+        [
+            {"id": "a", "action": "send_group_msg", "params": {"group_id": 1, "message": "x"}},
+            {"id": "m", "action": "get_group_member_info", "params": {"group_id": 1, "user_id": 2}},
+            {"id": "b", "action": "send_private_msg", "params": {"user_id": {"$ref": "m.data.user_id"}, "message": "y"}},
+            {"id": "c", "action": "send_group_msg", "params": {"group_id": 1, "message": "z"}},
+        ]
+    )
+    assert [step.follows for step in steps] == [None, None, "a", "b"]
@@ -0,0 +1,24 @@
+import time
+
+import pytest
+
+from aivk_qq.bot.cache import TTLCache
+
+
+def test_restore_subtracts_downtime(monkeypatch: pytest.MonkeyPatch):
+    cache = TTLCache(ttl=60.0)
+    cache.set("short", 1)
+    cache.set("long", 2, ttl=3600.0)
+    cache.set("forever", 3, ttl=0)
+    entries = cache.dump()
+
+    # 停机两分钟后重启
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    restored = TTLCache(ttl=60.0)
+    assert restored.restore(entries) == 2
+    assert restored.get("short") is None
+    assert restored.get("long") == 2
+    assert restored.get("forever") == 3
+    remaining = dict((key, expires_at) for key, expires_at, _ in restored.dump())
+    assert remaining["long"] == pytest.approx(now + 3600, abs=1)
@@ -0,0 +1,74 @@
+import asyncio
+import gzip
+import json
+import time
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from websockets.asyncio.server import serve
+from websockets.exceptions import InvalidStatus
+
+from aivk_qq.bot.bus import EventBus
+from aivk_qq.bot.capture import SEGMENT_SUFFIX, Frame, read_frames, replay
+from aivk_qq.bot.client import WSClient
+
+
+class Null:
+    async def execute(self, action, params=None, *, timeout=None):
+        return {"status": "ok", "retcode": 0, "data": None}
+
+
+def event_frame(ts: float, mono: float, message_id: int) -> Frame:
+    raw = json.dumps({"post_type": "message", "message_type": "private", "user_id": 1, "message_id": message_id})
+    return Frame(ts=ts, mono=mono, direction="in", src="ws", raw=raw)
+
+
+def write_segment(path: Path, frames: list[Frame]) -> None:
+    with gzip.open(path, "wt", encoding="utf-8") as fp:
+        for frame in frames:
+            fp.write(frame.to_line() + "\n")
+
+
+def test_read_frames_stops_at_truncated_tail(tmp_path: Path):
+    segment = tmp_path / f"0001{SEGMENT_SUFFIX}"
+    write_segment(segment, [event_frame(i, i, i) for i in range(200)])
+    data = segment.read_bytes()
+    segment.write_bytes(data[: len(data) - 40])
+    frames = list(read_frames(tmp_path))
+    assert 0 < len(frames) < 200
+    assert [frame.raw for frame in frames] == [event_frame(i, i, i).raw for i in range(len(frames))]
+
+
+def test_replay_clamps_monotonic_reset_between_segments(tmp_path: Path):
+    now = time.time()
+    # 第二段来自重启后的进程：单调时钟从头开始，墙钟相隔一小时
+    write_segment(tmp_path / f"0001{SEGMENT_SUFFIX}", [event_frame(now, 5000.0, 1), event_frame(now + 0.01, 5000.01, 2)])
+    write_segment(tmp_path / f"0002{SEGMENT_SUFFIX}", [event_frame(now + 3600, 3.0, 3), event_frame(now + 3600.01, 3.01, 4)])
+
+    async def run():
+        bus = EventBus(Null())
+        stats = await replay(bus, tmp_path, speed=1.0, max_gap=0.05)
+        bus.close()
+        return stats
+
+    stats = asyncio.run(asyncio.wait_for(run(), 5))
+    assert stats.events == 4
+    assert stats.elapsed < 1.0
+
+
+def test_ws_client_start_surfaces_rejected_handshake():
+    async def reject(connection, request):
+        return connection.respond(HTTPStatus.UNAUTHORIZED, "unauthorized\n")
+
+    async def run():
+        async with serve(lambda conn: conn.wait_closed(), "127.0.0.1", 0, process_request=reject) as server:
+            port = server.sockets[0].getsockname()[1]
+            client = WSClient("127.0.0.1", port, token="wrong", reconnect_interval=0.05)
+            try:
+                with pytest.raises(InvalidStatus):
+                    await asyncio.wait_for(client.start(wait=True), 5)
+            finally:
+                await client.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from aivk.api import AivkIO
+
+from aivk_qq.config import ConfigStore, QQConfig
+
+
+@pytest.fixture
+def aivk(monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
+    """把 AivkIO 的 qq 配置换成内存中的字典"""
+    saved: dict[str, Any] = {"qq": {"bot_uid": 10001, "port": 18141}}
+    monkeypatch.setattr(AivkIO, "get_config", classmethod(lambda cls, name: json.loads(json.dumps(saved.get(name, {})))))
+    monkeypatch.setattr(AivkIO, "save_config", classmethod(lambda cls, name, data: saved.__setitem__(name, data)))
+    return saved
+
+
+def test_only_non_default_values_are_written(tmp_path: Path, aivk: dict[str, Any]):
+    store = ConfigStore(tmp_path / "config.json")
+    assert store.update(rate=2.5)
+    on_disk = json.loads((tmp_path / "config.json").read_text(encoding="utf-8"))
+    assert on_disk == {"bot_uid": 10001, "port": 18141, "rate": 2.5}
+    assert aivk["qq"] == on_disk
+    assert store.snapshot.burst == QQConfig().burst
+
+
+def test_edits_through_aivk_are_picked_up(tmp_path: Path, aivk: dict[str, Any]):
+    store = ConfigStore(tmp_path / "config.json")
+    store.update(rate=2.5)
+    changes: list[tuple[float, float]] = []
+    store.subscribe(lambda old, new: changes.append((old.rate, new.rate)))
+
+    aivk["qq"] = {**aivk["qq"], "rate": 4.0}
+    assert store.reload()
+    assert store.snapshot.rate == 4.0
+    assert changes == [(2.5, 4.0)]
+    # 导入的修改写回 config.json，重启后仍然生效
+    assert ConfigStore(tmp_path / "config.json").snapshot.rate == 4.0
+    assert not store.reload()
+
+
+def test_file_edits_are_mirrored_to_aivk(tmp_path: Path, aivk: dict[str, Any]):
+    path = tmp_path / "config.json"
+    store = ConfigStore(path)
+    store.update(rate=2.5)
+    path.write_text(json.dumps({"bot_uid": 10001, "rate": 3.0, "flood_enabled": True}), encoding="utf-8")
+    assert store.reload()
+    assert store.snapshot.flood_enabled
+    assert aivk["qq"] == {"bot_uid": 10001, "rate": 3.0, "flood_enabled": True}
+    # AivkIO 中的内容与刚同步的一致，不会被当作外部修改再导入
+    assert not store.reload()
+
+
+def test_invalid_edit_keeps_old_config_and_polling_continues(tmp_path: Path, aivk: dict[str, Any]):
+    path = tmp_path / "config.json"
+    store = ConfigStore(path)
+    store.update(rate=2.0)
+    changes: list[float] = []
+    store.subscribe(lambda old, new: 1 / 0)
+    store.subscribe(lambda old, new: changes.append(new.rate))
+
+    path.write_text(json.dumps({"bot_uid": 10001, "rate": 2.0, "allowed_groups": ["abc"]}), encoding="utf-8")
+    assert not store.reload()
+    assert store.snapshot.rate == 2.0 and not store.snapshot.allowed_groups
+
+    path.write_text(json.dumps({"bot_uid": 10001, "rate": 3.0, "allowed_groups": ["123"]}), encoding="utf-8")
+    assert store.reload()
+    assert store.snapshot.rate == 3.0
+    assert store.snapshot.allowed_groups == frozenset({123})
+    assert changes == [3.0]
+
+
+def test_from_dict_coerces_declared_types():
+    config = QQConfig.from_dict({"rate": "2.5", "port": 8080.0, "expose_actions": ["get_status"], "extra_key": 1})
+    assert config.rate == 2.5 and config.port == 8080
+    assert config.expose_actions == ("get_status",)
+    assert config.extra == {"extra_key": 1}
+    for bad in ({"port": "x"}, {"flood_enabled": "yes"}, {"accounts": "abc"}, {"port": 1.5}, {"host": [1]}):
+        with pytest.raises(ValueError):
+            QQConfig.from_dict(bad)
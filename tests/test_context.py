@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any
+
+from aivk_qq.bot.context import ContextStore, estimate_tokens, parse_cq
+
+GROUP = 100
+
+
+def message(message_id: int, user_id: int, text: str, **sender: Any) -> dict[str, Any]:
+    return {
+        "post_type": "message",
+        "message_type": "group",
+        "group_id": GROUP,
+        "user_id": user_id,
+        "message_id": message_id,
+        "time": 1700000000 + message_id,
+        "raw_message": text,
+        "sender": {"user_id": user_id, **sender},
+    }
+
+
+def test_parse_cq():
+    assert parse_cq("hi [CQ:at,qq=123] &amp; [CQ:image,file=a&#44;b.jpg,summary=&#91;动画表情&#93;]") == [
+        {"type": "text", "data": {"text": "hi "}},
+        {"type": "at", "data": {"qq": "123"}},
+        {"type": "text", "data": {"text": " & "}},
+        {"type": "image", "data": {"file": "a,b.jpg", "summary": "[动画表情]"}},
+    ]
+    assert parse_cq("[CQ:face]") == [{"type": "face", "data": {}}]
+    assert parse_cq("") == []
+
+
+def test_segments_collapse_to_placeholders():
+    store = ContextStore()
+    event = message(1, 1, "[CQ:face,id=1][CQ:image,file=x.jpg]  看   这个 [CQ:dice] [CQ:unknown,a=1] [CQ:at,qq=all]")
+    assert store.render_message(event) == "[表情][图片] 看 这个 [骰子] [unknown] @全体成员"
+    segments = {**event, "message": [{"type": "image", "data": {"summary": "[动画表情]"}}, {"type": "record", "data": {}}]}
+    assert store.render_message(segments) == "[动画表情][语音]"
+
+
+def test_mentions_and_replies_resolve_nicknames():
+    store = ContextStore()
+    store.add_message(message(1, 1, "大家好", nickname="zhangsan", card="张三"))
+    store.add_message(message(2, 2, "[CQ:reply,id=1][CQ:at,qq=1] 你好", nickname="李四"))
+    lines = store.get_context(group_id=GROUP).splitlines()
+    assert lines[0].endswith("] 张三(1): 大家好")
+    assert lines[1].endswith("] 李四(2): [回复 张三] @张三 你好")
+    # 群名片只在本群生效，其它群回退到昵称
+    assert store.nickname(GROUP, 1) == "张三"
+    assert store.nickname(200, 1) == "zhangsan"
+    assert store.nickname(200, 3) == "3"
+
+
+def test_trim_and_tail_respect_the_token_budget():
+    store = ContextStore(max_tokens=60, max_messages=100)
+    for index in range(20):
+        store.add_message(message(index, 1, f"第{index}条消息"))
+    conversation = store.get(f"g{GROUP}")
+    assert conversation is not None
+    assert conversation.tokens <= 60
+    assert conversation.tokens == sum(line.tokens for line in conversation.lines)
+    assert conversation.rendered == "\n".join(line.text for line in conversation.lines)
+    assert conversation.rendered.endswith("第19条消息")
+    tail = store.get_context(group_id=GROUP, max_tokens=20)
+    assert tail and estimate_tokens(tail) <= 20 + tail.count("\n")
+    assert tail.endswith("第19条消息") and len(tail.splitlines()) < len(conversation.lines)
+    # 预算不足一行时仍返回最近一行
+    assert store.get_context(group_id=GROUP, max_tokens=1) == conversation.lines[-1].text
+    store.reconfigure(max_tokens=1000, max_messages=2)
+    assert len(conversation.lines) == 2
+
+
+def test_recall_removes_the_line():
+    store = ContextStore()
+    for index in range(3):
+        store.add_message(message(index, 1, f"消息{index}"))
+    recall = {"post_type": "notice", "notice_type": "group_recall", "group_id": GROUP, "message_id": 1}
+    asyncio.run(store._on_recall(recall))
+    rendered = store.get_context(group_id=GROUP)
+    assert "消息1" not in rendered and rendered.count("\n") == 1
+    assert store.get(f"g{GROUP}").find(1) is None
+
+
+def test_empty_events_do_not_create_conversations():
+    store = ContextStore()
+    assert not store.add_message(message(1, 1, "   "))
+    assert f"g{GROUP}" not in store and len(store) == 0
+    assert store.add_message(message(2, 1, "你好"))
+    assert len(store) == 1
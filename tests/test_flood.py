@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any
+
+from aivk_qq.bot.flood import FloodGuard, hamming, simhash
+
+GROUP = 1000
+
+
+class Recorder:
+    """记录处置动作的假 NapCat，fail 中的动作返回失败"""
+
+    def __init__(self, fail: set[str] | None = None) -> None:
+        self.fail = fail or set()
+        self.sent: list[tuple[str, dict[str, Any]]] = []
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        self.sent.append((action, params or {}))
+        if action in self.fail:
+            return {"status": "failed", "retcode": 102, "data": None}
+        return {"status": "ok", "retcode": 0, "data": None}
+
+
+def message(user_id: int, message_id: int, text: str = "hello") -> dict[str, Any]:
+    return {
+        "post_type": "message",
+        "message_type": "group",
+        "group_id": GROUP,
+        "user_id": user_id,
+        "self_id": 1,
+        "message_id": message_id,
+        "raw_message": f"{text} {message_id}",
+        "sender": {"role": "member"},
+    }
+
+
+def test_near_duplicates_have_close_simhash():
+    assert hamming(simhash("快来加群 123456"), simhash("快来加群!!! 654321")) <= 3
+    assert hamming(simhash("今天天气不错"), simhash("明天记得交作业")) > 3
+
+
+def test_recall_overflow_never_drops_the_ban():
+    guard = FloodGuard(max_messages=1, max_duplicates=100, max_pending=2)
+    results = [guard.allow(message(7, index)) for index in range(4)]
+    assert results == [True, False, False, False]
+    assert [params["user_id"] for params in guard._bans] == [7]
+    assert [params["message_id"] for params in guard._recalls] == [2, 3]
+    assert guard.dropped == 1
+
+    async def run() -> Recorder:
+        recorder = Recorder()
+        guard.limiter.rate = guard.limiter.burst = 1000.0
+        guard.start(recorder)
+        await asyncio.sleep(0.05)
+        await guard.stop()
+        return recorder
+
+    sent = asyncio.run(run()).sent
+    assert sent[0] == ("set_group_ban", {"group_id": GROUP, "user_id": 7, "duration": 300})
+    assert [action for action, _ in sent[1:]] == ["delete_msg", "delete_msg"]
+
+
+def test_failed_ban_is_retried_on_next_flood_message():
+    guard = FloodGuard(max_messages=1, max_duplicates=100, recall=False, enforce_rate=1000.0)
+
+    async def run() -> Recorder:
+        recorder = Recorder(fail={"set_group_ban"})
+        guard.start(recorder)
+        guard.allow(message(7, 1))
+        guard.allow(message(7, 2))
+        await asyncio.sleep(0.05)
+        recorder.fail.clear()
+        guard.allow(message(7, 3))
+        await asyncio.sleep(0.05)
+        guard.allow(message(7, 4))
+        await asyncio.sleep(0.05)
+        await guard.stop()
+        return recorder
+
+    sent = asyncio.run(run()).sent
+    # 第一次禁言失败后重新禁言，成功后禁言期内不再重复
+    assert [action for action, _ in sent] == ["set_group_ban", "set_group_ban"]
+
+
+def test_admins_are_blocked_but_not_punished():
+    guard = FloodGuard(max_messages=1, max_duplicates=100)
+    admin = [{**message(8, index), "sender": {"role": "admin"}} for index in range(3)]
+    assert [guard.allow(event) for event in admin] == [True, False, False]
+    assert not guard._bans and not guard._recalls
+    assert guard.blocked == 2
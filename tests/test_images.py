@@ -0,0 +1,64 @@
+import asyncio
+import base64
+from typing import Any
+
+import pytest
+
+from aivk_qq.bot.images import ImageError, ImagePipeline
+
+PNG = "base64://" + base64.b64encode(b"\x89PNG fake image").decode()
+
+
+class SlowOcr:
+    """OCR 调用需要一段时间的假 NapCat"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"status": "ok", "retcode": 0, "data": [{"text": "你好"}]}
+
+
+def test_cancelled_waiter_does_not_cancel_coalesced_ocr():
+    async def run():
+        caller = SlowOcr()
+        pipeline = ImagePipeline(caller)
+        first = asyncio.create_task(pipeline.ocr(PNG))
+        second = asyncio.create_task(pipeline.ocr(PNG))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        await pipeline.close()
+        return caller.calls, result
+
+    calls, result = asyncio.run(run())
+    assert calls == 1
+    assert result.error is None and result.text == "你好"
+
+
+@pytest.mark.parametrize(
+    "image",
+    [
+        "/etc/passwd",
+        "file:///etc/passwd",
+        "../secret.png",
+        "http://127.0.0.1:8080/a.png",
+        "http://169.254.169.254/latest/meta-data",
+        "http://[::1]/a.png",
+        "ftp://example.com/a.png",
+    ],
+)
+def test_local_and_private_references_are_rejected(image: str):
+    async def run():
+        caller = SlowOcr()
+        pipeline = ImagePipeline(caller)
+        try:
+            with pytest.raises(ImageError):
+                await pipeline.content_key(image)
+        finally:
+            await pipeline.close()
+        return caller.calls
+
+    assert asyncio.run(run()) == 0
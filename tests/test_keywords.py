@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any
+
+from aivk_qq.bot.keywords import Automaton, KeywordEngine
+
+RULES = [
+    {"keyword": "你好", "action": "reply", "reply": "你好呀"},
+    {"keyword": "广告", "action": "recall"},
+    {"keyword": "违禁词", "action": "ban", "duration": 600, "groups": [100]},
+]
+
+
+def message(text: str, group_id: int | None = 100, **extra: Any) -> dict[str, Any]:
+    event: dict[str, Any] = {"post_type": "message", "raw_message": text, "message_id": 5, "user_id": 7, **extra}
+    if group_id is None:
+        event["message_type"] = "private"
+    else:
+        event.update(message_type="group", group_id=group_id)
+    return event
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = Automaton(["he", "she", "his", "hers"])
+    assert automaton.search("ushers") == {0, 1, 3}
+    assert automaton.search("AHIS") == {2}
+    assert automaton.search("nothing") == set()
+    assert automaton.size == 4
+    assert Automaton(()).search("abc") == set()
+    assert Automaton(["ab", "abc"]).states == 4
+
+
+def test_match_respects_groups_and_rule_order():
+    engine = KeywordEngine(RULES)
+    assert [rule.keyword for rule in engine.match("广告 你好", 100)] == ["你好", "广告"]
+    assert [rule.keyword for rule in engine.match("违禁词", 100)] == ["违禁词"]
+    assert engine.match("违禁词", 200) == []
+    assert engine.match("违禁词") == []
+
+
+def test_reply_action():
+    engine = KeywordEngine(RULES)
+    (action,) = engine.actions_for(message("你好啊"))
+    assert action.action == "send_group_msg"
+    assert action.params["message"][1] == {"type": "text", "data": {"text": "你好呀"}}
+    (action,) = engine.actions_for(message("你好", group_id=None))
+    assert action.action == "send_private_msg" and action.params["user_id"] == 7
+    # 补拉的历史消息不回复
+    assert engine.actions_for(message("你好", backfilled=True)) == []
+    assert engine.matched == 3
+
+
+def test_moderation_suppresses_reply():
+    engine = KeywordEngine(RULES)
+    actions = engine.actions_for(message("你好 广告 违禁词"))
+    assert [action.action for action in actions] == ["delete_msg", "set_group_ban"]
+    assert actions[0].params == {"message_id": 5}
+    assert actions[1].params == {"group_id": 100, "user_id": 7, "duration": 600}
+    # 私聊不禁言
+    assert [action.action for action in engine.actions_for(message("广告", group_id=None))] == ["delete_msg"]
+    assert [action.action for action in engine.actions_for(message("广告", backfilled=True))] == ["delete_msg"]
+    quiet = KeywordEngine(RULES, moderate_backfilled=False)
+    assert quiet.actions_for(message("广告", backfilled=True)) == []
+
+
+def test_rebuild_swaps_rules():
+    engine = KeywordEngine(RULES)
+
+    async def run() -> tuple[bool, bool]:
+        changed = await engine.rebuild([{"keyword": "再见", "action": "recall"}])
+        return changed, await engine.rebuild([{"keyword": "再见", "action": "recall"}])
+
+    assert asyncio.run(run()) == (True, False)
+    assert engine.match("你好") == []
+    assert engine.stats()["rules"] == 1
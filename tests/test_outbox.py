@@ -0,0 +1,123 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from aivk_qq.bot.client import ActionError, ActionNotSent, ActionQueued
+from aivk_qq.bot.outbox import Outbox
+
+
+class Flaky:
+    """按顺序抛出给定异常、之后返回成功的假 NapCat"""
+
+    def __init__(self, *errors: ActionError) -> None:
+        self.errors = list(errors)
+        self.calls: list[str] = []
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        self.calls.append(action)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"status": "ok", "retcode": 0, "data": None}
+
+
+def run(caller: Flaky, directory: Path) -> Outbox:
+    async def scenario() -> Outbox:
+        outbox = Outbox(caller, directory, commit_interval=0.001, retry_interval=0.01)
+        await outbox.open()
+        with pytest.raises(ActionError):
+            await outbox.execute("send_group_msg", {"group_id": 1, "message": "hi"})
+        await asyncio.sleep(0.05)
+        await outbox.close()
+        return outbox
+
+    return asyncio.run(scenario())
+
+
+def test_unknown_delivery_is_not_resent(tmp_path: Path):
+    caller = Flaky(ActionError("send_group_msg 超时"))
+    outbox = run(caller, tmp_path)
+    assert caller.calls == ["send_group_msg"]
+    assert outbox.pending == 0
+    assert outbox.unknown == 1
+
+
+def test_unsent_action_is_queued_and_retried(tmp_path: Path):
+    caller = Flaky(ActionNotSent("未连接"))
+
+    async def scenario() -> Outbox:
+        outbox = Outbox(caller, tmp_path, commit_interval=0.001, retry_interval=0.01)
+        await outbox.open()
+        # 已经落盘、稍后补发：调用方收到的不是"可以安全重发"的 ActionNotSent
+        with pytest.raises(ActionQueued):
+            await outbox.execute("send_group_msg", {"group_id": 1, "message": "hi"})
+        await asyncio.sleep(0.05)
+        await outbox.close()
+        return outbox
+
+    outbox = asyncio.run(scenario())
+    assert caller.calls == ["send_group_msg", "send_group_msg"]
+    assert outbox.pending == 0
+
+
+def test_unknown_delivery_is_not_replayed_after_restart(tmp_path: Path):
+    run(Flaky(ActionError("连接已断开")), tmp_path)
+    caller = Flaky()
+
+    async def reopen() -> int:
+        outbox = Outbox(caller, tmp_path)
+        replayed = await outbox.open()
+        await outbox.close()
+        return replayed
+
+    assert asyncio.run(reopen()) == 0
+    assert caller.calls == []
+
+
+def test_idempotency_key_is_sent_once_across_restarts(tmp_path: Path):
+    caller = Flaky()
+
+    async def scenario() -> list[dict[str, Any]]:
+        responses = []
+        for _ in range(2):
+            outbox = Outbox(caller, tmp_path, commit_interval=0.001)
+            await outbox.open()
+            for _ in range(2):
+                responses.append(await outbox.execute("send_group_msg", {"group_id": 1, "message": "hi"}, key="reply:9"))
+            await outbox.close()
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert caller.calls == ["send_group_msg"]
+    assert [response.get("deduplicated", False) for response in responses] == [False, True, True, True]
+    assert all(response["status"] == "ok" for response in responses)
+
+
+def test_log_write_failure_drops_entry_and_reports_not_sent(tmp_path: Path, caplog: pytest.LogCaptureFixture):
+    caller = Flaky()
+
+    async def scenario() -> Outbox:
+        outbox = Outbox(caller, tmp_path, commit_interval=0.001, retry_interval=0.01)
+        await outbox.open()
+        write = outbox._write_batch
+
+        def broken(data: bytes) -> None:
+            raise OSError(28, "No space left on device")
+
+        outbox._write_batch = broken  # type: ignore[method-assign]
+        with pytest.raises(ActionNotSent) as info:
+            await outbox.execute("send_group_msg", {"group_id": 1, "message": "hi"}, key="reply:1")
+        assert not isinstance(info.value, ActionQueued)
+        outbox._write_batch = write  # type: ignore[method-assign]
+        await asyncio.sleep(0.05)
+        # 没有发出的 key 可以重发
+        await outbox.execute("send_group_msg", {"group_id": 1, "message": "hi"}, key="reply:1")
+        await outbox.close()
+        return outbox
+
+    with caplog.at_level("ERROR", logger="aivk.qq.bot.outbox"):
+        outbox = asyncio.run(scenario())
+    assert caller.calls == ["send_group_msg"]
+    assert outbox.pending == 0
+    assert any("写入日志失败" in record.message for record in caplog.records)
@@ -0,0 +1,52 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from aivk_qq.bot import plugins, trace
+from aivk_qq.bot.bus import EventBus
+from aivk_qq.bot.trace import Trace
+
+PLUGIN = '''
+import asyncio
+
+from aivk_qq.bot import trace
+
+PLUGIN = {"commands": ["/bg"]}
+seen = []
+torn_down = []
+
+
+def setup(bus):
+    async def background():
+        seen.append(trace.current())
+
+    asyncio.get_running_loop().create_task(background())
+
+
+def teardown():
+    torn_down.append(True)
+'''
+
+
+def test_plugin_setup_does_not_inherit_trace_and_teardown_runs_on_close(tmp_path: Path, monkeypatch):
+    (tmp_path / "bg.py").write_text(PLUGIN, encoding="utf-8")
+    monkeypatch.setattr(plugins, "default_plugin_dir", lambda: tmp_path)
+    monkeypatch.setattr(plugins.importlib.metadata, "entry_points", lambda group: [])
+
+    async def run() -> tuple[list, list]:
+        bus = EventBus()
+        plugins.setup(bus)
+        # 模拟一次处于追踪中的分发触发了插件加载
+        trace._trace.set(Trace("t"))
+        await bus.dispatch({"post_type": "message", "raw_message": "/bg"})
+        await asyncio.sleep(0)
+        module = sys.modules[f"{plugins.MODULE_PREFIX}_bg"]
+        stats = bus.metrics()["plugins"]["bg"]
+        assert stats["loaded"] and stats["loads"] == 1 and stats["events"] == 1
+        assert stats["load_ms"] is not None
+        await bus.aclose()
+        return module.seen, module.torn_down
+
+    seen, torn_down = asyncio.run(run())
+    assert seen == [None]
+    assert torn_down == [True]
@@ -0,0 +1,21 @@
+import asyncio
+import socket
+
+from aivk_qq.bot.runtime import Runtime
+
+
+def test_metrics_bind_failure_is_not_fatal():
+    async def run() -> tuple[bool, bool]:
+        with socket.socket() as taken:
+            taken.bind(("127.0.0.1", 0))
+            taken.listen()
+            port = taken.getsockname()[1]
+            runtime = Runtime()
+            served = await runtime.serve_metrics("127.0.0.1", port)
+            await runtime.close_metrics()
+        free = Runtime()
+        ok = await free.serve_metrics("127.0.0.1", 0)
+        await free.close_metrics()
+        return served, ok
+
+    assert asyncio.run(run()) == (False, True)
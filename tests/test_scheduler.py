@@ -0,0 +1,73 @@
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from aivk_qq.bot.scheduler import Job, JobStore
+
+
+def same_stamp_write(path: Path, data: str) -> None:
+    """写入同样大小的内容并恢复 mtime，模拟轮询无法察觉的修改"""
+    stat = path.stat()
+    path.write_text(data, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def test_record_keeps_jobs_added_by_another_process(tmp_path: Path):
+    path = tmp_path / "jobs.json"
+    bot = JobStore(path)
+    bot.put(Job("daily", "set_group_sign", {"group_id": 1}, cron="0 8 * * *"))
+    mcp = JobStore(path)
+    mcp.put(Job("remind", "send_group_msg", {"group_id": 1, "message": "hi"}, at=time.time() + 60))
+
+    bot.record("daily", time.time(), "ok")
+
+    saved = {item["id"]: item for item in json.loads(path.read_text(encoding="utf-8"))}
+    assert set(saved) == {"daily", "remind"}
+    assert saved["daily"]["runs"] == 1
+    # 调度器随后轮询时能发现新任务
+    assert bot.reload()
+    assert bot.get("remind") is not None
+
+
+def test_remove_does_not_resurrect_removed_jobs(tmp_path: Path):
+    path = tmp_path / "jobs.json"
+    mcp = JobStore(path)
+    mcp.put(Job("a", "send_like", {"user_id": 1}, cron="@daily"))
+    mcp.put(Job("b", "send_like", {"user_id": 2}, cron="@daily"))
+    bot = JobStore(path)
+    assert mcp.remove("a")
+    bot.record("b", time.time(), "ok")
+    assert [item["id"] for item in json.loads(path.read_text(encoding="utf-8"))] == ["b"]
+
+
+def test_update_rereads_file_even_when_stamp_is_unchanged(tmp_path: Path):
+    path = tmp_path / "jobs.json"
+    store = JobStore(path)
+    store.put(Job("a", "send_like", {"user_id": 1}, cron="@daily"))
+    same_stamp_write(path, path.read_text(encoding="utf-8").replace('"send_like"', '"send_poke"'))
+    store.record("a", time.time(), "ok")
+    assert json.loads(path.read_text(encoding="utf-8"))[0]["action"] == "send_poke"
+
+
+def test_hand_edited_jobs_are_coerced_or_skipped(tmp_path: Path):
+    path = tmp_path / "jobs.json"
+    path.write_text(
+        json.dumps([
+            {"id": "iso", "action": "send_group_msg", "params": {"group_id": 1}, "at": "2026-12-01T08:00"},
+            {"id": "text", "action": "send_like", "at": "1767225600"},
+            {"id": "bad-cron", "action": "send_like", "cron": 8},
+            {"id": "bad-params", "action": "send_like", "params": "x", "cron": "@daily"},
+            {"id": "bad-at", "action": "send_like", "at": "tomorrow"},
+            {"id": "bad-flag", "action": "send_like", "cron": "@daily", "enabled": "yes"},
+            "not a job",
+        ]),
+        encoding="utf-8",
+    )
+    store = JobStore(path)
+    assert set(store.jobs) == {"iso", "text"}
+    assert store.jobs["iso"].at == datetime.fromisoformat("2026-12-01T08:00").timestamp()
+    assert store.jobs["text"].at == 1767225600.0
+    assert store.jobs["text"].params == {}
+    assert store.jobs["iso"].next_run(0) == store.jobs["iso"].at
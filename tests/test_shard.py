@@ -0,0 +1,87 @@
+import asyncio
+import os
+import queue
+import time
+from typing import Any
+
+import pytest
+
+from aivk_qq.bot.bus import EventBus
+from aivk_qq.bot.client import ActionError, ActionNotSent
+from aivk_qq.bot.shard import ShardCaller, ShardRouter
+
+
+def setup(bus: EventBus) -> None:
+    """工作进程的处理器入口：收到 crash 时进程直接退出，其余消息回复 pong"""
+
+    @bus.on_message()
+    async def handle(event: dict[str, Any]) -> None:
+        if event.get("raw_message") == "crash":
+            os._exit(3)
+        assert bus.caller is not None
+        await bus.caller.execute("send_private_msg", {"user_id": event["user_id"], "message": "pong"})
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.sent: list[tuple[str, dict[str, Any]]] = []
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        self.sent.append((action, params or {}))
+        return {"status": "ok", "retcode": 0, "data": None}
+
+
+def message(text: str) -> dict[str, Any]:
+    return {"post_type": "message", "message_type": "private", "user_id": 7, "raw_message": text}
+
+
+def test_shard_caller_times_out_without_response():
+    async def run() -> None:
+        caller = ShardCaller(0, queue.Queue(), queue.Queue(), grace=0.0)
+        caller.start()
+        started = time.monotonic()
+        with pytest.raises(ActionError):
+            await caller.execute("send_private_msg", {"user_id": 1}, timeout=0.2)
+        assert time.monotonic() - started < 2
+        await caller.stop()
+
+    asyncio.run(run())
+
+
+def test_shard_caller_fails_fast_when_request_queue_is_full():
+    async def run() -> int:
+        requests: queue.Queue = queue.Queue(maxsize=1)
+        caller = ShardCaller(0, requests, queue.Queue(), grace=0.0)
+        caller.start()
+        first = asyncio.create_task(caller.execute("send_like", {"user_id": 1}, timeout=0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(ActionNotSent):
+            await caller.execute("send_like", {"user_id": 2})
+        with pytest.raises(ActionError):
+            await first
+        await caller.stop()
+        return caller.dropped
+
+    assert asyncio.run(run()) == 1
+
+
+def test_router_restarts_dead_worker():
+    async def run() -> tuple[ShardRouter, Recorder]:
+        recorder = Recorder()
+        router = ShardRouter("test_shard:setup", 1, recorder, check_interval=0.1)
+        router.start()
+        try:
+            await router.route(message("crash"))
+            deadline = time.monotonic() + 30
+            while router.restarts[0] == 0 and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            await router.route(message("ping"))
+            while not recorder.sent and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+        finally:
+            await router.stop(timeout=10)
+        return router, recorder
+
+    router, recorder = asyncio.run(run())
+    assert router.restarts == [1]
+    assert recorder.sent == [("send_private_msg", {"user_id": 7, "message": "pong"})]
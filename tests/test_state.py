@@ -0,0 +1,186 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from aivk_qq.bot import state
+from aivk_qq.bot.ratelimit import TokenBucket
+from aivk_qq.bot.state import (
+    MemoryBackend,
+    RedisBackend,
+    SharedTokenBucket,
+    SQLiteBackend,
+    StateBackend,
+    StateError,
+    shared_limiter,
+)
+
+
+class FakeRedis:
+    """
+    最小的 RESP2 服务端，支持 GET / SET PX NX / DEL 与 state.py 中的两段 EVAL 脚本
+
+    脚本用 Python 实现同样的语义，足以验证客户端的编码、流水线与结果解析。
+    """
+
+    def __init__(self) -> None:
+        self.data: dict[bytes, tuple[float, Any]] = {}
+        self.commands: list[list[bytes]] = []
+        self.server: asyncio.Server | None = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        assert self.server is not None
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _get(self, key: bytes) -> Any:
+        item = self.data.get(key)
+        if item is None or (item[0] and item[0] < time.time()):
+            self.data.pop(key, None)
+            return None
+        return item[1]
+
+    @staticmethod
+    async def _read(reader: asyncio.StreamReader) -> list[bytes] | None:
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = []
+        for _ in range(int(line[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            parts.append((await reader.readexactly(size + 2))[:-2])
+        return parts
+
+    @staticmethod
+    def _bulk(value: bytes | None) -> bytes:
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _handle(self, command: list[bytes]) -> bytes:
+        name = command[0].upper()
+        now = time.time()
+        if name == b"GET":
+            return self._bulk(self._get(command[1]))
+        if name == b"SET":
+            key, value, options = command[1], command[2], [part.upper() for part in command[3:]]
+            if b"NX" in options and self._get(key) is not None:
+                return b"$-1\r\n"
+            expires = now + int(options[options.index(b"PX") + 1]) / 1000 if b"PX" in options else 0.0
+            self.data[key] = (expires, value)
+            return b"+OK\r\n"
+        if name == b"DEL":
+            return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in command[1:])
+        if name == b"EVAL":
+            script, key, args = command[1].decode(), command[3], command[4:]
+            if "INCRBY" in script:
+                current = self._get(key)
+                expires = self.data[key][0] if current is not None else 0.0
+                if current is None and int(args[1]) > 0:
+                    expires = now + int(args[1]) / 1000
+                value = int(current or 0) + int(args[0])
+                self.data[key] = (expires, str(value).encode())
+                return b":%d\r\n" % value
+            rate, burst, n = (float(arg) for arg in args)
+            tokens, ts = self._get(key) or (burst, now)
+            tokens, wait = state._bucket_step(tokens, ts, now, rate, burst, n)
+            self.data[key] = (now + burst / rate + 1, (tokens, now))
+            return self._bulk(repr(wait).encode())
+        return b"-ERR unknown command\r\n"
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while (command := await self._read(reader)) is not None:
+                self.commands.append(command)
+                writer.write(self._handle(command))
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def exercise(backend: StateBackend) -> None:
+    assert await backend.set("seen:1", True, ttl=60, nx=True) is True
+    assert await backend.set("seen:1", True, ttl=60, nx=True) is False
+    assert await backend.get("seen:1") is True
+    assert await backend.incr("count", ttl=60) == 1
+    assert await backend.incr("count", 5) == 6
+    # 突发 2：前两次立即取得，第三次需要等待 1/rate 秒左右
+    waits = [await backend.take("bucket", 1.0, 2.0) for _ in range(3)]
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.9 < waits[2] <= 1.0
+    first, count = await backend.batch().set("seen:2", 1, nx=True).incr("count").execute()
+    assert (first, count) == (True, 7)
+    assert await backend.delete("seen:1", "seen:2", "missing") == 2
+    assert await backend.get("seen:1") is None
+    await backend.close()
+
+
+def test_memory_backend():
+    asyncio.run(exercise(MemoryBackend()))
+
+
+def test_sqlite_backend(tmp_path: Path):
+    asyncio.run(exercise(SQLiteBackend(tmp_path / "state.db")))
+
+
+def test_sqlite_take_is_shared_between_connections(tmp_path: Path):
+    async def run() -> list[float]:
+        first, second = SQLiteBackend(tmp_path / "state.db"), SQLiteBackend(tmp_path / "state.db")
+        try:
+            return [await backend.take("rate:1", 1.0, 2.0) for backend in (first, second, first)]
+        finally:
+            await first.close()
+            await second.close()
+
+    waits = asyncio.run(run())
+    assert waits[:2] == [0.0, 0.0] and waits[2] > 0
+
+
+def test_redis_backend_over_resp():
+    async def run() -> FakeRedis:
+        server = FakeRedis()
+        port = await server.start()
+        try:
+            await exercise(RedisBackend("127.0.0.1", port, prefix="t:"))
+        finally:
+            await server.stop()
+        return server
+
+    server = asyncio.run(run())
+    assert [b"SET", b"t:seen:1", b"true", b"PX", b"60000", b"NX"] in server.commands
+
+
+def test_shared_bucket_falls_back_to_local_when_backend_is_down(caplog: pytest.LogCaptureFixture):
+    async def run() -> tuple[SharedTokenBucket, list[float]]:
+        # 没有服务在监听的端口
+        backend = RedisBackend("127.0.0.1", 1, timeout=0.5)
+        bucket = SharedTokenBucket(backend, "rate:1", 100.0, 2.0)
+        waits = [await bucket.acquire() for _ in range(3)]
+        await backend.close()
+        return bucket, waits
+
+    with caplog.at_level("WARNING", logger="aivk.qq.bot.state"):
+        bucket, waits = asyncio.run(run())
+    assert bucket.degraded
+    assert waits[:2] == [0.0, 0.0] and waits[2] > 0
+    assert len([record for record in caplog.records if "不可用" in record.message]) == 1
+
+
+def test_shared_limiter_picks_local_bucket_for_memory_backend(tmp_path: Path):
+    assert isinstance(shared_limiter(None, "rate:1", 1.0), TokenBucket)
+    assert isinstance(shared_limiter(MemoryBackend(), "rate:1", 1.0), TokenBucket)
+    backend = SQLiteBackend(tmp_path / "state.db")
+    assert isinstance(shared_limiter(backend, "rate:1", 1.0), SharedTokenBucket)
+    asyncio.run(backend.close())
+
+
+def test_state_error_is_raised_by_unreachable_backend():
+    async def run() -> None:
+        with pytest.raises(StateError):
+            await RedisBackend("127.0.0.1", 1, timeout=0.5).get("x")
+
+    asyncio.run(run())
@@ -0,0 +1,99 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from aivk_qq.bot.stream import StreamRegistry, TextStream, split_sentences, stream_reply
+
+
+class Recorder:
+    """记录发送的假 NapCat，fail 为 True 时发送消息失败"""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.sent: list[tuple[str, dict[str, Any]]] = []
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        if self.fail and action.startswith("send_"):
+            raise RuntimeError("发送失败")
+        self.sent.append((action, params or {}))
+        return {"status": "ok", "retcode": 0, "data": None}
+
+
+async def pieces(*texts: str) -> AsyncIterator[str]:
+    for text in texts:
+        yield text
+
+
+def test_split_sentences():
+    assert split_sentences("你好。今天天气不错！还有", 1, 100) == (["你好。", "今天天气不错！"], "还有")
+    # 太短的句子与下一句合并
+    assert split_sentences("好。好的。", 4, 100) == (["好。好的。"], "")
+    assert split_sentences("a" * 25, 1, 10) == (["a" * 10, "a" * 10], "a" * 5)
+
+
+def test_overflow_is_packed_into_a_forward_message():
+    recorder = Recorder()
+    text = "".join(f"第{index}句话写得足够长一些。" for index in range(8))
+    result = asyncio.run(
+        stream_reply(recorder, pieces(text), group_id=1, min_chars=5, interval=0, max_messages=3, self_id=9)
+    )
+    actions = [action for action, _ in recorder.sent]
+    assert actions == ["send_group_msg", "send_group_msg", "send_group_forward_msg"]
+    assert result.forwarded and result.messages == 3
+    assert result.chars == len(text)
+
+
+def test_private_reply_sends_typing_status():
+    recorder = Recorder()
+    asyncio.run(stream_reply(recorder, pieces("你好。"), user_id=2, min_chars=1, interval=0))
+    assert recorder.sent[0] == ("set_input_status", {"user_id": 2, "event_type": 1})
+    assert recorder.sent[-1] == ("send_private_msg", {"user_id": 2, "message": "你好。"})
+
+
+def test_finished_stream_keeps_its_result_until_end():
+    async def run() -> None:
+        registry = StreamRegistry()
+        recorder = Recorder()
+        stream = TextStream(idle_timeout=0.05)
+        stream_id = registry.open(stream, stream_reply(recorder, stream, group_id=1, min_chars=1, interval=0))
+        registry.push(stream_id, "你好。")
+        await asyncio.sleep(0.2)
+        # 空闲超时后不能再推送，但结果仍然可以取回
+        with pytest.raises(RuntimeError):
+            registry.push(stream_id, "还在吗")
+        result = await registry.end(stream_id)
+        assert result.messages == 1
+        with pytest.raises(KeyError):
+            await registry.end(stream_id)
+
+    asyncio.run(run())
+
+
+def test_send_error_is_returned_by_end():
+    async def run() -> None:
+        registry = StreamRegistry()
+        stream = TextStream()
+        stream_id = registry.open(stream, stream_reply(Recorder(fail=True), stream, group_id=1, min_chars=1))
+        registry.push(stream_id, "你好。")
+        await asyncio.sleep(0.05)
+        with pytest.raises(RuntimeError, match="发送失败"):
+            await registry.end(stream_id)
+        assert len(registry) == 0
+
+    asyncio.run(run())
+
+
+def test_streams_are_bounded_per_owner():
+    async def run() -> None:
+        registry = StreamRegistry(max_per_owner=1)
+        streams = [TextStream(), TextStream(), TextStream()]
+        first = registry.open(streams[0], stream_reply(Recorder(), streams[0], group_id=1), owner=1)
+        with pytest.raises(RuntimeError):
+            registry.open(streams[1], stream_reply(Recorder(), streams[1], group_id=1), owner=1)
+        other = registry.open(streams[2], stream_reply(Recorder(), streams[2], group_id=1), owner=2)
+        await registry.end(first)
+        await registry.end(other)
+
+    asyncio.run(run())
@@ -0,0 +1,31 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from aivk_qq.bot.trace import Tracer, read_traces
+
+
+def test_export_is_written_off_the_event_loop(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "aivk-qq.jsonl"
+    tracer = Tracer(1.0, path=path, flush_interval=0.0)
+    writers: list[threading.Thread] = []
+    write = Tracer._write
+
+    def record(self: Tracer, *args) -> None:
+        writers.append(threading.current_thread())
+        write(self, *args)
+
+    monkeypatch.setattr(Tracer, "_write", record)
+
+    async def run() -> None:
+        for index in range(5):
+            with tracer.root("dispatch", index=index):
+                pass
+        await tracer.aflush()
+
+    asyncio.run(run())
+    assert writers and threading.main_thread() not in writers
+    assert tracer.exported == 5
+    assert sorted(trace.root.attrs["index"] for trace in read_traces([path])) == list(range(5))
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from aivk_qq.bot.client import ActionError, ActionNotSent
+from aivk_qq.bot.unified import UnifiedClient
+
+
+class Transport:
+    """第一次调用抛出给定异常、之后返回成功的假传输"""
+
+    def __init__(self, error: ActionError | None = None) -> None:
+        self.error = error
+        self.connected = True
+        self.calls: list[str] = []
+
+    async def execute(self, action: str, params: dict[str, Any] | None = None, *, timeout: float | None = None):
+        self.calls.append(action)
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return {"status": "ok", "retcode": 0, "data": None}
+
+
+def send(error: ActionError, action: str = "send_group_msg") -> tuple[Transport, Transport, Any]:
+    ws, http = Transport(error), Transport()
+    client = UnifiedClient(http, ws, explore_every=0)  # type: ignore[arg-type]
+    # 让 WS 排在前面
+    client._stats["http"].latency = 1.0
+
+    async def call() -> Any:
+        return await client.execute(action, {"group_id": 1, "message": "hi"})
+
+    try:
+        result: Any = asyncio.run(call())
+    except ActionError as e:
+        result = e
+    return ws, http, result
+
+
+def test_send_fails_over_when_not_sent():
+    ws, http, result = send(ActionNotSent("未连接"))
+    assert ws.calls == ["send_group_msg"] and http.calls == ["send_group_msg"]
+    assert result["status"] == "ok"
+
+
+@pytest.mark.parametrize("error", [ActionError("超时"), ActionError("连接已断开")])
+@pytest.mark.parametrize("action", ["send_group_msg", "set_group_leave", "set_group_admin", "_send_group_notice"])
+def test_mutating_action_does_not_fail_over_when_delivery_unknown(error: ActionError, action: str):
+    ws, http, result = send(error, action=action)
+    assert ws.calls == [action] and http.calls == []
+    assert result is error
+
+
+def test_mutating_action_fails_over_when_not_sent():
+    ws, http, result = send(ActionNotSent("未连接"), action="set_group_leave")
+    assert http.calls == ["set_group_leave"]
+    assert result["status"] == "ok"
+
+
+@pytest.mark.parametrize("action", ["get_group_info", "can_send_image", "_get_group_notice", "fetch_custom_face"])
+def test_read_only_action_fails_over_on_any_transport_error(action: str):
+    ws, http, result = send(ActionError("连接已断开"), action=action)
+    assert http.calls == [action]
+    assert result["status"] == "ok"